@@ -0,0 +1,166 @@
+# calibrate_retrieval_gate.py
+"""
+Offline calibration of the retrieval score gate (graph/retrieval/score_gate.py).
+
+Every FAQ question in paste.txt is run through retrieval and the reranker,
+as the retrieve node does, so the gate is calibrated on the documents it
+will see; each kept document is labelled relevant or not:
+
+- labels=grader: by retrieval_grader, i.e. the LLM decision the gate replaces
+- labels=faq: by whether it is the FAQ entry the question came from (no LLM calls)
+
+The accept threshold is the lowest similarity at which the documents scoring
+at or above it are relevant with at least the target precision. The reject
+threshold is the highest similarity below which at most 1 - precision of the
+documents are relevant. The result is written to RETRIEVAL_GATE_PATH.
+
+Usage:
+    python calibrate_retrieval_gate.py [--labels grader|faq] [--precision 0.97]
+"""
+import argparse
+import json
+from datetime import datetime
+from typing import List, Tuple
+
+from dotenv import load_dotenv
+
+from graph.retrieval import retrieval_service, reranker
+from graph.retrieval.score_gate import RETRIEVAL_GATE_PATH
+
+load_dotenv()
+
+# (similarity, relevant) of one retrieved document
+Sample = Tuple[float, bool]
+
+
+def load_faq_pairs(path: str) -> List[Tuple[str, str]]:
+    """(soru, cevap) pairs from the FAQ JSON file"""
+    with open(path, "r", encoding="utf-8") as file:
+        data = json.load(file)
+
+    pairs = []
+    for items in data.values():
+        for item in items:
+            if item.get("soru"):
+                pairs.append((item["soru"], item.get("cevap", "")))
+    return pairs
+
+
+def collect_samples(pairs: List[Tuple[str, str]], labels: str) -> List[Sample]:
+    """Retrieve and rerank for every FAQ question and label each kept document"""
+    grader = None
+    if labels == "grader":
+        from graph.chains.retrieval_grader import retrieval_grader
+        grader = retrieval_grader
+
+    samples: List[Sample] = []
+    for number, (question, _) in enumerate(pairs, 1):
+        results = reranker.rerank(question, retrieval_service.retrieve_with_scores(question, k=reranker.candidates))
+
+        if grader is not None:
+            grades = grader.batch(
+                [{"question": question, "document": document.page_content} for document, _ in results],
+                config={"max_concurrency": 5}
+            )
+            relevant = [grade.binary_score.lower() == "yes" for grade in grades]
+        else:
+            relevant = [
+                document.metadata.get("question") == question or f"Soru: {question}" in document.page_content
+                for document, _ in results
+            ]
+
+        samples.extend((score, is_relevant) for (_, score), is_relevant in zip(results, relevant))
+        if number % 10 == 0:
+            print(f"📄 {number}/{len(pairs)} questions labelled")
+
+    return samples
+
+
+def choose_accept_threshold(samples: List[Sample], precision: float, min_support: int) -> float:
+    """Lowest score whose at-or-above set reaches the target precision (1.01 = accept nothing)"""
+    ordered = sorted(samples, reverse=True)
+    threshold = 1.01
+    relevant = 0
+    for count, (score, is_relevant) in enumerate(ordered, 1):
+        relevant += is_relevant
+        # Documents with equal scores always end up on the same side
+        if count < len(ordered) and ordered[count][0] == score:
+            continue
+        if count >= min_support and relevant / count >= precision:
+            threshold = score
+    return threshold
+
+
+def choose_reject_threshold(samples: List[Sample], precision: float, min_support: int) -> float:
+    """Highest score below which at most 1 - precision are relevant (-1.0 = reject nothing)"""
+    ordered = sorted(samples)
+    threshold = -1.0
+    relevant = 0
+    for count, (score, is_relevant) in enumerate(ordered, 1):
+        relevant += is_relevant
+        next_score = ordered[count][0] if count < len(ordered) else score + 1e-6
+        if next_score == score:
+            continue
+        if count >= min_support and relevant / count <= 1 - precision:
+            threshold = next_score
+    return threshold
+
+
+def report(samples: List[Sample], accept: float, reject: float) -> dict:
+    """How many documents the gate decides alone, and how often it agrees with the labels"""
+    accepted = [is_relevant for score, is_relevant in samples if score >= accept]
+    rejected = [is_relevant for score, is_relevant in samples if score < reject]
+    decided = len(accepted) + len(rejected)
+    agreed = sum(accepted) + (len(rejected) - sum(rejected))
+
+    return {
+        "samples": len(samples),
+        "relevant": sum(is_relevant for _, is_relevant in samples),
+        "auto_accepted": len(accepted),
+        "auto_rejected": len(rejected),
+        "auto_decided_ratio": round(decided / len(samples), 4) if samples else 0.0,
+        "auto_agreement": round(agreed / decided, 4) if decided else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate retrieval score gate thresholds")
+    parser.add_argument("--faq", default="paste.txt", help="FAQ JSON file with soru/cevap pairs")
+    parser.add_argument("--labels", choices=("grader", "faq"), default="grader")
+    parser.add_argument("--precision", type=float, default=0.97, help="Required agreement on each side")
+    parser.add_argument("--min-support", type=int, default=20, help="Minimum documents behind a threshold")
+    parser.add_argument("--output", default=RETRIEVAL_GATE_PATH)
+    args = parser.parse_args()
+
+    pairs = load_faq_pairs(args.faq)
+    print(f"📚 {len(pairs)} FAQ questions, labels from {args.labels}")
+
+    samples = collect_samples(pairs, args.labels)
+    accept = choose_accept_threshold(samples, args.precision, args.min_support)
+    reject = min(choose_reject_threshold(samples, args.precision, args.min_support), accept)
+    stats = report(samples, accept, reject)
+
+    calibration = {
+        "embedding_model": retrieval_service.embeddings.model,
+        "accept_similarity": round(accept, 4),
+        "reject_similarity": round(reject, 4),
+        "precision": args.precision,
+        "labels": args.labels,
+        "candidates": reranker.candidates,
+        "k": reranker.max_documents,
+        "questions": len(pairs),
+        **stats,
+        "calibrated_at": datetime.now().isoformat(),
+    }
+
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(calibration, file, ensure_ascii=False, indent=2)
+
+    print(f"✅ accept >= {accept:.4f}, reject < {reject:.4f}")
+    print(f"🚦 {stats['auto_decided_ratio']:.0%} of documents decided without the LLM "
+          f"(agreement {stats['auto_agreement']})")
+    print(f"💾 Saved calibration to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -17,6 +17,8 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from graph.graph import create_telecom_workflow
 from graph.state import GraphState
 from graph.memory.redis_client import redis_memory
+from graph.retrieval import retrieval_service, answer_cache
+from graph.streaming import stream_answer
 
 
 # Colors for console output
@@ -57,6 +59,9 @@ class TelecomChatConsole:
         else:
             print(f"{Colors.WARNING}⚠️  Redis not available - memory will not persist{Colors.ENDC}")
 
+        # Load the embedding model and open the vector store's pool up front
+        retrieval_service.warm_up()
+
     def print_banner(self):
         """Print welcome banner"""
         banner = f"""
@@ -162,6 +167,8 @@ class TelecomChatConsole:
             if phone_number != "Belirtilmedi":
                 user_context = redis_memory.get_user_context(phone_number)
 
+        cache_stats = answer_cache.stats()
+
         status = f"""
 {Colors.HEADER}{Colors.BOLD}📊 OTURUM DURUMU{Colors.ENDC}
 
@@ -176,6 +183,7 @@ class TelecomChatConsole:
 • Konuşma Geçmişi: {len(conversation_history)} mesaj
 • Telefon Numarası: {phone_number}
 • Kullanıcı Bağlamı: {len(user_context)} alan
+• Cevap Önbelleği: {cache_stats.get('hit', 0)} isabet, %{cache_stats['hit_rate'] * 100:.0f} oran
 
 {Colors.OKBLUE}Sistem Durumu:{Colors.ENDC}
 • AI Agent: ✅ Aktif
@@ -207,7 +215,7 @@ class TelecomChatConsole:
         }
 
     def process_user_input(self, user_input: str) -> str:
-        """Process user input through the AI workflow"""
+        """Process user input through the AI workflow, printing the answer as it streams"""
         try:
             # Create state
             initial_state = self.create_initial_state(user_input)
@@ -217,24 +225,47 @@ class TelecomChatConsole:
 
             # Run workflow
             start_time = time.time()
-            result = self.workflow.invoke(initial_state)
-            processing_time = time.time() - start_time
+            first_token_time = None
+            result = {}
+            response = 'Üzgünüm, bir yanıt oluşturamadım.'
+
+            for event in stream_answer(self.workflow, initial_state):
+                if event.kind == "token":
+                    if first_token_time is None:
+                        first_token_time = time.time() - start_time
+                        print(f"{Colors.OKGREEN}🤖 Agent: {Colors.ENDC}", end="")
+                    print(event.text, end="", flush=True)
+                elif event.kind == "restart":
+                    # The streamed answer was graded poorly and is being replaced
+                    print(f"\n{Colors.WARNING}🔄 Cevap iyileştiriliyor...{Colors.ENDC}")
+                    print(f"{Colors.OKGREEN}🤖 Agent: {Colors.ENDC}", end="")
+                else:
+                    result = event.state
+                    response = event.text or response
+                    if first_token_time is not None:
+                        print()
+                    if not event.shown:
+                        label = "🔄 Düzeltilmiş cevap" if first_token_time is not None else "🤖 Agent"
+                        print(f"{Colors.OKGREEN}{label}: {Colors.ENDC}{response}")
 
-            # Extract response
-            response = result.get('generation', 'Üzgünüm, bir yanıt oluşturamadım.')
+            processing_time = time.time() - start_time
+            print()
 
             # Show processing info in debug mode
             if os.getenv('DEBUG', '').lower() == 'true':
                 route = result.get('datasource', 'Unknown')
-                tools_used = result.get('user_context', {}).get('last_tools_used', [])
+                tools_used = (result.get('user_context') or {}).get('last_tools_used', [])
+                first_token = f"{first_token_time:.2f}s" if first_token_time is not None else "-"
                 print(
-                    f"{Colors.WARNING}[DEBUG] Route: {route}, Tools: {tools_used}, Time: {processing_time:.2f}s{Colors.ENDC}")
+                    f"{Colors.WARNING}[DEBUG] Route: {route}, Tools: {tools_used}, "
+                    f"First token: {first_token}, Time: {processing_time:.2f}s{Colors.ENDC}")
 
             return response
 
         except Exception as e:
             error_msg = f"Üzgünüm, bir hata oluştu: {str(e)}"
             print(f"{Colors.FAIL}❌ Error: {e}{Colors.ENDC}")
+            print(f"{Colors.OKGREEN}🤖 Agent: {Colors.ENDC}{error_msg}\n")
             return error_msg
 
     def handle_command(self, command: str) -> bool:
@@ -292,11 +323,8 @@ class TelecomChatConsole:
                 # Process user question
                 self.message_count += 1
 
-                # Get AI response
-                response = self.process_user_input(user_input)
-
-                # Display response
-                print(f"{Colors.OKGREEN}🤖 Agent: {Colors.ENDC}{response}\n")
+                # Get AI response, displayed while it is generated
+                self.process_user_input(user_input)
 
                 # Show conversation tips periodically
                 if self.message_count % 5 == 0:
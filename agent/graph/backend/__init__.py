@@ -0,0 +1,31 @@
+"""
+Telecom backend access layer used by the function calling tools
+"""
+
+from .client import (
+    telecom_api,
+    async_telecom_api,
+    TelecomAPIClient,
+    AsyncTelecomAPIClient,
+    BackendUnavailableError
+)
+from .health import BackendHealthMonitor
+from .resolver import (
+    user_resolver,
+    UserResolver,
+    canonical_identifier,
+    normalize_phone_number
+)
+
+__all__ = [
+    'telecom_api',
+    'async_telecom_api',
+    'TelecomAPIClient',
+    'AsyncTelecomAPIClient',
+    'BackendHealthMonitor',
+    'BackendUnavailableError',
+    'user_resolver',
+    'UserResolver',
+    'canonical_identifier',
+    'normalize_phone_number'
+]
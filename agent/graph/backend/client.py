@@ -0,0 +1,236 @@
+"""
+Pooled, keep-alive HTTP client for the telecom backend API.
+
+All telecom tools share one requests.Session so TCP connections to
+TELECOM_API_BASE_URL are reused across tool calls. Idempotent GETs are
+retried with jittered backoff, and a circuit breaker fails calls fast while
+the backend is known to be down (see graph.backend.health).
+
+AsyncTelecomAPIClient offers the same behaviour on httpx for the asyncio
+graph path, sharing the health monitor with the sync client; its blocking
+health probe runs in a worker thread (BackendHealthMonitor.ais_available).
+"""
+import asyncio
+import os
+import random
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+from graph.backend.health import BackendHealthMonitor
+
+load_dotenv()
+
+# Configuration
+TELECOM_API_BASE_URL = os.getenv("TELECOM_API_BASE_URL", "http://localhost:3000")
+API_TIMEOUT = int(os.getenv("API_TIMEOUT", "10"))
+API_CONNECT_TIMEOUT = float(os.getenv("API_CONNECT_TIMEOUT", "2"))
+API_POOL_MAXSIZE = int(os.getenv("API_POOL_MAXSIZE", "20"))
+API_GET_RETRIES = int(os.getenv("API_GET_RETRIES", "2"))
+API_RETRY_BACKOFF = float(os.getenv("API_RETRY_BACKOFF", "0.2"))
+API_RETRY_BACKOFF_MAX = float(os.getenv("API_RETRY_BACKOFF_MAX", "2"))
+
+# (connect, read) timeouts per logical endpoint
+ENDPOINT_TIMEOUTS: Dict[str, Tuple[float, float]] = {
+    "users.by_phone": (API_CONNECT_TIMEOUT, 3),
+    "users.by_customer_id": (API_CONNECT_TIMEOUT, 3),
+    "users.list": (API_CONNECT_TIMEOUT, API_TIMEOUT),
+    "users.update": (API_CONNECT_TIMEOUT, API_TIMEOUT),
+    "user_info.package": (API_CONNECT_TIMEOUT, 5),
+    "user_info.bills": (API_CONNECT_TIMEOUT, 5),
+    "user_info.tickets": (API_CONNECT_TIMEOUT, 5),
+    "packages.list": (API_CONNECT_TIMEOUT, 5),
+    "tickets.create": (API_CONNECT_TIMEOUT, API_TIMEOUT),
+    "health": (API_CONNECT_TIMEOUT, 2),
+}
+DEFAULT_TIMEOUT = (API_CONNECT_TIMEOUT, API_TIMEOUT)
+
+# Gateway-style statuses that are worth retrying for idempotent requests
+RETRYABLE_STATUSES = {502, 503, 504}
+
+
+class BackendUnavailableError(Exception):
+    """Raised without sending a request while the backend is known to be down"""
+
+
+class TelecomAPIClient:
+    """Shared session for every call the telecom tools make to the backend"""
+
+    def __init__(self,
+                 base_url: str = TELECOM_API_BASE_URL,
+                 pool_maxsize: int = API_POOL_MAXSIZE,
+                 get_retries: int = API_GET_RETRIES,
+                 health: Optional[BackendHealthMonitor] = None):
+        self.base_url = base_url.rstrip("/")
+        self.get_retries = get_retries
+        self.health = health or BackendHealthMonitor(probe=self.probe)
+
+        self.session = requests.Session()
+        # Retries are handled below so they can be limited to GETs
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_maxsize,
+            pool_block=True,
+            max_retries=0
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Connection": "keep-alive"})
+
+    def get(self, path: str, endpoint: str = "", **kwargs) -> requests.Response:
+        return self.request("GET", path, endpoint=endpoint, **kwargs)
+
+    def post(self, path: str, endpoint: str = "", **kwargs) -> requests.Response:
+        return self.request("POST", path, endpoint=endpoint, **kwargs)
+
+    def put(self, path: str, endpoint: str = "", **kwargs) -> requests.Response:
+        return self.request("PUT", path, endpoint=endpoint, **kwargs)
+
+    def request(self, method: str, path: str, endpoint: str = "", **kwargs: Any) -> requests.Response:
+        """
+        Send a request through the pooled session
+
+        Args:
+            method: HTTP method
+            path: Path below the base URL, e.g. '/api/v1/packages'
+            endpoint: Logical endpoint name used to pick the timeout
+            **kwargs: Passed through to requests (params, json, ...)
+
+        Returns:
+            The backend response (any status code)
+
+        Raises:
+            BackendUnavailableError: The backend is known to be down
+            requests.exceptions.RequestException: Network errors after retries
+        """
+        if not self.health.is_available():
+            raise BackendUnavailableError("Backend API is unavailable (circuit open)")
+
+        kwargs.setdefault("timeout", ENDPOINT_TIMEOUTS.get(endpoint, DEFAULT_TIMEOUT))
+        url = f"{self.base_url}{path}"
+        attempts = 1 + (self.get_retries if method == "GET" else 0)
+
+        for attempt in range(attempts):
+            is_last_attempt = attempt == attempts - 1
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if is_last_attempt:
+                    self.health.record_failure()
+                    raise
+                self._backoff(attempt)
+                continue
+
+            if response.status_code in RETRYABLE_STATUSES and not is_last_attempt:
+                response.close()
+                self._backoff(attempt)
+                continue
+
+            if response.status_code >= 500:
+                self.health.record_failure()
+            else:
+                self.health.record_success()
+            return response
+
+    def probe(self) -> bool:
+        """Active GET /health check, bypassing the circuit and retries"""
+        response = self.session.get(f"{self.base_url}/health", timeout=ENDPOINT_TIMEOUTS["health"])
+        return response.status_code == 200
+
+    @staticmethod
+    def _backoff(attempt: int) -> None:
+        """Sleep with full-jitter exponential backoff"""
+        time.sleep(_backoff_delay(attempt))
+
+
+class AsyncTelecomAPIClient:
+    """httpx.AsyncClient counterpart of TelecomAPIClient"""
+
+    def __init__(self,
+                 base_url: str = TELECOM_API_BASE_URL,
+                 pool_maxsize: int = API_POOL_MAXSIZE,
+                 get_retries: int = API_GET_RETRIES,
+                 health: Optional[BackendHealthMonitor] = None):
+        self.base_url = base_url.rstrip("/")
+        self.pool_maxsize = pool_maxsize
+        self.get_retries = get_retries
+        self.health = health or BackendHealthMonitor()
+        # httpx.AsyncClient is bound to the loop it first ran on
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                limits=httpx.Limits(
+                    max_connections=self.pool_maxsize,
+                    max_keepalive_connections=self.pool_maxsize
+                )
+            )
+            self._client_loop = loop
+        return self._client
+
+    async def get(self, path: str, endpoint: str = "", **kwargs) -> httpx.Response:
+        return await self.request("GET", path, endpoint=endpoint, **kwargs)
+
+    async def post(self, path: str, endpoint: str = "", **kwargs) -> httpx.Response:
+        return await self.request("POST", path, endpoint=endpoint, **kwargs)
+
+    async def put(self, path: str, endpoint: str = "", **kwargs) -> httpx.Response:
+        return await self.request("PUT", path, endpoint=endpoint, **kwargs)
+
+    async def request(self, method: str, path: str, endpoint: str = "", **kwargs: Any) -> httpx.Response:
+        """
+        Send a request through the pooled async client
+
+        Same retry, timeout and health semantics as TelecomAPIClient.request.
+
+        Raises:
+            BackendUnavailableError: The backend is known to be down
+            httpx.TransportError: Network errors after retries
+        """
+        if not await self.health.ais_available():
+            raise BackendUnavailableError("Backend API is unavailable (circuit open)")
+
+        connect_timeout, read_timeout = ENDPOINT_TIMEOUTS.get(endpoint, DEFAULT_TIMEOUT)
+        kwargs.setdefault("timeout", httpx.Timeout(read_timeout, connect=connect_timeout))
+        attempts = 1 + (self.get_retries if method == "GET" else 0)
+
+        for attempt in range(attempts):
+            is_last_attempt = attempt == attempts - 1
+            try:
+                response = await self.client.request(method, path, **kwargs)
+            except httpx.TransportError:
+                if is_last_attempt:
+                    self.health.record_failure()
+                    raise
+                await asyncio.sleep(_backoff_delay(attempt))
+                continue
+
+            if response.status_code in RETRYABLE_STATUSES and not is_last_attempt:
+                await asyncio.sleep(_backoff_delay(attempt))
+                continue
+
+            if response.status_code >= 500:
+                self.health.record_failure()
+            else:
+                self.health.record_success()
+            return response
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff delay"""
+    delay = min(API_RETRY_BACKOFF_MAX, API_RETRY_BACKOFF * (2 ** attempt))
+    return random.uniform(0, delay)
+
+
+# Global client instances
+telecom_api = TelecomAPIClient()
+async_telecom_api = AsyncTelecomAPIClient(health=telecom_api.health)
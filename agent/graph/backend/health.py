@@ -0,0 +1,171 @@
+"""
+Passive backend health monitor shared across workers through Redis.
+
+Health is learned from the outcomes of real tool calls, so the fast path
+sends no extra requests. Only when the circuit is half-open does one worker
+actively probe GET /health; the result is published to every worker.
+
+The probe and the Redis sync are blocking calls; on the asyncio path
+ais_available runs them in a worker thread.
+"""
+import asyncio
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+from dotenv import load_dotenv
+
+from graph.memory import redis_memory
+
+load_dotenv()
+
+# Configuration
+API_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("API_CIRCUIT_FAILURE_THRESHOLD", "5"))
+API_CIRCUIT_RECOVERY_SECONDS = float(os.getenv("API_CIRCUIT_RECOVERY_SECONDS", "30"))
+API_HEALTH_SYNC_SECONDS = float(os.getenv("API_HEALTH_SYNC_SECONDS", "5"))
+
+
+class BackendHealthMonitor:
+    """Closed / open / half-open circuit whose state is shared via Redis"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self,
+                 probe: Optional[Callable[[], bool]] = None,
+                 failure_threshold: int = API_CIRCUIT_FAILURE_THRESHOLD,
+                 recovery_seconds: float = API_CIRCUIT_RECOVERY_SECONDS,
+                 sync_seconds: float = API_HEALTH_SYNC_SECONDS):
+        """
+        Args:
+            probe: Active health check, only called in the half-open state
+            failure_threshold: Consecutive failures that open the circuit
+            recovery_seconds: How long the circuit stays open before probing
+            sync_seconds: How often the shared state is re-read from Redis
+        """
+        self.probe = probe
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.sync_seconds = sync_seconds
+
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.consecutive_failures = 0
+        self._last_sync = 0.0
+        self._lock = threading.Lock()
+
+    def is_available(self) -> bool:
+        """
+        Whether requests to the backend should be attempted
+
+        Closed: True without any I/O (beyond a periodic Redis sync).
+        Open: False until the recovery window has passed.
+        Half-open: one worker probes; the others fail fast meanwhile.
+        """
+        self._sync()
+
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if time.time() - self.opened_at < self.recovery_seconds:
+                return False
+            self.state = self.HALF_OPEN
+
+        return self._probe_half_open()
+
+    async def ais_available(self) -> bool:
+        """
+        Async counterpart of is_available
+
+        The closed circuit is answered in place; a Redis sync or a half-open
+        probe, which block, run in a worker thread instead of on the loop.
+        """
+        if self._io_due():
+            return await asyncio.to_thread(self.is_available)
+        return self.is_available()
+
+    def _io_due(self) -> bool:
+        """Whether is_available would sync from Redis or probe the backend"""
+        if time.monotonic() - self._last_sync >= self.sync_seconds:
+            return True
+        with self._lock:
+            return self.state != self.CLOSED and time.time() - self.opened_at >= self.recovery_seconds
+
+    def record_success(self) -> None:
+        """Record a request that reached a healthy backend"""
+        with self._lock:
+            self.consecutive_failures = 0
+            if self.state == self.CLOSED:
+                return
+            self.state = self.CLOSED
+
+        print("✅ Backend API recovered, circuit closed")
+        redis_memory.save_backend_health({"state": self.CLOSED}, ttl_seconds=int(self.recovery_seconds * 10))
+
+    def record_failure(self) -> None:
+        """Record a request that failed because of the backend"""
+        with self._lock:
+            self.consecutive_failures += 1
+            should_open = (self.state == self.HALF_OPEN or
+                           self.consecutive_failures >= self.failure_threshold)
+            if not should_open or self.state == self.OPEN:
+                return
+            self._open()
+
+        print(f"⚠️ Backend API circuit opened after {self.consecutive_failures} failures")
+        self._publish_open()
+
+    def _open(self) -> None:
+        """Switch to open; caller holds the lock"""
+        self.state = self.OPEN
+        self.opened_at = time.time()
+
+    def _publish_open(self) -> None:
+        redis_memory.save_backend_health(
+            {"state": self.OPEN, "opened_at": self.opened_at},
+            ttl_seconds=int(self.recovery_seconds * 10)
+        )
+
+    def _probe_half_open(self) -> bool:
+        """Run the active probe if this worker wins the shared probe lock"""
+        if self.probe is None:
+            return True
+
+        if not redis_memory.acquire_backend_probe_lock(ttl_seconds=max(1, int(self.recovery_seconds))):
+            # Another worker is probing; keep failing fast until it publishes
+            return False
+
+        healthy = False
+        try:
+            healthy = self.probe()
+        except Exception as e:
+            print(f"⚠️ Backend health probe failed: {e}")
+
+        if healthy:
+            self.record_success()
+        else:
+            with self._lock:
+                self._open()
+            self._publish_open()
+        return healthy
+
+    def _sync(self) -> None:
+        """Adopt the state other workers published, at most every sync_seconds"""
+        now = time.monotonic()
+        if now - self._last_sync < self.sync_seconds:
+            return
+        self._last_sync = now
+
+        shared = redis_memory.get_backend_health()
+        if not shared:
+            return
+
+        with self._lock:
+            if shared.get("state") == self.OPEN and float(shared.get("opened_at", 0)) > self.opened_at:
+                self.state = self.OPEN
+                self.opened_at = float(shared["opened_at"])
+            elif shared.get("state") == self.CLOSED and self.state != self.CLOSED:
+                self.state = self.CLOSED
+                self.consecutive_failures = 0
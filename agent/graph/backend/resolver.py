@@ -0,0 +1,347 @@
+"""
+Indexed user lookup for telecom tools.
+
+Resolves a phone number or customer ID to a backend user record without
+downloading the whole user table. Results are kept in a bounded in-process
+index and in Redis, and are invalidated after writes to the user.
+"""
+import os
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote
+
+from dotenv import load_dotenv
+
+from graph.backend.client import telecom_api, async_telecom_api
+from graph.memory import redis_memory, async_redis_memory, TTLCache
+
+load_dotenv()
+
+# Configuration
+USER_INDEX_TTL_SECONDS = int(os.getenv("USER_INDEX_TTL_SECONDS", "600"))
+USER_INDEX_LOCAL_TTL_SECONDS = int(os.getenv("USER_INDEX_LOCAL_TTL_SECONDS", "60"))
+USER_INDEX_MAX_ENTRIES = int(os.getenv("USER_INDEX_MAX_ENTRIES", "1024"))
+USER_SCAN_PAGE_SIZE = int(os.getenv("USER_SCAN_PAGE_SIZE", "100"))
+# Identifiers the backend does not know are remembered briefly, so retries do not hit the API
+USER_INDEX_NEGATIVE_TTL_SECONDS = int(os.getenv("USER_INDEX_NEGATIVE_TTL_SECONDS", "60"))
+
+# Only these fields are kept in the index; tools need nothing else from the user
+INDEXED_USER_FIELDS = ("id", "customer_id", "phone_number", "current_package_id")
+
+CUSTOMER_ID_PATTERN = re.compile(r'^MSTR\d{3,}$', re.IGNORECASE)
+
+# Index entry of an identifier the backend does not know
+NOT_FOUND_RECORD = {"not_found": True}
+
+
+def normalize_phone_number(phone_number: str) -> Optional[str]:
+    """
+    Normalize a Turkish mobile number to the backend format (+905XXXXXXXXX)
+
+    Accepts '+90 555 123 45 67', '0555 123 45 67', '00905551234567',
+    '5551234567' and similar variants.
+    """
+    if not phone_number:
+        return None
+
+    digits = re.sub(r'\D', '', phone_number)
+    if digits.startswith('0090'):
+        digits = digits[2:]
+    elif digits.startswith('0') and len(digits) == 11:
+        digits = '90' + digits[1:]
+    elif digits.startswith('5') and len(digits) == 10:
+        digits = '90' + digits
+
+    if len(digits) == 12 and digits.startswith('905'):
+        return '+' + digits
+    return None
+
+
+def canonical_identifier(identifier: str) -> Optional[str]:
+    """
+    Map a phone number or customer ID to one canonical index key
+
+    Returns:
+        'phone:+905551234567', 'customer:MSTR001', or None if unrecognized
+    """
+    if not identifier:
+        return None
+
+    candidate = identifier.strip()
+    if CUSTOMER_ID_PATTERN.match(candidate):
+        return f"customer:{candidate.upper()}"
+
+    phone_number = normalize_phone_number(candidate)
+    if phone_number:
+        return f"phone:{phone_number}"
+    return None
+
+
+def _identifier_keys_for(user_record: Dict[str, Any]) -> List[str]:
+    """All canonical keys a user record is reachable under"""
+    keys = []
+    for value in (user_record.get("phone_number"), user_record.get("customer_id")):
+        key = canonical_identifier(value) if value else None
+        if key and key not in keys:
+            keys.append(key)
+    return keys
+
+
+def _compact_user(user: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce a backend user payload to the indexed fields"""
+    return {field: user.get(field) for field in INDEXED_USER_FIELDS if field in user}
+
+
+def _page_records(users: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Canonical key -> compact record of every user on a page"""
+    records = {}
+    for user in users:
+        user_record = _compact_user(user)
+        for key in _identifier_keys_for(user_record):
+            records[key] = user_record
+    return records
+
+
+def _is_user_not_found(response) -> bool:
+    """A 404 of the lookup endpoint itself, rather than of a backend that lacks it"""
+    try:
+        return response.json().get("error") == "User not found"
+    except ValueError:
+        return False
+
+
+# ===== SHARED LOOKUP DECISIONS (used by the sync resolver and its async copy) =====
+
+def _lookup_key(identifier: str) -> Optional[str]:
+    identifier_key = canonical_identifier(identifier)
+    if not identifier_key:
+        print(f"⚠️ Unrecognized user identifier: {identifier}")
+    return identifier_key
+
+
+def _indexed_user(user_record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """The user of an index entry, None for a remembered miss"""
+    return None if user_record == NOT_FOUND_RECORD else user_record
+
+
+def _lookup_route(identifier_key: str) -> Tuple[str, str]:
+    """(path, endpoint) of the backend lookup for a canonical key"""
+    kind, value = identifier_key.split(":", 1)
+    if kind == "phone":
+        return f"/api/v1/users/phone/{quote(value, safe='')}", "users.by_phone"
+    return f"/api/v1/users/customer/{quote(value, safe='')}", "users.by_customer_id"
+
+
+def _lookup_result(identifier_key: str, response) -> Tuple[Optional[Dict[str, Any]], bool]:
+    """
+    User of a lookup response
+
+    Returns:
+        (user, scan): user None when the backend does not know it; scan True
+        when the backend lacks the customer ID endpoint and users must be paged
+    """
+    if response.status_code == 404:
+        if identifier_key.startswith("customer:") and not _is_user_not_found(response):
+            print("⚠️ Backend has no customer ID lookup, scanning users")
+            return None, True
+        return None, False
+    response.raise_for_status()
+    return response.json(), False
+
+
+def _scan_params(page: int) -> Dict[str, int]:
+    return {"page": page, "limit": USER_SCAN_PAGE_SIZE}
+
+
+def _scanned_page(payload: Dict[str, Any], page: int, customer_id: str) \
+        -> Tuple[Dict[str, Dict[str, Any]], Optional[Dict[str, Any]], Optional[int]]:
+    """
+    Outcome of one page of the user scan
+
+    Returns:
+        (records to index, matching user or None, next page or None when the scan is over)
+    """
+    users: List[Dict[str, Any]] = payload.get("users", [])
+    match = next((user for user in users if (user.get("customer_id") or "").upper() == customer_id), None)
+    total_pages = payload.get("pagination", {}).get("totalPages", page)
+    next_page = None if match or not users or page >= total_pages else page + 1
+    return _page_records(users), match, next_page
+
+
+def _resolved_records(identifier_key: str, user: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+    """(compact record, records to index by canonical key) of a fetched user"""
+    user_record = _compact_user(user)
+    print(f"🔎 Resolved {identifier_key} to user {user_record.get('id')}")
+    return user_record, {key: user_record for key in _identifier_keys_for(user_record)}
+
+
+def _invalidated_keys(identifier_key: str, user_record: Optional[Dict[str, Any]]) -> List[str]:
+    """The key itself and every other key of the indexed user"""
+    identifier_keys = [identifier_key]
+    if user_record and user_record != NOT_FOUND_RECORD:
+        identifier_keys.extend(k for k in _identifier_keys_for(user_record) if k not in identifier_keys)
+    return identifier_keys
+
+
+class UserResolver:
+    """Resolve identifiers to user records via a two-level TTL index"""
+
+    def __init__(self,
+                 ttl_seconds: int = USER_INDEX_TTL_SECONDS,
+                 local_ttl_seconds: int = USER_INDEX_LOCAL_TTL_SECONDS,
+                 max_entries: int = USER_INDEX_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        # Kept shorter than the Redis TTL: writes on another worker only clear
+        # Redis, so a stale local entry must age out quickly on its own.
+        self.local_index = TTLCache(max_entries=max_entries, ttl_seconds=local_ttl_seconds)
+
+    def resolve(self, identifier: str) -> Optional[Dict[str, Any]]:
+        """
+        Find the user for a phone number or customer ID
+
+        Args:
+            identifier: Phone number (any common format) or customer ID
+
+        Returns:
+            Compact user record with at least 'id', or None if not found
+        """
+        identifier_key = _lookup_key(identifier)
+        if not identifier_key:
+            return None
+
+        user_record = self.local_index.get(identifier_key)
+        if user_record:
+            return user_record
+
+        user_record = redis_memory.get_user_index(identifier_key)
+        if user_record:
+            return self._local_hit(identifier_key, user_record)
+
+        user = self._fetch(identifier_key)
+        if not user:
+            redis_memory.save_user_index(identifier_key, NOT_FOUND_RECORD, USER_INDEX_NEGATIVE_TTL_SECONDS)
+            return None
+
+        user_record, records = _resolved_records(identifier_key, user)
+        self._index_records(records)
+        return user_record
+
+    def invalidate(self, identifier: str) -> None:
+        """
+        Drop every index entry of the user behind an identifier
+
+        Call after writes that change the user (package change, info update)
+        so the next lookup reads fresh data from the backend.
+        """
+        identifier_key = canonical_identifier(identifier)
+        if not identifier_key:
+            return
+
+        user_record = self.local_index.get(identifier_key) or redis_memory.get_user_index(identifier_key)
+        identifier_keys = self._drop_local(_invalidated_keys(identifier_key, user_record))
+        redis_memory.delete_user_index(*identifier_keys)
+
+    async def aresolve(self, identifier: str) -> Optional[Dict[str, Any]]:
+        """Async counterpart of resolve, sharing the same in-process index"""
+        identifier_key = _lookup_key(identifier)
+        if not identifier_key:
+            return None
+
+        user_record = self.local_index.get(identifier_key)
+        if user_record:
+            return user_record
+
+        user_record = await async_redis_memory.get_user_index(identifier_key)
+        if user_record:
+            return self._local_hit(identifier_key, user_record)
+
+        user = await self._afetch(identifier_key)
+        if not user:
+            await async_redis_memory.save_user_index(identifier_key, NOT_FOUND_RECORD, USER_INDEX_NEGATIVE_TTL_SECONDS)
+            return None
+
+        user_record, records = _resolved_records(identifier_key, user)
+        await self._aindex_records(records)
+        return user_record
+
+    async def ainvalidate(self, identifier: str) -> None:
+        """Async counterpart of invalidate"""
+        identifier_key = canonical_identifier(identifier)
+        if not identifier_key:
+            return
+
+        user_record = self.local_index.get(identifier_key) or await async_redis_memory.get_user_index(identifier_key)
+        identifier_keys = self._drop_local(_invalidated_keys(identifier_key, user_record))
+        await async_redis_memory.delete_user_index(*identifier_keys)
+
+    def _local_hit(self, identifier_key: str, user_record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Copy a Redis index entry into the local index"""
+        user = _indexed_user(user_record)
+        if user:
+            self.local_index.set(identifier_key, user)
+        return user
+
+    def _drop_local(self, identifier_keys: List[str]) -> List[str]:
+        for key in identifier_keys:
+            self.local_index.delete(key)
+        print(f"🧹 Invalidated user index: {', '.join(identifier_keys)}")
+        return identifier_keys
+
+    def _index_records(self, records: Dict[str, Dict[str, Any]]) -> None:
+        """Store records by canonical key, with one Redis round trip"""
+        for key, user_record in records.items():
+            self.local_index.set(key, user_record)
+        redis_memory.save_user_indexes(records, self.ttl_seconds)
+
+    def _fetch(self, identifier_key: str) -> Optional[Dict[str, Any]]:
+        """Look the user up with GET /api/v1/users/phone/:phoneNumber or /customer/:customerId"""
+        path, endpoint = _lookup_route(identifier_key)
+        user, scan = _lookup_result(identifier_key, telecom_api.get(path, endpoint=endpoint))
+        if scan:
+            return self._scan_for_customer_id(identifier_key.split(":", 1)[1])
+        return user
+
+    def _scan_for_customer_id(self, customer_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Page through GET /api/v1/users until the customer ID is found
+
+        Fallback for backends without the customer ID endpoint. The users of
+        each page are indexed in one pipelined write, and the scan stops at
+        the page with the match.
+        """
+        page = 1
+        while page:
+            response = telecom_api.get("/api/v1/users", endpoint="users.list", params=_scan_params(page))
+            response.raise_for_status()
+            records, match, page = _scanned_page(response.json(), page, customer_id)
+            self._index_records(records)
+            if match:
+                return match
+        return None
+
+    async def _aindex_records(self, records: Dict[str, Dict[str, Any]]) -> None:
+        for key, user_record in records.items():
+            self.local_index.set(key, user_record)
+        await async_redis_memory.save_user_indexes(records, self.ttl_seconds)
+
+    async def _afetch(self, identifier_key: str) -> Optional[Dict[str, Any]]:
+        path, endpoint = _lookup_route(identifier_key)
+        user, scan = _lookup_result(identifier_key, await async_telecom_api.get(path, endpoint=endpoint))
+        if scan:
+            return await self._ascan_for_customer_id(identifier_key.split(":", 1)[1])
+        return user
+
+    async def _ascan_for_customer_id(self, customer_id: str) -> Optional[Dict[str, Any]]:
+        page = 1
+        while page:
+            response = await async_telecom_api.get("/api/v1/users", endpoint="users.list", params=_scan_params(page))
+            response.raise_for_status()
+            records, match, page = _scanned_page(response.json(), page, customer_id)
+            await self._aindex_records(records)
+            if match:
+                return match
+        return None
+
+
+# Global resolver instance
+user_resolver = UserResolver()
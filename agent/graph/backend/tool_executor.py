@@ -0,0 +1,130 @@
+"""
+Executor for the tool calls chosen by the LLM.
+
+Read-only tools run concurrently on a bounded thread pool, or as bounded
+asyncio tasks on the async path. Mutating tools act as barriers: they run
+alone, in the order the LLM chose them, so a read that follows a write still
+observes it. Results are merged back in the original call order.
+"""
+import asyncio
+import contextvars
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TOOL_EXECUTOR_MAX_WORKERS = int(os.getenv("TOOL_EXECUTOR_MAX_WORKERS", "4"))
+
+# Tools that never change backend state and may run in parallel
+READ_ONLY_TOOLS = frozenset({
+    "get_user_package_info",
+    "get_user_bill_info",
+    "get_user_support_tickets",
+    "get_all_packages",
+})
+
+ToolCall = Tuple[str, Dict[str, Any]]
+
+
+class ToolExecutor:
+    """Run (tool_name, tool_args) pairs against a tool mapping"""
+
+    def __init__(self, tool_mapping: Dict[str, Any], max_workers: int = TOOL_EXECUTOR_MAX_WORKERS):
+        self.tool_mapping = tool_mapping
+        self.max_workers = max_workers
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="telecom-tool")
+
+    def execute(self, tool_calls: List[ToolCall]) -> Dict[str, Any]:
+        """
+        Execute tool calls and merge their results
+
+        Args:
+            tool_calls: (tool_name, tool_args) pairs in the order the LLM chose
+
+        Returns:
+            Dictionary of tool_name -> result, in call order. As before, a
+            later call of the same tool overwrites an earlier one.
+        """
+        results: List[Any] = [None] * len(tool_calls)
+
+        for batch in self._batches(tool_calls):
+            if len(batch) == 1:
+                index = batch[0]
+                results[index] = self._run(*tool_calls[index])
+                continue
+
+            print(f"⚡ Running {len(batch)} read-only tools concurrently")
+            futures = {
+                index: self.pool.submit(contextvars.copy_context().run, self._run, *tool_calls[index])
+                for index in batch
+            }
+            for index, future in futures.items():
+                results[index] = future.result()
+
+        tool_results = {}
+        for (tool_name, _), result in zip(tool_calls, results):
+            tool_results[tool_name] = result
+        return tool_results
+
+    async def aexecute(self, tool_calls: List[ToolCall]) -> Dict[str, Any]:
+        """Async counterpart of execute, using the tools' ainvoke"""
+        results: List[Any] = [None] * len(tool_calls)
+        semaphore = asyncio.Semaphore(self.max_workers)
+
+        async def run_bounded(index: int) -> None:
+            async with semaphore:
+                results[index] = await self._arun(*tool_calls[index])
+
+        for batch in self._batches(tool_calls):
+            if len(batch) > 1:
+                print(f"⚡ Running {len(batch)} read-only tools concurrently")
+            await asyncio.gather(*(run_bounded(index) for index in batch))
+
+        tool_results = {}
+        for (tool_name, _), result in zip(tool_calls, results):
+            tool_results[tool_name] = result
+        return tool_results
+
+    @staticmethod
+    def _batches(tool_calls: List[ToolCall]) -> List[List[int]]:
+        """Group consecutive read-only calls; every other call is its own batch"""
+        batches: List[List[int]] = []
+        for index, (tool_name, _) in enumerate(tool_calls):
+            if tool_name in READ_ONLY_TOOLS and batches and tool_calls[batches[-1][0]][0] in READ_ONLY_TOOLS:
+                batches[-1].append(index)
+            else:
+                batches.append([index])
+        return batches
+
+    def _run(self, tool_name: str, tool_args: Dict[str, Any]) -> Any:
+        """Invoke one tool, turning failures into a JSON error result"""
+        tool_func = self.tool_mapping.get(tool_name)
+        if tool_func is None:
+            print(f"❌ Unknown tool: {tool_name}")
+            return json.dumps({"error": f"Unknown tool: {tool_name}"}, ensure_ascii=False)
+
+        try:
+            result = tool_func.invoke(tool_args)
+            print(f"✅ {tool_name} executed successfully")
+            return result
+        except Exception as e:
+            print(f"❌ Error executing {tool_name}: {e}")
+            return json.dumps({"error": str(e)}, ensure_ascii=False)
+
+    async def _arun(self, tool_name: str, tool_args: Dict[str, Any]) -> Any:
+        tool_func = self.tool_mapping.get(tool_name)
+        if tool_func is None:
+            print(f"❌ Unknown tool: {tool_name}")
+            return json.dumps({"error": f"Unknown tool: {tool_name}"}, ensure_ascii=False)
+
+        try:
+            result = await tool_func.ainvoke(tool_args)
+            print(f"✅ {tool_name} executed successfully")
+            return result
+        except Exception as e:
+            print(f"❌ Error executing {tool_name}: {e}")
+            return json.dumps({"error": str(e)}, ensure_ascii=False)
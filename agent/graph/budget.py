@@ -0,0 +1,100 @@
+"""
+Per-turn latency and token budget for the answer loop.
+
+grade_answer -> regenerate can repeat up to TURN_MAX_RETRIES times, and
+each round is two LLM calls. A turn gets a deadline and a token allowance
+when it enters the graph (load_memory). Before scheduling a regeneration
+the graph checks that the retry cap is not reached, that a whole round
+(REGENERATION_SECONDS_ESTIMATE) still fits before the deadline, and that
+the tokens used so far leave room for it. Otherwise the turn ends with the
+best graded answer so far. Metrics count why: 'turn_budget.deadline' or
+'turn_budget.tokens' (both also as 'turn_budget.exhausted'), or
+'turn_budget.retries' when the cap ended the loop.
+
+Tokens are estimated from the text sent to and received from the
+generation and answer grading calls (about four characters per token);
+the chains do not report usage.
+"""
+import os
+import time
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from graph.metrics import metrics
+from graph.state import GraphState
+
+load_dotenv()
+
+TURN_MAX_RETRIES = int(os.getenv("TURN_MAX_RETRIES", "2"))
+TURN_LATENCY_BUDGET_SECONDS = float(os.getenv("TURN_LATENCY_BUDGET_SECONDS", "12"))
+TURN_TOKEN_BUDGET = int(os.getenv("TURN_TOKEN_BUDGET", "12000"))
+# Expected duration of one regenerate + grade_answer round
+REGENERATION_SECONDS_ESTIMATE = float(os.getenv("REGENERATION_SECONDS_ESTIMATE", "3"))
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(*texts: str) -> int:
+    return sum(len(text or "") for text in texts) // CHARS_PER_TOKEN
+
+
+class TurnBudget:
+    """Decides whether a turn can afford another regeneration"""
+
+    def __init__(self,
+                 latency_seconds: float = TURN_LATENCY_BUDGET_SECONDS,
+                 tokens: int = TURN_TOKEN_BUDGET,
+                 max_retries: int = TURN_MAX_RETRIES,
+                 regeneration_seconds: float = REGENERATION_SECONDS_ESTIMATE):
+        """
+        Args:
+            latency_seconds: Time from graph entry to the last regeneration's end
+            tokens: Estimated tokens of the answer loop's LLM calls
+            max_retries: Regenerations per turn, whatever the budget
+            regeneration_seconds: Time a regeneration round needs before the deadline
+        """
+        self.latency_seconds = latency_seconds
+        self.tokens = tokens
+        self.max_retries = max_retries
+        self.regeneration_seconds = regeneration_seconds
+
+    def start(self, state: GraphState) -> GraphState:
+        """State with a fresh deadline and token count for the turn"""
+        return {**state, "budget_deadline": time.monotonic() + self.latency_seconds, "tokens_used": 0}
+
+    def charge(self, state: GraphState, *texts: str) -> int:
+        """Tokens used after an LLM call with these inputs and output"""
+        return state.get("tokens_used", 0) + estimate_tokens(*texts)
+
+    def remaining_seconds(self, state: GraphState) -> float:
+        deadline = state.get("budget_deadline")
+        return float("inf") if deadline is None else deadline - time.monotonic()
+
+    def exhausted_by(self, state: GraphState) -> Optional[str]:
+        """Why another regeneration is not allowed: 'retries', 'deadline', 'tokens', or None"""
+        if state.get("retry_count", 0) >= self.max_retries:
+            return "retries"
+        if self.remaining_seconds(state) < self.regeneration_seconds:
+            return "deadline"
+        # Every round so far was one generation and one grading; the next costs about the same
+        tokens_used = state.get("tokens_used", 0)
+        if tokens_used + tokens_used / (state.get("retry_count", 0) + 1) > self.tokens:
+            return "tokens"
+        return None
+
+    def allows_regeneration(self, state: GraphState) -> bool:
+        """Check the budget before scheduling a regeneration, counting why it is refused"""
+        reason = self.exhausted_by(state)
+        if reason is None:
+            return True
+
+        metrics.incr(f"turn_budget.{reason}")
+        if reason != "retries":
+            metrics.incr("turn_budget.exhausted")
+        print(f"⏱️ No regeneration: {reason} budget exhausted")
+        return False
+
+
+# Global turn budget instance
+turn_budget = TurnBudget()
@@ -0,0 +1,127 @@
+"""
+Answer grading policy in front of answer_grader.
+
+Not every answer needs an LLM to grade it:
+
+- fixed replies (graph/messages.py: rejection, phone number required, API
+  unavailable, generation error) are deterministic and final; retrying
+  them cannot help, and they are never cached
+- answers served from the semantic answer cache were graded before they
+  were stored
+- an empty or very short answer, one that only repeats the question, or
+  one not written in Turkish is poor without asking; it goes straight to
+  regeneration
+
+Only answers these checks leave undecided are sent to answer_grader.
+The language check counts common Turkish and English words and Turkish
+letters; it decides only on answers long enough to tell.
+"""
+import os
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from graph.messages import is_system_message
+from graph.metrics import metrics
+from graph.retrieval.embedding_cache import normalize_question
+
+load_dotenv()
+
+ANSWER_POLICY_ENABLED = os.getenv("ANSWER_POLICY_ENABLED", "true").lower() == "true"
+ANSWER_MIN_CHARS = int(os.getenv("ANSWER_MIN_CHARS", "15"))
+ANSWER_ECHO_SIMILARITY = float(os.getenv("ANSWER_ECHO_SIMILARITY", "0.9"))
+
+TURKISH_LETTERS = set("çğıöşü")
+TURKISH_WORDS = {
+    "ve", "bir", "bu", "için", "ile", "da", "de", "olarak", "daha", "size", "sizin", "lütfen",
+    "paketiniz", "faturanız", "hattınız", "olan", "gibi", "ancak", "veya", "her", "çok", "var",
+    "yok", "değil", "mi", "mı", "ne", "nasıl", "şu", "o", "ise", "kadar", "tl", "gb",
+}
+ENGLISH_WORDS = {
+    "the", "and", "is", "are", "you", "your", "to", "of", "for", "with", "this", "that", "please",
+    "can", "will", "have", "has", "be", "it", "in", "on", "we", "our", "not", "if", "or",
+}
+# Words the language check must see before it decides
+LANGUAGE_MIN_WORDS = 4
+TURKISH_MIN_SHARE = 0.3
+
+
+@dataclass
+class AnswerCheck:
+    """
+    Local verdict on an answer
+
+    grade is None when answer_grader must decide; retry is whether a poor
+    answer is worth regenerating
+    """
+    reason: str
+    grade: Optional[bool] = None
+    retry: bool = False
+
+
+def turkish_share(text: str) -> Optional[float]:
+    """Share of Turkish among the recognised words, None when too few are recognised"""
+    turkish = english = 0
+    for word in normalize_question(text).split():
+        if word in TURKISH_WORDS or TURKISH_LETTERS & set(word):
+            turkish += 1
+        elif word in ENGLISH_WORDS:
+            english += 1
+    if turkish + english < LANGUAGE_MIN_WORDS:
+        return None
+    return turkish / (turkish + english)
+
+
+class AnswerPolicy:
+    """Decides which answers need the LLM answer grader"""
+
+    def __init__(self,
+                 min_chars: int = ANSWER_MIN_CHARS,
+                 echo_similarity: float = ANSWER_ECHO_SIMILARITY,
+                 enabled: bool = ANSWER_POLICY_ENABLED):
+        """
+        Args:
+            min_chars: Shorter answers are poor
+            echo_similarity: Answers at least this similar to the question only repeat it
+            enabled: When False every answer goes to the LLM, as before
+        """
+        self.min_chars = min_chars
+        self.echo_similarity = echo_similarity
+        self.enabled = enabled
+
+    def check(self, question: str, generation: str, cached: bool = False) -> AnswerCheck:
+        """Local verdict on an answer, or grade None when the LLM must grade it"""
+        result = self._check(question, generation or "", cached)
+        metrics.incr(f"answer_policy.{result.reason}")
+        return result
+
+    def _check(self, question: str, generation: str, cached: bool) -> AnswerCheck:
+        if not self.enabled:
+            return AnswerCheck("llm")
+        if cached:
+            return AnswerCheck("cached", grade=True)
+        if is_system_message(generation):
+            return AnswerCheck("system_message", grade=False)
+
+        answer = generation.strip()
+        if not answer:
+            return AnswerCheck("empty", grade=False, retry=True)
+        if len(answer) < self.min_chars:
+            return AnswerCheck("too_short", grade=False, retry=True)
+
+        normalized_answer = normalize_question(answer)
+        normalized_question = normalize_question(question)
+        if SequenceMatcher(None, normalized_answer, normalized_question).ratio() >= self.echo_similarity:
+            return AnswerCheck("echo", grade=False, retry=True)
+
+        share = turkish_share(answer)
+        if share is not None and share < TURKISH_MIN_SHARE:
+            return AnswerCheck("not_turkish", grade=False, retry=True)
+
+        return AnswerCheck("llm")
+
+
+# Global answer policy instance
+answer_policy = AnswerPolicy()
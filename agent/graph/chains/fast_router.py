@@ -0,0 +1,153 @@
+"""
+Rule-based fast path in front of question_router.
+
+The router prompt spells out deterministic rules: a phone number or a
+customer ID (MSTR001), personal pronouns ("benim", "bana") and possessive
+suffixes on account nouns ("paketim", "faturamı", "hattım") mean a personal
+lookup; "hangi paketleriniz var", "nasıl yapılır" mean general information.
+These are compiled into regexes, each rule adds its weight to a score
+(positive for function_calls, negative for vectorstore), and the absolute
+score, capped at 1, is the confidence. Only questions below
+FAST_ROUTER_MIN_CONFIDENCE go to the LLM. A pronoun alone stays below it:
+"ben yurtdışında internet kullanabilir miyim" asks for general information.
+
+Every decision is appended to FAST_ROUTER_LOG_PATH (JSON lines, phone
+numbers and customer IDs masked) with the rules that fired and, for LLM
+routed questions, the LLM's route, so the rules and weights can be tuned
+offline. FAST_ROUTER_AUDIT_RATE sends a share of rule-routed questions to
+the LLM as well, only to log whether it agrees.
+"""
+import json
+import os
+import random
+import re
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+from graph.chains.personal_patterns import (
+    CUSTOMER_ID_PATTERN, PERSONAL_PRONOUN_PATTERN, PHONE_PATTERN, POSSESSIVE_PATTERN
+)
+from graph.metrics import metrics
+from graph.retrieval.embedding_cache import normalize_question
+
+load_dotenv()
+
+FAST_ROUTER_ENABLED = os.getenv("FAST_ROUTER_ENABLED", "true").lower() == "true"
+FAST_ROUTER_MIN_CONFIDENCE = float(os.getenv("FAST_ROUTER_MIN_CONFIDENCE", "0.6"))
+FAST_ROUTER_LOG_PATH = os.getenv("FAST_ROUTER_LOG_PATH", "fast_router_decisions.jsonl")
+FAST_ROUTER_AUDIT_RATE = float(os.getenv("FAST_ROUTER_AUDIT_RATE", "0.0"))
+
+# (name, pattern, weight); positive weights point to function_calls
+RULES = [
+    ("personal_pronoun", PERSONAL_PRONOUN_PATTERN, 0.4),
+    ("possessive_account", POSSESSIVE_PATTERN, 0.7),
+    ("realtime_usage", re.compile(r"\b(?:kalan|kaldı|harcadım|kullandım|konuştum)\b"), 0.4),
+    ("account_operation", re.compile(r"\b(?:yükle|yükleme yap|değiştir|iptal et|dondur|kapat)\w*\b"), 0.2),
+    ("general_offer", re.compile(r"\b(?:hangi|neler|nelerdir|var mı)\b"), -0.4),
+    ("second_person", re.compile(r"\b(?:sizin|\w+(?:leriniz|larınız)\w*)\b"), -0.4),
+    ("how_to", re.compile(r"\bnasıl\b.*\b(?:yapılır|yapabilirim|olur|edilir|alınır)\b"), -0.5),
+    ("general_pricing", re.compile(r"\b(?:ücret\w*|fiyat\w*|tarifeler\w*|kampanya\w*)\b"), -0.3),
+]
+
+# Identifiers leave no doubt that the question is about an account
+IDENTIFIER_WEIGHT = 0.9
+
+
+@dataclass
+class FastRoute:
+    """Rule-based routing decision; datasource is None in the ambiguous band"""
+    datasource: Optional[str]
+    confidence: float
+    score: float
+    rules: List[str] = field(default_factory=list)
+
+
+class FastRouter:
+    """Compiled rule/lexicon router for obvious questions"""
+
+    def __init__(self,
+                 min_confidence: float = FAST_ROUTER_MIN_CONFIDENCE,
+                 log_path: str = FAST_ROUTER_LOG_PATH,
+                 audit_rate: float = FAST_ROUTER_AUDIT_RATE,
+                 enabled: bool = FAST_ROUTER_ENABLED):
+        """
+        Args:
+            min_confidence: Confidence at which the rules decide without the LLM
+            log_path: JSON lines file for decisions; empty disables logging
+            audit_rate: Share of rule decisions also checked by the LLM, for the log only
+            enabled: When False every question is ambiguous, i.e. LLM routed
+        """
+        self.min_confidence = min_confidence
+        self.log_path = log_path
+        self.audit_rate = audit_rate
+        self.enabled = enabled
+        self._log_lock = threading.Lock()
+
+    def classify(self, question: str, record: bool = True) -> FastRoute:
+        """
+        Route decision for question, or datasource None when the LLM must decide
+
+        record=False leaves the fast_router metrics alone, for callers that
+        only peek at the route the router node will take
+        """
+        rules: List[str] = []
+        score = 0.0
+
+        if PHONE_PATTERN.search(question):
+            rules.append("phone_number")
+            score += IDENTIFIER_WEIGHT
+        if CUSTOMER_ID_PATTERN.search(question):
+            rules.append("customer_id")
+            score += IDENTIFIER_WEIGHT
+
+        text = normalize_question(question)
+        for name, pattern, weight in RULES:
+            if pattern.search(text):
+                rules.append(name)
+                score += weight
+
+        confidence = min(abs(score), 1.0)
+        datasource = None
+        if self.enabled and confidence >= self.min_confidence:
+            datasource = "function_calls" if score > 0 else "vectorstore"
+
+        if record:
+            metrics.incr("fast_router.rule" if datasource else "fast_router.llm")
+        return FastRoute(datasource=datasource, confidence=round(confidence, 3), score=round(score, 3), rules=rules)
+
+    def should_audit(self) -> bool:
+        """Whether to also ask the LLM about a rule-routed question"""
+        return self.audit_rate > 0 and random.random() < self.audit_rate
+
+    def log(self, question: str, decision: FastRoute, llm_datasource: Optional[str] = None) -> None:
+        """Append a decision to the tuning log"""
+        if not self.log_path:
+            return
+
+        entry = {
+            "question": mask_identifiers(question),
+            "rules": decision.rules,
+            "score": decision.score,
+            "confidence": decision.confidence,
+            "rule_datasource": decision.datasource,
+            "llm_datasource": llm_datasource,
+            "timestamp": datetime.now().isoformat(),
+        }
+        try:
+            with self._log_lock, open(self.log_path, "a", encoding="utf-8") as file:
+                file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"⚠️ Could not write fast router log: {e}")
+
+
+def mask_identifiers(question: str) -> str:
+    """Question with phone numbers and customer IDs replaced by placeholders"""
+    return CUSTOMER_ID_PATTERN.sub("<customer_id>", PHONE_PATTERN.sub("<phone>", question))
+
+
+# Global fast router instance
+fast_router = FastRouter()
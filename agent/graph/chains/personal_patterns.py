@@ -0,0 +1,28 @@
+"""
+Patterns that mark a question as being about the caller's own account.
+
+Shared by the fast router, which weighs them to route a question, and the
+semantic answer cache, which never stores answers to such questions. Kept
+free of graph imports so both can use it without an import cycle.
+"""
+import re
+
+# Matched on the raw question; normalization strips the '+'
+PHONE_PATTERN = re.compile(r"(?:\+?90\s?|0)?5\d{2}\s?\d{3}\s?\d{2}\s?\d{2}")
+CUSTOMER_ID_PATTERN = re.compile(r"\bMSTR\d{3,}\b", re.IGNORECASE)
+
+# Account nouns as they appear before a suffix (hat -> hattım, borç -> borcum)
+ACCOUNT_STEMS = (
+    "abonelik", "aboneliğ", "adres", "bakiye", "borc", "borç", "dakika", "fatura", "hat", "hatt",
+    "hesab", "hesap", "internet", "kontör", "kota", "kullanım", "numara", "paket", "sms", "sözleşme",
+    "tarife", "ödeme",
+)
+
+# Possessive "my" (-m / -ım / -im / -um / -üm), an optional plural before it
+# and an optional case ending after it: paketim, faturamı, paketlerimden,
+# hesabımdaki
+POSSESSIVE_PATTERN = re.compile(
+    r"\b(?:" + "|".join(ACCOUNT_STEMS) + r")(?:ler|lar)?[ıiuü]?m"
+    r"(?:ı|i|u|ü|a|e|da|de|daki|deki|dan|den|ın|in|un|ün|la|le)?\b"
+)
+PERSONAL_PRONOUN_PATTERN = re.compile(r"\b(?:ben|benim|bana|bende|benimki|beni|kendim)\b")
@@ -0,0 +1,226 @@
+"""
+Local question relevance classifier in front of question_grader.
+
+A logistic regression over character 3-5 grams and words of the
+normalized question, trained by train_relevance_classifier.py from the FAQ
+questions in paste.txt, a seed set of labelled examples and the grades
+question_grader gave to logged traffic. It runs on the CPU in well under a
+millisecond.
+
+The model file (RELEVANCE_MODEL_PATH) is versioned and loaded once at
+import. It carries the confidence threshold picked on cross-validated
+predictions: at or above it the classifier grades alone, below it the
+question goes to question_grader. A question the classifier would reject is
+still sent to the LLM when the conversation has history, since a short
+follow-up ("peki ya Gold?") only makes sense in context.
+
+Without a model file every question goes to the LLM, as before.
+"""
+import json
+import math
+import os
+import random
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from graph.chains.fast_router import mask_identifiers
+from graph.metrics import metrics
+from graph.retrieval.embedding_cache import normalize_question
+
+load_dotenv()
+
+RELEVANCE_CLASSIFIER_ENABLED = os.getenv("RELEVANCE_CLASSIFIER_ENABLED", "true").lower() == "true"
+RELEVANCE_MODEL_PATH = os.getenv("RELEVANCE_MODEL_PATH", "relevance_model.json")
+# Overrides the threshold stored in the model file
+RELEVANCE_MIN_CONFIDENCE = os.getenv("RELEVANCE_MIN_CONFIDENCE", "")
+QUESTION_GRADE_LOG_PATH = os.getenv("QUESTION_GRADE_LOG_PATH", "question_grades.jsonl")
+
+MODEL_FORMAT = 1
+NGRAM_RANGE = (3, 5)
+
+
+def features(question: str, ngram_range: Tuple[int, int] = NGRAM_RANGE) -> List[str]:
+    """Distinct word and character n-gram features of a question"""
+    text = normalize_question(question)
+    found = {f"w:{word}" for word in text.split()}
+    padded = f" {text} "
+    for size in range(ngram_range[0], ngram_range[1] + 1):
+        for start in range(len(padded) - size + 1):
+            found.add(padded[start:start + size])
+    return sorted(found)
+
+
+class RelevanceModel:
+    """Trained logistic regression weights, as stored in the model file"""
+
+    def __init__(self, model: Dict[str, Any]):
+        self.version = model["version"]
+        self.ngram_range = tuple(model["ngram_range"])
+        self.bias = model["bias"]
+        self.weights = model["weights"]
+        self.threshold = model["threshold"]
+        self.raw = model
+
+    @classmethod
+    def train(cls, samples: Iterable[Tuple[str, bool]], epochs: int = 30, learning_rate: float = 0.5,
+              l2: float = 1e-4, min_count: int = 2, ngram_range: Tuple[int, int] = NGRAM_RANGE,
+              seed: int = 42) -> "RelevanceModel":
+        """
+        Fit on (question, relevant) pairs with SGD on the logistic loss
+
+        Features seen in fewer than min_count questions are dropped, which
+        keeps the model file small and the weights less noisy. Both classes
+        weigh the same in total, however unbalanced the samples are.
+        """
+        featurized = [(features(question, ngram_range), bool(relevant)) for question, relevant in samples]
+
+        document_counts: Dict[str, int] = {}
+        for found, _ in featurized:
+            for feature in found:
+                document_counts[feature] = document_counts.get(feature, 0) + 1
+        featurized = [([f for f in found if document_counts[f] >= min_count], label) for found, label in featurized]
+
+        positives = sum(label for _, label in featurized)
+        class_weight = {
+            True: len(featurized) / (2 * max(positives, 1)),
+            False: len(featurized) / (2 * max(len(featurized) - positives, 1)),
+        }
+
+        weights: Dict[str, float] = {}
+        bias = 0.0
+        order = list(range(len(featurized)))
+        rng = random.Random(seed)
+        for _ in range(epochs):
+            rng.shuffle(order)
+            for index in order:
+                found, label = featurized[index]
+                scale = 1 / math.sqrt(len(found)) if found else 0.0
+                gradient = (_sigmoid(bias + scale * sum(weights.get(f, 0.0) for f in found)) - label)
+                gradient *= class_weight[label]
+                bias -= learning_rate * gradient
+                for feature in found:
+                    weight = weights.get(feature, 0.0)
+                    weights[feature] = weight - learning_rate * (gradient * scale + l2 * weight)
+
+        return cls({
+            "format": MODEL_FORMAT,
+            "version": datetime.now().strftime("%Y%m%d%H%M%S"),
+            "ngram_range": list(ngram_range),
+            "bias": round(bias, 6),
+            "weights": {feature: round(weight, 6) for feature, weight in weights.items() if abs(weight) >= 1e-4},
+            "threshold": 1.01,
+            "samples": {"relevant": positives, "irrelevant": len(featurized) - positives},
+        })
+
+    def probability(self, question: str) -> float:
+        """Probability that the question is relevant"""
+        found = [feature for feature in features(question, self.ngram_range) if feature in self.weights]
+        scale = 1 / math.sqrt(len(found)) if found else 0.0
+        return _sigmoid(self.bias + scale * sum(self.weights[feature] for feature in found))
+
+    def save(self, path: str, **extra: Any) -> None:
+        self.raw.update(extra, threshold=self.threshold)
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.raw, file, ensure_ascii=False)
+
+
+def _sigmoid(value: float) -> float:
+    # Clamped, math.exp overflows beyond ~700
+    return 1 / (1 + math.exp(-max(-50.0, min(50.0, value))))
+
+
+class RelevanceClassifier:
+    """Grades questions locally when the model is confident enough"""
+
+    def __init__(self,
+                 model: Optional[RelevanceModel] = None,
+                 min_confidence: Optional[float] = None,
+                 log_path: str = QUESTION_GRADE_LOG_PATH,
+                 enabled: bool = RELEVANCE_CLASSIFIER_ENABLED):
+        """
+        Args:
+            model: Trained model; None defers every question to the LLM
+            min_confidence: Confidence to grade alone, defaults to the model's threshold
+            log_path: JSON lines file of grades, training data for the next model; empty disables it
+            enabled: When False every question is deferred to the LLM
+        """
+        self.model = model
+        self.min_confidence = min_confidence if min_confidence is not None else (
+            model.threshold if model else 1.01
+        )
+        self.log_path = log_path
+        self.enabled = enabled and model is not None
+        self._log_lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: str = RELEVANCE_MODEL_PATH) -> "RelevanceClassifier":
+        """Classifier with the model file's parameters, or a deferring one without a usable file"""
+        model = load_model(path)
+        min_confidence = float(RELEVANCE_MIN_CONFIDENCE) if RELEVANCE_MIN_CONFIDENCE else None
+        if model:
+            print(f"✅ Relevance classifier {model.version} loaded")
+        return cls(model, min_confidence)
+
+    def grade(self, question: str, has_history: bool = False) -> Tuple[Optional[bool], float]:
+        """
+        Local grade of a question
+
+        Returns:
+            (relevant, confidence); relevant is None when question_grader must decide
+        """
+        if not self.enabled:
+            return None, 0.0
+
+        probability = self.model.probability(question)
+        relevant = probability >= 0.5
+        confidence = probability if relevant else 1 - probability
+
+        if confidence < self.min_confidence or (not relevant and has_history):
+            metrics.incr("relevance_classifier.defer")
+            return None, confidence
+
+        metrics.incr("relevance_classifier.relevant" if relevant else "relevance_classifier.irrelevant")
+        return relevant, confidence
+
+    def log(self, question: str, relevant: bool, source: str, confidence: float = 0.0) -> None:
+        """Append a grade to the traffic log; 'llm' grades are used as training labels"""
+        if not self.log_path:
+            return
+
+        entry = {
+            "question": mask_identifiers(question),
+            "relevant": relevant,
+            "source": source,
+            "confidence": round(confidence, 4),
+            "model_version": self.model.version if self.model else None,
+            "timestamp": datetime.now().isoformat(),
+        }
+        try:
+            with self._log_lock, open(self.log_path, "a", encoding="utf-8") as file:
+                file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"⚠️ Could not write question grade log: {e}")
+
+
+def load_model(path: str) -> Optional[RelevanceModel]:
+    """Model written by train_relevance_classifier.py, None if missing, unreadable or of another format"""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            model = json.load(file)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Could not read relevance model {path}: {e}")
+        return None
+
+    if model.get("format") != MODEL_FORMAT:
+        print(f"⚠️ Relevance model {path} has format {model.get('format')}, expected {MODEL_FORMAT}; ignoring it")
+        return None
+    return RelevanceModel(model)
+
+
+# Global relevance classifier instance
+relevance_classifier = RelevanceClassifier.from_file()
@@ -1,3 +1,5 @@
+from typing import List
+
 from langchain_core.prompts import ChatPromptTemplate
 from pydantic import BaseModel, Field
 from langchain_groq import ChatGroq
@@ -53,4 +55,38 @@ grade_prompt = ChatPromptTemplate.from_messages(
 )
 
 # Create the grader chain
-retrieval_grader = grade_prompt | structured_llm_grader
\ No newline at end of file
+retrieval_grader = grade_prompt | structured_llm_grader
+
+
+# Batched grading: every retrieved document in one structured call
+class DocumentGrade(BaseModel):
+    """Relevance grade of one numbered document"""
+
+    index: int = Field(description="Number of the document in the list, starting at 0")
+    binary_score: str = Field(
+        description="Document is relevant to the question, 'yes' or 'no'"
+    )
+    confidence: str = Field(
+        description="Confidence level: 'high', 'medium', or 'low'",
+        default="medium"
+    )
+
+
+class GradeDocumentsBatch(BaseModel):
+    """Relevance grades for all retrieved documents, one per document."""
+
+    grades: List[DocumentGrade] = Field(description="One grade for every numbered document")
+
+
+structured_llm_batch_grader = llm.with_structured_output(GradeDocumentsBatch)
+
+batch_grade_prompt = ChatPromptTemplate.from_messages(
+    [
+        ("system", system + """
+
+You will receive several numbered documents. Grade EVERY document independently and return one grade per document, using the document's number as its index."""),
+        ("human", "Retrieved documents: \n\n {documents} \n\n User question: {question}"),
+    ]
+)
+
+batch_retrieval_grader = batch_grade_prompt | structured_llm_batch_grader
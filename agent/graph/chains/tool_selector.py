@@ -0,0 +1,231 @@
+"""
+Tool selection for function_calls_node.
+
+The LLM, with the telecom tools bound, picks the tools to run for a
+question; the customer's phone number is added to every tool that needs
+it. When the LLM picks no tool it is asked again with a simpler prompt,
+when the call fails with a forced single-tool prompt, and the last resort
+is the package info tool.
+
+Tools proposed by the combined triage call (graph/chains/triage.py) are
+used instead when all of them are usable.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_groq import ChatGroq
+from dotenv import load_dotenv
+
+from graph.backend.tool_executor import ToolCall
+
+load_dotenv()
+
+llm = ChatGroq(
+    model="llama-3.1-8b-instant",
+    temperature=0
+)
+
+# Simple tool calling prompt
+tool_calling_prompt = ChatPromptTemplate.from_messages([
+    ("system", """You are a telecom call center agent. Based on the customer's question, decide which tools to use.
+
+IMPORTANT: The customer's phone number is: {phone_number}
+
+Available tools:
+- get_user_package_info: For package details, usage, remaining data/minutes (needs phone number)
+- get_user_bill_info: For billing, payments, outstanding amounts (needs phone number)
+- get_user_support_tickets: For existing issues and ticket history (needs phone number)
+- get_all_packages: For available packages and pricing (doesn't need phone number)
+- create_support_ticket: To create new support tickets (needs phone number, title, description)
+- change_user_package: To change user's package (needs phone number, new_package_id)
+- update_user_info: To update customer information like email, address, etc. (needs phone number)
+
+If the customer asks about their personal information, ALWAYS use their phone number: {phone_number}
+
+Examples:
+- "What's my package?" → use get_user_package_info with phone_number: {phone_number}
+- "Show my bills" → use get_user_bill_info with phone_number: {phone_number}
+- "What packages are available?" → use get_all_packages (no phone needed)
+- "Change my package to PKG002" → use change_user_package with phone_number: {phone_number} and new_package_id: "PKG002"
+- "I want to switch to Temel Paket" → use get_all_packages first to find package ID, then change_user_package
+- "Update my email to new@email.com" → use update_user_info with phone_number: {phone_number} and email: "new@email.com"
+- "Create a complaint about slow internet" → use create_support_ticket with phone_number: {phone_number}
+
+For package changes:
+- If customer mentions package by name (like "Temel Paket"), you may need to use get_all_packages first to find the package_id
+- Always use the package_id (like PKG001, PKG002) for change_user_package tool"""),
+    ("human", "Customer question: {question}")
+])
+
+
+# Tools that operate on a specific customer and need their phone number
+PHONE_NUMBER_TOOLS = frozenset({
+    "get_user_package_info",
+    "get_user_bill_info",
+    "get_user_support_tickets",
+    "create_support_ticket",
+    "change_user_package",
+    "update_user_info",
+})
+
+# Fallback prompt when the LLM picks no tool
+SIMPLE_TOOL_PROMPT = """Based on this customer question: "{question}"
+                    
+                    Customer phone: {phone_number}
+                    
+                    You MUST call one of these tools:
+                    - get_user_package_info (for package/usage questions)  
+                    - get_user_bill_info (for billing questions)
+                    - get_user_support_tickets (for support questions)
+                    - get_all_packages (for available packages)
+                    - change_user_package (for package changes)
+                    - update_user_info (for info updates)
+                    - create_support_ticket (for complaints)
+                    
+                    Call the most appropriate tool."""
+
+# Fallback prompt when the tool calling prompt itself fails
+FORCE_TOOL_PROMPT = """You are a call center agent. Customer says: "{question}"
+                    
+                    Customer phone number: {phone_number}
+                    
+                    You MUST use exactly ONE tool. Choose the best tool and call it:
+                    
+                    For package info → get_user_package_info
+                    For billing → get_user_bill_info  
+                    For support issues → get_user_support_tickets
+                    For seeing all packages → get_all_packages
+                    For changing package → change_user_package
+                    For updating info → update_user_info
+                    For new complaints → create_support_ticket
+                    
+                    Call the tool now."""
+
+# Prompt of each selection stage: tools first, simple when no tool was
+# picked, force when the tools call failed
+SELECTION_PROMPTS = {
+    "tools": tool_calling_prompt,
+    "simple": SIMPLE_TOOL_PROMPT,
+    "force": FORCE_TOOL_PROMPT,
+}
+
+
+class ToolSelector:
+    """Picks (tool_name, tool_args) pairs for a question from a tool mapping"""
+
+    def __init__(self, tool_mapping: Dict[str, Any]):
+        self.tool_mapping = tool_mapping
+        self.llm_with_tools = llm.bind_tools(list(tool_mapping.values()))
+
+    def collect(self, llm_tool_calls: List[Dict[str, Any]], user_identifier: str) -> List[ToolCall]:
+        """Turn LLM tool calls into (name, args) pairs, ensuring the phone number is passed"""
+        tool_calls = []
+        for tool_call in llm_tool_calls:
+            tool_name = tool_call["name"]
+            tool_args = tool_call["args"]
+
+            print(f"🛠️ LLM chose tool: {tool_name} with args: {tool_args}")
+
+            # ENSURE PHONE NUMBER IS ALWAYS PASSED
+            if tool_name in PHONE_NUMBER_TOOLS:
+                if "phone_number" not in tool_args or not tool_args["phone_number"]:
+                    tool_args["phone_number"] = user_identifier
+                    print(f"📱 Added phone number to tool args: {user_identifier}")
+
+            tool_calls.append((tool_name, tool_args))
+        return tool_calls
+
+    def proposed(self, proposed: List[Dict[str, Any]], user_identifier: str) -> Optional[List[ToolCall]]:
+        """
+        Tool calls proposed by the combined triage call, if all of them are usable
+
+        None (select the tools as usual) when there are none, or when one names
+        an unknown tool or lacks a required argument.
+        """
+        if not proposed:
+            return None
+
+        tool_calls = self.collect(
+            [{"name": call["name"], "args": dict(call.get("args") or {})} for call in proposed], user_identifier
+        )
+        for tool_name, tool_args in tool_calls:
+            if tool_name not in self.tool_mapping or any(not tool_args.get(arg) for arg in self._required_args(tool_name)):
+                print(f"⚠️ Proposed tool call {tool_name} is not usable, selecting tools again")
+                return None
+        return tool_calls
+
+    def select(self, question: str, user_identifier: str) -> List[ToolCall]:
+        """
+        Ask the LLM which tools to run
+
+        Falls back to a simpler prompt when the LLM picks no tool, to a forced
+        single-tool prompt when the LLM call fails, and finally to package info.
+        """
+        stage, tool_calls = "tools", None
+        while tool_calls is None:
+            try:
+                response, error = self.llm_with_tools.invoke(self._prompt(stage, question, user_identifier)), None
+            except Exception as e:
+                response, error = None, e
+            stage, tool_calls = self._after_call(stage, response, error, user_identifier)
+        return tool_calls
+
+    async def aselect(self, question: str, user_identifier: str) -> List[ToolCall]:
+        """Async counterpart of select"""
+        stage, tool_calls = "tools", None
+        while tool_calls is None:
+            try:
+                response, error = await self.llm_with_tools.ainvoke(self._prompt(stage, question, user_identifier)), None
+            except Exception as e:
+                response, error = None, e
+            stage, tool_calls = self._after_call(stage, response, error, user_identifier)
+        return tool_calls
+
+    @staticmethod
+    def _prompt(stage: str, question: str, user_identifier: str) -> str:
+        # Give LLM the phone number context explicitly
+        return SELECTION_PROMPTS[stage].format(question=question, phone_number=user_identifier)
+
+    def _after_call(self, stage: str, response, error: Optional[Exception],
+                    user_identifier: str) -> Tuple[Optional[str], Optional[List[ToolCall]]]:
+        """
+        Outcome of one selection call
+
+        Returns:
+            (next stage, None) to ask the LLM again, or (None, tool calls) once decided
+        """
+        llm_tool_calls = getattr(response, 'tool_calls', None)
+
+        if stage == "tools":
+            if error is not None:
+                print(f"❌ LLM error, trying one more time with forced tool selection: {error}")
+                return "force", None
+            print(f"🤖 LLM response has tool calls: {bool(llm_tool_calls)}")
+            if llm_tool_calls:
+                return None, self.collect(llm_tool_calls, user_identifier)
+            print("🤖 LLM didn't call tools, asking LLM again with simpler prompt")
+            return "simple", None
+
+        if llm_tool_calls:
+            # The forced prompt asks for exactly one tool
+            return None, self._first_known(llm_tool_calls if stage == "simple" else llm_tool_calls[:1],
+                                           user_identifier)
+        if error is not None:
+            print(f"❌ Simple prompt also failed: {error}" if stage == "simple"
+                  else f"❌ All LLM attempts failed: {error}")
+        elif stage == "simple":
+            print("🤖 LLM still didn't call tools, using default package info")
+        return None, self._default(user_identifier)
+
+    def _default(self, user_identifier: str) -> List[ToolCall]:
+        """Last resort when the LLM picks no usable tool"""
+        return [("get_user_package_info", {"phone_number": user_identifier})]
+
+    def _first_known(self, llm_tool_calls: List[Dict[str, Any]], user_identifier: str) -> List[ToolCall]:
+        """The first tool call that maps to a known tool, or the default"""
+        known = [call for call in self.collect(llm_tool_calls, user_identifier) if call[0] in self.tool_mapping]
+        return known[:1] or self._default(user_identifier)
+
+    def _required_args(self, tool_name: str) -> List[str]:
+        schema = self.tool_mapping[tool_name].args_schema
+        return [name for name, field in schema.model_fields.items() if field.is_required()]
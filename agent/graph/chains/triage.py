@@ -0,0 +1,95 @@
+"""
+Combined triage chain: relevance, route and tool selection in one call.
+
+A personal-data turn otherwise makes three sequential LLM calls before any
+data is fetched: question_grader, question_router and the tool calling LLM
+of function_calls_node. The triage chain asks for all three decisions in a
+single structured response. Its grading and routing rules are the
+question_grader and question_router prompts themselves, so the two paths
+cannot drift apart; triage_parity.py compares their decisions on a recorded
+corpus.
+
+The proposed tool calls leave out the phone number, which function_calls_node
+resolves from the question and the conversation memory as before.
+"""
+from typing import Dict, List, Literal
+
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_groq import ChatGroq
+from pydantic import BaseModel, Field
+from dotenv import load_dotenv
+
+from graph.chains.question_grader import system as grader_system
+from graph.chains.router import system as router_system
+
+load_dotenv(verbose=True)
+
+
+class ProposedToolCall(BaseModel):
+    """A tool the call center agent should run to answer the question"""
+
+    name: str = Field(description="Tool name, one of the available tools")
+    args: Dict[str, str] = Field(
+        default_factory=dict,
+        description="Tool arguments other than phone_number, e.g. new_package_id or email",
+    )
+
+
+class Triage(BaseModel):
+    """Relevance, datasource and tool selection for a Turkish telecom call center question"""
+
+    binary_score: str = Field(
+        description="Question is relevant to the call center, 'yes' or 'no'"
+    )
+    datasource: Literal["vectorstore", "function_calls"] = Field(
+        ...,
+        description="Route the question to the vectorstore or to function calls",
+    )
+    tool_calls: List[ProposedToolCall] = Field(
+        default_factory=list,
+        description="Tools to call when datasource is function_calls, otherwise empty",
+    )
+
+
+llm = ChatGroq(
+    model="llama-3.1-8b-instant",
+    temperature=0
+)
+structured_llm_triage = llm.with_structured_output(Triage)
+
+TOOLS_SECTION = """Available tools (the customer's phone number is added for you, never pass phone_number):
+- get_user_package_info: package details, usage, remaining data/minutes
+- get_user_bill_info: billing, payments, outstanding amounts
+- get_user_support_tickets: existing issues and ticket history
+- get_all_packages: available packages and pricing
+- create_support_ticket: new complaint or issue (args: title, description)
+- change_user_package: change the package (args: new_package_id like PKG002)
+- update_user_info: update email, address, city, first_name or last_name (args: the fields to change)
+
+Examples:
+- "Faturamı görebilir miyim?" → get_user_bill_info
+- "Paketimi PKG002 ile değiştir" → change_user_package with new_package_id: "PKG002"
+- "E-postamı yeni@mail.com yap" → update_user_info with email: "yeni@mail.com"
+- "İnternetim çok yavaş, şikayet etmek istiyorum" → create_support_ticket with a short title and description
+
+If the customer names a package instead of its ID, call get_all_packages as well."""
+
+system = f"""You triage questions for a Turkish telecom call center. Make three decisions at once.
+
+1. RELEVANCE (binary_score)
+{grader_system}
+
+2. ROUTE (datasource), for relevant questions
+{router_system}
+
+3. TOOLS (tool_calls), only when datasource is function_calls; otherwise leave it empty
+{TOOLS_SECTION}"""
+
+triage_prompt = ChatPromptTemplate.from_messages(
+    [
+        ("system", system),
+        ("human", "Triage question: \n\n User question: {question}"),
+    ]
+)
+
+triage_chain = triage_prompt | structured_llm_triage
@@ -1,38 +1,133 @@
 # Import all nodes
 from langgraph.graph import StateGraph
+from langchain_core.runnables import RunnableLambda
 from typing import Literal
+import os
+
+from dotenv import load_dotenv
 
 # Import your state
 from graph.state import GraphState
+from graph.messages import is_system_message
+from graph.budget import turn_budget
 
 # Import all nodes - fix this import
-from graph.nodes.grade_questions import grade_question_node
-from graph.nodes.route_question import route_question_node
-from graph.nodes.retrieve import retrieve  # Change this line
-from graph.nodes.grade_documents import grade_documents
-from graph.nodes.function_calls import function_calls_node
-from graph.nodes.generation import generate_answer_node, regenerate_answer_node
-from graph.nodes.grade_answer import grade_answer_node
-from graph.nodes.reject_question import reject_question_node
-
-def create_telecom_workflow():
-    """Create the complete telecom call center workflow"""
+from graph.nodes.grade_questions import grade_question_node, agrade_question_node
+from graph.nodes.route_question import route_question_node, aroute_question_node
+from graph.nodes.triage import triage_node, atriage_node
+from graph.nodes.answer_cache import (
+    lookup_answer_cache_node, alookup_answer_cache_node,
+    store_answer_cache_node, astore_answer_cache_node
+)
+from graph.nodes.retrieve import retrieve, aretrieve, prefetch_documents_node, aprefetch_documents_node
+from graph.nodes.grade_documents import grade_documents, agrade_documents
+from graph.nodes.function_calls import function_calls_node, afunction_calls_node
+from graph.nodes.generation import (
+    generate_answer_node, agenerate_answer_node,
+    regenerate_answer_node, aregenerate_answer_node
+)
+from graph.nodes.grade_answer import grade_answer_node, agrade_answer_node, select_answer_node, aselect_answer_node
+from graph.nodes.reject_question import reject_question_node, areject_question_node
+from graph.memory.memory_nodes import load_memory_node, aload_memory_node, flush_memory_node, aflush_memory_node
+
+
+load_dotenv()
+
+# Grade and route the question concurrently, optionally with speculative retrieval
+PARALLEL_QUESTION_TRIAGE = os.getenv("PARALLEL_QUESTION_TRIAGE", "true").lower() == "true"
+SPECULATIVE_RETRIEVAL = os.getenv("SPECULATIVE_RETRIEVAL", "false").lower() == "true"
+# Grade, route and pick tools with one LLM call instead of three
+COMBINED_TRIAGE = os.getenv("COMBINED_TRIAGE", "false").lower() == "true"
+
+
+def _node(func, afunc) -> RunnableLambda:
+    """
+    Node with a native coroutine, so app.ainvoke/astream never block the
+    event loop while app.invoke keeps using the sync implementation
+    """
+    return RunnableLambda(func, afunc=afunc, name=func.__name__)
+
+
+def _changes(state: GraphState, result: GraphState) -> GraphState:
+    return {key: value for key, value in result.items() if key not in state or state[key] != value}
+
+
+def _delta_node(func, afunc) -> RunnableLambda:
+    """
+    Node returning only the keys it changed
+
+    Nodes running in the same step must not write the same key, and every
+    node here returns the whole state; the delta keeps their writes apart.
+    """
+    def delta(state: GraphState) -> GraphState:
+        return _changes(state, func(state))
+
+    async def adelta(state: GraphState) -> GraphState:
+        return _changes(state, await afunc(state))
+
+    return RunnableLambda(delta, afunc=adelta, name=func.__name__)
+
+
+def join_question_node(state: GraphState) -> GraphState:
+    """Meeting point of the parallel question grading, routing and prefetch"""
+    return {}
+
+
+async def ajoin_question_node(state: GraphState) -> GraphState:
+    """Async counterpart of join_question_node"""
+    return {}
+
+
+def create_telecom_workflow(parallel: bool = PARALLEL_QUESTION_TRIAGE, speculative: bool = SPECULATIVE_RETRIEVAL,
+                            triage: bool = COMBINED_TRIAGE):
+    """
+    Create the complete telecom call center workflow
+
+    Args:
+        parallel: Grade and route the question in the same step instead of
+            one after the other; rejection is rare, so the route is rarely wasted
+        speculative: In parallel mode, also retrieve documents in that step;
+            they are used if the question is routed to the vectorstore and
+            discarded otherwise; questions the fast router sends to
+            function_calls are not prefetched
+        triage: Replace grade_question and route_question with the combined
+            triage node, which also proposes the tools function_calls runs
+    """
 
     workflow = StateGraph(GraphState)
 
     # Add all nodes
-    workflow.add_node("grade_question", grade_question_node)
-    workflow.add_node("route_question", route_question_node)
-    workflow.add_node("retrieve", retrieve)
-    workflow.add_node("grade_documents", grade_documents)
-    workflow.add_node("function_calls", function_calls_node)
-    workflow.add_node("generate", generate_answer_node)
-    workflow.add_node("regenerate", regenerate_answer_node)  # New retry node
-    workflow.add_node("grade_answer", grade_answer_node)
-    workflow.add_node("reject_question", reject_question_node)
-
-    # Set entry point
-    workflow.set_entry_point("grade_question")
+    workflow.add_node("load_memory", _node(load_memory_node, aload_memory_node))
+    if triage:
+        if parallel and speculative:
+            workflow.add_node("triage", _delta_node(triage_node, atriage_node))
+            workflow.add_node("prefetch", _delta_node(prefetch_documents_node, aprefetch_documents_node))
+            workflow.add_node("join_question", _node(join_question_node, ajoin_question_node))
+        else:
+            workflow.add_node("triage", _node(triage_node, atriage_node))
+    elif parallel:
+        workflow.add_node("grade_question", _delta_node(grade_question_node, agrade_question_node))
+        workflow.add_node("route_question", _delta_node(route_question_node, aroute_question_node))
+        workflow.add_node("join_question", _node(join_question_node, ajoin_question_node))
+        if speculative:
+            workflow.add_node("prefetch", _delta_node(prefetch_documents_node, aprefetch_documents_node))
+    else:
+        workflow.add_node("grade_question", _node(grade_question_node, agrade_question_node))
+        workflow.add_node("route_question", _node(route_question_node, aroute_question_node))
+    workflow.add_node("answer_cache", _node(lookup_answer_cache_node, alookup_answer_cache_node))
+    workflow.add_node("retrieve", _node(retrieve, aretrieve))
+    workflow.add_node("grade_documents", _node(grade_documents, agrade_documents))
+    workflow.add_node("function_calls", _node(function_calls_node, afunction_calls_node))
+    workflow.add_node("generate", _node(generate_answer_node, agenerate_answer_node))
+    workflow.add_node("regenerate", _node(regenerate_answer_node, aregenerate_answer_node))  # New retry node
+    workflow.add_node("grade_answer", _node(grade_answer_node, agrade_answer_node))
+    workflow.add_node("select_answer", _node(select_answer_node, aselect_answer_node))
+    workflow.add_node("cache_answer", _node(store_answer_cache_node, astore_answer_cache_node))
+    workflow.add_node("reject_question", _node(reject_question_node, areject_question_node))
+    workflow.add_node("flush_memory", _node(flush_memory_node, aflush_memory_node))
+
+    # Set entry point - memory is loaded once per turn and flushed once at the end
+    workflow.set_entry_point("load_memory")
 
     # Conditional edge functions
     def should_continue_after_question_grade(state: GraphState) -> Literal["route_question", "reject_question"]:
@@ -41,74 +136,145 @@ def create_telecom_workflow():
         else:
             return "reject_question"
 
-    def route_after_routing(state: GraphState) -> Literal["retrieve", "function_calls"]:
+    def route_after_routing(state: GraphState) -> Literal["answer_cache", "function_calls"]:
         if state.get("datasource") == "vectorstore":
-            return "retrieve"
+            return "answer_cache"
         else:
             return "function_calls"
 
+    def route_after_join(state: GraphState) -> Literal["reject_question", "answer_cache", "function_calls"]:
+        """Grade and route are both known: a rejection discards the route and any prefetch"""
+        if not state.get("question_grade", False):
+            return "reject_question"
+        return route_after_routing(state)
+
+    def route_after_answer_cache(state: GraphState) -> Literal["flush_memory", "retrieve"]:
+        """A cached graded answer ends the turn; otherwise retrieve as usual"""
+        if state.get("answer_cache_hit", False):
+            return "flush_memory"
+        else:
+            return "retrieve"
+
     def should_continue_after_retrieval_grade(state: GraphState) -> Literal["generate", "function_calls"]:
         if state.get("retrieval_grade", False) and state.get("relevant_documents"):
             return "generate"
         else:
             return "function_calls"
 
-    def should_continue_after_answer_grade(state: GraphState) -> Literal["regenerate", "__end__"]:
-        """After grading answer: retry if bad, end if good"""
-        needs_retry = state.get("needs_retry", False)
-        retry_count = state.get("retry_count", 0)
-        answer_grade = state.get("answer_grade", False)
+    def route_after_function_calls(state: GraphState) -> Literal["generate", "grade_answer"]:
+        """A fixed reply (phone number required, API unavailable) is the answer as it stands"""
+        if is_system_message(state.get("generation", "")):
+            return "grade_answer"
+        return "generate"
 
-        print(f"🔍 Debug - needs_retry: {needs_retry}, retry_count: {retry_count}, answer_grade: {answer_grade}")
-
-        if needs_retry and retry_count <3:
+    def should_continue_after_answer_grade(state: GraphState) -> Literal["regenerate", "__end__"]:
+        """After grading answer: retry if bad and the turn's budget allows it, end otherwise"""
+        if state.get("needs_retry", False) and turn_budget.allows_regeneration(state):
             return "regenerate"
         else:
             return "__end__"
 
     # Add conditional edges
+    if triage:
+        # A single triage step; only the speculative prefetch can run beside it
+        decision_node = "triage"
+        if parallel and speculative:
+            for node in ("triage", "prefetch"):
+                workflow.add_edge("load_memory", node)
+            workflow.add_edge(["triage", "prefetch"], "join_question")
+            decision_node = "join_question"
+        else:
+            workflow.add_edge("load_memory", "triage")
+
+        workflow.add_conditional_edges(
+            decision_node,
+            route_after_join,
+            {
+                "reject_question": "reject_question",
+                "answer_cache": "answer_cache",
+                "function_calls": "function_calls"
+            }
+        )
+    elif parallel:
+        triage_nodes = ["grade_question", "route_question"] + (["prefetch"] if speculative else [])
+        for node in triage_nodes:
+            workflow.add_edge("load_memory", node)
+        workflow.add_edge(triage_nodes, "join_question")
+
+        workflow.add_conditional_edges(
+            "join_question",
+            route_after_join,
+            {
+                "reject_question": "reject_question",
+                "answer_cache": "answer_cache",
+                "function_calls": "function_calls"
+            }
+        )
+    else:
+        workflow.add_edge("load_memory", "grade_question")
+
+        workflow.add_conditional_edges(
+            "grade_question",
+            should_continue_after_question_grade,
+            {
+                "route_question": "route_question",
+                "reject_question": "reject_question"
+            }
+        )
+
+        workflow.add_conditional_edges(
+            "route_question",
+            route_after_routing,
+            {
+                "answer_cache": "answer_cache",
+                "function_calls": "function_calls"
+            }
+        )
+
     workflow.add_conditional_edges(
-        "grade_question",
-        should_continue_after_question_grade,
+        "answer_cache",
+        route_after_answer_cache,
         {
-            "route_question": "route_question",
-            "reject_question": "reject_question"
+            "flush_memory": "flush_memory",
+            "retrieve": "retrieve"
         }
     )
 
     workflow.add_conditional_edges(
-        "route_question",
-        route_after_routing,
+        "grade_documents",
+        should_continue_after_retrieval_grade,
         {
-            "retrieve": "retrieve",
+            "generate": "generate",
             "function_calls": "function_calls"
         }
     )
 
+
     workflow.add_conditional_edges(
-        "grade_documents",
-        should_continue_after_retrieval_grade,
+        "function_calls",
+        route_after_function_calls,
         {
             "generate": "generate",
-            "function_calls": "function_calls"
+            "grade_answer": "grade_answer"
         }
     )
 
-
     workflow.add_conditional_edges(
         "grade_answer",
         should_continue_after_answer_grade,
         {
             "regenerate": "regenerate",
-            "__end__": "__end__"
+            "__end__": "select_answer"
         }
     )
 
     # Add simple edges
     workflow.add_edge("retrieve", "grade_documents")
-    workflow.add_edge("function_calls", "generate")
     workflow.add_edge("generate", "grade_answer")
     workflow.add_edge("regenerate", "grade_answer")
-    workflow.add_edge("reject_question", "__end__")
+    workflow.add_edge("select_answer", "cache_answer")
+    workflow.add_edge("cache_answer", "flush_memory")
+    workflow.add_edge("reject_question", "flush_memory")
+    workflow.add_edge("flush_memory", "__end__")
 
     return workflow.compile()
\ No newline at end of file
@@ -3,6 +3,9 @@ Memory management module for telecom call center conversations
 """
 
 from .redis_client import redis_memory, RedisMemoryManager
+from .async_redis_client import async_redis_memory, AsyncRedisMemoryManager
+from .ttl_cache import TTLCache
+from .l1_cache import memory_l1, MemoryL1Cache
 from .memory_nodes import (
     with_memory,
     add_user_message,
@@ -15,6 +18,11 @@ from .memory_nodes import (
 __all__ = [
     'redis_memory',
     'RedisMemoryManager',
+    'async_redis_memory',
+    'AsyncRedisMemoryManager',
+    'TTLCache',
+    'memory_l1',
+    'MemoryL1Cache',
     'with_memory',
     'add_user_message',
     'add_assistant_message',
@@ -0,0 +1,562 @@
+"""
+Asyncio Redis memory manager, the redis.asyncio counterpart of RedisMemoryManager
+"""
+
+import asyncio
+import json
+from datetime import timedelta
+from typing import Dict, Any, Optional, List, Tuple
+
+import redis
+import redis.asyncio as aioredis
+
+from graph.memory.l1_cache import MISSING
+from graph.memory.redis_client import RedisKeyspace
+
+
+class AsyncRedisMemoryManager(RedisKeyspace):
+    """Non-blocking memory manager used by the async graph nodes"""
+
+    def __init__(self):
+        # redis.asyncio connections are bound to the event loop that created
+        # them, so the client is created lazily per running loop.
+        self._redis_client: Optional[aioredis.Redis] = None
+        self._binary_client: Optional[aioredis.Redis] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _ensure_clients(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._redis_client is None or self._client_loop is not loop:
+            self._redis_client = aioredis.Redis(
+                connection_pool=aioredis.BlockingConnectionPool(**self._connection_kwargs())
+            )
+            self._binary_client = aioredis.Redis(
+                connection_pool=aioredis.BlockingConnectionPool(**self._connection_kwargs(decode_responses=False))
+            )
+            self._client_loop = loop
+
+    @property
+    def redis_client(self) -> aioredis.Redis:
+        self._ensure_clients()
+        return self._redis_client
+
+    @property
+    def binary_client(self) -> aioredis.Redis:
+        """Client returning raw bytes, for packed embeddings"""
+        self._ensure_clients()
+        return self._binary_client
+
+    async def health_check(self) -> bool:
+        """Whether Redis is worth calling, from recent command outcomes"""
+        return super().health_check()
+
+    async def ping(self) -> bool:
+        """Actively check that Redis is responding"""
+        try:
+            await self.redis_client.ping()
+            self._failures = 0
+            self._retry_at = 0.0
+            return True
+        except Exception as e:
+            print(f"❌ Redis connection failed: {e}")
+            self._record_error(e)
+            return False
+
+    # ========================================================================
+    # CONVERSATION HISTORY METHODS
+    # ========================================================================
+
+    async def save_conversation_history(self, conversation_id: str, history: List[Dict[str, str]]) -> bool:
+        """Replace the whole conversation history in Redis"""
+        if not await self.health_check():
+            print("⚠️ Redis not available - conversation not saved")
+            return False
+
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            self._queue_history_write(pipe, self._get_conversation_key(conversation_id), history, replace=True)
+            await pipe.execute()
+
+            print(f"💾 Saved conversation history: {len(history)} messages")
+            return True
+
+        except Exception as e:
+            self._record_error(e)
+            print(f"❌ Error saving conversation history: {e}")
+            return False
+
+    async def append_conversation_messages(self, conversation_id: str, messages: List[Dict[str, str]]) -> bool:
+        """Append messages to conversation history with RPUSH + LTRIM + EXPIRE"""
+        if not messages:
+            return True
+        if not await self.health_check():
+            print("⚠️ Redis not available - conversation not saved")
+            return False
+
+        key = self._get_conversation_key(conversation_id)
+        try:
+            try:
+                pipe = self.redis_client.pipeline(transaction=False)
+                self._queue_history_write(pipe, key, messages)
+                await pipe.execute()
+            except redis.exceptions.ResponseError as e:
+                if not self._is_wrong_type(e):
+                    raise
+                await self._migrate_legacy_history(key)
+                pipe = self.redis_client.pipeline(transaction=False)
+                self._queue_history_write(pipe, key, messages)
+                await pipe.execute()
+
+            print(f"💾 Appended {len(messages)} messages to conversation history")
+            return True
+
+        except Exception as e:
+            self._record_error(e)
+            print(f"❌ Error appending to conversation history: {e}")
+            return False
+
+    async def get_conversation_history(self, conversation_id: str, last_n: Optional[int] = None) -> List[Dict[str, str]]:
+        """Get conversation history from Redis, empty list if not found"""
+        if not await self.health_check():
+            return []
+
+        try:
+            key = self._get_conversation_key(conversation_id)
+            try:
+                history = self._decode_messages(await self.redis_client.lrange(key, *self._history_range(last_n)))
+            except redis.exceptions.ResponseError as e:
+                if not self._is_wrong_type(e):
+                    raise
+                history = await self._migrate_legacy_history(key)
+                history = history[-last_n:] if last_n else history
+
+            if history:
+                print(f"📚 Retrieved conversation history: {len(history)} messages")
+                return history
+
+            print("📭 No conversation history found")
+            return []
+
+        except Exception as e:
+            self._record_error(e)
+            print(f"❌ Error getting conversation history: {e}")
+            return []
+
+    async def add_message_to_conversation(self, conversation_id: str, role: str, content: str) -> bool:
+        """Add a single message to conversation history"""
+        return await self.append_conversation_messages(conversation_id, [{"role": role, "content": content}])
+
+    async def _migrate_legacy_history(self, key: str) -> List[Dict[str, str]]:
+        """Convert a history stored as one JSON blob into a Redis list"""
+        try:
+            serialized_history = await self.redis_client.get(key)
+        except redis.exceptions.ResponseError as e:
+            if not self._is_wrong_type(e):
+                raise
+            return self._decode_messages(await self.redis_client.lrange(key, 0, -1))
+
+        history = json.loads(serialized_history)[-self.conversation_max_messages:] if serialized_history else []
+
+        pipe = self.redis_client.pipeline(transaction=True)
+        self._queue_history_write(pipe, key, history, replace=True)
+        await pipe.execute()
+
+        print(f"🔁 Migrated conversation history to a list: {len(history)} messages")
+        return history
+
+    async def clear_conversation(self, conversation_id: str) -> bool:
+        """Clear conversation history and related data"""
+        if not await self.health_check():
+            return False
+
+        try:
+            phone_key = self._get_phone_mapping_key(conversation_id)
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.delete(self._get_conversation_key(conversation_id), phone_key)
+            self._queue_l1_invalidation(pipe, "phone_mapping", phone_key)
+            deleted_count = (await pipe.execute())[0]
+            self._l1().invalidate("phone_mapping", phone_key)
+
+            print(f"🗑️ Cleared conversation data: {deleted_count} keys deleted")
+            return True
+
+        except Exception as e:
+            self._record_error(e)
+            print(f"❌ Error clearing conversation: {e}")
+            return False
+
+    # ========================================================================
+    # USER CONTEXT METHODS
+    # ========================================================================
+
+    async def save_user_context(self, phone_number: str, context: Dict[str, Any]) -> bool:
+        """Save user context to Redis"""
+        if not await self.health_check():
+            return False
+
+        try:
+            context_with_meta = self._user_context_with_meta(phone_number, context)
+
+            key = self._get_user_context_key(phone_number)
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.setex(key, self.user_context_ttl, json.dumps(context_with_meta, ensure_ascii=False))
+            self._queue_key_stat(pipe, "user_contexts", key)
+            self._queue_l1_invalidation(pipe, "user_context", key)
+            await pipe.execute()
+            self._l1().set("user_context", key, context_with_meta)
+
+            print(f"💾 Saved user context for {phone_number}")
+            return True
+
+        except Exception as e:
+            self._record_error(e)
+            print(f"❌ Error saving user context: {e}")
+            return False
+
+    async def get_user_context(self, phone_number: str) -> Dict[str, Any]:
+        """Get user context from Redis, empty dict if not found"""
+        if not await self.health_check():
+            return {}
+
+        try:
+            key = self._get_user_context_key(phone_number)
+            l1 = self._l1()
+            context = l1.get("user_context", key)
+
+            if context is MISSING:
+                version = l1.version()
+                serialized_context = await self.redis_client.get(key)
+                context = json.loads(serialized_context) if serialized_context else {}
+                l1.set("user_context", key, context, version)
+
+            if context:
+                print(f"👤 Retrieved user context for {phone_number}")
+                return dict(context)
+
+            print(f"👤 No user context found for {phone_number}")
+            return {}
+
+        except Exception as e:
+            self._record_error(e)
+            print(f"❌ Error getting user context: {e}")
+            return {}
+
+    async def update_user_context(self, phone_number: str, updates: Dict[str, Any]) -> bool:
+        """Update specific fields in user context"""
+        try:
+            current_context = await self.get_user_context(phone_number)
+            current_context.update(updates)
+            return await self.save_user_context(phone_number, current_context)
+
+        except Exception as e:
+            self._record_error(e)
+            print(f"❌ Error updating user context: {e}")
+            return False
+
+    # ========================================================================
+    # PHONE NUMBER MAPPING METHODS
+    # ========================================================================
+
+    async def link_conversation_to_phone(self, conversation_id: str, phone_number: str) -> bool:
+        """Link conversation ID to phone number for easy lookup"""
+        if not await self.health_check():
+            return False
+
+        try:
+            key = self._get_phone_mapping_key(conversation_id)
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.setex(key, self.conversation_ttl, phone_number)
+            self._queue_key_stat(pipe, "phone_mappings", key)
+            self._queue_l1_invalidation(pipe, "phone_mapping", key)
+            await pipe.execute()
+            self._l1().set("phone_mapping", key, phone_number)
+
+            print(f"🔗 Linked conversation {conversation_id[:8]}... to {phone_number}")
+            return True
+
+        except Exception as e:
+            self._record_error(e)
+            print(f"❌ Error linking conversation to phone: {e}")
+            return False
+
+    async def get_phone_from_conversation(self, conversation_id: str) -> Optional[str]:
+        """Get phone number associated with conversation"""
+        if not await self.health_check():
+            return None
+
+        try:
+            key = self._get_phone_mapping_key(conversation_id)
+            l1 = self._l1()
+            phone_number = l1.get("phone_mapping", key)
+
+            if phone_number is MISSING:
+                version = l1.version()
+                phone_number = await self.redis_client.get(key)
+                l1.set("phone_mapping", key, phone_number, version)
+
+            if phone_number:
+                print(f"📞 Found phone {phone_number} for conversation {conversation_id[:8]}...")
+
+            return phone_number
+
+        except Exception as e:
+            self._record_error(e)
+            print(f"❌ Error getting phone from conversation: {e}")
+            return None
+
+    # ========================================================================
+    # API RESPONSE CACHING METHODS
+    # ========================================================================
+
+    async def cache_api_response(self, cache_key: str, response_data: Dict[str, Any], ttl_minutes: int = 5) -> bool:
+        """Cache API responses to reduce external API calls"""
+        if not await self.health_check():
+            return False
+
+        try:
+            key = self._get_api_cache_key(cache_key)
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.setex(key, timedelta(minutes=ttl_minutes), json.dumps(response_data, ensure_ascii=False))
+            self._queue_key_stat(pipe, "api_cache", key)
+            await pipe.execute()
+
+            print(f"💾 Cached API response: {cache_key}")
+            return True
+
+        except Exception as e:
+            self._record_error(e)
+            print(f"❌ Error caching API response: {e}")
+            return False
+
+    async def get_cached_api_response(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Get cached API response"""
+        if not await self.health_check():
+            return None
+
+        try:
+            cached_data = await self.redis_client.get(self._get_api_cache_key(cache_key))
+
+            if cached_data:
+                print(f"💾 Using cached API response: {cache_key}")
+                return json.loads(cached_data)
+
+            return None
+
+        except Exception as e:
+            self._record_error(e)
+            print(f"❌ Error getting cached API response: {e}")
+            return None
+
+    # ========================================================================
+    # EMBEDDING CACHE METHODS
+    # ========================================================================
+
+    async def cache_embedding(self, cache_key: str, vector: bytes) -> bool:
+        """Cache a packed query embedding"""
+        if not await self.health_check():
+            return False
+
+        try:
+            key = self._get_embedding_key(cache_key)
+            pipe = self.binary_client.pipeline(transaction=False)
+            pipe.setex(key, self.embedding_cache_ttl, vector)
+            self._queue_key_stat(pipe, "embeddings", key)
+            await pipe.execute()
+            return True
+
+        except Exception as e:
+            self._record_error(e)
+            print(f"❌ Error caching embedding: {e}")
+            return False
+
+    async def get_cached_embedding(self, cache_key: str) -> Optional[bytes]:
+        """Get a packed query embedding"""
+        if not await self.health_check():
+            return None
+
+        try:
+            return await self.binary_client.get(self._get_embedding_key(cache_key))
+
+        except Exception as e:
+            self._record_error(e)
+            print(f"❌ Error getting cached embedding: {e}")
+            return None
+
+    # ========================================================================
+    # TURN MEMORY METHODS
+    # ========================================================================
+
+    async def load_turn_memory(self, conversation_id: str) -> Tuple[List[Dict[str, str]], Optional[str], Dict[str, Any]]:
+        """Load history, linked phone number and user context for a graph turn"""
+        if not await self.health_check():
+            return [], None, {}
+
+        try:
+            conversation_key = self._get_conversation_key(conversation_id)
+            phone_mapping_key = self._get_phone_mapping_key(conversation_id)
+            l1 = self._l1()
+            phone_number = l1.get("phone_mapping", phone_mapping_key)
+            mapping_version = l1.version()
+
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.lrange(conversation_key, 0, -1)
+            if phone_number is MISSING:
+                pipe.get(phone_mapping_key)
+            serialized_history, *mapping_result = await pipe.execute(raise_on_error=False)
+
+            if mapping_result:
+                phone_number = mapping_result[0]
+                if isinstance(phone_number, Exception):
+                    raise phone_number
+                l1.set("phone_mapping", phone_mapping_key, phone_number, mapping_version)
+
+            if self._is_wrong_type(serialized_history):
+                history = await self._migrate_legacy_history(conversation_key)
+            elif isinstance(serialized_history, Exception):
+                raise serialized_history
+            else:
+                history = self._decode_messages(serialized_history)
+
+            user_context = {}
+            if phone_number:
+                user_context_key = self._get_user_context_key(phone_number)
+                user_context = l1.get("user_context", user_context_key)
+                if user_context is MISSING:
+                    context_version = l1.version()
+                    serialized_context = await self.redis_client.get(user_context_key)
+                    user_context = json.loads(serialized_context) if serialized_context else {}
+                    l1.set("user_context", user_context_key, user_context, context_version)
+                user_context = dict(user_context)
+
+            print(f"📚 Loaded turn memory: {len(history)} messages, phone: {phone_number or '-'}")
+            return history, phone_number, user_context
+
+        except Exception as e:
+            self._record_error(e)
+            print(f"❌ Error loading turn memory: {e}")
+            return [], None, {}
+
+    async def save_turn_memory(self,
+                               conversation_id: str,
+                               new_messages: Optional[List[Dict[str, str]]] = None,
+                               history: Optional[List[Dict[str, str]]] = None,
+                               phone_number: Optional[str] = None,
+                               user_context: Optional[Dict[str, Any]] = None) -> bool:
+        """Write the memory a graph turn changed in a single pipelined round trip"""
+        if not await self.health_check():
+            print("⚠️ Redis not available - turn memory not saved")
+            return False
+
+        try:
+            conversation_key = self._get_conversation_key(conversation_id)
+            pipe = self.redis_client.pipeline(transaction=False)
+
+            if history is not None:
+                self._queue_history_write(pipe, conversation_key, history, replace=True)
+            elif new_messages:
+                self._queue_history_write(pipe, conversation_key, new_messages)
+
+            l1_updates = {}
+            if phone_number:
+                phone_mapping_key = self._get_phone_mapping_key(conversation_id)
+                pipe.setex(phone_mapping_key, self.conversation_ttl, phone_number)
+                self._queue_key_stat(pipe, "phone_mappings", phone_mapping_key)
+                self._queue_l1_invalidation(pipe, "phone_mapping", phone_mapping_key)
+                l1_updates["phone_mapping"] = (phone_mapping_key, phone_number)
+
+                if user_context is not None:
+                    user_context_key = self._get_user_context_key(phone_number)
+                    context_with_meta = self._user_context_with_meta(phone_number, user_context)
+                    pipe.setex(
+                        user_context_key,
+                        self.user_context_ttl,
+                        json.dumps(context_with_meta, ensure_ascii=False)
+                    )
+                    self._queue_key_stat(pipe, "user_contexts", user_context_key)
+                    self._queue_l1_invalidation(pipe, "user_context", user_context_key)
+                    l1_updates["user_context"] = (user_context_key, context_with_meta)
+
+            results = await pipe.execute(raise_on_error=False)
+
+            if any(self._is_wrong_type(result) for result in results):
+                await self._migrate_legacy_history(conversation_key)
+                pipe = self.redis_client.pipeline(transaction=False)
+                self._queue_history_write(pipe, conversation_key, new_messages or [])
+                results = await pipe.execute(raise_on_error=False)
+
+            for result in results:
+                if isinstance(result, Exception):
+                    raise result
+
+            l1 = self._l1()
+            for namespace, (key, value) in l1_updates.items():
+                l1.set(namespace, key, value)
+
+            print(f"💾 Saved turn memory for conversation {conversation_id[:8]}...")
+            return True
+
+        except Exception as e:
+            self._record_error(e)
+            print(f"❌ Error saving turn memory: {e}")
+            return False
+
+    # ========================================================================
+    # USER INDEX METHODS
+    # ========================================================================
+
+    async def save_user_index(self, identifier_key: str, user_record: Dict[str, Any], ttl_seconds: int) -> bool:
+        """Index a user record under a canonical identifier"""
+        return await self.save_user_indexes({identifier_key: user_record}, ttl_seconds)
+
+    async def save_user_indexes(self, user_records: Dict[str, Dict[str, Any]], ttl_seconds: int) -> bool:
+        """Index several user records in one pipelined round trip"""
+        if not user_records or not await self.health_check():
+            return False
+
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for identifier_key, user_record in user_records.items():
+                pipe.setex(
+                    self._get_user_index_key(identifier_key),
+                    ttl_seconds,
+                    json.dumps(user_record, ensure_ascii=False)
+                )
+            await pipe.execute()
+            return True
+
+        except Exception as e:
+            self._record_error(e)
+            print(f"❌ Error saving user index: {e}")
+            return False
+
+    async def get_user_index(self, identifier_key: str) -> Optional[Dict[str, Any]]:
+        """Get the indexed user record for a canonical identifier"""
+        if not await self.health_check():
+            return None
+
+        try:
+            cached_record = await self.redis_client.get(self._get_user_index_key(identifier_key))
+            return json.loads(cached_record) if cached_record else None
+
+        except Exception as e:
+            self._record_error(e)
+            print(f"❌ Error getting user index: {e}")
+            return None
+
+    async def delete_user_index(self, *identifier_keys: str) -> int:
+        """Remove indexed user records"""
+        if not identifier_keys or not await self.health_check():
+            return 0
+
+        try:
+            keys = [self._get_user_index_key(identifier_key) for identifier_key in identifier_keys]
+            return await self.redis_client.delete(*keys)
+
+        except Exception as e:
+            self._record_error(e)
+            print(f"❌ Error deleting user index: {e}")
+            return 0
+
+
+# Global async Redis manager instance
+async_redis_memory = AsyncRedisMemoryManager()
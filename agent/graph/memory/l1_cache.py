@@ -0,0 +1,189 @@
+"""
+In-process L1 cache in front of Redis for user context and phone mappings.
+
+Entries live for a short TTL in a bounded LRU. Every worker subscribes to
+an invalidation channel, and every write publishes the changed key on it,
+so other workers drop their copy. Entries are only served while the
+subscription is up; after a reconnect the cache is cleared, since
+invalidations may have been missed.
+
+An invalidation can arrive while a worker is still reading the old value
+from Redis. Readers take a version() before the read and pass it to set(),
+which drops the value if the key was invalidated (or written) since.
+"""
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from dotenv import load_dotenv
+
+from graph.memory.ttl_cache import TTLCache
+from graph.metrics import metrics
+
+load_dotenv()
+
+MEMORY_L1_MAX_ENTRIES = int(os.getenv("MEMORY_L1_MAX_ENTRIES", "4096"))
+MEMORY_L1_TTL_SECONDS = float(os.getenv("MEMORY_L1_TTL_SECONDS", "30"))
+
+INVALIDATION_CHANNEL = "telecom:memory:invalidate"
+
+# Cached namespaces, keyed by their Redis key
+L1_NAMESPACES = ("user_context", "phone_mapping")
+
+# Returned by get() on a miss, since None is a cacheable value
+MISSING = object()
+
+
+class MemoryL1Cache:
+    """Bounded, short-lived local copies of rarely changing memory keys"""
+
+    def __init__(self, max_entries: int = MEMORY_L1_MAX_ENTRIES, ttl_seconds: float = MEMORY_L1_TTL_SECONDS):
+        self._caches: Dict[str, TTLCache] = {
+            namespace: TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+            for namespace in L1_NAMESPACES
+        }
+        # Sequence number of the latest invalidation or write, per key; the
+        # oldest records are dropped beyond max_entries, raising the floor
+        # every other key is compared against
+        self._sequence = 0
+        self._invalidated: Dict[str, "OrderedDict[str, int]"] = {namespace: OrderedDict() for namespace in L1_NAMESPACES}
+        self._invalidated_floor: Dict[str, int] = {namespace: 0 for namespace in L1_NAMESPACES}
+        self._max_invalidated = max(1, int(max_entries))
+        self._version_lock = threading.Lock()
+        # Identifies this worker's own invalidations, which need no handling
+        self.origin = uuid.uuid4().hex[:12]
+        self._subscribed = False
+        self._listener = None
+        self._listener_lock = threading.Lock()
+
+    def get(self, namespace: str, key: str) -> Any:
+        """Cached value, or MISSING on a miss or while invalidations are not received"""
+        if not self._subscribed:
+            return MISSING
+
+        value = self._caches[namespace].get(key, MISSING)
+        metrics.incr(f"memory_l1.{namespace}.{'miss' if value is MISSING else 'hit'}")
+        return value
+
+    def version(self) -> int:
+        """Token to take before reading a key from Redis, for set()"""
+        with self._version_lock:
+            return self._sequence
+
+    def set(self, namespace: str, key: str, value: Any, version: Optional[int] = None) -> None:
+        """
+        Cache a value read from Redis, or one this worker just wrote
+
+        Args:
+            version: version() taken before the Redis read; the value is
+                dropped if the key changed since. None for a write, which
+                also makes reads still in flight drop their older value.
+        """
+        if not self._subscribed:
+            return
+
+        with self._version_lock:
+            if version is None:
+                self._record_invalidation(namespace, key)
+            elif self._invalidated[namespace].get(key, self._invalidated_floor[namespace]) > version:
+                metrics.incr(f"memory_l1.{namespace}.stale_fill")
+                return
+            self._caches[namespace].set(key, value)
+
+    def invalidate(self, namespace: str, key: str) -> None:
+        with self._version_lock:
+            self._record_invalidation(namespace, key)
+            self._caches[namespace].delete(key)
+
+    def clear(self) -> None:
+        with self._version_lock:
+            for namespace, cache in self._caches.items():
+                self._record_invalidation(namespace)
+                cache.clear()
+
+    def _record_invalidation(self, namespace: str, key: Optional[str] = None) -> None:
+        """Advance the sequence for key, or for the whole namespace; caller holds the version lock"""
+        self._sequence += 1
+        invalidated = self._invalidated[namespace]
+        if key is None:
+            invalidated.clear()
+            self._invalidated_floor[namespace] = self._sequence
+            return
+
+        invalidated[key] = self._sequence
+        invalidated.move_to_end(key)
+        while len(invalidated) > self._max_invalidated:
+            _, sequence = invalidated.popitem(last=False)
+            self._invalidated_floor[namespace] = max(self._invalidated_floor[namespace], sequence)
+
+    def invalidation_message(self, namespace: str, key: str) -> str:
+        """Payload to PUBLISH on INVALIDATION_CHANNEL after writing key"""
+        return f"{self.origin}|{namespace}|{key}"
+
+    def ensure_listener(self, pubsub_factory: Callable[[], Any]) -> bool:
+        """
+        Start the invalidation listener thread once
+
+        Args:
+            pubsub_factory: Returns a new redis PubSub object
+
+        Returns:
+            bool: True if the cache can currently be used
+        """
+        if self._listener is None:
+            with self._listener_lock:
+                if self._listener is None:
+                    self._listener = threading.Thread(
+                        target=self._listen,
+                        args=(pubsub_factory,),
+                        name="memory-l1-invalidation",
+                        daemon=True
+                    )
+                    self._listener.start()
+        return self._subscribed
+
+    def _listen(self, pubsub_factory: Callable[[], Any]) -> None:
+        backoff = 1.0
+        while True:
+            pubsub = None
+            try:
+                pubsub = pubsub_factory()
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+                while True:
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is None:
+                        continue
+                    if message["type"] == "subscribe":
+                        # Anything cached before now may have missed invalidations
+                        self.clear()
+                        self._subscribed = True
+                        backoff = 1.0
+                    elif message["type"] == "message":
+                        self._on_invalidation(message["data"])
+            except Exception as e:
+                if self._subscribed:
+                    print(f"⚠️ L1 cache invalidation listener disconnected: {e}")
+            finally:
+                self._subscribed = False
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+    def _on_invalidation(self, data: str) -> None:
+        origin, _, rest = data.partition("|")
+        namespace, _, key = rest.partition("|")
+        if origin != self.origin and namespace in self._caches:
+            self.invalidate(namespace, key)
+            metrics.incr(f"memory_l1.{namespace}.invalidation")
+
+
+# Global L1 cache shared by the sync and async memory managers
+memory_l1 = MemoryL1Cache()
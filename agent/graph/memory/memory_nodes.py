@@ -2,90 +2,142 @@
 Memory-aware node decorators and utilities for LangGraph workflow
 """
 from typing import Callable, Dict, Any
+from graph.budget import turn_budget
 from graph.memory.redis_client import redis_memory
+from graph.memory.async_redis_client import async_redis_memory
 from graph.state import GraphState
-from typing import Callable
+import functools
+import inspect
 import uuid
 
 
-def with_memory(node_func: Callable) -> Callable:
-    """Decorator to add Redis memory to any node function"""
+# State fields that make up the turn's memory; a change to any of them is
+# written back by flush_memory_node
+MEMORY_FIELDS = ("conversation_history", "user_context", "memory_phone_number")
 
-    def memory_wrapper(state: GraphState) -> GraphState:
-        conversation_id = state.get("conversation_id")
-        if not conversation_id:
-            conversation_id = str(uuid.uuid4())
-            state = {**state, "conversation_id": conversation_id}
 
-        # Load conversation history and user context from Redis
-        conversation_history = redis_memory.get_conversation_history(conversation_id)
+def _mark_dirty(state: GraphState, result_state: GraphState) -> GraphState:
+    """Record which memory fields a node changed"""
+    dirty = set(state.get("memory_dirty", []))
+    for field in MEMORY_FIELDS:
+        if field in result_state and result_state[field] != state.get(field):
+            dirty.add(field)
+    return {**result_state, "memory_dirty": sorted(dirty)}
 
-        # Try to get phone number from conversation mapping
-        phone_number = redis_memory.get_phone_from_conversation(conversation_id)
-        user_context = {}
-        if phone_number:
-            user_context = redis_memory.get_user_context(phone_number)
-
-        # Add memory to state
-        memory_enhanced_state = {
-            **state,
-            "conversation_history": conversation_history,
-            "user_context": user_context
-        }
 
-        # Execute the original node function
-        result_state = node_func(memory_enhanced_state)
+def _ensure_conversation_id(state: GraphState) -> GraphState:
+    if state.get("conversation_id"):
+        return state
+    return {**state, "conversation_id": str(uuid.uuid4())}
 
-        # Save updated conversation history back to Redis
-        if "conversation_history" in result_state:
-            redis_memory.save_conversation_history(
-                conversation_id,
-                result_state["conversation_history"]
-            )
 
-        # Save updated user context if phone number is available
-        if result_state.get("user_context") and phone_number:
-            redis_memory.save_user_context(phone_number, result_state["user_context"])
+def _loaded_state(state: GraphState, history, phone_number, user_context) -> GraphState:
+    return {
+        **state,
+        "conversation_history": history,
+        "user_context": user_context,
+        "memory_phone_number": phone_number,
+        "memory_history_len": len(history),
+        "memory_history_tail": history[-1] if history else None,
+        "memory_loaded": True,
+        "memory_dirty": []
+    }
 
-        return result_state
 
-    return memory_wrapper
+def _history_updates(state: GraphState) -> Dict[str, Any]:
+    """Append only the turn's new messages, unless the loaded ones changed"""
+    history = state.get("conversation_history") or []
+    loaded_len = state.get("memory_history_len", 0)
+
+    loaded_tail_intact = len(history) >= loaded_len and (
+        loaded_len == 0 or history[loaded_len - 1] == state.get("memory_history_tail")
+    )
+    if loaded_tail_intact:
+        return {"new_messages": history[loaded_len:]}
+    return {"history": history}
+
+
+def _turn_memory_updates(state: GraphState) -> Dict[str, Any]:
+    """save_turn_memory arguments for the dirty fields of a turn"""
+    dirty = set(state.get("memory_dirty", []))
+    user_context = state.get("user_context") or {}
+    # Conversations identified by customer ID have no mapped phone number;
+    # function_calls records the identifier it used in the user context, so
+    # the context is stored and linked under that instead of being dropped
+    phone_number = state.get("memory_phone_number") or user_context.get("phone_number")
+    return {
+        **(_history_updates(state) if "conversation_history" in dirty else {}),
+        # Re-linking with every write keeps the mapping alive as long as the history
+        "phone_number": phone_number if dirty & set(MEMORY_FIELDS) else None,
+        "user_context": user_context if "user_context" in dirty and user_context else None,
+    }
+
+
+def load_memory_node(state: GraphState) -> GraphState:
+    """Graph entry: load the turn's memory from Redis once and start the turn's budget"""
+    state = turn_budget.start(_ensure_conversation_id(state))
+    history, phone_number, user_context = redis_memory.load_turn_memory(state["conversation_id"])
+    return _loaded_state(state, history, phone_number, user_context)
+
+
+async def aload_memory_node(state: GraphState) -> GraphState:
+    """Async counterpart of load_memory_node"""
+    state = turn_budget.start(_ensure_conversation_id(state))
+    history, phone_number, user_context = await async_redis_memory.load_turn_memory(state["conversation_id"])
+    return _loaded_state(state, history, phone_number, user_context)
+
+
+def flush_memory_node(state: GraphState) -> GraphState:
+    """Graph exit: write the memory the turn changed in one pipelined round trip"""
+    if state.get("memory_dirty"):
+        redis_memory.save_turn_memory(state["conversation_id"], **_turn_memory_updates(state))
+    return {**state, "memory_dirty": []}
 
 
-def _save_memory_updates(state: GraphState, conversation_id: str, original_phone: str = None):
+async def aflush_memory_node(state: GraphState) -> GraphState:
+    """Async counterpart of flush_memory_node"""
+    if state.get("memory_dirty"):
+        await async_redis_memory.save_turn_memory(state["conversation_id"], **_turn_memory_updates(state))
+    return {**state, "memory_dirty": []}
+
+
+def with_memory(node_func: Callable) -> Callable:
     """
-    Save memory updates back to Redis
+    Decorator to add Redis memory to any node function (sync or async)
 
-    Args:
-        state: Updated state from node execution
-        conversation_id: Conversation identifier
-        original_phone: Original phone number (if any)
+    Inside the workflow, memory is loaded once by load_memory_node and the
+    wrapper only records which memory fields the node changed. Called on a
+    state without loaded memory, the node loads and saves memory itself.
     """
-    try:
-        # Save conversation history if updated
-        if "conversation_history" in state:
-            updated_history = state["conversation_history"]
-            redis_memory.save_conversation_history(conversation_id, updated_history)
 
-        # Determine phone number for user context saving
-        phone_number = original_phone
+    if inspect.iscoroutinefunction(node_func):
+        return _with_async_memory(node_func)
 
-        # Try to get phone from user context or other sources
-        user_context = state.get("user_context", {})
-        if not phone_number and "phone_number" in user_context:
-            phone_number = user_context["phone_number"]
+    @functools.wraps(node_func)
+    def memory_wrapper(state: GraphState) -> GraphState:
+        if not state.get("memory_loaded"):
+            state = load_memory_node(state)
+            result_state = flush_memory_node(_mark_dirty(state, node_func(state)))
+            return {**result_state, "memory_loaded": False}
 
-        # Save user context if we have a phone number and context updates
-        if phone_number and user_context:
-            redis_memory.save_user_context(phone_number, user_context)
+        return _mark_dirty(state, node_func(state))
 
-            # Also update the conversation -> phone mapping
-            redis_memory.link_conversation_to_phone(conversation_id, phone_number)
+    return memory_wrapper
 
-        print(f"💾 Memory updates saved for conversation {conversation_id[:8]}...")
 
-    except Exception as e:
-        print(f"❌ Error saving memory updates: {e}")
+def _with_async_memory(node_func: Callable) -> Callable:
+    """Async counterpart of with_memory, backed by redis.asyncio"""
+
+    @functools.wraps(node_func)
+    async def memory_wrapper(state: GraphState) -> GraphState:
+        if not state.get("memory_loaded"):
+            state = await aload_memory_node(state)
+            result_state = await aflush_memory_node(_mark_dirty(state, await node_func(state)))
+            return {**result_state, "memory_loaded": False}
+
+        return _mark_dirty(state, await node_func(state))
+
+    return memory_wrapper
 
 
 def add_user_message(conversation_id: str, message: str) -> bool:
@@ -5,41 +5,110 @@ Redis-based memory manager for conversation history and user context
 import redis
 import json
 import os
-from typing import Dict, Any, Optional, List
+import time
+from typing import Dict, Any, Iterator, Optional, List, Tuple
 from datetime import timedelta
 from dotenv import load_dotenv
 
-load_dotenv()
-
-
-class RedisMemoryManager:
-    """Redis-based memory manager for telecom call center conversations"""
+from graph.memory.l1_cache import memory_l1, MemoryL1Cache, MISSING, INVALIDATION_CHANNEL
+from graph.metrics import metrics
 
-    def __init__(self):
-        """Initialize Redis connection with environment variables"""
-        try:
-            self.redis_client = redis.Redis(
-                host=os.getenv('REDIS_HOST', 'localhost'),
-                port=int(os.getenv('REDIS_PORT', 6379)),
-                password=os.getenv('REDIS_PASSWORD', None),
-                db=int(os.getenv('REDIS_DB', 0)),
-                decode_responses=True,
-                socket_connect_timeout=5,
-                socket_timeout=5
-            )
+load_dotenv()
 
-            # Test connection
-            self.redis_client.ping()
-            print("✅ Redis connected successfully")
+# Connection pool and reconnect settings
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+REDIS_RECONNECT_BACKOFF = float(os.getenv("REDIS_RECONNECT_BACKOFF", "1"))
+REDIS_RECONNECT_BACKOFF_MAX = float(os.getenv("REDIS_RECONNECT_BACKOFF_MAX", "30"))
+
+# Keys per SCAN step and per UNLINK/TTL pipeline in maintenance operations
+REDIS_SCAN_BATCH = int(os.getenv("REDIS_SCAN_BATCH", "500"))
+
+# Errors that mean Redis itself is unreachable, as opposed to a bad command or payload
+CONNECTION_ERRORS = (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError)
+
+
+class RedisKeyspace:
+    """Key layout, TTLs and connection settings shared by the sync and async managers"""
+
+    # TTL settings
+    conversation_ttl = timedelta(hours=24)  # Conversations expire after 24 hours
+    user_context_ttl = timedelta(days=30)  # User context expires after 30 days
+    api_cache_ttl = timedelta(minutes=5)  # API responses cached for 5 minutes
+    embedding_cache_ttl = timedelta(days=7)  # Query embeddings cached for 7 days
+
+    # Conversation history is a Redis list of JSON messages, capped at this length
+    conversation_max_messages = 20
+
+    # Namespaces counted for get_stats, with the TTL of their keys. Every write
+    # adds its key to a HyperLogLog bucket a quarter of the TTL wide, so
+    # counting live keys is a PFCOUNT over the buckets a key can still be
+    # alive in instead of a KEYS scan.
+    stats_namespaces = {
+        "conversations": conversation_ttl,
+        "user_contexts": user_context_ttl,
+        "phone_mappings": conversation_ttl,
+        "api_cache": api_cache_ttl,
+        "embeddings": embedding_cache_ttl,
+    }
+    stats_buckets_per_ttl = 4
+    stats_min_bucket_seconds = 60
+
+    # Passive connection state: no PING before commands. A connection error
+    # backs off further commands, and the first command after the backoff
+    # doubles as the reconnect attempt.
+    _retry_at = 0.0
+    _failures = 0
+
+    @staticmethod
+    def _connection_kwargs(decode_responses: bool = True) -> Dict[str, Any]:
+        """Redis connection settings from environment variables"""
+        return {
+            "host": os.getenv('REDIS_HOST', 'localhost'),
+            "port": int(os.getenv('REDIS_PORT', 6379)),
+            "password": os.getenv('REDIS_PASSWORD', None),
+            "db": int(os.getenv('REDIS_DB', 0)),
+            "decode_responses": decode_responses,
+            "socket_connect_timeout": 5,
+            "socket_timeout": 5,
+            "max_connections": REDIS_MAX_CONNECTIONS,
+            # Wait this long for a free pooled connection before failing
+            "timeout": 5
+        }
+
+    @staticmethod
+    def _l1_pubsub():
+        """PubSub on its own connection, for the L1 invalidation listener"""
+        return redis.Redis(connection_pool=redis.BlockingConnectionPool(**RedisKeyspace._connection_kwargs())).pubsub()
+
+    def _l1(self) -> MemoryL1Cache:
+        """The in-process L1 cache, starting its invalidation listener on first use"""
+        memory_l1.ensure_listener(self._l1_pubsub)
+        return memory_l1
+
+    def _queue_l1_invalidation(self, pipe, namespace: str, key: str) -> None:
+        """Queue a PUBLISH telling other workers to drop their L1 copy of key"""
+        pipe.publish(INVALIDATION_CHANNEL, memory_l1.invalidation_message(namespace, key))
 
-        except Exception as e:
-            print(f"❌ Redis connection failed: {e}")
-            self.redis_client = None
+    def health_check(self) -> bool:
+        """
+        Whether Redis is worth calling, from recent command outcomes
 
-        # TTL settings
-        self.conversation_ttl = timedelta(hours=24)  # Conversations expire after 24 hours
-        self.user_context_ttl = timedelta(days=30)  # User context expires after 30 days
-        self.api_cache_ttl = timedelta(minutes=5)  # API responses cached for 5 minutes
+        Never talks to Redis; use ping() for an active check.
+        """
+        now = time.monotonic()
+        if self._failures and now >= self._retry_at + REDIS_RECONNECT_BACKOFF_MAX:
+            # Quiet for a full backoff period since the last failure
+            self._failures = 0
+        return now >= self._retry_at
+
+    def _record_error(self, error: Exception) -> None:
+        """Back off from Redis if an error shows it is unreachable"""
+        if not isinstance(error, CONNECTION_ERRORS):
+            return
+        self._failures += 1
+        delay = min(REDIS_RECONNECT_BACKOFF_MAX, REDIS_RECONNECT_BACKOFF * (2 ** (self._failures - 1)))
+        self._retry_at = time.monotonic() + delay
+        print(f"⚠️ Redis unreachable, retrying in {delay:.0f}s")
 
     def _get_conversation_key(self, conversation_id: str) -> str:
         """Generate Redis key for conversation history"""
@@ -59,14 +128,111 @@ class RedisMemoryManager:
         """Generate Redis key for API response caching"""
         return f"telecom:api_cache:{cache_key}"
 
-    def health_check(self) -> bool:
-        """Check if Redis is available and responding"""
+    def _get_embedding_key(self, cache_key: str) -> str:
+        """Generate Redis key for a cached query embedding"""
+        return f"telecom:embedding:{cache_key}"
+
+    def _get_user_index_key(self, identifier_key: str) -> str:
+        """Generate Redis key for identifier -> user record index"""
+        return f"telecom:user_index:{identifier_key}"
+
+    def _get_backend_health_key(self) -> str:
+        """Generate Redis key for the shared backend API health state"""
+        return "telecom:backend_health"
+
+    def _get_stats_key(self, namespace: str, bucket: int) -> str:
+        """Generate Redis key for one time bucket of a namespace's key HyperLogLog"""
+        return f"telecom:stats:{namespace}:{bucket}"
+
+    def _stats_bucket_seconds(self, namespace: str) -> int:
+        """Width of a namespace's HyperLogLog buckets: a fraction of its TTL"""
+        ttl_seconds = int(self.stats_namespaces[namespace].total_seconds())
+        return max(self.stats_min_bucket_seconds, ttl_seconds // self.stats_buckets_per_ttl)
+
+    def _stats_keys(self, namespace: str) -> List[str]:
+        """
+        HyperLogLog keys for every bucket a key of the namespace can still be alive in
+
+        The oldest bucket is only partly within the TTL, so the count covers
+        up to one bucket width more than the TTL.
+        """
+        bucket_seconds = self._stats_bucket_seconds(namespace)
+        ttl_seconds = self.stats_namespaces[namespace].total_seconds()
+        current = int(time.time() // bucket_seconds)
+        buckets = -(-int(ttl_seconds) // bucket_seconds) + 1
+        return [self._get_stats_key(namespace, current - offset) for offset in range(buckets)]
+
+    def _queue_key_stat(self, pipe, namespace: str, key: str) -> None:
+        """Queue PFADD of a written key into the current bucket of its namespace"""
+        stats_key = self._stats_keys(namespace)[0]
+        pipe.pfadd(stats_key, key)
+        bucket = timedelta(seconds=self._stats_bucket_seconds(namespace))
+        pipe.expire(stats_key, self.stats_namespaces[namespace] + 2 * bucket)
+
+    def _queue_history_write(self, pipe, key: str, messages: List[Dict[str, str]], replace: bool = False) -> None:
+        """Queue RPUSH + LTRIM + EXPIRE (after DEL when replacing) on a pipeline"""
+        if replace:
+            pipe.delete(key)
+        if messages:
+            pipe.rpush(key, *[json.dumps(message, ensure_ascii=False) for message in messages])
+        # Keep only the most recent messages to prevent memory bloat
+        pipe.ltrim(key, -self.conversation_max_messages, -1)
+        pipe.expire(key, self.conversation_ttl)
+        self._queue_key_stat(pipe, "conversations", key)
+
+    @staticmethod
+    def _history_range(last_n: Optional[int]) -> Tuple[int, int]:
+        """LRANGE bounds for the most recent last_n messages (all when None)"""
+        return (-last_n, -1) if last_n else (0, -1)
+
+    @staticmethod
+    def _decode_messages(serialized_messages: List[str]) -> List[Dict[str, str]]:
+        return [json.loads(message) for message in serialized_messages]
+
+    @staticmethod
+    def _is_wrong_type(error: Exception) -> bool:
+        """Whether a Redis error comes from a legacy (JSON blob) conversation key"""
+        return isinstance(error, redis.exceptions.ResponseError) and "WRONGTYPE" in str(error)
+
+    @staticmethod
+    def _user_context_with_meta(phone_number: str, context: Dict[str, Any]) -> Dict[str, Any]:
+        """User context as stored, with update metadata"""
+        return {
+            **context,
+            "phone_number": phone_number,
+            "last_updated": str(int(time.time())),
+            "update_count": context.get("update_count", 0) + 1
+        }
+
+
+class RedisMemoryManager(RedisKeyspace):
+    """Redis-based memory manager for telecom call center conversations"""
+
+    def __init__(self):
+        """Initialize Redis connection with environment variables"""
+        # One blocking pool shared by every thread; connections are opened
+        # lazily, so an unreachable Redis at import is retried on later calls
+        self.redis_client = redis.Redis(
+            connection_pool=redis.BlockingConnectionPool(**self._connection_kwargs())
+        )
+        # Raw bytes values (packed embeddings) cannot go through the decoding client
+        self.binary_client = redis.Redis(
+            connection_pool=redis.BlockingConnectionPool(**self._connection_kwargs(decode_responses=False))
+        )
+
+        if self.ping():
+            print("✅ Redis connected successfully")
+
+    def ping(self) -> bool:
+        """Actively check that Redis is responding"""
         try:
-            if self.redis_client is None:
-                return False
             self.redis_client.ping()
+            self._failures = 0
+            self._retry_at = 0.0
             return True
-        except:
+        except Exception as e:
+            print(f"❌ Redis connection failed: {e}")
+            self._record_error(e)
             return False
 
     # ========================================================================
@@ -75,7 +241,10 @@ class RedisMemoryManager:
 
     def save_conversation_history(self, conversation_id: str, history: List[Dict[str, str]]) -> bool:
         """
-        Save conversation history to Redis
+        Replace the whole conversation history in Redis
+
+        Prefer append_conversation_messages for new messages; this rewrites
+        the list.
 
         Args:
             conversation_id: Unique conversation identifier
@@ -89,29 +258,65 @@ class RedisMemoryManager:
             return False
 
         try:
-            key = self._get_conversation_key(conversation_id)
-            serialized_history = json.dumps(history, ensure_ascii=False)
-
-            # Save with expiration
-            self.redis_client.setex(
-                key,
-                self.conversation_ttl,
-                serialized_history
-            )
+            pipe = self.redis_client.pipeline(transaction=False)
+            self._queue_history_write(pipe, self._get_conversation_key(conversation_id), history, replace=True)
+            pipe.execute()
 
             print(f"💾 Saved conversation history: {len(history)} messages")
             return True
 
         except Exception as e:
+            self._record_error(e)
             print(f"❌ Error saving conversation history: {e}")
             return False
 
-    def get_conversation_history(self, conversation_id: str) -> List[Dict[str, str]]:
+    def append_conversation_messages(self, conversation_id: str, messages: List[Dict[str, str]]) -> bool:
+        """
+        Append messages to conversation history with RPUSH + LTRIM + EXPIRE
+
+        Args:
+            conversation_id: Unique conversation identifier
+            messages: New message dictionaries with 'role' and 'content'
+
+        Returns:
+            bool: True if successful
+        """
+        if not messages:
+            return True
+        if not self.health_check():
+            print("⚠️ Redis not available - conversation not saved")
+            return False
+
+        key = self._get_conversation_key(conversation_id)
+        try:
+            try:
+                pipe = self.redis_client.pipeline(transaction=False)
+                self._queue_history_write(pipe, key, messages)
+                pipe.execute()
+            except redis.exceptions.ResponseError as e:
+                if not self._is_wrong_type(e):
+                    raise
+                # Legacy JSON blob: convert it, then append
+                self._migrate_legacy_history(key)
+                pipe = self.redis_client.pipeline(transaction=False)
+                self._queue_history_write(pipe, key, messages)
+                pipe.execute()
+
+            print(f"💾 Appended {len(messages)} messages to conversation history")
+            return True
+
+        except Exception as e:
+            self._record_error(e)
+            print(f"❌ Error appending to conversation history: {e}")
+            return False
+
+    def get_conversation_history(self, conversation_id: str, last_n: Optional[int] = None) -> List[Dict[str, str]]:
         """
         Get conversation history from Redis
 
         Args:
             conversation_id: Unique conversation identifier
+            last_n: Only return the most recent last_n messages
 
         Returns:
             List of message dictionaries, empty list if not found
@@ -121,10 +326,15 @@ class RedisMemoryManager:
 
         try:
             key = self._get_conversation_key(conversation_id)
-            serialized_history = self.redis_client.get(key)
-
-            if serialized_history:
-                history = json.loads(serialized_history)
+            try:
+                history = self._decode_messages(self.redis_client.lrange(key, *self._history_range(last_n)))
+            except redis.exceptions.ResponseError as e:
+                if not self._is_wrong_type(e):
+                    raise
+                history = self._migrate_legacy_history(key)
+                history = history[-last_n:] if last_n else history
+
+            if history:
                 print(f"📚 Retrieved conversation history: {len(history)} messages")
                 return history
 
@@ -132,6 +342,7 @@ class RedisMemoryManager:
             return []
 
         except Exception as e:
+            self._record_error(e)
             print(f"❌ Error getting conversation history: {e}")
             return []
 
@@ -147,28 +358,32 @@ class RedisMemoryManager:
         Returns:
             bool: True if successful
         """
-        if not self.health_check():
-            return False
+        return self.append_conversation_messages(conversation_id, [{"role": role, "content": content}])
 
-        try:
-            # Get current history
-            current_history = self.get_conversation_history(conversation_id)
+    def _migrate_legacy_history(self, key: str) -> List[Dict[str, str]]:
+        """
+        Convert a history stored as one JSON blob into a Redis list
 
-            # Add new message
-            new_message = {"role": role, "content": content}
-            current_history.append(new_message)
+        Returns:
+            The migrated history
+        """
+        try:
+            serialized_history = self.redis_client.get(key)
+        except redis.exceptions.ResponseError as e:
+            if not self._is_wrong_type(e):
+                raise
+            # Another worker migrated it first
+            return self._decode_messages(self.redis_client.lrange(key, 0, -1))
 
-            # Keep only last 20 messages to prevent memory bloat
-            if len(current_history) > 20:
-                current_history = current_history[-20:]
-                print("🗑️ Trimmed conversation history to last 20 messages")
+        history = json.loads(serialized_history)[-self.conversation_max_messages:] if serialized_history else []
 
-            # Save updated history
-            return self.save_conversation_history(conversation_id, current_history)
+        # MULTI/EXEC so readers never see the key deleted but not yet refilled
+        pipe = self.redis_client.pipeline(transaction=True)
+        self._queue_history_write(pipe, key, history, replace=True)
+        pipe.execute()
 
-        except Exception as e:
-            print(f"❌ Error adding message to conversation: {e}")
-            return False
+        print(f"🔁 Migrated conversation history to a list: {len(history)} messages")
+        return history
 
     def clear_conversation(self, conversation_id: str) -> bool:
         """
@@ -188,12 +403,17 @@ class RedisMemoryManager:
             phone_key = self._get_phone_mapping_key(conversation_id)
 
             # Delete keys
-            deleted_count = self.redis_client.delete(conv_key, phone_key)
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.delete(conv_key, phone_key)
+            self._queue_l1_invalidation(pipe, "phone_mapping", phone_key)
+            deleted_count = pipe.execute()[0]
+            self._l1().invalidate("phone_mapping", phone_key)
 
             print(f"🗑️ Cleared conversation data: {deleted_count} keys deleted")
             return True
 
         except Exception as e:
+            self._record_error(e)
             print(f"❌ Error clearing conversation: {e}")
             return False
 
@@ -219,26 +439,27 @@ class RedisMemoryManager:
             key = self._get_user_context_key(phone_number)
 
             # Add metadata
-            context_with_meta = {
-                **context,
-                "phone_number": phone_number,
-                "last_updated": str(int(time.time())),
-                "update_count": context.get("update_count", 0) + 1
-            }
+            context_with_meta = self._user_context_with_meta(phone_number, context)
 
             serialized_context = json.dumps(context_with_meta, ensure_ascii=False)
 
             # Save with expiration
-            self.redis_client.setex(
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.setex(
                 key,
                 self.user_context_ttl,
                 serialized_context
             )
+            self._queue_key_stat(pipe, "user_contexts", key)
+            self._queue_l1_invalidation(pipe, "user_context", key)
+            pipe.execute()
+            self._l1().set("user_context", key, context_with_meta)
 
             print(f"💾 Saved user context for {phone_number}")
             return True
 
         except Exception as e:
+            self._record_error(e)
             print(f"❌ Error saving user context: {e}")
             return False
 
@@ -257,17 +478,24 @@ class RedisMemoryManager:
 
         try:
             key = self._get_user_context_key(phone_number)
-            serialized_context = self.redis_client.get(key)
+            l1 = self._l1()
+            context = l1.get("user_context", key)
+
+            if context is MISSING:
+                version = l1.version()
+                serialized_context = self.redis_client.get(key)
+                context = json.loads(serialized_context) if serialized_context else {}
+                l1.set("user_context", key, context, version)
 
-            if serialized_context:
-                context = json.loads(serialized_context)
+            if context:
                 print(f"👤 Retrieved user context for {phone_number}")
-                return context
+                return dict(context)
 
             print(f"👤 No user context found for {phone_number}")
             return {}
 
         except Exception as e:
+            self._record_error(e)
             print(f"❌ Error getting user context: {e}")
             return {}
 
@@ -288,6 +516,7 @@ class RedisMemoryManager:
             return self.save_user_context(phone_number, current_context)
 
         except Exception as e:
+            self._record_error(e)
             print(f"❌ Error updating user context: {e}")
             return False
 
@@ -313,12 +542,18 @@ class RedisMemoryManager:
             key = self._get_phone_mapping_key(conversation_id)
 
             # Save mapping with same TTL as conversation
-            self.redis_client.setex(key, self.conversation_ttl, phone_number)
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.setex(key, self.conversation_ttl, phone_number)
+            self._queue_key_stat(pipe, "phone_mappings", key)
+            self._queue_l1_invalidation(pipe, "phone_mapping", key)
+            pipe.execute()
+            self._l1().set("phone_mapping", key, phone_number)
 
             print(f"🔗 Linked conversation {conversation_id[:8]}... to {phone_number}")
             return True
 
         except Exception as e:
+            self._record_error(e)
             print(f"❌ Error linking conversation to phone: {e}")
             return False
 
@@ -337,7 +572,13 @@ class RedisMemoryManager:
 
         try:
             key = self._get_phone_mapping_key(conversation_id)
-            phone_number = self.redis_client.get(key)
+            l1 = self._l1()
+            phone_number = l1.get("phone_mapping", key)
+
+            if phone_number is MISSING:
+                version = l1.version()
+                phone_number = self.redis_client.get(key)
+                l1.set("phone_mapping", key, phone_number, version)
 
             if phone_number:
                 print(f"📞 Found phone {phone_number} for conversation {conversation_id[:8]}...")
@@ -345,6 +586,7 @@ class RedisMemoryManager:
             return phone_number
 
         except Exception as e:
+            self._record_error(e)
             print(f"❌ Error getting phone from conversation: {e}")
             return None
 
@@ -372,16 +614,20 @@ class RedisMemoryManager:
             serialized_data = json.dumps(response_data, ensure_ascii=False)
 
             # Cache with TTL
-            self.redis_client.setex(
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.setex(
                 key,
                 timedelta(minutes=ttl_minutes),
                 serialized_data
             )
+            self._queue_key_stat(pipe, "api_cache", key)
+            pipe.execute()
 
             print(f"💾 Cached API response: {cache_key}")
             return True
 
         except Exception as e:
+            self._record_error(e)
             print(f"❌ Error caching API response: {e}")
             return False
 
@@ -409,9 +655,362 @@ class RedisMemoryManager:
             return None
 
         except Exception as e:
+            self._record_error(e)
             print(f"❌ Error getting cached API response: {e}")
             return None
 
+    # ========================================================================
+    # EMBEDDING CACHE METHODS
+    # ========================================================================
+
+    def cache_embedding(self, cache_key: str, vector: bytes) -> bool:
+        """
+        Cache a packed query embedding
+
+        Args:
+            cache_key: Versioned key from the embedding cache
+            vector: Packed float32 vector
+
+        Returns:
+            bool: True if successful
+        """
+        if not self.health_check():
+            return False
+
+        try:
+            key = self._get_embedding_key(cache_key)
+            pipe = self.binary_client.pipeline(transaction=False)
+            pipe.setex(key, self.embedding_cache_ttl, vector)
+            self._queue_key_stat(pipe, "embeddings", key)
+            pipe.execute()
+            return True
+
+        except Exception as e:
+            self._record_error(e)
+            print(f"❌ Error caching embedding: {e}")
+            return False
+
+    def get_cached_embedding(self, cache_key: str) -> Optional[bytes]:
+        """
+        Get a packed query embedding
+
+        Args:
+            cache_key: Versioned key from the embedding cache
+
+        Returns:
+            Packed float32 vector if found, None otherwise
+        """
+        if not self.health_check():
+            return None
+
+        try:
+            return self.binary_client.get(self._get_embedding_key(cache_key))
+
+        except Exception as e:
+            self._record_error(e)
+            print(f"❌ Error getting cached embedding: {e}")
+            return None
+
+    # ========================================================================
+    # USER INDEX METHODS
+    # ========================================================================
+
+    def save_user_index(self, identifier_key: str, user_record: Dict[str, Any], ttl_seconds: int) -> bool:
+        """
+        Index a user record under a canonical identifier (phone or customer ID)
+
+        Args:
+            identifier_key: Canonical identifier key, e.g. 'phone:+905551234567'
+            user_record: Compact user record containing at least 'id'
+            ttl_seconds: Time to live in seconds
+
+        Returns:
+            bool: True if successful
+        """
+        return self.save_user_indexes({identifier_key: user_record}, ttl_seconds)
+
+    def save_user_indexes(self, user_records: Dict[str, Dict[str, Any]], ttl_seconds: int) -> bool:
+        """
+        Index several user records in one pipelined round trip
+
+        Args:
+            user_records: Canonical identifier key -> compact user record
+            ttl_seconds: Time to live in seconds
+
+        Returns:
+            bool: True if successful
+        """
+        if not user_records or not self.health_check():
+            return False
+
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for identifier_key, user_record in user_records.items():
+                pipe.setex(
+                    self._get_user_index_key(identifier_key),
+                    ttl_seconds,
+                    json.dumps(user_record, ensure_ascii=False)
+                )
+            pipe.execute()
+            return True
+
+        except Exception as e:
+            self._record_error(e)
+            print(f"❌ Error saving user index: {e}")
+            return False
+
+    def get_user_index(self, identifier_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the indexed user record for a canonical identifier
+
+        Args:
+            identifier_key: Canonical identifier key
+
+        Returns:
+            User record if found, None otherwise
+        """
+        if not self.health_check():
+            return None
+
+        try:
+            cached_record = self.redis_client.get(self._get_user_index_key(identifier_key))
+            return json.loads(cached_record) if cached_record else None
+
+        except Exception as e:
+            self._record_error(e)
+            print(f"❌ Error getting user index: {e}")
+            return None
+
+    def delete_user_index(self, *identifier_keys: str) -> int:
+        """
+        Remove indexed user records
+
+        Args:
+            identifier_keys: Canonical identifier keys to remove
+
+        Returns:
+            Number of keys deleted
+        """
+        if not identifier_keys or not self.health_check():
+            return 0
+
+        try:
+            keys = [self._get_user_index_key(identifier_key) for identifier_key in identifier_keys]
+            return self.redis_client.delete(*keys)
+
+        except Exception as e:
+            self._record_error(e)
+            print(f"❌ Error deleting user index: {e}")
+            return 0
+
+    # ========================================================================
+    # TURN MEMORY METHODS
+    # ========================================================================
+
+    def load_turn_memory(self, conversation_id: str) -> Tuple[List[Dict[str, str]], Optional[str], Dict[str, Any]]:
+        """
+        Load everything a graph turn needs in at most two round trips
+
+        Args:
+            conversation_id: Unique conversation identifier
+
+        Returns:
+            (conversation history, linked phone number, user context)
+        """
+        if not self.health_check():
+            return [], None, {}
+
+        try:
+            conversation_key = self._get_conversation_key(conversation_id)
+            phone_mapping_key = self._get_phone_mapping_key(conversation_id)
+            l1 = self._l1()
+            phone_number = l1.get("phone_mapping", phone_mapping_key)
+            mapping_version = l1.version()
+
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.lrange(conversation_key, 0, -1)
+            if phone_number is MISSING:
+                pipe.get(phone_mapping_key)
+            serialized_history, *mapping_result = pipe.execute(raise_on_error=False)
+
+            if mapping_result:
+                phone_number = mapping_result[0]
+                if isinstance(phone_number, Exception):
+                    raise phone_number
+                l1.set("phone_mapping", phone_mapping_key, phone_number, mapping_version)
+
+            if self._is_wrong_type(serialized_history):
+                history = self._migrate_legacy_history(conversation_key)
+            elif isinstance(serialized_history, Exception):
+                raise serialized_history
+            else:
+                history = self._decode_messages(serialized_history)
+
+            user_context = {}
+            if phone_number:
+                user_context_key = self._get_user_context_key(phone_number)
+                user_context = l1.get("user_context", user_context_key)
+                if user_context is MISSING:
+                    context_version = l1.version()
+                    serialized_context = self.redis_client.get(user_context_key)
+                    user_context = json.loads(serialized_context) if serialized_context else {}
+                    l1.set("user_context", user_context_key, user_context, context_version)
+                user_context = dict(user_context)
+
+            print(f"📚 Loaded turn memory: {len(history)} messages, phone: {phone_number or '-'}")
+            return history, phone_number, user_context
+
+        except Exception as e:
+            self._record_error(e)
+            print(f"❌ Error loading turn memory: {e}")
+            return [], None, {}
+
+    def save_turn_memory(self,
+                         conversation_id: str,
+                         new_messages: Optional[List[Dict[str, str]]] = None,
+                         history: Optional[List[Dict[str, str]]] = None,
+                         phone_number: Optional[str] = None,
+                         user_context: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Write the memory a graph turn changed in a single pipelined round trip
+
+        Args:
+            conversation_id: Unique conversation identifier
+            new_messages: Messages to append to the conversation history
+            history: Full conversation history, when earlier messages changed
+            phone_number: Phone number to link the conversation to, if changed
+            user_context: User context to save under phone_number, if changed
+
+        Returns:
+            bool: True if successful
+        """
+        if not self.health_check():
+            print("⚠️ Redis not available - turn memory not saved")
+            return False
+
+        try:
+            conversation_key = self._get_conversation_key(conversation_id)
+            pipe = self.redis_client.pipeline(transaction=False)
+
+            if history is not None:
+                self._queue_history_write(pipe, conversation_key, history, replace=True)
+            elif new_messages:
+                self._queue_history_write(pipe, conversation_key, new_messages)
+
+            l1_updates = {}
+            if phone_number:
+                phone_mapping_key = self._get_phone_mapping_key(conversation_id)
+                pipe.setex(phone_mapping_key, self.conversation_ttl, phone_number)
+                self._queue_key_stat(pipe, "phone_mappings", phone_mapping_key)
+                self._queue_l1_invalidation(pipe, "phone_mapping", phone_mapping_key)
+                l1_updates["phone_mapping"] = (phone_mapping_key, phone_number)
+
+                if user_context is not None:
+                    user_context_key = self._get_user_context_key(phone_number)
+                    context_with_meta = self._user_context_with_meta(phone_number, user_context)
+                    pipe.setex(
+                        user_context_key,
+                        self.user_context_ttl,
+                        json.dumps(context_with_meta, ensure_ascii=False)
+                    )
+                    self._queue_key_stat(pipe, "user_contexts", user_context_key)
+                    self._queue_l1_invalidation(pipe, "user_context", user_context_key)
+                    l1_updates["user_context"] = (user_context_key, context_with_meta)
+
+            results = pipe.execute(raise_on_error=False)
+
+            if any(self._is_wrong_type(result) for result in results):
+                # Legacy JSON blob history: convert it, then append
+                self._migrate_legacy_history(conversation_key)
+                pipe = self.redis_client.pipeline(transaction=False)
+                self._queue_history_write(pipe, conversation_key, new_messages or [])
+                results = pipe.execute(raise_on_error=False)
+
+            for result in results:
+                if isinstance(result, Exception):
+                    raise result
+
+            l1 = self._l1()
+            for namespace, (key, value) in l1_updates.items():
+                l1.set(namespace, key, value)
+
+            print(f"💾 Saved turn memory for conversation {conversation_id[:8]}...")
+            return True
+
+        except Exception as e:
+            self._record_error(e)
+            print(f"❌ Error saving turn memory: {e}")
+            return False
+
+    # ========================================================================
+    # BACKEND HEALTH METHODS
+    # ========================================================================
+
+    def save_backend_health(self, health: Dict[str, Any], ttl_seconds: int) -> bool:
+        """
+        Publish the backend API health state to all workers
+
+        Args:
+            health: State dictionary, e.g. {"state": "open", "opened_at": 1700000000.0}
+            ttl_seconds: Time to live in seconds
+
+        Returns:
+            bool: True if successful
+        """
+        if not self.health_check():
+            return False
+
+        try:
+            self.redis_client.setex(self._get_backend_health_key(), ttl_seconds, json.dumps(health))
+            return True
+
+        except Exception as e:
+            self._record_error(e)
+            print(f"❌ Error saving backend health: {e}")
+            return False
+
+    def get_backend_health(self) -> Optional[Dict[str, Any]]:
+        """
+        Get the backend API health state published by any worker
+
+        Returns:
+            State dictionary if present, None otherwise
+        """
+        if not self.health_check():
+            return None
+
+        try:
+            health = self.redis_client.get(self._get_backend_health_key())
+            return json.loads(health) if health else None
+
+        except Exception as e:
+            self._record_error(e)
+            print(f"❌ Error getting backend health: {e}")
+            return None
+
+    def acquire_backend_probe_lock(self, ttl_seconds: int) -> bool:
+        """
+        Elect a single worker to actively probe a half-open backend
+
+        Args:
+            ttl_seconds: How long the lock is held
+
+        Returns:
+            bool: True if this worker should probe. Also True without Redis,
+            since there is nothing to coordinate with.
+        """
+        if not self.health_check():
+            return True
+
+        try:
+            key = f"{self._get_backend_health_key()}:probe_lock"
+            return bool(self.redis_client.set(key, "1", nx=True, ex=ttl_seconds))
+
+        except Exception as e:
+            self._record_error(e)
+            print(f"❌ Error acquiring backend probe lock: {e}")
+            return True
+
     # ========================================================================
     # UTILITY METHODS
     # ========================================================================
@@ -420,6 +1019,11 @@ class RedisMemoryManager:
         """
         Get Redis memory usage statistics
 
+        Key counts are HyperLogLog estimates of the distinct keys written
+        within each namespace's TTL plus a quarter of it (one bucket), so
+        this never scans the keyspace. They are upper bounds on the live
+        keys: keys deleted or expired within that window are still counted.
+
         Returns:
             Dictionary with statistics
         """
@@ -427,32 +1031,77 @@ class RedisMemoryManager:
             return {"error": "Redis not available"}
 
         try:
-            # Get key counts
-            conversation_keys = len(self.redis_client.keys("telecom:conversation:*"))
-            user_context_keys = len(self.redis_client.keys("telecom:user_context:*"))
-            phone_mapping_keys = len(self.redis_client.keys("telecom:phone_mapping:*"))
-            api_cache_keys = len(self.redis_client.keys("telecom:api_cache:*"))
+            pipe = self.redis_client.pipeline(transaction=False)
+            for namespace in self.stats_namespaces:
+                pipe.pfcount(*self._stats_keys(namespace))
+            pipe.dbsize()
+            *key_counts, total_keys = pipe.execute()
 
             # Get Redis info
-            info = self.redis_client.info()
+            info = self.redis_client.info("memory")
 
             return {
                 "redis_status": "connected",
-                "key_counts": {
-                    "conversations": conversation_keys,
-                    "user_contexts": user_context_keys,
-                    "phone_mappings": phone_mapping_keys,
-                    "api_cache": api_cache_keys
-                },
+                "key_counts": dict(zip(self.stats_namespaces, key_counts)),
+                "l1_cache": metrics.snapshot("memory_l1."),
                 "memory_usage": {
                     "used_memory": info.get("used_memory_human", "Unknown"),
-                    "total_keys": info.get("db0", {}).get("keys", 0) if "db0" in info else 0
+                    "total_keys": total_keys
                 }
             }
 
         except Exception as e:
+            self._record_error(e)
             return {"error": str(e)}
 
+    def scan_keys(self, pattern: str, batch_size: int = REDIS_SCAN_BATCH) -> Iterator[List[str]]:
+        """
+        Iterate over keys matching a pattern with SCAN, one batch at a time
+
+        Unlike KEYS this never blocks Redis for long; keys written or deleted
+        during the scan may or may not be returned.
+
+        Args:
+            pattern: Glob-style key pattern, e.g. 'telecom:api_cache:*'
+            batch_size: SCAN COUNT hint
+
+        Yields:
+            Non-empty lists of keys
+        """
+        cursor = 0
+        while True:
+            cursor, keys = self.redis_client.scan(cursor=cursor, match=pattern, count=batch_size)
+            if keys:
+                yield keys
+            if cursor == 0:
+                break
+
+    def delete_keys(self, pattern: str, batch_size: int = REDIS_SCAN_BATCH) -> int:
+        """
+        Delete all keys matching a pattern with SCAN + UNLINK batches
+
+        Args:
+            pattern: Glob-style key pattern
+            batch_size: SCAN COUNT hint
+
+        Returns:
+            Number of keys deleted
+        """
+        if not self.health_check():
+            return 0
+
+        try:
+            deleted_count = 0
+            for keys in self.scan_keys(pattern, batch_size):
+                # UNLINK frees memory in a background thread
+                deleted_count += self.redis_client.unlink(*keys)
+            return deleted_count
+
+        except Exception as e:
+            self._record_error(e)
+            print(f"❌ Error deleting keys: {e}")
+            return 0
+
     def cleanup_expired_keys(self) -> int:
         """
         Manually cleanup expired keys (Redis does this automatically, but this is for debugging)
@@ -465,13 +1114,15 @@ class RedisMemoryManager:
 
         try:
             # Find keys without TTL (shouldn't happen, but just in case)
-            all_keys = self.redis_client.keys("telecom:*")
             keys_without_ttl = []
 
-            for key in all_keys:
-                ttl = self.redis_client.ttl(key)
-                if ttl == -1:  # No expiration set
-                    keys_without_ttl.append(key)
+            for keys in self.scan_keys("telecom:*"):
+                pipe = self.redis_client.pipeline(transaction=False)
+                for key in keys:
+                    pipe.ttl(key)
+                for key, ttl in zip(keys, pipe.execute()):
+                    if ttl == -1:  # No expiration set
+                        keys_without_ttl.append(key)
 
             # You could delete these or set TTL
             print(f"🔍 Found {len(keys_without_ttl)} keys without TTL")
@@ -479,12 +1130,10 @@ class RedisMemoryManager:
             return len(keys_without_ttl)
 
         except Exception as e:
+            self._record_error(e)
             print(f"❌ Error during cleanup: {e}")
             return 0
 
 
-# Import time for timestamps
-import time
-
 # Global Redis manager instance
 redis_memory = RedisMemoryManager()
\ No newline at end of file
@@ -0,0 +1,24 @@
+"""
+Fixed replies the graph gives without the LLM.
+
+They are complete answers as they stand: nothing is generated for them and
+answer grading skips them (see graph/chains/answer_policy.py).
+"""
+
+REJECTION_MESSAGE = "Üzgünüm, bu soruyu anlayamadım. Telecom hizmetlerimiz hakkında bir soru sorabilir misiniz?"
+GENERATION_ERROR_MESSAGE = "Üzgünüm, bir hata oluştu. Lütfen tekrar deneyiniz."
+API_UNAVAILABLE_MESSAGE = "API hizmetimiz şu anda kullanılamıyor. Lütfen daha sonra tekrar deneyiniz."
+PHONE_REQUIRED_MESSAGE = "Kişisel bilgilerinize erişebilmem için telefon numaranızı belirtiniz. Örnek: 0555 123 45 67"
+PHONE_STILL_REQUIRED_MESSAGE = "Telefon numaranızı hala alamadım. Lütfen açık bir şekilde belirtiniz: '0555 123 45 67'"
+
+SYSTEM_MESSAGES = frozenset({
+    REJECTION_MESSAGE,
+    GENERATION_ERROR_MESSAGE,
+    API_UNAVAILABLE_MESSAGE,
+    PHONE_REQUIRED_MESSAGE,
+    PHONE_STILL_REQUIRED_MESSAGE,
+})
+
+
+def is_system_message(text: str) -> bool:
+    return text in SYSTEM_MESSAGES
@@ -0,0 +1,38 @@
+"""
+In-process counters for cache and pipeline behaviour.
+
+Counters are plain monotonically increasing integers keyed by a dotted
+name, e.g. 'memory_l1.user_context.hit'. Read them with snapshot().
+"""
+import threading
+from collections import defaultdict
+from typing import Dict
+
+
+class Metrics:
+    """Thread-safe named counters"""
+
+    def __init__(self):
+        self._counters: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += amount
+
+    def get(self, name: str) -> int:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def snapshot(self, prefix: str = "") -> Dict[str, int]:
+        """Current values of all counters whose name starts with prefix"""
+        with self._lock:
+            return {name: value for name, value in sorted(self._counters.items()) if name.startswith(prefix)}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+
+
+# Global metrics registry
+metrics = Metrics()
@@ -0,0 +1,91 @@
+from graph.memory.memory_nodes import with_memory
+from graph.retrieval.answer_cache import answer_cache
+from graph.state import GraphState
+
+
+def _cache_hit_state(state: GraphState, cached) -> GraphState:
+    answer = cached["answer"]
+    updated_history = state.get("conversation_history", []) + [{"role": "assistant", "content": answer}]
+
+    print(f"⚡ Answer cache hit ({cached['similarity']:.3f}): '{cached['question'][:50]}'")
+
+    return {
+        **state,
+        "generation": answer,
+        "conversation_history": updated_history,
+        "answer_cache_hit": True,
+        "answer_grade": True,
+        "needs_retry": False
+    }
+
+
+def _has_prior_turns(state: GraphState) -> bool:
+    """Whether earlier messages precede the question; generation puts them in the prompt"""
+    conversation_history = state.get("conversation_history", [])
+    for index in range(len(conversation_history) - 1, -1, -1):
+        message = conversation_history[index]
+        if message["role"] == "user" and message["content"] == state["question"]:
+            return index > 0
+    return bool(conversation_history)
+
+
+def _is_cacheable_turn(state: GraphState) -> bool:
+    """A general question asked without earlier turns its answer could depend on"""
+    return not _has_prior_turns(state) and answer_cache.is_cacheable_question(state["question"])
+
+
+def _should_store(state: GraphState) -> bool:
+    """Only graded knowledge-base answers that were not personalised are cached"""
+    return (
+        state.get("datasource") == "vectorstore"
+        and not state.get("answer_cache_hit")
+        and state.get("answer_grade", False)
+        and bool(state.get("relevant_documents"))
+        and not state.get("tool_results")
+        and not state.get("user_context")
+        and _is_cacheable_turn(state)
+    )
+
+
+@with_memory
+def lookup_answer_cache_node(state: GraphState) -> GraphState:
+    """Answer a general question from the semantic answer cache if possible"""
+    print("🧠 Checking answer cache...")
+
+    question = state["question"]
+    if not _is_cacheable_turn(state):
+        return {**state, "answer_cache_hit": False}
+
+    cached = answer_cache.lookup(question)
+    if cached is None:
+        return {**state, "answer_cache_hit": False}
+    return _cache_hit_state(state, cached)
+
+
+@with_memory
+async def alookup_answer_cache_node(state: GraphState) -> GraphState:
+    """Async counterpart of lookup_answer_cache_node"""
+    print("🧠 Checking answer cache...")
+
+    question = state["question"]
+    if not _is_cacheable_turn(state):
+        return {**state, "answer_cache_hit": False}
+
+    cached = await answer_cache.alookup(question)
+    if cached is None:
+        return {**state, "answer_cache_hit": False}
+    return _cache_hit_state(state, cached)
+
+
+def store_answer_cache_node(state: GraphState) -> GraphState:
+    """Cache the final answer of a general question for later callers"""
+    if _should_store(state):
+        answer_cache.store(state["question"], state["generation"])
+    return state
+
+
+async def astore_answer_cache_node(state: GraphState) -> GraphState:
+    """Async counterpart of store_answer_cache_node"""
+    if _should_store(state):
+        await answer_cache.astore(state["question"], state["generation"])
+    return state
@@ -2,31 +2,24 @@
 Fixed dynamic function calls node - maintains memory while adding dynamic tool selection
 """
 import hashlib
+import httpx
 import requests
 import json
 import re
-from typing import Dict, Any, Optional, List
-
-from graph.memory import redis_memory, with_memory
+import uuid
+from typing import Dict, Any, Optional, List, Tuple
+
+from graph.backend import telecom_api, async_telecom_api, user_resolver, BackendUnavailableError
+from graph.backend.tool_executor import ToolCall, ToolExecutor
+from graph.chains.tool_selector import ToolSelector
+from graph.memory import redis_memory, async_redis_memory, with_memory
+from graph.messages import API_UNAVAILABLE_MESSAGE, PHONE_REQUIRED_MESSAGE, PHONE_STILL_REQUIRED_MESSAGE
 from graph.state import GraphState
 from langchain.tools import tool
-from langchain_groq import ChatGroq
-from langchain_core.prompts import ChatPromptTemplate
 from dotenv import load_dotenv
-import os
 
 load_dotenv()
 
-# Configuration
-TELECOM_API_BASE_URL = os.getenv("TELECOM_API_BASE_URL", "http://localhost:3000")
-API_TIMEOUT = int(os.getenv("API_TIMEOUT", "10"))
-
-# Initialize LLM for function calling
-llm = ChatGroq(
-    model="llama-3.1-8b-instant",
-    temperature=0
-)
-
 def extract_phone_number(text: str) -> Optional[str]:
     """Extract Turkish phone number from text"""
     patterns = [
@@ -53,140 +46,150 @@ def extract_customer_id(text: str) -> Optional[str]:
     return match.group(0).upper() if match else None
 
 def find_user_by_identifier(identifier: str) -> Optional[Dict]:
-    """Find user by phone number or customer ID"""
-    try:
-        response = requests.get(f"{TELECOM_API_BASE_URL}/api/v1/users", timeout=API_TIMEOUT)
-        if response.status_code != 200:
-            return None
-
-        users_data = response.json()
-        for user in users_data.get('users', []):
-            if (user.get('phone_number') == identifier or
-                user.get('customer_id') == identifier):
-                return user
-        return None
-    except Exception:
-        return None
+    """
+    Find user by phone number or customer ID
 
-def test_api_connection() -> bool:
-    """Test if telecom API is accessible"""
-    try:
-        response = requests.get(f"{TELECOM_API_BASE_URL}/api/v1/users?limit=1", timeout=5)
-        return response.status_code == 200
-    except Exception as e:
-        print(f"⚠️ API connection test failed: {e}")
-        return False
+    None only when the backend does not know the user; an unavailable
+    backend or a failed request raises, so tools do not report it as an
+    unknown user.
+    """
+    return user_resolver.resolve(identifier)
+
+# ===== SHARED TOOL RESPONSE HANDLING (used by the sync tools and their async copies) =====
+
+def _error_json(error_msg: str) -> str:
+    print(f"❌ {error_msg}")
+    return json.dumps({"error": error_msg}, ensure_ascii=False)
+
+def _user_not_found_json(phone_number: str) -> str:
+    return json.dumps({"error": f"User not found with phone number: {phone_number}"}, ensure_ascii=False)
+
+def _tool_error_json(error: Exception) -> str:
+    """Error result for an exception raised by a tool, on either HTTP client"""
+    if isinstance(error, BackendUnavailableError):
+        return _error_json(API_UNAVAILABLE_MESSAGE)
+    if isinstance(error, (requests.exceptions.Timeout, httpx.TimeoutException)):
+        return _error_json("API request timed out")
+    if isinstance(error, (requests.exceptions.ConnectionError, httpx.TransportError)):
+        return _error_json("Cannot connect to API server")
+    return _error_json(f"API call failed: {str(error)}")
+
+def _fetched_json(response, label: str) -> str:
+    """Result of a GET tool: the payload, or an error with the status"""
+    if response.status_code == 200:
+        print(f"✅ {label} retrieved successfully")
+        return json.dumps(response.json(), ensure_ascii=False, indent=2)
+    return _error_json(f"{label} unavailable. Status: {response.status_code}")
+
+def _new_ticket(user: Dict, title: str, description: str, issue_type: str, priority: str) -> Dict[str, Any]:
+    return {
+        "ticket_id": f"DLK{str(uuid.uuid4())[:6].upper()}",
+        "user_id": user['id'],
+        "issue_type": issue_type,
+        "priority": priority,
+        "title": title,
+        "description": description
+    }
+
+def _ticket_created_json(response, ticket_data: Dict[str, Any]) -> str:
+    if response.status_code in [200, 201]:
+        print(f"✅ Support ticket created successfully")
+        return json.dumps({
+            "success": True,
+            "message": f"Support ticket created successfully with ID: {ticket_data['ticket_id']}",
+            "ticket": response.json()
+        }, ensure_ascii=False, indent=2)
+    return _error_json(f"Failed to create ticket. Status: {response.status_code}")
+
+def _new_package_or_error(packages_response, new_package_id: str) -> Tuple[Optional[Dict], Optional[str]]:
+    """(package, None) when new_package_id can be chosen, (None, error result) otherwise"""
+    if packages_response.status_code != 200:
+        return None, json.dumps({"error": "Cannot verify package availability"}, ensure_ascii=False)
+
+    packages = packages_response.json()
+    new_package = next((pkg for pkg in packages if pkg.get('package_id') == new_package_id), None)
+    if not new_package:
+        return None, json.dumps({
+            "error": f"Package {new_package_id} not found",
+            "available_packages": [pkg.get('package_id') for pkg in packages]
+        }, ensure_ascii=False)
+    return new_package, None
+
+def _package_changed_json(response, user: Dict, new_package_id: str, new_package: Dict) -> str:
+    if response.status_code == 200:
+        print(f"✅ Package changed successfully")
+        return json.dumps({
+            "success": True,
+            "message": f"Package successfully changed to {new_package_id}",
+            "old_package_id": user.get('current_package_id'),
+            "new_package_id": new_package_id,
+            "new_package_details": {
+                "name": new_package.get('name', 'Unknown'),
+                "price": new_package.get('price', 0),
+                "data_limit_gb": new_package.get('data_limit_gb', 0),
+                "voice_minutes": new_package.get('voice_minutes', 0)
+            },
+            "updated_user": response.json()
+        }, ensure_ascii=False, indent=2)
+    return _error_json(f"Failed to change package. Status: {response.status_code}")
+
+def _user_update_fields(**fields: Optional[str]) -> Dict[str, str]:
+    """Only the fields that are provided"""
+    return {field: value for field, value in fields.items() if value is not None}
+
+def _user_updated_json(response, update_data: Dict[str, str]) -> str:
+    if response.status_code == 200:
+        print(f"✅ User info updated successfully")
+        return json.dumps({
+            "success": True,
+            "message": "User information updated successfully",
+            "updated_fields": update_data,
+            "updated_user": response.json()
+        }, ensure_ascii=False, indent=2)
+    return _error_json(f"Failed to update user info. Status: {response.status_code}")
 
 # ===== WORKING TOOLS (Keep your original working logic) =====
 
-@tool
-def get_user_package_info(phone_number: str) -> str:
-    """Get user's current package information, data/voice usage, remaining quotas, and package features."""
+def _get_user_info(phone_number: str, resource: str, label: str) -> str:
+    """GET /api/v1/user-info/{id}/{resource} for the user behind phone_number"""
     try:
-        print(f"🌐 Getting package info for: {phone_number}")
+        print(f"🌐 Getting {label.lower()} for: {phone_number}")
         user = find_user_by_identifier(phone_number)
         if not user:
-            return json.dumps({"error": f"User not found with phone number: {phone_number}"}, ensure_ascii=False)
+            return _user_not_found_json(phone_number)
 
-        response = requests.get(
-            f"{TELECOM_API_BASE_URL}/api/v1/user-info/{user['id']}/package",
-            timeout=API_TIMEOUT
+        response = telecom_api.get(
+            f"/api/v1/user-info/{user['id']}/{resource}",
+            endpoint=f"user_info.{resource}"
         )
-
-        if response.status_code == 200:
-            result = response.json()
-            print(f"✅ Package info retrieved successfully")
-            return json.dumps(result, ensure_ascii=False, indent=2)
-        else:
-            error_msg = f"Package info unavailable. Status: {response.status_code}"
-            print(f"❌ {error_msg}")
-            return json.dumps({"error": error_msg}, ensure_ascii=False)
-    except requests.exceptions.Timeout:
-        error_msg = "API request timed out"
-        print(f"❌ {error_msg}")
-        return json.dumps({"error": error_msg}, ensure_ascii=False)
-    except requests.exceptions.ConnectionError:
-        error_msg = "Cannot connect to API server"
-        print(f"❌ {error_msg}")
-        return json.dumps({"error": error_msg}, ensure_ascii=False)
+        return _fetched_json(response, label)
     except Exception as e:
-        error_msg = f"API call failed: {str(e)}"
-        print(f"❌ {error_msg}")
-        return json.dumps({"error": error_msg}, ensure_ascii=False)
+        return _tool_error_json(e)
+
+@tool
+def get_user_package_info(phone_number: str) -> str:
+    """Get user's current package information, data/voice usage, remaining quotas, and package features."""
+    return _get_user_info(phone_number, "package", "Package info")
 
 @tool
 def get_user_bill_info(phone_number: str) -> str:
     """Get user's billing information, payment history, outstanding balances, and payment status."""
-    try:
-        print(f"🌐 Getting bill info for: {phone_number}")
-        user = find_user_by_identifier(phone_number)
-        if not user:
-            return json.dumps({"error": f"User not found with phone number: {phone_number}"}, ensure_ascii=False)
-
-        response = requests.get(
-            f"{TELECOM_API_BASE_URL}/api/v1/user-info/{user['id']}/bills",
-            timeout=API_TIMEOUT
-        )
-
-        if response.status_code == 200:
-            result = response.json()
-            print(f"✅ Bill info retrieved successfully")
-            return json.dumps(result, ensure_ascii=False, indent=2)
-        else:
-            error_msg = f"Bill info unavailable. Status: {response.status_code}"
-            print(f"❌ {error_msg}")
-            return json.dumps({"error": error_msg}, ensure_ascii=False)
-    except Exception as e:
-        error_msg = f"API call failed: {str(e)}"
-        print(f"❌ {error_msg}")
-        return json.dumps({"error": error_msg}, ensure_ascii=False)
+    return _get_user_info(phone_number, "bills", "Bill info")
 
 @tool
 def get_user_support_tickets(phone_number: str) -> str:
     """Get user's support tickets, issue history, current problems, and resolution status."""
-    try:
-        print(f"🌐 Getting support tickets for: {phone_number}")
-        user = find_user_by_identifier(phone_number)
-        if not user:
-            return json.dumps({"error": f"User not found with phone number: {phone_number}"}, ensure_ascii=False)
-
-        response = requests.get(
-            f"{TELECOM_API_BASE_URL}/api/v1/user-info/{user['id']}/tickets",
-            timeout=API_TIMEOUT
-        )
-
-        if response.status_code == 200:
-            result = response.json()
-            print(f"✅ Support tickets retrieved successfully")
-            return json.dumps(result, ensure_ascii=False, indent=2)
-        else:
-            error_msg = f"Support tickets unavailable. Status: {response.status_code}"
-            print(f"❌ {error_msg}")
-            return json.dumps({"error": error_msg}, ensure_ascii=False)
-    except Exception as e:
-        error_msg = f"API call failed: {str(e)}"
-        print(f"❌ {error_msg}")
-        return json.dumps({"error": error_msg}, ensure_ascii=False)
+    return _get_user_info(phone_number, "tickets", "Support tickets")
 
 @tool
 def get_all_packages() -> str:
     """Get all available packages and plans that customers can choose from, including prices and features."""
     try:
         print("🌐 Getting all available packages")
-        response = requests.get(f"{TELECOM_API_BASE_URL}/api/v1/packages", timeout=API_TIMEOUT)
-
-        if response.status_code == 200:
-            result = response.json()
-            print(f"✅ Packages retrieved successfully")
-            return json.dumps(result, ensure_ascii=False, indent=2)
-        else:
-            error_msg = f"Packages unavailable. Status: {response.status_code}"
-            print(f"❌ {error_msg}")
-            return json.dumps({"error": error_msg}, ensure_ascii=False)
+        response = telecom_api.get("/api/v1/packages", endpoint="packages.list")
+        return _fetched_json(response, "Packages")
     except Exception as e:
-        error_msg = f"API call failed: {str(e)}"
-        print(f"❌ {error_msg}")
-        return json.dumps({"error": error_msg}, ensure_ascii=False)
+        return _tool_error_json(e)
 
 @tool
 def create_support_ticket(phone_number: str, title: str, description: str, issue_type: str = "teknik", priority: str = "orta") -> str:
@@ -203,42 +206,17 @@ def create_support_ticket(phone_number: str, title: str, description: str, issue
         print(f"🌐 Creating support ticket for: {phone_number}")
         user = find_user_by_identifier(phone_number)
         if not user:
-            return json.dumps({"error": f"User not found with phone number: {phone_number}"}, ensure_ascii=False)
-
-        import uuid
-        ticket_id = f"DLK{str(uuid.uuid4())[:6].upper()}"
-
-        ticket_data = {
-            "ticket_id": ticket_id,
-            "user_id": user['id'],
-            "issue_type": issue_type,
-            "priority": priority,
-            "title": title,
-            "description": description
-        }
-
-        response = requests.post(
-            f"{TELECOM_API_BASE_URL}/api/v1/tickets",
-            json=ticket_data,
-            timeout=API_TIMEOUT
-        )
+            return _user_not_found_json(phone_number)
 
-        if response.status_code in [200, 201]:
-            result = response.json()
-            print(f"✅ Support ticket created successfully")
-            return json.dumps({
-                "success": True,
-                "message": f"Support ticket created successfully with ID: {ticket_id}",
-                "ticket": result
-            }, ensure_ascii=False, indent=2)
-        else:
-            error_msg = f"Failed to create ticket. Status: {response.status_code}"
-            print(f"❌ {error_msg}")
-            return json.dumps({"error": error_msg}, ensure_ascii=False)
+        ticket_data = _new_ticket(user, title, description, issue_type, priority)
+        response = telecom_api.post(
+            "/api/v1/tickets",
+            endpoint="tickets.create",
+            json=ticket_data
+        )
+        return _ticket_created_json(response, ticket_data)
     except Exception as e:
-        error_msg = f"API call failed: {str(e)}"
-        print(f"❌ {error_msg}")
-        return json.dumps({"error": error_msg}, ensure_ascii=False)
+        return _tool_error_json(e)
 
 @tool
 def change_user_package(phone_number: str, new_package_id: str) -> str:
@@ -252,62 +230,24 @@ def change_user_package(phone_number: str, new_package_id: str) -> str:
         print(f"🔄 Changing package for {phone_number} to {new_package_id}")
         user = find_user_by_identifier(phone_number)
         if not user:
-            return json.dumps({"error": f"User not found with phone number: {phone_number}"}, ensure_ascii=False)
+            return _user_not_found_json(phone_number)
 
         # First, verify the new package exists
-        packages_response = requests.get(f"{TELECOM_API_BASE_URL}/api/v1/packages", timeout=API_TIMEOUT)
-        if packages_response.status_code != 200:
-            return json.dumps({"error": "Cannot verify package availability"}, ensure_ascii=False)
-
-        packages = packages_response.json()
-        package_exists = any(pkg.get('package_id') == new_package_id for pkg in packages)
-
-        if not package_exists:
-            return json.dumps({
-                "error": f"Package {new_package_id} not found",
-                "available_packages": [pkg.get('package_id') for pkg in packages]
-            }, ensure_ascii=False)
-
-        # Update user's package
-        update_data = {
-            "current_package_id": new_package_id
-        }
-
-        response = requests.put(
-            f"{TELECOM_API_BASE_URL}/api/v1/users/{user['id']}",
-            json=update_data,
-            timeout=API_TIMEOUT
+        packages_response = telecom_api.get("/api/v1/packages", endpoint="packages.list")
+        new_package, error = _new_package_or_error(packages_response, new_package_id)
+        if error:
+            return error
+
+        response = telecom_api.put(
+            f"/api/v1/users/{user['id']}",
+            endpoint="users.update",
+            json={"current_package_id": new_package_id}
         )
-
         if response.status_code == 200:
-            result = response.json()
-
-            # Get the new package details for confirmation
-            new_package = next((pkg for pkg in packages if pkg.get('package_id') == new_package_id), None)
-
-            print(f"✅ Package changed successfully")
-            return json.dumps({
-                "success": True,
-                "message": f"Package successfully changed to {new_package_id}",
-                "old_package_id": user.get('current_package_id'),
-                "new_package_id": new_package_id,
-                "new_package_details": {
-                    "name": new_package.get('name', 'Unknown') if new_package else 'Unknown',
-                    "price": new_package.get('price', 0) if new_package else 0,
-                    "data_limit_gb": new_package.get('data_limit_gb', 0) if new_package else 0,
-                    "voice_minutes": new_package.get('voice_minutes', 0) if new_package else 0
-                },
-                "updated_user": result
-            }, ensure_ascii=False, indent=2)
-        else:
-            error_msg = f"Failed to change package. Status: {response.status_code}"
-            print(f"❌ {error_msg}")
-            return json.dumps({"error": error_msg}, ensure_ascii=False)
-
+            user_resolver.invalidate(phone_number)
+        return _package_changed_json(response, user, new_package_id, new_package)
     except Exception as e:
-        error_msg = f"API call failed: {str(e)}"
-        print(f"❌ {error_msg}")
-        return json.dumps({"error": error_msg}, ensure_ascii=False)
+        return _tool_error_json(e)
 
 @tool
 def update_user_info(phone_number: str, email: str = None, address: str = None, city: str = None, first_name: str = None, last_name: str = None) -> str:
@@ -325,48 +265,135 @@ def update_user_info(phone_number: str, email: str = None, address: str = None,
         print(f"📝 Updating user info for: {phone_number}")
         user = find_user_by_identifier(phone_number)
         if not user:
-            return json.dumps({"error": f"User not found with phone number: {phone_number}"}, ensure_ascii=False)
-
-        # Prepare update data (only include fields that are provided)
-        update_data = {}
-        if email is not None:
-            update_data["email"] = email
-        if address is not None:
-            update_data["address"] = address
-        if city is not None:
-            update_data["city"] = city
-        if first_name is not None:
-            update_data["first_name"] = first_name
-        if last_name is not None:
-            update_data["last_name"] = last_name
+            return _user_not_found_json(phone_number)
 
+        update_data = _user_update_fields(email=email, address=address, city=city,
+                                          first_name=first_name, last_name=last_name)
         if not update_data:
             return json.dumps({"error": "No update fields provided"}, ensure_ascii=False)
 
-        response = requests.put(
-            f"{TELECOM_API_BASE_URL}/api/v1/users/{user['id']}",
-            json=update_data,
-            timeout=API_TIMEOUT
+        response = telecom_api.put(
+            f"/api/v1/users/{user['id']}",
+            endpoint="users.update",
+            json=update_data
+        )
+        if response.status_code == 200:
+            user_resolver.invalidate(phone_number)
+        return _user_updated_json(response, update_data)
+    except Exception as e:
+        return _tool_error_json(e)
+
+
+# ===== ASYNC TOOL IMPLEMENTATIONS (used by ainvoke on the async graph path) =====
+
+async def afind_user_by_identifier(identifier: str) -> Optional[Dict]:
+    """Async counterpart of find_user_by_identifier"""
+    return await user_resolver.aresolve(identifier)
+
+async def _aget_user_info(phone_number: str, resource: str, label: str) -> str:
+    """Async counterpart of _get_user_info"""
+    try:
+        print(f"🌐 Getting {label.lower()} for: {phone_number}")
+        user = await afind_user_by_identifier(phone_number)
+        if not user:
+            return _user_not_found_json(phone_number)
+
+        response = await async_telecom_api.get(
+            f"/api/v1/user-info/{user['id']}/{resource}",
+            endpoint=f"user_info.{resource}"
+        )
+        return _fetched_json(response, label)
+    except Exception as e:
+        return _tool_error_json(e)
+
+async def _aget_user_package_info(phone_number: str) -> str:
+    return await _aget_user_info(phone_number, "package", "Package info")
+
+async def _aget_user_bill_info(phone_number: str) -> str:
+    return await _aget_user_info(phone_number, "bills", "Bill info")
+
+async def _aget_user_support_tickets(phone_number: str) -> str:
+    return await _aget_user_info(phone_number, "tickets", "Support tickets")
+
+async def _aget_all_packages() -> str:
+    try:
+        print("🌐 Getting all available packages")
+        response = await async_telecom_api.get("/api/v1/packages", endpoint="packages.list")
+        return _fetched_json(response, "Packages")
+    except Exception as e:
+        return _tool_error_json(e)
+
+async def _acreate_support_ticket(phone_number: str, title: str, description: str, issue_type: str = "teknik", priority: str = "orta") -> str:
+    try:
+        print(f"🌐 Creating support ticket for: {phone_number}")
+        user = await afind_user_by_identifier(phone_number)
+        if not user:
+            return _user_not_found_json(phone_number)
+
+        ticket_data = _new_ticket(user, title, description, issue_type, priority)
+        response = await async_telecom_api.post(
+            "/api/v1/tickets",
+            endpoint="tickets.create",
+            json=ticket_data
         )
+        return _ticket_created_json(response, ticket_data)
+    except Exception as e:
+        return _tool_error_json(e)
 
+async def _achange_user_package(phone_number: str, new_package_id: str) -> str:
+    try:
+        print(f"🔄 Changing package for {phone_number} to {new_package_id}")
+        user = await afind_user_by_identifier(phone_number)
+        if not user:
+            return _user_not_found_json(phone_number)
+
+        packages_response = await async_telecom_api.get("/api/v1/packages", endpoint="packages.list")
+        new_package, error = _new_package_or_error(packages_response, new_package_id)
+        if error:
+            return error
+
+        response = await async_telecom_api.put(
+            f"/api/v1/users/{user['id']}",
+            endpoint="users.update",
+            json={"current_package_id": new_package_id}
+        )
         if response.status_code == 200:
-            result = response.json()
-            print(f"✅ User info updated successfully")
-            return json.dumps({
-                "success": True,
-                "message": "User information updated successfully",
-                "updated_fields": update_data,
-                "updated_user": result
-            }, ensure_ascii=False, indent=2)
-        else:
-            error_msg = f"Failed to update user info. Status: {response.status_code}"
-            print(f"❌ {error_msg}")
-            return json.dumps({"error": error_msg}, ensure_ascii=False)
+            await user_resolver.ainvalidate(phone_number)
+        return _package_changed_json(response, user, new_package_id, new_package)
+    except Exception as e:
+        return _tool_error_json(e)
+
+async def _aupdate_user_info(phone_number: str, email: str = None, address: str = None, city: str = None, first_name: str = None, last_name: str = None) -> str:
+    try:
+        print(f"📝 Updating user info for: {phone_number}")
+        user = await afind_user_by_identifier(phone_number)
+        if not user:
+            return _user_not_found_json(phone_number)
 
+        update_data = _user_update_fields(email=email, address=address, city=city,
+                                          first_name=first_name, last_name=last_name)
+        if not update_data:
+            return json.dumps({"error": "No update fields provided"}, ensure_ascii=False)
+
+        response = await async_telecom_api.put(
+            f"/api/v1/users/{user['id']}",
+            endpoint="users.update",
+            json=update_data
+        )
+        if response.status_code == 200:
+            await user_resolver.ainvalidate(phone_number)
+        return _user_updated_json(response, update_data)
     except Exception as e:
-        error_msg = f"API call failed: {str(e)}"
-        print(f"❌ {error_msg}")
-        return json.dumps({"error": error_msg}, ensure_ascii=False)
+        return _tool_error_json(e)
+
+# Give each tool a native coroutine so tool.ainvoke doesn't fall back to a thread
+get_user_package_info.coroutine = _aget_user_package_info
+get_user_bill_info.coroutine = _aget_user_bill_info
+get_user_support_tickets.coroutine = _aget_user_support_tickets
+get_all_packages.coroutine = _aget_all_packages
+create_support_ticket.coroutine = _acreate_support_ticket
+change_user_package.coroutine = _achange_user_package
+update_user_info.coroutine = _aupdate_user_info
 
 # List of available tools
 telecom_tools = [
@@ -390,312 +417,224 @@ TOOL_MAPPING = {
     "update_user_info": update_user_info
 }
 
-# LLM with tools bound
-llm_with_tools = llm.bind_tools(telecom_tools)
-
-# Simple tool calling prompt
-tool_calling_prompt = ChatPromptTemplate.from_messages([
-    ("system", """You are a telecom call center agent. Based on the customer's question, decide which tools to use.
-
-IMPORTANT: The customer's phone number is: {phone_number}
-
-Available tools:
-- get_user_package_info: For package details, usage, remaining data/minutes (needs phone number)
-- get_user_bill_info: For billing, payments, outstanding amounts (needs phone number)
-- get_user_support_tickets: For existing issues and ticket history (needs phone number)
-- get_all_packages: For available packages and pricing (doesn't need phone number)
-- create_support_ticket: To create new support tickets (needs phone number, title, description)
-- change_user_package: To change user's package (needs phone number, new_package_id)
-- update_user_info: To update customer information like email, address, etc. (needs phone number)
-
-If the customer asks about their personal information, ALWAYS use their phone number: {phone_number}
-
-Examples:
-- "What's my package?" → use get_user_package_info with phone_number: {phone_number}
-- "Show my bills" → use get_user_bill_info with phone_number: {phone_number}
-- "What packages are available?" → use get_all_packages (no phone needed)
-- "Change my package to PKG002" → use change_user_package with phone_number: {phone_number} and new_package_id: "PKG002"
-- "I want to switch to Temel Paket" → use get_all_packages first to find package ID, then change_user_package
-- "Update my email to new@email.com" → use update_user_info with phone_number: {phone_number} and email: "new@email.com"
-- "Create a complaint about slow internet" → use create_support_ticket with phone_number: {phone_number}
-
-For package changes:
-- If customer mentions package by name (like "Temel Paket"), you may need to use get_all_packages first to find the package_id
-- Always use the package_id (like PKG001, PKG002) for change_user_package tool"""),
-    ("human", "Customer question: {question}")
-])
+# Runs read-only tools concurrently, mutating tools in order
+tool_executor = ToolExecutor(TOOL_MAPPING)
+
+# Picks the tools to run for a question
+tool_selector = ToolSelector(TOOL_MAPPING)
+
+
+def _phone_from_history(conversation_history: List[Dict[str, str]]) -> Optional[str]:
+    """Find the most recent phone number the user typed in the last 5 messages"""
+    for msg in reversed(conversation_history[-5:]):
+        if msg.get("role") == "user":
+            historical_phone = extract_phone_number(msg.get("content", ""))
+            if historical_phone:
+                print(f"📱 Found phone number in conversation history: {historical_phone}")
+                return historical_phone
+    return None
+
+
+def _api_cache_key(user_identifier: str, question: str) -> str:
+    return hashlib.md5(f"{user_identifier}:{question}".encode()).hexdigest()
+
+
+def _is_cacheable(tool_results: Dict[str, Any]) -> bool:
+    """Cache only if at least one tool returned data rather than an error"""
+    try:
+        for tool_result in tool_results.values():
+            result_data = json.loads(tool_result) if isinstance(tool_result, str) else tool_result
+            if "error" not in result_data:
+                return True
+    except Exception:
+        pass  # Don't cache if there's an error
+    return False
+
+
+def _system_reply_state(state: GraphState, error: str, message: str) -> GraphState:
+    """The fixed reply is the turn's answer; the graph skips generation for it"""
+    updated_history = state.get("conversation_history", []) + [{"role": "assistant", "content": message}]
+    return {
+        **state,
+        "tool_results": {"error": json.dumps({
+            "error": error,
+            "message": message
+        }, ensure_ascii=False)},
+        "generation": message,
+        "conversation_history": updated_history
+    }
+
+
+def _api_unavailable_state(state: GraphState) -> GraphState:
+    print("❌ API not available")
+    return _system_reply_state(state, "api_unavailable", API_UNAVAILABLE_MESSAGE)
+
+
+def _phone_required_state(state: GraphState, conversation_history: List[Dict[str, str]]) -> GraphState:
+    # Check if we already asked for phone number recently
+    recent_requests = [msg for msg in conversation_history[-4:]
+                       if msg.get("content") and "telefon numaranızı belirtiniz" in msg.get("content", "")]
+
+    if recent_requests:
+        error_message = PHONE_STILL_REQUIRED_MESSAGE
+    else:
+        error_message = PHONE_REQUIRED_MESSAGE
+
+    print("❌ No phone number found in question or memory")
+
+    return _system_reply_state(state, "phone_number_required", error_message)
+
+
+def _function_call_failed_state(state: GraphState, error: Exception) -> GraphState:
+    print(f"❌ Error in function_calls_node: {error}")
+
+    # Return a proper error response
+    error_result = {
+        "error": "function_call_failed",
+        "message": f"Sistem hatası: {str(error)}"
+    }
+
+    return {
+        **state,
+        "tool_results": {"error": json.dumps(error_result, ensure_ascii=False)}
+    }
+
+
+def _user_identifier(state: GraphState) -> Tuple[Optional[str], Optional[str]]:
+    """
+    (phone number, user identifier) of the turn
+
+    The phone number comes from the question, the user context, the
+    conversation mapping or the history, in that order; the identifier is
+    the phone number or else a customer ID in the question.
+    """
+    question = state["question"]
+    user_context = state.get("user_context", {})
+
+    # ENHANCED PHONE NUMBER EXTRACTION WITH MEMORY
+    phone_number = extract_phone_number(question)
+    customer_id = extract_customer_id(question)
+
+    # Check user context from memory FIRST
+    if not phone_number and "phone_number" in user_context:
+        phone_number = user_context["phone_number"]
+        print(f"📱 Using cached phone number from memory: {phone_number}")
+
+    # Check conversation mapping (loaded with the turn's memory)
+    if not phone_number:
+        phone_number = state.get("memory_phone_number")
+        if phone_number:
+            print(f"📱 Retrieved phone from conversation mapping: {phone_number}")
+
+    # Check conversation history for phone numbers
+    if not phone_number:
+        phone_number = _phone_from_history(state.get("conversation_history", []))
+
+    # Use customer ID if no phone number
+    return phone_number, phone_number or customer_id
+
+
+def _identified_state(state: GraphState, phone_number: Optional[str]) -> GraphState:
+    # Link conversation to phone for future reference (saved with the turn's memory)
+    return {**state, "memory_phone_number": phone_number} if phone_number else state
+
+
+def _tool_results_state(state: GraphState, tool_results: Dict[str, Any], user_identifier: str) -> GraphState:
+    return {
+        **state,
+        "tool_results": tool_results,
+        "user_context": {**state.get("user_context", {}), "phone_number": user_identifier}
+    }
+
+
+def _cached_results_state(state: GraphState, cached_response, user_identifier: str) -> GraphState:
+    print("💾 Using cached API response")
+    return _tool_results_state(state, cached_response, user_identifier)
+
+
+def _completed_state(state: GraphState, tool_results: Dict[str, Any], user_identifier: str) -> GraphState:
+    print(f"📊 Function calls completed successfully. Used {len(tool_results)} tools.")
+    return _tool_results_state(state, tool_results, user_identifier)
+
+
+def _proposed_tool_calls(state: GraphState, user_identifier: str) -> Optional[List[ToolCall]]:
+    """Usable tool calls of the triage call, or None after announcing the LLM selection"""
+    tool_calls = tool_selector.proposed(state.get("proposed_tool_calls") or [], user_identifier)
+    if tool_calls is None:
+        print(f"🧠 LLM analyzing question with phone number: {user_identifier}")
+    return tool_calls
+
 
 @with_memory
 def function_calls_node(state: GraphState) -> GraphState:
     """Fixed dynamic function calls - maintains memory and working logic"""
     print("🔧 Fixed dynamic function calls with memory...")
 
-    question = state["question"]
-    conversation_id = state["conversation_id"]
-    user_context = state.get("user_context", {})
-    conversation_history = state.get("conversation_history", [])
+    try:
+        phone_number, user_identifier = _user_identifier(state)
+        if not user_identifier:
+            return _phone_required_state(state, state.get("conversation_history", []))
+        state = _identified_state(state, phone_number)
+
+        # Check cache first
+        cache_key = _api_cache_key(user_identifier, state["question"])
+        cached_response = redis_memory.get_cached_api_response(cache_key)
+        if cached_response:
+            return _cached_results_state(state, cached_response, user_identifier)
+
+        # Fail fast if recent tool calls (on any worker) found the API down
+        if not telecom_api.health.is_available():
+            return _api_unavailable_state(state)
+
+        # === DYNAMIC TOOL CALLING WITH FIXED CONTEXT ===
+        tool_calls = _proposed_tool_calls(state, user_identifier)
+        if tool_calls is None:
+            tool_calls = tool_selector.select(state["question"], user_identifier)
+        tool_results = tool_executor.execute(tool_calls)
+
+        # Cache the API response (only if successful)
+        if _is_cacheable(tool_results):
+            redis_memory.cache_api_response(cache_key, tool_results, ttl_minutes=5)
+            print("💾 API response cached")
+
+        return _completed_state(state, tool_results, user_identifier)
+
+    except Exception as e:
+        return _function_call_failed_state(state, e)
+
+
+@with_memory
+async def afunction_calls_node(state: GraphState) -> GraphState:
+    """Async counterpart of function_calls_node"""
+    print("🔧 Fixed dynamic function calls with memory...")
 
     try:
-        # ENHANCED PHONE NUMBER EXTRACTION WITH MEMORY
-        phone_number = extract_phone_number(question)
-        customer_id = extract_customer_id(question)
-
-        # Check user context from memory FIRST
-        if not phone_number and "phone_number" in user_context:
-            phone_number = user_context["phone_number"]
-            print(f"📱 Using cached phone number from memory: {phone_number}")
-
-        # Check conversation mapping from Redis
-        if not phone_number:
-            phone_number = redis_memory.get_phone_from_conversation(conversation_id)
-            if phone_number:
-                print(f"📱 Retrieved phone from conversation mapping: {phone_number}")
-
-        # Check conversation history for phone numbers
-        if not phone_number:
-            for msg in reversed(conversation_history[-5:]):  # Check last 5 messages
-                if msg.get("role") == "user":
-                    historical_phone = extract_phone_number(msg.get("content", ""))
-                    if historical_phone:
-                        phone_number = historical_phone
-                        print(f"📱 Found phone number in conversation history: {phone_number}")
-                        break
-
-        # Use customer ID if no phone number
-        user_identifier = phone_number or customer_id
-
-        if user_identifier:
-            # Link conversation to phone for future reference
-            if phone_number:
-                redis_memory.link_conversation_to_phone(conversation_id, phone_number)
-
-            # Create cache key for API response
-            cache_key = hashlib.md5(f"{user_identifier}:{question}".encode()).hexdigest()
-
-            # Check cache first
-            cached_response = redis_memory.get_cached_api_response(cache_key)
-            if cached_response:
-                print("💾 Using cached API response")
-                return {
-                    **state,
-                    "tool_results": cached_response,
-                    "user_context": {**user_context, "phone_number": user_identifier}
-                }
-
-            # Check if API is available
-            if not test_api_connection():
-                error_message = "API hizmetimiz şu anda kullanılamıyor. Lütfen daha sonra tekrar deneyiniz."
-                print("❌ API not available")
-                return {
-                    **state,
-                    "tool_results": {"error": json.dumps({
-                        "error": "api_unavailable",
-                        "message": error_message
-                    }, ensure_ascii=False)},
-                    "generation": error_message
-                }
-
-            # === DYNAMIC TOOL CALLING WITH FIXED CONTEXT ===
-            print(f"🧠 LLM analyzing question with phone number: {user_identifier}")
-
-            try:
-                # Give LLM the phone number context explicitly
-                response = llm_with_tools.invoke(
-                    tool_calling_prompt.format(
-                        question=question,
-                        phone_number=user_identifier
-                    )
-                )
-
-                print(f"🤖 LLM response has tool calls: {bool(hasattr(response, 'tool_calls') and response.tool_calls)}")
-
-                tool_results = {}
-
-                # Execute the tools the LLM decided to use
-                if hasattr(response, 'tool_calls') and response.tool_calls:
-                    for tool_call in response.tool_calls:
-                        tool_name = tool_call["name"]
-                        tool_args = tool_call["args"]
-
-                        print(f"🛠️ LLM chose tool: {tool_name} with args: {tool_args}")
-
-                        # ENSURE PHONE NUMBER IS ALWAYS PASSED
-                        if tool_name in ["get_user_package_info", "get_user_bill_info", "get_user_support_tickets", "create_support_ticket", "change_user_package", "update_user_info"]:
-                            if "phone_number" not in tool_args or not tool_args["phone_number"]:
-                                tool_args["phone_number"] = user_identifier
-                                print(f"📱 Added phone number to tool args: {user_identifier}")
-
-                        try:
-                            # Execute using the mapping
-                            if tool_name in TOOL_MAPPING:
-                                tool_func = TOOL_MAPPING[tool_name]
-                                result = tool_func.invoke(tool_args)
-                                tool_results[tool_name] = result
-                                print(f"✅ {tool_name} executed successfully")
-                            else:
-                                print(f"❌ Unknown tool: {tool_name}")
-                                tool_results[tool_name] = json.dumps({"error": f"Unknown tool: {tool_name}"}, ensure_ascii=False)
-
-                        except Exception as e:
-                            print(f"❌ Error executing {tool_name}: {e}")
-                            tool_results[tool_name] = json.dumps({"error": str(e)}, ensure_ascii=False)
-
-                # If no tools were called, use fallback logic (your original approach)
-                else:
-                    print("🤖 LLM didn't call tools, asking LLM again with simpler prompt")
-
-                    # Try a simpler prompt to force tool selection
-                    simple_prompt = f"""Based on this customer question: "{question}"
-                    
-                    Customer phone: {user_identifier}
-                    
-                    You MUST call one of these tools:
-                    - get_user_package_info (for package/usage questions)  
-                    - get_user_bill_info (for billing questions)
-                    - get_user_support_tickets (for support questions)
-                    - get_all_packages (for available packages)
-                    - change_user_package (for package changes)
-                    - update_user_info (for info updates)
-                    - create_support_ticket (for complaints)
-                    
-                    Call the most appropriate tool."""
-
-                    try:
-                        simple_response = llm_with_tools.invoke(simple_prompt)
-                        if hasattr(simple_response, 'tool_calls') and simple_response.tool_calls:
-                            for tool_call in simple_response.tool_calls:
-                                tool_name = tool_call["name"]
-                                tool_args = tool_call["args"]
-
-                                # Ensure phone number
-                                if tool_name in ["get_user_package_info", "get_user_bill_info", "get_user_support_tickets", "create_support_ticket", "change_user_package", "update_user_info"]:
-                                    if "phone_number" not in tool_args:
-                                        tool_args["phone_number"] = user_identifier
-
-                                if tool_name in TOOL_MAPPING:
-                                    tool_func = TOOL_MAPPING[tool_name]
-                                    result = tool_func.invoke(tool_args)
-                                    tool_results[tool_name] = result
-                                    break
-                        else:
-                            # Last resort - default to package info
-                            print("🤖 LLM still didn't call tools, using default package info")
-                            result = get_user_package_info.invoke({"phone_number": user_identifier})
-                            tool_results = {"get_user_package_info": result}
-                    except Exception as simple_error:
-                        print(f"❌ Simple prompt also failed: {simple_error}")
-                        # Ultimate fallback
-                        result = get_user_package_info.invoke({"phone_number": user_identifier})
-                        tool_results = {"get_user_package_info": result}
-
-            except Exception as llm_error:
-                print(f"❌ LLM error, trying one more time with forced tool selection: {llm_error}")
-
-                # Try one more time with even more explicit prompting
-                try:
-                    force_prompt = f"""You are a call center agent. Customer says: "{question}"
-                    
-                    Customer phone number: {user_identifier}
-                    
-                    You MUST use exactly ONE tool. Choose the best tool and call it:
-                    
-                    For package info → get_user_package_info
-                    For billing → get_user_bill_info  
-                    For support issues → get_user_support_tickets
-                    For seeing all packages → get_all_packages
-                    For changing package → change_user_package
-                    For updating info → update_user_info
-                    For new complaints → create_support_ticket
-                    
-                    Call the tool now."""
-
-                    force_response = llm_with_tools.invoke(force_prompt)
-
-                    if hasattr(force_response, 'tool_calls') and force_response.tool_calls:
-                        tool_call = force_response.tool_calls[0]  # Take first one
-                        tool_name = tool_call["name"]
-                        tool_args = tool_call["args"]
-
-                        # Ensure phone number
-                        if tool_name in ["get_user_package_info", "get_user_bill_info", "get_user_support_tickets", "create_support_ticket", "change_user_package", "update_user_info"]:
-                            if "phone_number" not in tool_args:
-                                tool_args["phone_number"] = user_identifier
-
-                        if tool_name in TOOL_MAPPING:
-                            tool_func = TOOL_MAPPING[tool_name]
-                            result = tool_func.invoke(tool_args)
-                            tool_results = {tool_name: result}
-                        else:
-                            # Final fallback
-                            result = get_user_package_info.invoke({"phone_number": user_identifier})
-                            tool_results = {"get_user_package_info": result}
-                    else:
-                        # Final fallback
-                        result = get_user_package_info.invoke({"phone_number": user_identifier})
-                        tool_results = {"get_user_package_info": result}
-
-                except Exception as force_error:
-                    print(f"❌ All LLM attempts failed: {force_error}")
-                    # Ultimate fallback
-                    result = get_user_package_info.invoke({"phone_number": user_identifier})
-                    tool_results = {"get_user_package_info": result}
-
-            # Cache the API response (only if successful)
-            try:
-                for tool_name, tool_result in tool_results.items():
-                    result_data = json.loads(tool_result) if isinstance(tool_result, str) else tool_result
-                    if "error" not in result_data:
-                        redis_memory.cache_api_response(cache_key, tool_results, ttl_minutes=5)
-                        print("💾 API response cached")
-                        break
-            except:
-                pass  # Don't cache if there's an error
-
-            # Update user context with phone number
-            updated_user_context = {**user_context, "phone_number": user_identifier}
-
-            print(f"📊 Function calls completed successfully. Used {len(tool_results)} tools.")
-
-            return {
-                **state,
-                "tool_results": tool_results,
-                "user_context": updated_user_context
-            }
-
-        else:
-            # Check if we already asked for phone number recently
-            recent_requests = [msg for msg in conversation_history[-4:]
-                             if msg.get("content") and "telefon numaranızı belirtiniz" in msg.get("content", "")]
-
-            if recent_requests:
-                error_message = "Telefon numaranızı hala alamadım. Lütfen açık bir şekilde belirtiniz: '0555 123 45 67'"
-            else:
-                error_message = "Kişisel bilgilerinize erişebilmem için telefon numaranızı belirtiniz. Örnek: 0555 123 45 67"
-
-            print("❌ No phone number found in question or memory")
-
-            return {
-                **state,
-                "tool_results": {"error": json.dumps({
-                    "error": "phone_number_required",
-                    "message": error_message
-                }, ensure_ascii=False)},
-                "generation": error_message
-            }
+        phone_number, user_identifier = _user_identifier(state)
+        if not user_identifier:
+            return _phone_required_state(state, state.get("conversation_history", []))
+        state = _identified_state(state, phone_number)
+
+        cache_key = _api_cache_key(user_identifier, state["question"])
+        cached_response = await async_redis_memory.get_cached_api_response(cache_key)
+        if cached_response:
+            return _cached_results_state(state, cached_response, user_identifier)
+
+        if not await async_telecom_api.health.ais_available():
+            return _api_unavailable_state(state)
+
+        tool_calls = _proposed_tool_calls(state, user_identifier)
+        if tool_calls is None:
+            tool_calls = await tool_selector.aselect(state["question"], user_identifier)
+        tool_results = await tool_executor.aexecute(tool_calls)
+
+        if _is_cacheable(tool_results):
+            await async_redis_memory.cache_api_response(cache_key, tool_results, ttl_minutes=5)
+            print("💾 API response cached")
+
+        return _completed_state(state, tool_results, user_identifier)
 
     except Exception as e:
-        print(f"❌ Error in function_calls_node: {e}")
-
-        # Return a proper error response
-        error_result = {
-            "error": "function_call_failed",
-            "message": f"Sistem hatası: {str(e)}"
-        }
-
-        return {
-            **state,
-            "tool_results": {"error": json.dumps(error_result, ensure_ascii=False)}
-        }
+        return _function_call_failed_state(state, e)
 
 # Test function
 """def test_memory_and_dynamic():
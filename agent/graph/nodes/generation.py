@@ -1,4 +1,8 @@
+import json
+
+from graph.budget import turn_budget
 from graph.chains.generation_chain import generation_chain
+from graph.messages import GENERATION_ERROR_MESSAGE
 from graph.memory.memory_nodes import with_memory
 from graph.state import GraphState
 from langchain_core.prompts import ChatPromptTemplate
@@ -35,205 +39,202 @@ Please provide a helpful response in Turkish based on the context and question a
 generation_chain = turkish_prompt | llm | StrOutputParser()
 
 
-@with_memory
-def generate_answer_node(state: GraphState) -> GraphState:
-    """Generate answer with memory - Always responds in Turkish"""
-    print("✍️ Generating answer...")
-
-    question = state["question"]
+def _build_context(state: GraphState) -> str:
+    """Build the generation context from memory, documents and tool results"""
     conversation_history = state.get("conversation_history", [])
     user_context = state.get("user_context", {})
 
-    try:
-        # Build context with memory
-        context_parts = []
-
-        # Add conversation history
-        if conversation_history:
-            recent_history = conversation_history[-4:]
-            history_text = "\n".join([f"{msg['role']}: {msg['content']}" for msg in recent_history])
-            context_parts.append(f"Conversation History:\n{history_text}")
-
-        # Add user context
-        if user_context:
-            user_info = []
-            if "phone_number" in user_context:
-                user_info.append(f"Phone: {user_context['phone_number']}")
-            if "name" in user_context:
-                user_info.append(f"Name: {user_context['name']}")
-            if "package" in user_context:
-                user_info.append(f"Package: {user_context['package']}")
-
-            if user_info:
-                context_parts.append(f"User Info: {', '.join(user_info)}")
-
-        # Add documents or tool results
-        if state.get("relevant_documents"):
-            doc_context = "\n".join([doc.page_content for doc in state["relevant_documents"]])
-            context_parts.append(f"Knowledge Base:\n{doc_context}")
-        elif state.get("tool_results"):
-            # Format tool results nicely
-            tool_results = state["tool_results"]
-            formatted_results = []
-
-            for tool_name, tool_result in tool_results.items():
-                if isinstance(tool_result, str):
-                    try:
-                        import json
-                        parsed_result = json.loads(tool_result)
-                        if "data" in parsed_result and parsed_result.get("success"):
-                            # Extract key information from successful API calls
-                            data = parsed_result["data"]
-                            formatted_results.append(
-                                f"API Response from {tool_name}: {json.dumps(data, ensure_ascii=False, indent=2)}")
-                        else:
-                            formatted_results.append(f"API Response from {tool_name}: {tool_result}")
-                    except:
+    context_parts = []
+
+    # Add conversation history
+    if conversation_history:
+        recent_history = conversation_history[-4:]
+        history_text = "\n".join([f"{msg['role']}: {msg['content']}" for msg in recent_history])
+        context_parts.append(f"Conversation History:\n{history_text}")
+
+    # Add user context
+    if user_context:
+        user_info = []
+        if "phone_number" in user_context:
+            user_info.append(f"Phone: {user_context['phone_number']}")
+        if "name" in user_context:
+            user_info.append(f"Name: {user_context['name']}")
+        if "package" in user_context:
+            user_info.append(f"Package: {user_context['package']}")
+
+        if user_info:
+            context_parts.append(f"User Info: {', '.join(user_info)}")
+
+    # Add documents or tool results
+    if state.get("relevant_documents"):
+        doc_context = "\n".join([doc.page_content for doc in state["relevant_documents"]])
+        context_parts.append(f"Knowledge Base:\n{doc_context}")
+    elif state.get("tool_results"):
+        # Format tool results nicely
+        tool_results = state["tool_results"]
+        formatted_results = []
+
+        for tool_name, tool_result in tool_results.items():
+            if isinstance(tool_result, str):
+                try:
+                    parsed_result = json.loads(tool_result)
+                    if "data" in parsed_result and parsed_result.get("success"):
+                        # Extract key information from successful API calls
+                        data = parsed_result["data"]
+                        formatted_results.append(
+                            f"API Response from {tool_name}: {json.dumps(data, ensure_ascii=False, indent=2)}")
+                    else:
                         formatted_results.append(f"API Response from {tool_name}: {tool_result}")
-                else:
+                except:
                     formatted_results.append(f"API Response from {tool_name}: {tool_result}")
+            else:
+                formatted_results.append(f"API Response from {tool_name}: {tool_result}")
 
-            if formatted_results:
-                context_parts.append(f"API Data:\n" + "\n".join(formatted_results))
+        if formatted_results:
+            context_parts.append(f"API Data:\n" + "\n".join(formatted_results))
 
-        full_context = "\n\n".join(context_parts) if context_parts else "No additional context available."
+    return "\n\n".join(context_parts) if context_parts else "No additional context available."
 
-        # Generate answer using the Turkish-focused chain
-        response = generation_chain.invoke({
-            "context": full_context,
-            "question": question
-        })
 
-        # Add assistant message to conversation history
-        updated_history = conversation_history + [{"role": "assistant", "content": response}]
+# Improved prompt for retries
+retry_prompt = ChatPromptTemplate.from_messages([
+    ("system", """You are a helpful Turkish telecom customer service agent. You MUST ALWAYS respond in Turkish.
 
-        print(f"Generated: {response[:100]}...")
+IMPORTANT: Your previous answer was not satisfactory. You need to provide a BETTER, more helpful response.
 
-        return {
-            **state,
-            "generation": response,
-            "conversation_history": updated_history
-        }
+Guidelines for improvement:
+- Be more specific and detailed
+- Provide clear actionable steps
+- Use the available data more effectively
+- Be more personalized to the customer
+- Ensure your response directly addresses their question"""),
 
-    except Exception as e:
-        print(f"❌ Error generating answer: {e}")
-        return {**state, "generation": "Üzgünüm, bir hata oluştu. Lütfen tekrar deneyiniz."}
+    ("human", """Context: {context}
 
+Current Question: {question}
 
-@with_memory
-def regenerate_answer_node(state: GraphState) -> GraphState:
-    """Regenerate a better answer when first attempt was graded poorly"""
-    print("🔄 Regenerating improved answer...")
+Previous Answer (that was not good enough): {previous_answer}
+
+Please provide an IMPROVED response in Turkish that better addresses the customer's needs.""")
+])
 
-    question = state["question"]
+retry_chain = retry_prompt | llm | StrOutputParser()
+
+
+def _generated_state(state: GraphState, context: str, response: str) -> GraphState:
+    # Add assistant message to conversation history
+    updated_history = state.get("conversation_history", []) + [{"role": "assistant", "content": response}]
+
+    print(f"Generated: {response[:100]}...")
+
+    return {
+        **state,
+        "generation": response,
+        "conversation_history": updated_history,
+        "tokens_used": turn_budget.charge(state, context, state["question"], response)
+    }
+
+
+def _regenerated_state(state: GraphState, context: str, improved_response: str) -> GraphState:
+    # Update conversation history - replace the last assistant message
     conversation_history = state.get("conversation_history", [])
-    user_context = state.get("user_context", {})
-    previous_answer = state.get("generation", "")
-    retry_count = state.get("retry_count", 0)
+    updated_history = conversation_history[:-1] if conversation_history and conversation_history[-1][
+        "role"] == "assistant" else conversation_history
+    updated_history = updated_history + [{"role": "assistant", "content": improved_response}]
 
-    try:
-        # Build context (same as before)
-        context_parts = []
-
-        # Add conversation history
-        if conversation_history:
-            recent_history = conversation_history[-4:]
-            history_text = "\n".join([f"{msg['role']}: {msg['content']}" for msg in recent_history])
-            context_parts.append(f"Conversation History:\n{history_text}")
-
-        # Add user context
-        if user_context:
-            user_info = []
-            if "phone_number" in user_context:
-                user_info.append(f"Phone: {user_context['phone_number']}")
-            if "name" in user_context:
-                user_info.append(f"Name: {user_context['name']}")
-            if "package" in user_context:
-                user_info.append(f"Package: {user_context['package']}")
-
-            if user_info:
-                context_parts.append(f"User Info: {', '.join(user_info)}")
-
-        # Add documents or tool results
-        if state.get("relevant_documents"):
-            doc_context = "\n".join([doc.page_content for doc in state["relevant_documents"]])
-            context_parts.append(f"Knowledge Base:\n{doc_context}")
-        elif state.get("tool_results"):
-            # Format tool results
-            tool_results = state["tool_results"]
-            formatted_results = []
-
-            for tool_name, tool_result in tool_results.items():
-                if isinstance(tool_result, str):
-                    try:
-                        import json
-                        parsed_result = json.loads(tool_result)
-                        if "data" in parsed_result and parsed_result.get("success"):
-                            data = parsed_result["data"]
-                            formatted_results.append(
-                                f"API Response from {tool_name}: {json.dumps(data, ensure_ascii=False, indent=2)}")
-                        else:
-                            formatted_results.append(f"API Response from {tool_name}: {tool_result}")
-                    except:
-                        formatted_results.append(f"API Response from {tool_name}: {tool_result}")
-                else:
-                    formatted_results.append(f"API Response from {tool_name}: {tool_result}")
+    print(f"Regenerated: {improved_response[:100]}...")
 
-            if formatted_results:
-                context_parts.append(f"API Data:\n" + "\n".join(formatted_results))
+    return {
+        **state,
+        "generation": improved_response,
+        "conversation_history": updated_history,
+        "needs_retry": False,
+        "retry_count": state.get("retry_count", 0) + 1,
+        "tokens_used": turn_budget.charge(
+            state, context, state["question"], state.get("generation", ""), improved_response
+        )
+    }
 
-        full_context = "\n\n".join(context_parts) if context_parts else "No additional context available."
 
-        # Create an improved prompt for retry
-        retry_prompt = ChatPromptTemplate.from_messages([
-            ("system", """You are a helpful Turkish telecom customer service agent. You MUST ALWAYS respond in Turkish.
+def _regeneration_failed_state(state: GraphState, error: Exception) -> GraphState:
+    print(f"❌ Error regenerating answer: {error}")
+    # If regeneration fails, keep the original answer
+    return {**state, "needs_retry": False, "retry_count": state.get("retry_count", 0) + 1}
 
-IMPORTANT: Your previous answer was not satisfactory. You need to provide a BETTER, more helpful response.
 
-Guidelines for improvement:
-- Be more specific and detailed
-- Provide clear actionable steps
-- Use the available data more effectively
-- Be more personalized to the customer
-- Ensure your response directly addresses their question"""),
+@with_memory
+def generate_answer_node(state: GraphState) -> GraphState:
+    """Generate answer with memory - Always responds in Turkish"""
+    print("✍️ Generating answer...")
 
-            ("human", """Context: {context}
+    try:
+        # Generate answer using the Turkish-focused chain
+        context = _build_context(state)
+        response = generation_chain.invoke({
+            "context": context,
+            "question": state["question"]
+        })
+        return _generated_state(state, context, response)
 
-Current Question: {question}
+    except Exception as e:
+        print(f"❌ Error generating answer: {e}")
+        return {**state, "generation": GENERATION_ERROR_MESSAGE}
 
-Previous Answer (that was not good enough): {previous_answer}
 
-Please provide an IMPROVED response in Turkish that better addresses the customer's needs.""")
-        ])
+@with_memory
+async def agenerate_answer_node(state: GraphState) -> GraphState:
+    """Async counterpart of generate_answer_node"""
+    print("✍️ Generating answer...")
+
+    try:
+        context = _build_context(state)
+        response = await generation_chain.ainvoke({
+            "context": context,
+            "question": state["question"]
+        })
+        return _generated_state(state, context, response)
 
-        retry_chain = retry_prompt | llm | StrOutputParser()
+    except Exception as e:
+        print(f"❌ Error generating answer: {e}")
+        return {**state, "generation": GENERATION_ERROR_MESSAGE}
+
+
+@with_memory
+def regenerate_answer_node(state: GraphState) -> GraphState:
+    """Regenerate a better answer when first attempt was graded poorly"""
+    print("🔄 Regenerating improved answer...")
 
+    try:
         # Generate improved answer
+        context = _build_context(state)
         improved_response = retry_chain.invoke({
-            "context": full_context,
-            "question": question,
-            "previous_answer": previous_answer
+            "context": context,
+            "question": state["question"],
+            "previous_answer": state.get("generation", "")
         })
+        return _regenerated_state(state, context, improved_response)
+
+    except Exception as e:
+        return _regeneration_failed_state(state, e)
 
-        # Update conversation history - replace the last assistant message
-        updated_history = conversation_history[:-1] if conversation_history and conversation_history[-1][
-            "role"] == "assistant" else conversation_history
-        updated_history = updated_history + [{"role": "assistant", "content": improved_response}]
 
-        print(f"Regenerated: {improved_response[:100]}...")
+@with_memory
+async def aregenerate_answer_node(state: GraphState) -> GraphState:
+    """Async counterpart of regenerate_answer_node"""
+    print("🔄 Regenerating improved answer...")
 
-        return {
-            **state,
-            "generation": improved_response,
-            "conversation_history": updated_history,
-            "needs_retry": False
-        }
+    try:
+        context = _build_context(state)
+        improved_response = await retry_chain.ainvoke({
+            "context": context,
+            "question": state["question"],
+            "previous_answer": state.get("generation", "")
+        })
+        return _regenerated_state(state, context, improved_response)
 
     except Exception as e:
-        print(f"❌ Error regenerating answer: {e}")
-        # If regeneration fails, keep the original answer
-        return {**state, "needs_retry": False}
+        return _regeneration_failed_state(state, e)
 
 # Export alias for backward compatibility
 generate = generate_answer_node
-regenerate = regenerate_answer_node
\ No newline at end of file
+regenerate = regenerate_answer_node
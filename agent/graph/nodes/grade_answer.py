@@ -1,43 +1,140 @@
+from graph.budget import turn_budget
 from graph.chains.answer_grader import answer_grader
+from graph.chains.answer_policy import answer_policy
 from graph.memory.memory_nodes import with_memory
 from graph.state import GraphState
 
+# Rank of a graded answer when picking the best one of a turn
+GOOD_ANSWER_RANK = 2
+LLM_POOR_ANSWER_RANK = 1
+LOCAL_POOR_ANSWER_RANK = 0
+
+
+def _graded_answer_state(state: GraphState, is_good: bool, retry: bool = True,
+                         rank: int = LLM_POOR_ANSWER_RANK) -> GraphState:
+    """
+    Record the grade and whether the answer should be regenerated
+
+    The graph decides whether the turn's budget allows the regeneration
+    (graph.budget); the best graded answer so far is kept for when it does not.
+    """
+    print(f"Answer grade: {'✅ Good' if is_good else '❌ Needs improvement'}")
+
+    rank = GOOD_ANSWER_RANK if is_good else rank
+    best = {}
+    # Later answers win ties, a regeneration is meant to improve on its predecessor
+    if rank >= state.get("best_answer_rank", LOCAL_POOR_ANSWER_RANK):
+        best = {
+            "best_generation": state.get("generation", ""),
+            "best_answer_grade": is_good,
+            "best_answer_rank": rank
+        }
+
+    needs_retry = not is_good and retry
+    if needs_retry:
+        print(f"🔄 Answer needs improvement (retries so far: {state.get('retry_count', 0)})")
+
+    return {
+        **state,
+        **best,
+        "answer_grade": is_good,
+        "needs_retry": needs_retry
+    }
+
+
+def _local_answer_grade(state: GraphState):
+    """State graded by the answer policy, or None when answer_grader must grade"""
+    check = answer_policy.check(
+        state["question"], state.get("generation", ""), cached=state.get("answer_cache_hit", False)
+    )
+    if check.grade is None:
+        return None
+
+    print(f"⚡ Local answer check: {check.reason}")
+    return _graded_answer_state(state, check.grade, retry=check.retry, rank=LOCAL_POOR_ANSWER_RANK)
+
+
+def _llm_graded_answer_state(state: GraphState, grade_result) -> GraphState:
+    graded = _graded_answer_state(state, grade_result.binary_score.lower() == "yes")  # Convert string to bool
+    tokens_used = turn_budget.charge(state, state["question"], state["generation"], grade_result.reasoning)
+    return {**graded, "tokens_used": tokens_used}
+
+
+def _grading_failed_state(state: GraphState, error: Exception) -> GraphState:
+    """Default to good on error; the prompt was still sent, so it is charged"""
+    print(f"❌ Error grading answer: {error}")
+    graded = _graded_answer_state(state, True)
+    return {**graded, "tokens_used": turn_budget.charge(state, state["question"], state["generation"])}
+
 
 @with_memory  # Add this decorator
 def grade_answer_node(state: GraphState) -> GraphState:
     """Grade the generated answer quality."""
     print("📊 Grading answer quality...")
 
-    question = state["question"]
-    generation = state["generation"]
-    retry_count = state.get("retry_count", 0)
+    local_state = _local_answer_grade(state)
+    if local_state is not None:
+        return local_state
 
     try:
         grade_result = answer_grader.invoke({
-            "question": question,
-            "generation": generation
+            "question": state["question"],
+            "generation": state["generation"]
         })
+        return _llm_graded_answer_state(state, grade_result)
 
-        is_good = grade_result.binary_score.lower() == "yes"  # Convert string to bool
-        print(f"Answer grade: {'✅ Good' if is_good else '❌ Needs improvement'}")
-
-        # If answer is bad and we haven't retried too much, mark for retry
-        if not is_good and retry_count < 2:  # Allow max 2 retries
-            print(f"🔄 Answer needs improvement, retry #{retry_count + 1}")
-            return {
-                **state,
-                "answer_grade": False,
-                "needs_retry": True,
-                "retry_count": retry_count + 1
-            }
-
-            # Answer is good OR we've tried enough times
-        return {
-            **state,
-            "answer_grade": is_good,
-            "needs_retry": False
-        }
+    except Exception as e:
+        return _grading_failed_state(state, e)
+
+
+@with_memory
+async def agrade_answer_node(state: GraphState) -> GraphState:
+    """Async counterpart of grade_answer_node"""
+    print("📊 Grading answer quality...")
+
+    local_state = _local_answer_grade(state)
+    if local_state is not None:
+        return local_state
+
+    try:
+        grade_result = await answer_grader.ainvoke({
+            "question": state["question"],
+            "generation": state["generation"]
+        })
+        return _llm_graded_answer_state(state, grade_result)
 
     except Exception as e:
-        print(f"❌ Error grading answer: {e}")
-        return {**state, "answer_grade": True, "needs_retry": False}  # Default to good on error
\ No newline at end of file
+        return _grading_failed_state(state, e)
+
+
+def _selected_answer_state(state: GraphState) -> GraphState:
+    best = state.get("best_generation")
+    if not best or best == state.get("generation"):
+        return {**state, "needs_retry": False}
+
+    print(f"🏁 Returning the best graded answer so far: {best[:100]}...")
+
+    # Replace the last assistant message, as regeneration does
+    conversation_history = state.get("conversation_history", [])
+    if conversation_history and conversation_history[-1]["role"] == "assistant":
+        conversation_history = conversation_history[:-1]
+
+    return {
+        **state,
+        "generation": best,
+        "answer_grade": state.get("best_answer_grade", False),
+        "conversation_history": conversation_history + [{"role": "assistant", "content": best}],
+        "needs_retry": False
+    }
+
+
+@with_memory
+def select_answer_node(state: GraphState) -> GraphState:
+    """End of the answer loop: answer with the best graded answer of the turn"""
+    return _selected_answer_state(state)
+
+
+@with_memory
+async def aselect_answer_node(state: GraphState) -> GraphState:
+    """Async counterpart of select_answer_node"""
+    return _selected_answer_state(state)
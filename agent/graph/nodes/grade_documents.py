@@ -1,7 +1,141 @@
 # from typing import Any, Dict
-from graph.chains.retrieval_grader import retrieval_grader
+import os
+from typing import Any, Dict, List, Tuple
+
+from dotenv import load_dotenv
+
+from graph.chains.retrieval_grader import GradeDocuments, retrieval_grader, batch_retrieval_grader
+from graph.retrieval.score_gate import score_gate
 from graph.state import GraphState
 
+load_dotenv()
+
+# Grade all documents in one structured call, falling back to concurrent
+# per-document calls for any document the batched answer does not cover
+BATCH_DOCUMENT_GRADING = os.getenv("BATCH_DOCUMENT_GRADING", "true").lower() == "true"
+RETRIEVAL_GRADER_MAX_CONCURRENCY = int(os.getenv("RETRIEVAL_GRADER_MAX_CONCURRENCY", "5"))
+
+# Grade of a document whose grading call failed
+NOT_RELEVANT = GradeDocuments(binary_score="no")
+
+
+def _is_relevant(score) -> bool:
+    grade = score.binary_score
+    if grade.lower() == "yes":
+        print("---GRADE: DOCUMENT RELEVANT---")
+        return True
+    print("---GRADE: DOCUMENT NOT RELEVANT---")
+    return False
+
+
+def _graded_documents_state(question: str, documents, scores: List[float], relevant: List[int]) -> GraphState:
+    filtered_docs = [documents[index] for index in relevant]
+    # relevant_documents and retrieval_grade drive the edge to generate
+    return {
+        "documents": filtered_docs,
+        "relevant_documents": filtered_docs,
+        "document_scores": [scores[index] for index in relevant] if scores else [],
+        "retrieval_grade": bool(filtered_docs),
+        "question": question
+    }
+
+
+def _lexical_match(document) -> bool:
+    """Ranked higher by the hybrid search's full-text side than by its vector side"""
+    text_rank = document.metadata.get("text_rank")
+    vector_rank = document.metadata.get("vector_rank")
+    return text_rank is not None and (vector_rank is None or text_rank < vector_rank)
+
+
+def _gate(documents, scores: List[float]) -> Tuple[List[int], List[int]]:
+    """Indices accepted on similarity alone, and indices the LLM must grade"""
+    if len(scores) != len(documents):
+        return [], list(range(len(documents)))
+
+    lexical = [_lexical_match(document) for document in documents]
+    accepted, ambiguous, rejected = score_gate.partition(scores, lexical)
+    if accepted or rejected:
+        print(f"🚦 Score gate: {len(accepted)} accepted, {len(rejected)} rejected, {len(ambiguous)} to grade")
+    return accepted, ambiguous
+
+
+def _numbered_documents(documents) -> str:
+    return "\n\n".join(f"[{index}] {d.page_content}" for index, d in enumerate(documents))
+
+
+def _grades_by_index(result, count: int) -> Dict[int, Any]:
+    """Usable grades of a batched result; unknown, repeated or malformed entries are dropped"""
+    grades = {}
+    for grade in result.grades:
+        if 0 <= grade.index < count and grade.index not in grades and grade.binary_score.lower() in ("yes", "no"):
+            grades[grade.index] = grade
+    return grades
+
+
+def _missing_indices(documents, grades: Dict[int, Any]) -> List[int]:
+    missing = [index for index in range(len(documents)) if index not in grades]
+    if grades and missing:
+        print(f"⚠️ Batched grading skipped {len(missing)} documents, grading them one by one")
+    return missing
+
+
+def _single_grade_inputs(question: str, documents, indices: List[int]) -> List[Dict[str, str]]:
+    return [{"question": question, "document": documents[index].page_content} for index in indices]
+
+
+def _usable_grades(scores: List[Any]) -> List[Any]:
+    """Per-document grades with failed calls graded not relevant"""
+    failed = [score for score in scores if isinstance(score, Exception)]
+    if failed:
+        print(f"⚠️ Grading {len(failed)} documents failed, treating them as not relevant: {failed[0]}")
+    return [NOT_RELEVANT if isinstance(score, Exception) else score for score in scores]
+
+
+def _grade(question: str, documents) -> List[Any]:
+    """One grade per document, in document order"""
+    grades: Dict[int, Any] = {}
+    if BATCH_DOCUMENT_GRADING and documents:
+        try:
+            result = batch_retrieval_grader.invoke({"question": question, "documents": _numbered_documents(documents)})
+            grades = _grades_by_index(result, len(documents))
+        except Exception as e:
+            print(f"⚠️ Batched document grading failed, grading one by one: {e}")
+
+    missing = _missing_indices(documents, grades)
+    if missing:
+        scores = retrieval_grader.batch(
+            _single_grade_inputs(question, documents, missing),
+            config={"max_concurrency": RETRIEVAL_GRADER_MAX_CONCURRENCY},
+            return_exceptions=True
+        )
+        grades.update(zip(missing, _usable_grades(scores)))
+
+    return [grades[index] for index in range(len(documents))]
+
+
+async def _agrade(question: str, documents) -> List[Any]:
+    """Async counterpart of _grade"""
+    grades: Dict[int, Any] = {}
+    if BATCH_DOCUMENT_GRADING and documents:
+        try:
+            result = await batch_retrieval_grader.ainvoke(
+                {"question": question, "documents": _numbered_documents(documents)}
+            )
+            grades = _grades_by_index(result, len(documents))
+        except Exception as e:
+            print(f"⚠️ Batched document grading failed, grading one by one: {e}")
+
+    missing = _missing_indices(documents, grades)
+    if missing:
+        scores = await retrieval_grader.abatch(
+            _single_grade_inputs(question, documents, missing),
+            config={"max_concurrency": RETRIEVAL_GRADER_MAX_CONCURRENCY},
+            return_exceptions=True
+        )
+        grades.update(zip(missing, _usable_grades(scores)))
+
+    return [grades[index] for index in range(len(documents))]
+
 
 def grade_documents(state: GraphState) -> GraphState: # Dict[str, Any]:
     """
@@ -15,21 +149,24 @@ def grade_documents(state: GraphState) -> GraphState: # Dict[str, Any]:
     print("---CHECK DOCUMENT RELEVANCE TO QUESTION---")
     question = state["question"]
     documents = state["documents"]
+    scores = state.get("document_scores") or []
 
-    filtered_docs = []
-    function_calls = False
+    accepted, ambiguous = _gate(documents, scores)
+    grades = _grade(question, [documents[index] for index in ambiguous])
+    relevant = sorted(accepted + [index for index, grade in zip(ambiguous, grades) if _is_relevant(grade)])
 
-    for d in documents:
-        score = retrieval_grader.invoke(
-            {"question": question, "document": d.page_content}
-        )
-        grade = score.binary_score
-        if grade.lower() == "yes":
-            print("---GRADE: DOCUMENT RELEVANT---")
-            filtered_docs.append(d)
-        else:
-            print("---GRADE: DOCUMENT NOT RELEVANT---")
-            function_calls = True
-            continue
-
-    return {"documents": filtered_docs, "question": question}
\ No newline at end of file
+    return _graded_documents_state(question, documents, scores, relevant)
+
+
+async def agrade_documents(state: GraphState) -> GraphState:
+    """Async counterpart of grade_documents"""
+    print("---CHECK DOCUMENT RELEVANCE TO QUESTION---")
+    question = state["question"]
+    documents = state["documents"]
+    scores = state.get("document_scores") or []
+
+    accepted, ambiguous = _gate(documents, scores)
+    grades = await _agrade(question, [documents[index] for index in ambiguous])
+    relevant = sorted(accepted + [index for index, grade in zip(ambiguous, grades) if _is_relevant(grade)])
+
+    return _graded_documents_state(question, documents, scores, relevant)
@@ -1,6 +1,14 @@
 from graph.chains.question_grader import question_grader
+from graph.chains.relevance_classifier import relevance_classifier
 from graph.state import GraphState
 from graph.memory.memory_nodes import with_memory
+from graph.nodes.question_common import grader_input, graded_state, local_grade
+
+
+def _llm_grade(state: GraphState, grade_result) -> bool:
+    is_relevant = grade_result.binary_score.lower() == "yes"
+    relevance_classifier.log(state["question"], is_relevant, "llm")
+    return is_relevant
 
 
 @with_memory  # Add this decorator
@@ -8,33 +16,32 @@ def grade_question_node(state: GraphState) -> GraphState:
     """Grade if the user question is relevant and answerable."""
     print("📝 Grading question relevance...")
 
-    question = state["question"]
-    conversation_history = state.get("conversation_history", [])
-
-    # Add context from conversation history
-    context = question
-    if conversation_history:
-        recent_history = conversation_history[-4:]
-        history_text = "\n".join([f"{msg['role']}: {msg['content']}" for msg in recent_history])
-        context = f"Previous conversation:\n{history_text}\n\nCurrent question: {question}"
+    classifier_grade = local_grade(state)
+    if classifier_grade is not None:
+        return graded_state(state, classifier_grade)
 
     try:
-        grade_result = question_grader.invoke({"question": context})
-        is_relevant = grade_result.binary_score.lower() == "yes"
+        grade_result = question_grader.invoke({"question": grader_input(state)})
+        return graded_state(state, _llm_grade(state, grade_result))
 
-        print(f"Question: '{question[:50]}...'")
-        print(f"Grade: {'✅ Relevant' if is_relevant else '❌ Not relevant'}")
+    except Exception as e:
+        print(f"❌ Error grading question: {e}")
+        return {**state, "question_grade": True}
 
-        # Add user message to conversation history
-        conversation_history = state.get("conversation_history", [])
-        updated_history = conversation_history + [{"role": "user", "content": question}]
 
-        return {
-            **state,
-            "question_grade": is_relevant,
-            "conversation_history": updated_history  # This will be saved by @with_memory
-        }
+@with_memory
+async def agrade_question_node(state: GraphState) -> GraphState:
+    """Async counterpart of grade_question_node"""
+    print("📝 Grading question relevance...")
+
+    classifier_grade = local_grade(state)
+    if classifier_grade is not None:
+        return graded_state(state, classifier_grade)
+
+    try:
+        grade_result = await question_grader.ainvoke({"question": grader_input(state)})
+        return graded_state(state, _llm_grade(state, grade_result))
 
     except Exception as e:
         print(f"❌ Error grading question: {e}")
-        return {**state, "question_grade": True}
\ No newline at end of file
+        return {**state, "question_grade": True}
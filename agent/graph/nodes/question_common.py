@@ -0,0 +1,69 @@
+"""
+Question handling shared by the grade_question, route_question and triage nodes
+"""
+from graph.chains.fast_router import fast_router, FastRoute
+from graph.chains.relevance_classifier import relevance_classifier
+from graph.state import GraphState
+
+
+def grader_input(state: GraphState) -> str:
+    """Question with recent conversation history as context"""
+    question = state["question"]
+    conversation_history = state.get("conversation_history", [])
+
+    # Add context from conversation history
+    context = question
+    if conversation_history:
+        recent_history = conversation_history[-4:]
+        history_text = "\n".join([f"{msg['role']}: {msg['content']}" for msg in recent_history])
+        context = f"Previous conversation:\n{history_text}\n\nCurrent question: {question}"
+    return context
+
+
+def local_grade(state: GraphState):
+    """Classifier grade, or None when the LLM must decide"""
+    relevant, confidence = relevance_classifier.grade(
+        state["question"], has_history=bool(state.get("conversation_history"))
+    )
+    if relevant is not None:
+        print(f"⚡ Local relevance grade ({confidence:.2f})")
+        relevance_classifier.log(state["question"], relevant, "classifier", confidence)
+    return relevant
+
+
+def graded_state(state: GraphState, is_relevant: bool) -> GraphState:
+    """State with the relevance grade and the question added to the history"""
+    question = state["question"]
+
+    print(f"Question: '{question[:50]}...'")
+    print(f"Grade: {'✅ Relevant' if is_relevant else '❌ Not relevant'}")
+
+    # Add user message to conversation history
+    conversation_history = state.get("conversation_history", [])
+    updated_history = conversation_history + [{"role": "user", "content": question}]
+
+    return {
+        **state,
+        "question_grade": is_relevant,
+        "conversation_history": updated_history  # This will be saved by @with_memory
+    }
+
+
+def fast_route(question: str) -> FastRoute:
+    """Rule-based route decision; datasource None when the LLM must decide"""
+    decision = fast_router.classify(question)
+    if decision.datasource:
+        print(f"⚡ Rule route ({decision.confidence:.2f}, {', '.join(decision.rules)})")
+    return decision
+
+
+def routed_state(state: GraphState, datasource: str) -> GraphState:
+    """State with the chosen datasource"""
+    print(f"Question: '{state['question'][:50]}...'")
+    print(f"Route: {datasource}")
+
+    return {
+        **state,
+        "datasource": datasource,
+        "needs_function_call": datasource == "function_calls"
+    }
@@ -1,9 +1,17 @@
+from graph.messages import REJECTION_MESSAGE
 from graph.state import GraphState
+
+
 def reject_question_node(state: GraphState) -> GraphState:
     """Handle rejected questions."""
     print("❌ Question rejected")
 
     return {
         **state,
-        "generation": "Üzgünüm, bu soruyu anlayamadım. Telecom hizmetlerimiz hakkında bir soru sorabilir misiniz?"
-    }
\ No newline at end of file
+        "generation": REJECTION_MESSAGE
+    }
+
+
+async def areject_question_node(state: GraphState) -> GraphState:
+    """Async counterpart of reject_question_node"""
+    return reject_question_node(state)
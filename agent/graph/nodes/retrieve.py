@@ -1,43 +1,106 @@
 # graph/nodes/retrieve.py
-from langchain_postgres import PGVector
-from langchain_ollama import OllamaEmbeddings
+from graph.chains.fast_router import fast_router
+from graph.retrieval import retrieval_service, reranker
 from graph.state import GraphState
-import os
-from dotenv import load_dotenv
 
-load_dotenv()
+
+def _retrieved_state(state: GraphState, results) -> GraphState:
+    documents = [document for document, _ in results]
+    scores = [score for _, score in results]
+
+    print(f"📄 Retrieved {len(documents)} documents (similarity {', '.join(f'{s:.2f}' for s in scores)})")
+    return {**state, "documents": documents, "document_scores": scores}
 
 
 def retrieve_documents_node(state: GraphState) -> GraphState:
-    """Retrieve documents from PGVector"""
+    """Retrieve candidates from PGVector (hybrid lexical + vector search) and keep the reranked top"""
+    if state.get("documents_prefetched"):
+        print(f"♻️ Using {len(state.get('documents', []))} prefetched documents")
+        return state
+
     print("🗂️ Retrieving documents...")
 
     question = state["question"]
 
     try:
-        # Create retriever locally to avoid circular import
-        embeddings = OllamaEmbeddings(
-            model="nomic-embed-text",  # or "all-minilm" or other embedding models
-            base_url="http://localhost:11434"  # default Ollama URL
-        )
-        vectorstore = PGVector(
-            embeddings=embeddings,
-            collection_name=os.getenv("COLLECTION_NAME", "telecom_docs"),
-            connection=os.getenv("POSTGRES_CONNECTION"),
-            use_jsonb=True,
-        )
-
-        retriever = vectorstore.as_retriever(search_kwargs={"k": 5})
-        documents = retriever.invoke(question)
-
-        print(f"📄 Retrieved {len(documents)} documents")
-        return {**state, "documents": documents}
+        results = retrieval_service.retrieve_with_scores(question, k=reranker.candidates)
+        return _retrieved_state(state, reranker.rerank(question, results))
 
     except Exception as e:
         print(f"❌ Error retrieving documents: {e}")
         # Return empty documents instead of failing
-        return {**state, "documents": []}
+        return {**state, "documents": [], "document_scores": []}
+
+
+async def aretrieve_documents_node(state: GraphState) -> GraphState:
+    """Async counterpart of retrieve_documents_node"""
+    if state.get("documents_prefetched"):
+        print(f"♻️ Using {len(state.get('documents', []))} prefetched documents")
+        return state
+
+    print("🗂️ Retrieving documents...")
+
+    question = state["question"]
+
+    try:
+        results = await retrieval_service.aretrieve_with_scores(question, k=reranker.candidates)
+        return _retrieved_state(state, reranker.rerank(question, results))
+
+    except Exception as e:
+        print(f"❌ Error retrieving documents: {e}")
+        return {**state, "documents": [], "document_scores": []}
+
+
+def _skips_prefetch(state: GraphState) -> bool:
+    """Questions the fast router already sends to function_calls need no documents"""
+    if fast_router.classify(state["question"], record=False).datasource == "function_calls":
+        print("⏭️ Skipping prefetch: personal account question")
+        return True
+    return False
+
+
+def prefetch_documents_node(state: GraphState) -> GraphState:
+    """
+    Speculative retrieval, run while the question is still being graded and routed
+
+    The result is used by retrieve if the question turns out to be a
+    knowledge base question, and discarded otherwise. Only a successful
+    prefetch is marked; after a failure retrieve tries again.
+    """
+    if _skips_prefetch(state):
+        return state
+
+    print("🗂️ Prefetching documents...")
+
+    question = state["question"]
+
+    try:
+        results = retrieval_service.retrieve_with_scores(question, k=reranker.candidates)
+        return {**_retrieved_state(state, reranker.rerank(question, results)), "documents_prefetched": True}
+
+    except Exception as e:
+        print(f"❌ Error prefetching documents: {e}")
+        return state
+
+
+async def aprefetch_documents_node(state: GraphState) -> GraphState:
+    """Async counterpart of prefetch_documents_node"""
+    if _skips_prefetch(state):
+        return state
+
+    print("🗂️ Prefetching documents...")
+
+    question = state["question"]
+
+    try:
+        results = await retrieval_service.aretrieve_with_scores(question, k=reranker.candidates)
+        return {**_retrieved_state(state, reranker.rerank(question, results)), "documents_prefetched": True}
+
+    except Exception as e:
+        print(f"❌ Error prefetching documents: {e}")
+        return state
 
 
 # Export for your existing import pattern
-retrieve = retrieve_documents_node
\ No newline at end of file
+retrieve = retrieve_documents_node
+aretrieve = aretrieve_documents_node
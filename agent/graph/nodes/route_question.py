@@ -1,4 +1,6 @@
+from graph.chains.fast_router import fast_router
 from graph.chains.router import question_router
+from graph.nodes.question_common import fast_route, routed_state
 from graph.state import GraphState
 
 
@@ -7,20 +9,40 @@ def route_question_node(state: GraphState) -> GraphState:
     print("🎯 Routing question...")
 
     question = state["question"]
+    decision = fast_route(question)
+    if decision.datasource and not fast_router.should_audit():
+        fast_router.log(question, decision)
+        return routed_state(state, decision.datasource)
 
     try:
         route_result = question_router.invoke({"question": question})
-        datasource = route_result.datasource
+        fast_router.log(question, decision, route_result.datasource)
+        return routed_state(state, decision.datasource or route_result.datasource)
 
-        print(f"Question: '{question[:50]}...'")
-        print(f"Route: {datasource}")
+    except Exception as e:
+        print(f"❌ Error routing question: {e}")
+        if decision.datasource:
+            return routed_state(state, decision.datasource)
+        return {**state, "datasource": "vectorstore"}
+
+
+async def aroute_question_node(state: GraphState) -> GraphState:
+    """Async counterpart of route_question_node"""
+    print("🎯 Routing question...")
+
+    question = state["question"]
+    decision = fast_route(question)
+    if decision.datasource and not fast_router.should_audit():
+        fast_router.log(question, decision)
+        return routed_state(state, decision.datasource)
 
-        return {
-            **state,
-            "datasource": datasource,
-            "needs_function_call": datasource == "function_calls"
-        }
+    try:
+        route_result = await question_router.ainvoke({"question": question})
+        fast_router.log(question, decision, route_result.datasource)
+        return routed_state(state, decision.datasource or route_result.datasource)
 
     except Exception as e:
         print(f"❌ Error routing question: {e}")
-        return {**state, "datasource": "vectorstore"}
\ No newline at end of file
+        if decision.datasource:
+            return routed_state(state, decision.datasource)
+        return {**state, "datasource": "vectorstore"}
@@ -0,0 +1,93 @@
+from typing import Any, Dict, List
+
+from graph.chains.fast_router import fast_router
+from graph.chains.relevance_classifier import relevance_classifier
+from graph.chains.triage import triage_chain
+from graph.memory.memory_nodes import with_memory
+from graph.nodes.question_common import fast_route, grader_input, graded_state, local_grade, routed_state
+from graph.state import GraphState
+
+
+def _proposed_calls(triage_result) -> List[Dict[str, Any]]:
+    """Proposed tool calls in the LLM tool call format function_calls_node reads"""
+    if triage_result.datasource != "function_calls":
+        return []
+    return [{"name": call.name, "args": dict(call.args)} for call in triage_result.tool_calls]
+
+
+def _triaged_state(state: GraphState, is_relevant: bool, datasource: str,
+                   proposed_tool_calls: List[Dict[str, Any]]) -> GraphState:
+    if proposed_tool_calls:
+        print(f"🛠️ Proposed tools: {', '.join(call['name'] for call in proposed_tool_calls)}")
+
+    graded = graded_state(state, is_relevant)
+    return {**routed_state(graded, datasource), "proposed_tool_calls": proposed_tool_calls}
+
+
+def _local_triage(state: GraphState, classifier_grade, decision):
+    """Triage without the LLM when the local grade rejects or both local decisions are made"""
+    if classifier_grade is False:
+        return _triaged_state(state, False, decision.datasource or "vectorstore", [])
+    if classifier_grade is not None and decision.datasource:
+        fast_router.log(state["question"], decision)
+        return _triaged_state(state, True, decision.datasource, [])
+    return None
+
+
+def _llm_triaged_state(state: GraphState, classifier_grade, decision, triage_result) -> GraphState:
+    """Local decisions take precedence over the LLM's, as in the three-call pipeline"""
+    question = state["question"]
+
+    is_relevant = classifier_grade
+    if is_relevant is None:
+        is_relevant = triage_result.binary_score.lower() == "yes"
+        relevance_classifier.log(question, is_relevant, "llm")
+
+    fast_router.log(question, decision, triage_result.datasource)
+    datasource = decision.datasource or triage_result.datasource
+    proposed_tool_calls = _proposed_calls(triage_result) if datasource == "function_calls" else []
+    return _triaged_state(state, is_relevant, datasource, proposed_tool_calls)
+
+
+def _triage_failed_state(state: GraphState, classifier_grade, decision, error: Exception) -> GraphState:
+    print(f"❌ Error triaging question: {error}")
+    is_relevant = True if classifier_grade is None else classifier_grade
+    return _triaged_state(state, is_relevant, decision.datasource or "vectorstore", [])
+
+
+@with_memory
+def triage_node(state: GraphState) -> GraphState:
+    """Grade, route and pick tools for the question with one LLM call"""
+    print("🧭 Triaging question...")
+
+    classifier_grade = local_grade(state)
+    decision = fast_route(state["question"])
+    local_state = _local_triage(state, classifier_grade, decision)
+    if local_state is not None:
+        return local_state
+
+    try:
+        triage_result = triage_chain.invoke({"question": grader_input(state)})
+        return _llm_triaged_state(state, classifier_grade, decision, triage_result)
+
+    except Exception as e:
+        return _triage_failed_state(state, classifier_grade, decision, e)
+
+
+@with_memory
+async def atriage_node(state: GraphState) -> GraphState:
+    """Async counterpart of triage_node"""
+    print("🧭 Triaging question...")
+
+    classifier_grade = local_grade(state)
+    decision = fast_route(state["question"])
+    local_state = _local_triage(state, classifier_grade, decision)
+    if local_state is not None:
+        return local_state
+
+    try:
+        triage_result = await triage_chain.ainvoke({"question": grader_input(state)})
+        return _llm_triaged_state(state, classifier_grade, decision, triage_result)
+
+    except Exception as e:
+        return _triage_failed_state(state, classifier_grade, decision, e)
@@ -0,0 +1,22 @@
+"""
+Knowledge base retrieval used by the retrieve node
+"""
+
+from .service import retrieval_service, RetrievalService
+from .embedding_cache import CachedEmbeddings, normalize_question
+from .answer_cache import answer_cache, SemanticAnswerCache
+from .score_gate import score_gate, ScoreGate
+from .reranker import reranker, Reranker
+
+__all__ = [
+    'retrieval_service',
+    'RetrievalService',
+    'CachedEmbeddings',
+    'normalize_question',
+    'answer_cache',
+    'SemanticAnswerCache',
+    'score_gate',
+    'ScoreGate',
+    'reranker',
+    'Reranker'
+]
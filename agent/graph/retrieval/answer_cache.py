@@ -0,0 +1,285 @@
+"""
+Semantic cache of graded answers to general (vectorstore) questions.
+
+A general question's answer depends only on the question and the knowledge
+base, so once an answer has passed grading it is stored with the question's
+embedding in a small pgvector table with an HNSW index. A later question
+whose embedding is within ANSWER_CACHE_SIMILARITY_THRESHOLD cosine
+similarity gets that answer straight away, skipping retrieval, document
+grading, generation and answer grading.
+
+Entries are tagged with a KB version: KB_VERSION, the embedding model and
+dimension, and a fingerprint of the collection's document ids. Re-ingesting
+the collection or bumping KB_VERSION makes every older entry unreachable,
+and stale or expired rows are purged whenever the fingerprint is refreshed.
+
+Questions about the caller's own account are never cached, and neither
+are questions with earlier turns in the conversation: generation puts the
+recent history into the prompt, so their answers may depend on it
+(graph/nodes/answer_cache.py).
+"""
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import text
+
+from graph.chains.personal_patterns import (
+    CUSTOMER_ID_PATTERN, PERSONAL_PRONOUN_PATTERN, PHONE_PATTERN, POSSESSIVE_PATTERN
+)
+from graph.metrics import metrics
+from graph.retrieval.embedding_cache import normalize_question
+from graph.retrieval.service import retrieval_service, RetrievalService
+from graph.retrieval.vector_index import vector_literal
+
+load_dotenv()
+
+# Configuration
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+ANSWER_CACHE_SIMILARITY_THRESHOLD = float(os.getenv("ANSWER_CACHE_SIMILARITY_THRESHOLD", "0.95"))
+ANSWER_CACHE_TTL_HOURS = float(os.getenv("ANSWER_CACHE_TTL_HOURS", "24"))
+ANSWER_CACHE_KB_REFRESH_SECONDS = float(os.getenv("ANSWER_CACHE_KB_REFRESH_SECONDS", "300"))
+KB_VERSION = os.getenv("KB_VERSION", "1")
+
+ANSWER_CACHE_TABLE = "telecom_answer_cache"
+
+# Long numbers and remaining quota on top of the shared personal patterns
+# (identifiers, pronouns, possessive account nouns); matched on the
+# normalized question
+PERSONAL_DETAIL_PATTERN = re.compile(r"\d{7,}|\b(?:kalan|kaldı)\b")
+
+_KB_FINGERPRINT_SQL = """
+    SELECT count(*), md5(coalesce(string_agg(e.id::text, ',' ORDER BY e.id::text), ''))
+    FROM langchain_pg_embedding e
+    JOIN langchain_pg_collection c ON e.collection_id = c.uuid
+    WHERE c.name = :collection_name
+"""
+
+_LOOKUP_SQL = f"""
+    SELECT question, answer, 1 - (embedding <=> CAST(:embedding AS vector)) AS similarity
+    FROM {ANSWER_CACHE_TABLE}
+    WHERE kb_version = :kb_version
+      AND created_at > now() - make_interval(secs => :ttl_seconds)
+    ORDER BY embedding <=> CAST(:embedding AS vector)
+    LIMIT 1
+"""
+
+_STORE_SQL = f"""
+    INSERT INTO {ANSWER_CACHE_TABLE} (kb_version, question, answer, embedding)
+    VALUES (:kb_version, :question, :answer, CAST(:embedding AS vector))
+"""
+
+_PURGE_SQL = f"""
+    DELETE FROM {ANSWER_CACHE_TABLE}
+    WHERE kb_version <> :kb_version
+       OR created_at <= now() - make_interval(secs => :ttl_seconds)
+"""
+
+
+class SemanticAnswerCache:
+    """Nearest-neighbour lookup of previously graded answers, per KB version"""
+
+    def __init__(self,
+                 service: RetrievalService = retrieval_service,
+                 threshold: float = ANSWER_CACHE_SIMILARITY_THRESHOLD,
+                 ttl_hours: float = ANSWER_CACHE_TTL_HOURS,
+                 kb_version: str = KB_VERSION,
+                 enabled: bool = ANSWER_CACHE_ENABLED):
+        """
+        Args:
+            service: Retrieval service providing the embeddings and engines
+            threshold: Minimum cosine similarity for a hit
+            ttl_hours: Lifetime of a cached answer
+            kb_version: Manual KB version, bump it after editing documents in place
+            enabled: When False every lookup misses and nothing is stored
+        """
+        self.service = service
+        self.threshold = threshold
+        self.ttl_seconds = ttl_hours * 3600
+        self.kb_version_label = kb_version
+        self.enabled = enabled
+
+        self._table_ready = False
+        self._kb_version: Optional[str] = None
+        self._kb_checked_at = 0.0
+
+    @staticmethod
+    def is_cacheable_question(question: str) -> bool:
+        """Whether a question is general, i.e. not about the caller's own account"""
+        if PHONE_PATTERN.search(question) or CUSTOMER_ID_PATTERN.search(question):
+            return False
+        text = normalize_question(question)
+        return not any(pattern.search(text) for pattern in
+                       (PERSONAL_PRONOUN_PATTERN, POSSESSIVE_PATTERN, PERSONAL_DETAIL_PATTERN))
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit, miss, store and skip counts with the hit rate of lookups"""
+        counts = {name.split(".", 1)[1]: value for name, value in metrics.snapshot("answer_cache.").items()}
+        lookups = counts.get("hit", 0) + counts.get("miss", 0)
+        return {**counts, "hit_rate": counts.get("hit", 0) / lookups if lookups else 0.0}
+
+    # ========================================================================
+    # SYNC API
+    # ========================================================================
+
+    def lookup(self, question: str) -> Optional[Dict[str, Any]]:
+        """
+        Cached answer for the closest previously answered question
+
+        Returns:
+            Dict with 'question', 'answer' and 'similarity' on a hit, None otherwise
+        """
+        if not self.enabled:
+            return None
+
+        try:
+            embedding = self.service.embeddings.embed_query(question)
+            with self.service.engine.begin() as conn:
+                kb_version = self._refresh_kb_version(conn)
+                row = conn.execute(text(_LOOKUP_SQL), self._lookup_params(embedding, kb_version)).first()
+            return self._lookup_result(row)
+
+        except Exception as e:
+            metrics.incr("answer_cache.error")
+            print(f"❌ Error looking up answer cache: {e}")
+            return None
+
+    def store(self, question: str, answer: str) -> bool:
+        """Cache a graded answer to a general question"""
+        if not self.enabled:
+            return False
+
+        try:
+            embedding = self.service.embeddings.embed_query(question)
+            with self.service.engine.begin() as conn:
+                kb_version = self._refresh_kb_version(conn)
+                conn.execute(text(_STORE_SQL), self._store_params(question, answer, embedding, kb_version))
+
+            metrics.incr("answer_cache.store")
+            print(f"💾 Cached answer for: {question[:50]}")
+            return True
+
+        except Exception as e:
+            metrics.incr("answer_cache.error")
+            print(f"❌ Error storing answer cache: {e}")
+            return False
+
+    def _refresh_kb_version(self, conn) -> str:
+        """Current KB version, re-fingerprinting the collection when it is due"""
+        if not self._table_ready:
+            for statement in self._ddl():
+                conn.execute(text(statement))
+            self._table_ready = True
+
+        if self._kb_version is None or time.monotonic() >= self._kb_checked_at + ANSWER_CACHE_KB_REFRESH_SECONDS:
+            row = conn.execute(text(_KB_FINGERPRINT_SQL), {"collection_name": self.service.collection_name}).first()
+            self._set_kb_version(row)
+            conn.execute(text(_PURGE_SQL), {"kb_version": self._kb_version, "ttl_seconds": self.ttl_seconds})
+        return self._kb_version
+
+    # ========================================================================
+    # ASYNC API
+    # ========================================================================
+
+    async def alookup(self, question: str) -> Optional[Dict[str, Any]]:
+        """Async counterpart of lookup"""
+        if not self.enabled:
+            return None
+
+        try:
+            embedding = await self.service.embeddings.aembed_query(question)
+            async with self.service.async_engine.begin() as conn:
+                kb_version = await self._arefresh_kb_version(conn)
+                row = (await conn.execute(text(_LOOKUP_SQL), self._lookup_params(embedding, kb_version))).first()
+            return self._lookup_result(row)
+
+        except Exception as e:
+            metrics.incr("answer_cache.error")
+            print(f"❌ Error looking up answer cache: {e}")
+            return None
+
+    async def astore(self, question: str, answer: str) -> bool:
+        """Async counterpart of store"""
+        if not self.enabled:
+            return False
+
+        try:
+            embedding = await self.service.embeddings.aembed_query(question)
+            async with self.service.async_engine.begin() as conn:
+                kb_version = await self._arefresh_kb_version(conn)
+                await conn.execute(text(_STORE_SQL), self._store_params(question, answer, embedding, kb_version))
+
+            metrics.incr("answer_cache.store")
+            print(f"💾 Cached answer for: {question[:50]}")
+            return True
+
+        except Exception as e:
+            metrics.incr("answer_cache.error")
+            print(f"❌ Error storing answer cache: {e}")
+            return False
+
+    async def _arefresh_kb_version(self, conn) -> str:
+        if not self._table_ready:
+            for statement in self._ddl():
+                await conn.execute(text(statement))
+            self._table_ready = True
+
+        if self._kb_version is None or time.monotonic() >= self._kb_checked_at + ANSWER_CACHE_KB_REFRESH_SECONDS:
+            row = (await conn.execute(text(_KB_FINGERPRINT_SQL), {"collection_name": self.service.collection_name})).first()
+            self._set_kb_version(row)
+            await conn.execute(text(_PURGE_SQL), {"kb_version": self._kb_version, "ttl_seconds": self.ttl_seconds})
+        return self._kb_version
+
+    # ========================================================================
+    # HELPERS
+    # ========================================================================
+
+    def _ddl(self) -> List[str]:
+        dimensions = self.service.embeddings.dimensions
+        return [
+            f"""
+            CREATE TABLE IF NOT EXISTS {ANSWER_CACHE_TABLE} (
+                id BIGSERIAL PRIMARY KEY,
+                kb_version TEXT NOT NULL,
+                question TEXT NOT NULL,
+                answer TEXT NOT NULL,
+                embedding VECTOR({dimensions}) NOT NULL,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+            """,
+            f"""
+            CREATE INDEX IF NOT EXISTS {ANSWER_CACHE_TABLE}_embedding_idx
+            ON {ANSWER_CACHE_TABLE} USING hnsw (embedding vector_cosine_ops)
+            """,
+        ]
+
+    def _set_kb_version(self, fingerprint_row) -> None:
+        document_count, id_digest = fingerprint_row
+        embeddings = self.service.embeddings
+        kb_version = f"{self.kb_version_label}:{embeddings.model}:{embeddings.dimensions}:{document_count}:{id_digest[:12]}"
+        if self._kb_version is not None and kb_version != self._kb_version:
+            print(f"🔄 Knowledge base changed, answer cache reset ({kb_version})")
+            metrics.incr("answer_cache.kb_change")
+        self._kb_version = kb_version
+        self._kb_checked_at = time.monotonic()
+
+    def _lookup_params(self, embedding: List[float], kb_version: str) -> Dict[str, Any]:
+        return {"embedding": vector_literal(embedding), "kb_version": kb_version, "ttl_seconds": self.ttl_seconds}
+
+    @staticmethod
+    def _store_params(question: str, answer: str, embedding: List[float], kb_version: str) -> Dict[str, Any]:
+        return {"kb_version": kb_version, "question": question, "answer": answer, "embedding": vector_literal(embedding)}
+
+    def _lookup_result(self, row) -> Optional[Dict[str, Any]]:
+        if row is None or row.similarity < self.threshold:
+            metrics.incr("answer_cache.miss")
+            return None
+
+        metrics.incr("answer_cache.hit")
+        return {"question": row.question, "answer": row.answer, "similarity": float(row.similarity)}
+
+
+# Global answer cache instance
+answer_cache = SemanticAnswerCache()
@@ -0,0 +1,139 @@
+"""
+Query embedding cache in front of the Ollama embedding model.
+
+Questions are keyed by their normalized text (Turkish-aware casefolding,
+punctuation stripped, whitespace collapsed), so "Roaming ücretleri nedir?"
+and "roaming ücretleri nedir" share one embedding. Vectors are kept as
+little-endian float32 in an in-process LRU and in Redis, which shares them
+across workers.
+
+Keys carry the model name and vector dimension. Switching
+EMBEDDING_MODEL, or a model that starts returning a different dimension,
+therefore lands on fresh keys and old vectors simply expire.
+"""
+import hashlib
+import os
+import struct
+import unicodedata
+from typing import List, Optional
+
+from dotenv import load_dotenv
+from langchain_core.embeddings import Embeddings
+
+from graph.memory import redis_memory, async_redis_memory, TTLCache
+from graph.metrics import metrics
+
+load_dotenv()
+
+EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", "768"))
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "2048"))
+EMBEDDING_CACHE_LOCAL_TTL_SECONDS = float(os.getenv("EMBEDDING_CACHE_LOCAL_TTL_SECONDS", "3600"))
+
+# Python's lower() maps 'İ' to 'i' + combining dot and 'I' to 'i', both
+# wrong for Turkish
+_TURKISH_UPPER = str.maketrans({"İ": "i", "I": "ı"})
+
+
+def normalize_question(text: str) -> str:
+    """
+    Canonical form of a question for cache keys
+
+    Example: '  Roaming ÜCRETLERİ nedir?? ' -> 'roaming ücretleri nedir'
+    """
+    text = unicodedata.normalize("NFC", text).translate(_TURKISH_UPPER).casefold()
+    text = "".join(" " if unicodedata.category(char).startswith("P") else char for char in text)
+    return " ".join(text.split())
+
+
+def pack_vector(vector: List[float]) -> bytes:
+    return struct.pack(f"<{len(vector)}f", *vector)
+
+
+def unpack_vector(data: bytes) -> List[float]:
+    return list(struct.unpack(f"<{len(data) // 4}f", data))
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper caching embed_query results; documents are not cached"""
+
+    def __init__(self,
+                 embeddings: Embeddings,
+                 model: str,
+                 dimensions: int = EMBEDDING_DIMENSIONS,
+                 max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES,
+                 local_ttl_seconds: float = EMBEDDING_CACHE_LOCAL_TTL_SECONDS):
+        """
+        Args:
+            embeddings: The underlying embedding model
+            model: Model name, part of every cache key
+            dimensions: Expected vector dimension, part of every cache key
+            max_entries: Size of the in-process LRU
+            local_ttl_seconds: Lifetime of in-process entries
+        """
+        self.embeddings = embeddings
+        self.model = model
+        self.dimensions = dimensions
+        self._local = TTLCache(max_entries=max_entries, ttl_seconds=local_ttl_seconds)
+
+    def cache_key(self, text: str) -> str:
+        digest = hashlib.sha1(normalize_question(text).encode("utf-8")).hexdigest()
+        return f"{self.model}:{self.dimensions}:{digest}"
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.embeddings.aembed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self.cache_key(text)
+        vector = self._lookup_local(key)
+        if vector is None:
+            vector = self._from_redis(key, redis_memory.get_cached_embedding(key))
+        if vector is not None:
+            return vector
+
+        metrics.incr("embedding_cache.miss")
+        vector = self.embeddings.embed_query(text)
+        key = self._store_local(text, vector)
+        redis_memory.cache_embedding(key, pack_vector(vector))
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        key = self.cache_key(text)
+        vector = self._lookup_local(key)
+        if vector is None:
+            vector = self._from_redis(key, await async_redis_memory.get_cached_embedding(key))
+        if vector is not None:
+            return vector
+
+        metrics.incr("embedding_cache.miss")
+        vector = await self.embeddings.aembed_query(text)
+        key = self._store_local(text, vector)
+        await async_redis_memory.cache_embedding(key, pack_vector(vector))
+        return vector
+
+    def _lookup_local(self, key: str) -> Optional[List[float]]:
+        vector = self._local.get(key)
+        if vector is not None:
+            metrics.incr("embedding_cache.local.hit")
+        return vector
+
+    def _from_redis(self, key: str, data: Optional[bytes]) -> Optional[List[float]]:
+        """Unpacked vector from a Redis value, ignoring values of the wrong size"""
+        if not data or len(data) != 4 * self.dimensions:
+            return None
+        metrics.incr("embedding_cache.redis.hit")
+        vector = unpack_vector(data)
+        self._local.set(key, vector)
+        return vector
+
+    def _store_local(self, text: str, vector: List[float]) -> str:
+        """Cache a fresh vector locally, returning its (possibly re-versioned) key"""
+        if len(vector) != self.dimensions:
+            print(f"⚠️ {self.model} returned {len(vector)}-dim embeddings, expected {self.dimensions}; re-keying cache")
+            self.dimensions = len(vector)
+            self._local.clear()
+        key = self.cache_key(text)
+        self._local.set(key, vector)
+        return key
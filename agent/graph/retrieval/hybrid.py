@@ -0,0 +1,125 @@
+"""
+Hybrid lexical + vector search over the knowledge base.
+
+Questions about USSD codes ("*264#"), package names ("Gold") and tariff
+codes hinge on exact tokens that embeddings blur. One SQL statement takes
+the pgvector top candidates and the full-text top candidates of the
+collection, and fuses the two rankings with reciprocal-rank fusion (RRF),
+so the hybrid search costs a single round trip.
+
+The document text is indexed twice in one tsvector: with the Turkish
+snowball configuration (stemming, Turkish stop words: "paketleri" matches
+"paket") and with the simple configuration (no stemming, so "264" or
+"gold" match as written). Both sides are lower-cased by Postgres, so
+questions are sent as typed. Question terms are OR-ed: every matching term
+raises the rank, no single term is required.
+
+The expression GIN index is built by manage_vector_index.py build-text
+(and by json_to_postgres.py after a load); the query repeats the exact
+expression so the planner can use it.
+"""
+import os
+from typing import Any, Dict, List, Tuple
+
+from dotenv import load_dotenv
+from langchain_core.documents import Document
+
+from graph.retrieval.vector_index import EMBEDDING_TABLE, vector_literal
+
+load_dotenv()
+
+TEXT_SEARCH_CONFIG = os.getenv("TEXT_SEARCH_CONFIG", "turkish")
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))
+# RRF constant: larger values flatten the difference between top ranks
+HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))
+
+TEXT_INDEX_NAME = "idx_embedding_document_fts"
+
+TEXT_SEARCH_VECTOR = (
+    f"(to_tsvector('{TEXT_SEARCH_CONFIG}', coalesce(document, '')) "
+    f"|| to_tsvector('simple', coalesce(document, '')))"
+)
+
+CREATE_TEXT_INDEX_SQL = f"CREATE INDEX IF NOT EXISTS {TEXT_INDEX_NAME} ON {EMBEDDING_TABLE} USING gin ({TEXT_SEARCH_VECTOR})"
+
+
+def _or_query(config: str) -> str:
+    """tsquery matching any term of the question (plainto_tsquery AND-s them)"""
+    return f"replace(plainto_tsquery('{config}', :question)::text, ' & ', ' | ')::tsquery"
+
+
+HYBRID_SEARCH_SQL = f"""
+    WITH collection AS (
+        SELECT uuid FROM langchain_pg_collection WHERE name = :collection_name
+    ),
+    query AS (
+        SELECT {_or_query(TEXT_SEARCH_CONFIG)} || {_or_query('simple')} AS terms
+    ),
+    vector_hits AS (
+        SELECT id, row_number() OVER (ORDER BY distance) AS rank
+        FROM (
+            SELECT id, embedding <=> CAST(:embedding AS vector) AS distance
+            FROM {EMBEDDING_TABLE}
+            WHERE collection_id = (SELECT uuid FROM collection)
+            ORDER BY distance
+            LIMIT :candidates
+        ) nearest
+    ),
+    text_hits AS (
+        SELECT id, row_number() OVER (ORDER BY text_score DESC) AS rank
+        FROM (
+            SELECT id, ts_rank_cd({TEXT_SEARCH_VECTOR}, query.terms) AS text_score
+            FROM {EMBEDDING_TABLE}, query
+            WHERE collection_id = (SELECT uuid FROM collection)
+              AND {TEXT_SEARCH_VECTOR} @@ query.terms
+            ORDER BY text_score DESC
+            LIMIT :candidates
+        ) matching
+    ),
+    fused AS (
+        SELECT coalesce(v.id, t.id) AS id,
+               v.rank AS vector_rank,
+               t.rank AS text_rank,
+               coalesce(1.0 / (:rrf_k + v.rank), 0) + coalesce(1.0 / (:rrf_k + t.rank), 0) AS rrf_score
+        FROM vector_hits v FULL OUTER JOIN text_hits t ON v.id = t.id
+    )
+    SELECT e.id, e.document, e.cmetadata, f.vector_rank, f.text_rank, f.rrf_score,
+           1 - (e.embedding <=> CAST(:embedding AS vector)) AS similarity
+    FROM fused f JOIN {EMBEDDING_TABLE} e ON e.id = f.id
+    ORDER BY f.rrf_score DESC, similarity DESC
+    LIMIT :k
+"""
+
+
+def hybrid_search_params(question: str, embedding: List[float], collection_name: str, k: int,
+                         candidates: int = HYBRID_CANDIDATES, rrf_k: int = HYBRID_RRF_K) -> Dict[str, Any]:
+    """Bind parameters of HYBRID_SEARCH_SQL"""
+    return {
+        "collection_name": collection_name,
+        "question": question,
+        "embedding": vector_literal(embedding),
+        "candidates": max(candidates, k),
+        "rrf_k": rrf_k,
+        "k": k,
+    }
+
+
+def hybrid_results(rows) -> List[Tuple[Document, float]]:
+    """
+    (document, cosine similarity) pairs in fused order
+
+    The similarity stays the score, as the score gate is calibrated on it;
+    the fusion details are kept in the metadata (text_rank is set only for
+    full-text matches).
+    """
+    results = []
+    for row in rows:
+        metadata = dict(row.cmetadata or {})
+        metadata.update({
+            "rrf_score": float(row.rrf_score),
+            "vector_rank": row.vector_rank,
+            "text_rank": row.text_rank,
+        })
+        document = Document(id=str(row.id), page_content=row.document, metadata=metadata)
+        results.append((document, float(row.similarity)))
+    return results
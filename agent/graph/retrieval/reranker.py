@@ -0,0 +1,135 @@
+"""
+Local reranking between retrieval and document grading.
+
+The retrieve node over-fetches RETRIEVAL_CANDIDATES documents and the
+reranker keeps the few worth grading and putting into the generation
+prompt. Each candidate is scored on the CPU from what retrieval already
+returned, without another model call:
+
+- the cosine similarity pgvector computed for it
+- the IDF-weighted share of the question's terms it contains, where IDF is
+  taken over the candidate set and terms are compared by a Turkish-friendly
+  prefix stem ("faturamı" and "faturanız" both become "fatur")
+
+Documents are sorted by the weighted sum, and the list is cut at the first
+score drop larger than RERANK_SCORE_GAP, keeping between
+RERANK_MIN_DOCUMENTS and RETRIEVAL_K documents. Scores passed downstream
+stay the cosine similarity, which the score gate is calibrated on.
+"""
+import math
+import os
+from typing import List, Set, Tuple
+
+from dotenv import load_dotenv
+from langchain_core.documents import Document
+
+from graph.metrics import metrics
+from graph.retrieval.embedding_cache import normalize_question
+
+load_dotenv()
+
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "true").lower() == "true"
+RETRIEVAL_K = int(os.getenv("RETRIEVAL_K", "5"))
+RETRIEVAL_CANDIDATES = int(os.getenv("RETRIEVAL_CANDIDATES", "20"))
+RERANK_VECTOR_WEIGHT = float(os.getenv("RERANK_VECTOR_WEIGHT", "0.7"))
+RERANK_SCORE_GAP = float(os.getenv("RERANK_SCORE_GAP", "0.08"))
+RERANK_MIN_DOCUMENTS = int(os.getenv("RERANK_MIN_DOCUMENTS", "2"))
+
+# Turkish agglutinates suffixes; the first five letters are a cheap stem
+STEM_LENGTH = 5
+
+# Question words and fillers that say nothing about the topic
+STOP_WORDS = {
+    "acaba", "ama", "ben", "benim", "bana", "bir", "bu", "da", "de", "en", "gibi", "hangi",
+    "icin", "için", "ile", "ise", "kaç", "mi", "mı", "mu", "mü", "nasıl", "ne", "neden",
+    "nedir", "nerede", "o", "olan", "sen", "siz", "şu", "var", "ve", "veya", "ya", "yok",
+}
+
+RerankResult = List[Tuple[Document, float]]
+
+
+def terms(text: str) -> Set[str]:
+    """Stemmed content terms of a text"""
+    stems = set()
+    for token in normalize_question(text).split():
+        if token in STOP_WORDS:
+            continue
+        stems.add(token[:STEM_LENGTH] if token.isalpha() else token)
+    return stems
+
+
+class Reranker:
+    """Reorders retrieved documents and keeps the leading group"""
+
+    def __init__(self,
+                 vector_weight: float = RERANK_VECTOR_WEIGHT,
+                 score_gap: float = RERANK_SCORE_GAP,
+                 min_documents: int = RERANK_MIN_DOCUMENTS,
+                 max_documents: int = RETRIEVAL_K,
+                 enabled: bool = RERANK_ENABLED):
+        """
+        Args:
+            vector_weight: Weight of the cosine similarity; the term overlap gets the rest
+            score_gap: Score drop between neighbours at which the list is cut
+            min_documents: Documents always kept (when retrieved)
+            max_documents: Documents kept at most
+            enabled: When False, rerank only truncates to max_documents
+        """
+        self.vector_weight = vector_weight
+        self.score_gap = score_gap
+        self.min_documents = min_documents
+        self.max_documents = max_documents
+        self.enabled = enabled
+
+    @property
+    def candidates(self) -> int:
+        """How many documents retrieval should fetch for rerank"""
+        return max(RETRIEVAL_CANDIDATES, self.max_documents) if self.enabled else self.max_documents
+
+    def score(self, question: str, results: RerankResult) -> List[float]:
+        """Combined score of each (document, similarity) pair"""
+        question_terms = terms(question)
+        document_terms = [terms(document.page_content) for document, _ in results]
+
+        # Terms found in fewer candidates say more about a match
+        idf = {
+            term: math.log(1 + len(results) / (1 + sum(term in found for found in document_terms)))
+            for term in question_terms
+        }
+        total = sum(idf.values())
+
+        scores = []
+        for (_, similarity), found in zip(results, document_terms):
+            overlap = sum(idf[term] for term in question_terms & found) / total if total else 0.0
+            scores.append(self.vector_weight * similarity + (1 - self.vector_weight) * overlap)
+        return scores
+
+    def rerank(self, question: str, results: RerankResult) -> RerankResult:
+        """
+        The leading (document, similarity) pairs by combined score
+
+        The combined score is recorded as the 'rerank_score' metadata of
+        each kept document.
+        """
+        if not self.enabled or len(results) <= self.min_documents:
+            return results[:self.max_documents]
+
+        ranked = sorted(zip(self.score(question, results), results), key=lambda item: item[0], reverse=True)
+
+        kept = ranked[:max(self.min_documents, 1)]
+        for current in ranked[len(kept):self.max_documents]:
+            if kept[-1][0] - current[0] > self.score_gap:
+                break
+            kept.append(current)
+
+        for score, (document, _) in kept:
+            document.metadata["rerank_score"] = round(score, 4)
+
+        metrics.incr("rerank.candidates", len(results))
+        metrics.incr("rerank.kept", len(kept))
+        print(f"🎯 Reranked {len(results)} → {len(kept)} documents")
+        return [result for _, result in kept]
+
+
+# Global reranker instance
+reranker = Reranker()
@@ -0,0 +1,115 @@
+"""
+Similarity-score gate in front of the LLM document grader.
+
+pgvector already tells us how close each retrieved document is to the
+question. Documents at or above the accept threshold are taken as relevant
+and documents below the reject threshold as irrelevant, without asking the
+LLM; only the ambiguous band in between goes to retrieval_grader.
+
+Thresholds come from the calibration file written by
+calibrate_retrieval_gate.py (RETRIEVAL_GATE_PATH). Calibrated thresholds
+are only valid for the embedding model they were measured with, so a file
+for another model is ignored. Without a usable file the gate is disabled
+and every document goes to the LLM; RETRIEVAL_ACCEPT_SIMILARITY /
+RETRIEVAL_REJECT_SIMILARITY are only the defaults of a ScoreGate built
+directly.
+
+Documents the full-text side of the hybrid search ranked higher than the
+vector side are never rejected on similarity alone: an exact "*264#" match
+can embed far from the question and still answer it.
+"""
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from graph.metrics import metrics
+
+load_dotenv()
+
+RETRIEVAL_GATE_ENABLED = os.getenv("RETRIEVAL_GATE_ENABLED", "true").lower() == "true"
+RETRIEVAL_GATE_PATH = os.getenv("RETRIEVAL_GATE_PATH", "retrieval_gate.json")
+RETRIEVAL_ACCEPT_SIMILARITY = float(os.getenv("RETRIEVAL_ACCEPT_SIMILARITY", "0.85"))
+RETRIEVAL_REJECT_SIMILARITY = float(os.getenv("RETRIEVAL_REJECT_SIMILARITY", "0.55"))
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "nomic-embed-text")
+
+
+class ScoreGate:
+    """Splits retrieved documents into accepted, rejected and ambiguous by similarity"""
+
+    def __init__(self,
+                 accept_similarity: float = RETRIEVAL_ACCEPT_SIMILARITY,
+                 reject_similarity: float = RETRIEVAL_REJECT_SIMILARITY,
+                 enabled: bool = RETRIEVAL_GATE_ENABLED):
+        """
+        Args:
+            accept_similarity: Cosine similarity at or above which a document is relevant
+            reject_similarity: Cosine similarity below which a document is irrelevant
+            enabled: When False every document is ambiguous, i.e. LLM graded
+        """
+        self.accept_similarity = accept_similarity
+        self.reject_similarity = min(reject_similarity, accept_similarity)
+        self.enabled = enabled
+
+    @classmethod
+    def from_calibration(cls, path: str = RETRIEVAL_GATE_PATH, model: str = EMBEDDING_MODEL) -> "ScoreGate":
+        """Gate with calibrated thresholds, or a disabled gate without a usable file"""
+        calibration = load_calibration(path)
+        if not calibration:
+            print(f"⚠️ No retrieval gate calibration at {path}; every document goes to the LLM grader")
+            return cls(enabled=False)
+        if calibration.get("embedding_model") != model:
+            print(f"⚠️ Retrieval gate calibrated for {calibration.get('embedding_model')}, not {model}; "
+                  f"every document goes to the LLM grader")
+            return cls(enabled=False)
+        return cls(
+            accept_similarity=calibration["accept_similarity"],
+            reject_similarity=calibration["reject_similarity"]
+        )
+
+    def partition(self, scores: List[float],
+                  lexical: Optional[List[bool]] = None) -> Tuple[List[int], List[int], List[int]]:
+        """
+        Indices of accepted, ambiguous and rejected documents
+
+        Args:
+            scores: Cosine similarity of each retrieved document
+            lexical: Whether each document was found by its exact terms;
+                those below the reject threshold go to the LLM instead
+
+        Returns:
+            (accepted, ambiguous, rejected) index lists, each in retrieval order
+        """
+        if not self.enabled:
+            return [], list(range(len(scores))), []
+
+        accepted, ambiguous, rejected = [], [], []
+        for index, score in enumerate(scores):
+            if score >= self.accept_similarity:
+                accepted.append(index)
+            elif score < self.reject_similarity and not (lexical and lexical[index]):
+                rejected.append(index)
+            else:
+                ambiguous.append(index)
+
+        metrics.incr("retrieval_gate.accept", len(accepted))
+        metrics.incr("retrieval_gate.reject", len(rejected))
+        metrics.incr("retrieval_gate.llm", len(ambiguous))
+        return accepted, ambiguous, rejected
+
+
+def load_calibration(path: str) -> Optional[Dict]:
+    """Calibration written by calibrate_retrieval_gate.py, None if missing or unreadable"""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Could not read retrieval gate calibration {path}: {e}")
+        return None
+
+
+# Global score gate instance
+score_gate = ScoreGate.from_calibration()
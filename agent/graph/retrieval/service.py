@@ -0,0 +1,275 @@
+"""
+Long-lived retrieval service over the PGVector knowledge base.
+
+The embedding client, the SQLAlchemy engine and the PGVector store are built
+once per process and reused by every retrieve call, so a question no longer
+pays for a new engine, new Postgres connections and the store's setup DDL.
+The engine keeps a pre-pinged connection pool, and on psycopg 3 the
+similarity query is prepared server-side on each pooled connection.
+Each new connection also applies the tuned ANN search settings (see
+vector_index).
+
+Query embeddings go through CachedEmbeddings (see embedding_cache).
+retrieve_with_scores runs the hybrid lexical + vector search (see hybrid)
+unless HYBRID_SEARCH_ENABLED is off, and falls back to plain vector search
+if the hybrid query fails.
+
+The async engine is bound to the event loop it was created on, so it is
+rebuilt once per loop, like the async Redis and HTTP clients. The previous
+loop's engine is disposed on that loop if it still runs, or has its pool
+dropped if the loop is gone; aclose disposes the current one at shutdown.
+"""
+import asyncio
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from langchain_core.documents import Document
+from langchain_ollama import OllamaEmbeddings
+from langchain_postgres import PGVector
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from graph.metrics import metrics
+from graph.retrieval.embedding_cache import CachedEmbeddings
+from graph.retrieval.hybrid import HYBRID_SEARCH_SQL, hybrid_results, hybrid_search_params
+from graph.retrieval.vector_index import apply_search_settings, load_search_settings
+
+load_dotenv()
+
+# Configuration
+POSTGRES_CONNECTION = os.getenv("POSTGRES_CONNECTION")
+COLLECTION_NAME = os.getenv("COLLECTION_NAME", "telecom_docs")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "nomic-embed-text")
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+RETRIEVAL_K = int(os.getenv("RETRIEVAL_K", "5"))
+HYBRID_SEARCH_ENABLED = os.getenv("HYBRID_SEARCH_ENABLED", "true").lower() == "true"
+PGVECTOR_POOL_SIZE = int(os.getenv("PGVECTOR_POOL_SIZE", "5"))
+PGVECTOR_MAX_OVERFLOW = int(os.getenv("PGVECTOR_MAX_OVERFLOW", "10"))
+PGVECTOR_POOL_TIMEOUT = float(os.getenv("PGVECTOR_POOL_TIMEOUT", "5"))
+PGVECTOR_POOL_RECYCLE = int(os.getenv("PGVECTOR_POOL_RECYCLE", "1800"))
+PGVECTOR_CONNECT_TIMEOUT = int(os.getenv("PGVECTOR_CONNECT_TIMEOUT", "5"))
+# psycopg 3 prepares a query after this many executions on a connection;
+# 0 prepares on first use, an empty value disables prepared statements
+PGVECTOR_PREPARE_THRESHOLD = os.getenv("PGVECTOR_PREPARE_THRESHOLD", "0")
+RETRIEVAL_WARMUP_QUERY = os.getenv("RETRIEVAL_WARMUP_QUERY", "paket fiyatları nedir")
+
+
+class RetrievalService:
+    """Process-wide embeddings client, connection pool and vector store"""
+
+    def __init__(self,
+                 connection: Optional[str] = POSTGRES_CONNECTION,
+                 collection_name: str = COLLECTION_NAME,
+                 k: int = RETRIEVAL_K,
+                 hybrid: bool = HYBRID_SEARCH_ENABLED):
+        self.connection = connection
+        self.collection_name = collection_name
+        self.k = k
+        self.hybrid = hybrid
+
+        self._lock = threading.RLock()
+        self._embeddings: Optional[CachedEmbeddings] = None
+        self._engine: Optional[Engine] = None
+        self._vectorstore: Optional[PGVector] = None
+        self._async_engine: Optional[AsyncEngine] = None
+        self._async_vectorstore: Optional[PGVector] = None
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.search_settings = load_search_settings()
+
+    @property
+    def embeddings(self) -> CachedEmbeddings:
+        """Shared, query-caching Ollama client, keeping its HTTP connection alive"""
+        if self._embeddings is None:
+            with self._lock:
+                if self._embeddings is None:
+                    self._embeddings = CachedEmbeddings(
+                        OllamaEmbeddings(model=EMBEDDING_MODEL, base_url=OLLAMA_BASE_URL),
+                        model=EMBEDDING_MODEL
+                    )
+        return self._embeddings
+
+    def _engine_args(self) -> Dict[str, Any]:
+        """Pool settings shared by the sync and async engines"""
+        engine_args: Dict[str, Any] = {
+            "pool_size": PGVECTOR_POOL_SIZE,
+            "max_overflow": PGVECTOR_MAX_OVERFLOW,
+            "pool_timeout": PGVECTOR_POOL_TIMEOUT,
+            "pool_recycle": PGVECTOR_POOL_RECYCLE,
+            "pool_pre_ping": True,
+            "connect_args": {"connect_timeout": PGVECTOR_CONNECT_TIMEOUT},
+        }
+        # Server-side prepared statements are a psycopg 3 feature
+        if make_url(self.connection).get_driver_name() == "psycopg":
+            threshold = int(PGVECTOR_PREPARE_THRESHOLD) if PGVECTOR_PREPARE_THRESHOLD else None
+            engine_args["connect_args"]["prepare_threshold"] = threshold
+        return engine_args
+
+    def _listen_connect(self, engine: Engine) -> None:
+        """Apply the ANN search settings once per new pooled connection"""
+        if self.search_settings:
+            event.listen(engine, "connect", lambda dbapi_connection, _: apply_search_settings(
+                dbapi_connection, self.search_settings
+            ))
+
+    @property
+    def vectorstore(self) -> PGVector:
+        """Sync store, built once on the pooled engine"""
+        if self._vectorstore is None:
+            with self._lock:
+                if self._vectorstore is None:
+                    self._engine = create_engine(self.connection, **self._engine_args())
+                    self._listen_connect(self._engine)
+                    self._vectorstore = PGVector(
+                        embeddings=self.embeddings,
+                        collection_name=self.collection_name,
+                        connection=self._engine,
+                        use_jsonb=True,
+                    )
+        return self._vectorstore
+
+    @property
+    def async_vectorstore(self) -> PGVector:
+        """Async store for the running event loop, built once per loop"""
+        loop = asyncio.get_running_loop()
+        if self._async_vectorstore is None or self._async_loop is not loop:
+            self._retire_async_engine()
+            self._async_engine = create_async_engine(self.connection, **self._engine_args())
+            self._listen_connect(self._async_engine.sync_engine)
+            self._async_vectorstore = PGVector(
+                embeddings=self.embeddings,
+                collection_name=self.collection_name,
+                connection=self._async_engine,
+                use_jsonb=True,
+            )
+            self._async_loop = loop
+        return self._async_vectorstore
+
+    def _retire_async_engine(self) -> None:
+        """Release the pool of the previous event loop's async engine"""
+        engine, loop = self._async_engine, self._async_loop
+        if engine is None:
+            return
+        if loop is not None and loop.is_running() and not loop.is_closed():
+            # Its connections belong to that loop, so it must dispose them
+            asyncio.run_coroutine_threadsafe(engine.dispose(), loop)
+        else:
+            # The loop is gone and its connections with it; drop the pool without touching them
+            engine.sync_engine.dispose(close=False)
+
+    @property
+    def engine(self) -> Engine:
+        """Pooled sync engine, shared with the vector store"""
+        self.vectorstore
+        return self._engine
+
+    @property
+    def async_engine(self) -> AsyncEngine:
+        """Pooled async engine of the running event loop"""
+        self.async_vectorstore
+        return self._async_engine
+
+    def search(self, question: str, k: Optional[int] = None) -> List[Document]:
+        """Top-k documents for question"""
+        return self.vectorstore.similarity_search(question, k=k or self.k)
+
+    async def asearch(self, question: str, k: Optional[int] = None) -> List[Document]:
+        """Async counterpart of search"""
+        return await self.async_vectorstore.asimilarity_search(question, k=k or self.k)
+
+    def search_with_scores(self, question: str, k: Optional[int] = None) -> List[Tuple[Document, float]]:
+        """Top-k documents with their cosine similarity (1 - pgvector's cosine distance)"""
+        results = self.vectorstore.similarity_search_with_score(question, k=k or self.k)
+        return [(document, 1 - distance) for document, distance in results]
+
+    async def asearch_with_scores(self, question: str, k: Optional[int] = None) -> List[Tuple[Document, float]]:
+        """Async counterpart of search_with_scores"""
+        results = await self.async_vectorstore.asimilarity_search_with_score(question, k=k or self.k)
+        return [(document, 1 - distance) for document, distance in results]
+
+    def hybrid_search_with_scores(self, question: str, k: Optional[int] = None) -> List[Tuple[Document, float]]:
+        """Top-k documents by RRF of vector and full-text ranks, with their cosine similarity"""
+        embedding = self.embeddings.embed_query(question)
+        params = hybrid_search_params(question, embedding, self.collection_name, k or self.k)
+        with self.engine.connect() as conn:
+            rows = conn.execute(text(HYBRID_SEARCH_SQL), params).all()
+        return hybrid_results(rows)
+
+    async def ahybrid_search_with_scores(self, question: str, k: Optional[int] = None) -> List[Tuple[Document, float]]:
+        """Async counterpart of hybrid_search_with_scores"""
+        embedding = await self.embeddings.aembed_query(question)
+        params = hybrid_search_params(question, embedding, self.collection_name, k or self.k)
+        async with self.async_engine.connect() as conn:
+            rows = (await conn.execute(text(HYBRID_SEARCH_SQL), params)).all()
+        return hybrid_results(rows)
+
+    def retrieve_with_scores(self, question: str, k: Optional[int] = None) -> List[Tuple[Document, float]]:
+        """Hybrid search when enabled, vector search otherwise or if it fails"""
+        if self.hybrid:
+            try:
+                return self.hybrid_search_with_scores(question, k)
+            except Exception as e:
+                print(f"⚠️ Hybrid search failed, using vector search: {e}")
+                metrics.incr("retrieval.hybrid_fallback")
+        return self.search_with_scores(question, k)
+
+    async def aretrieve_with_scores(self, question: str, k: Optional[int] = None) -> List[Tuple[Document, float]]:
+        """Async counterpart of retrieve_with_scores"""
+        if self.hybrid:
+            try:
+                return await self.ahybrid_search_with_scores(question, k)
+            except Exception as e:
+                print(f"⚠️ Hybrid search failed, using vector search: {e}")
+                metrics.incr("retrieval.hybrid_fallback")
+        return await self.asearch_with_scores(question, k)
+
+    def warm_up(self) -> bool:
+        """
+        Build the store and run one search at startup
+
+        This loads the embedding model in Ollama, opens a pooled connection
+        and prepares the similarity query, so the first caller does not pay
+        for any of it.
+
+        Returns:
+            True if the warm-up search succeeded
+        """
+        try:
+            self.retrieve_with_scores(RETRIEVAL_WARMUP_QUERY, k=1)
+            print("✅ Retrieval service warmed up")
+            return True
+        except Exception as e:
+            print(f"⚠️ Retrieval warm-up failed: {e}")
+            return False
+
+    async def awarm_up(self) -> bool:
+        """Async counterpart of warm_up, for the running loop's engine"""
+        try:
+            await self.aretrieve_with_scores(RETRIEVAL_WARMUP_QUERY, k=1)
+            print("✅ Retrieval service warmed up")
+            return True
+        except Exception as e:
+            print(f"⚠️ Retrieval warm-up failed: {e}")
+            return False
+
+    def close(self) -> None:
+        """Dispose the sync engine's pool"""
+        with self._lock:
+            if self._engine is not None:
+                self._engine.dispose()
+            self._engine = None
+            self._vectorstore = None
+
+    async def aclose(self) -> None:
+        """Dispose the running event loop's async engine pool"""
+        if self._async_engine is not None and self._async_loop is asyncio.get_running_loop():
+            await self._async_engine.dispose()
+            self._async_engine = None
+            self._async_vectorstore = None
+            self._async_loop = None
+
+
+# Global retrieval service instance
+retrieval_service = RetrievalService()
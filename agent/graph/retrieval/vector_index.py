@@ -0,0 +1,109 @@
+"""
+ANN index settings for the knowledge base embeddings table.
+
+manage_vector_index.py builds the index after the data is loaded, sized
+from the collection, and tunes the search-time knob (hnsw.ef_search or
+ivfflat.probes) against a recall target and a latency budget. The tuned
+value is saved to VECTOR_INDEX_PATH. Every pooled retrieval connection
+applies it when it is opened, so each similarity query runs with it.
+PGVECTOR_EF_SEARCH / PGVECTOR_IVFFLAT_PROBES override the file.
+"""
+import json
+import math
+import os
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+VECTOR_INDEX_PATH = os.getenv("VECTOR_INDEX_PATH", "vector_index.json")
+PGVECTOR_EF_SEARCH = os.getenv("PGVECTOR_EF_SEARCH", "")
+PGVECTOR_IVFFLAT_PROBES = os.getenv("PGVECTOR_IVFFLAT_PROBES", "")
+
+EMBEDDING_TABLE = "langchain_pg_embedding"
+VECTOR_INDEX_NAME = "idx_embedding_vector"
+
+# Session settings for each index type, by tuning file key
+SEARCH_SETTINGS = {
+    "ef_search": "hnsw.ef_search",
+    "probes": "ivfflat.probes",
+}
+
+
+def hnsw_build_params(row_count: int) -> Dict[str, int]:
+    """HNSW m / ef_construction for a collection of row_count vectors"""
+    if row_count < 10_000:
+        return {"m": 16, "ef_construction": 64}
+    if row_count < 100_000:
+        return {"m": 16, "ef_construction": 128}
+    if row_count < 1_000_000:
+        return {"m": 24, "ef_construction": 200}
+    return {"m": 32, "ef_construction": 256}
+
+
+def ivfflat_lists(row_count: int) -> int:
+    """pgvector's recommended list count: rows / 1000 up to 1M rows, sqrt(rows) above"""
+    if row_count <= 1_000_000:
+        return max(1, row_count // 1000)
+    return int(math.sqrt(row_count))
+
+
+def load_search_settings(path: str = VECTOR_INDEX_PATH) -> Dict[str, int]:
+    """
+    Session settings to apply on every retrieval connection
+
+    Returns:
+        e.g. {'hnsw.ef_search': 40}; empty when nothing is tuned
+    """
+    settings: Dict[str, int] = {}
+
+    tuning = load_tuning(path)
+    if tuning:
+        for key, setting in SEARCH_SETTINGS.items():
+            if tuning.get(key):
+                settings[setting] = int(tuning[key])
+
+    if PGVECTOR_EF_SEARCH:
+        settings["hnsw.ef_search"] = int(PGVECTOR_EF_SEARCH)
+    if PGVECTOR_IVFFLAT_PROBES:
+        settings["ivfflat.probes"] = int(PGVECTOR_IVFFLAT_PROBES)
+    return settings
+
+
+def load_tuning(path: str = VECTOR_INDEX_PATH) -> Optional[Dict[str, Any]]:
+    """Tuning written by manage_vector_index.py, None if missing or unreadable"""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Could not read vector index tuning {path}: {e}")
+        return None
+
+
+def vector_literal(vector: List[float]) -> str:
+    """pgvector text representation of an embedding"""
+    return "[" + ",".join(str(value) for value in vector) + "]"
+
+
+def apply_search_settings(dbapi_connection, settings: Dict[str, int]) -> None:
+    """
+    SET the search settings for the session of a new DBAPI connection
+
+    Runs in autocommit, since a SET inside the transaction SQLAlchemy rolls
+    back on return to the pool would be undone.
+    """
+    if not settings:
+        return
+
+    autocommit = dbapi_connection.autocommit
+    dbapi_connection.autocommit = True
+    cursor = dbapi_connection.cursor()
+    try:
+        for setting, value in settings.items():
+            cursor.execute(f"SET {setting} = {int(value)}")
+    finally:
+        cursor.close()
+        dbapi_connection.autocommit = autocommit
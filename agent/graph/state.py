@@ -15,11 +15,24 @@ class GraphState(TypedDict, total=False):
     # Document retrieval
     documents: List[Document]
     relevant_documents: List[Document]
+    document_scores: List[float]  # Cosine similarity of each entry in documents
+    documents_prefetched: bool  # Retrieved speculatively alongside question grading and routing
 
     conversation_history: List[Dict[str, str]]  # Loaded from Redis
     user_context: Dict[str, Any]  # Loaded from Redis
 
+    # Turn-scoped memory session (see graph.memory.memory_nodes)
+    memory_loaded: bool  # Loaded once at graph entry
+    memory_phone_number: Optional[str]  # Phone the conversation is linked to
+    memory_history_len: int  # Messages loaded from Redis, the rest are appended
+    memory_history_tail: Optional[Dict[str, str]]  # Last loaded message
+    memory_dirty: List[str]  # Memory fields to write back at the end of the turn
+
+    # Semantic answer cache
+    answer_cache_hit: bool  # Answer served from the cache, skipping retrieval and grading
+
     # Tool/API results
+    proposed_tool_calls: List[Dict[str, Any]]  # Tool calls picked by the combined triage call
     tool_results: Optional[Dict[str, Any]]
 
     # Generation
@@ -32,9 +45,16 @@ class GraphState(TypedDict, total=False):
 
     # Control flow
     needs_function_call: bool
-    retry_count: int
+    retry_count: int  # Regenerations so far
     needs_retry: bool
 
+    # Per-turn budget of the answer loop (see graph.budget)
+    budget_deadline: float  # time.monotonic() by which regenerations must end
+    tokens_used: int  # Estimated tokens of the generation and answer grading calls
+    best_generation: Optional[str]  # Best graded answer so far, returned when the loop ends
+    best_answer_grade: bool
+    best_answer_rank: int  # 2 good, 1 graded poor by the LLM, 0 poor by the local checks
+
 
 def create_initial_state(question: str) -> GraphState:
     """Create initial state with all required fields"""
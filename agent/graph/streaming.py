@@ -0,0 +1,112 @@
+"""
+Token streaming of a graph turn.
+
+The graph is run with stream_mode=["messages", "values"]: LLM tokens of
+the generate and regenerate nodes are passed on as they arrive, and the
+last state snapshot is the turn's result. Tokens of the graders and the
+router are not part of the answer and are dropped.
+
+Answer grading runs after the streamed answer is complete, so a poor
+answer may already have been shown when grade_answer asks for a
+regeneration. STREAM_REGENERATION_POLICY decides what the caller sees:
+
+- replace: every regenerated answer is streamed too, announced by a
+  'restart' event so the caller can mark the previous one as replaced
+- final: only the first answer is streamed; a regenerated answer arrives
+  whole with the 'final' event
+
+Either way the final state's generation is the answer of record, the one
+kept in the conversation history and the answer cache. The 'final' event
+carries it, with shown=False when the caller still has to display it
+(e.g. answer cache hits and error messages, which stream no tokens).
+"""
+import os
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from dotenv import load_dotenv
+
+from graph.state import GraphState
+
+load_dotenv()
+
+STREAM_REGENERATION_POLICY = os.getenv("STREAM_REGENERATION_POLICY", "replace")
+
+# Nodes whose LLM tokens are the answer
+STREAMED_NODES = ("generate", "regenerate")
+
+STREAM_MODES = ["messages", "values"]
+
+
+@dataclass
+class StreamEvent:
+    """One step of a streamed turn: 'token', 'restart' or 'final'"""
+    kind: str
+    text: str = ""
+    state: Optional[GraphState] = None
+    shown: bool = True
+
+
+class _AnswerStream:
+    """Turns graph stream chunks into answer events for one turn"""
+
+    def __init__(self, policy: str):
+        self.policy = policy
+        self.step = None
+        self.suppressed = False
+        self.streamed = ""
+        self.state: Optional[GraphState] = None
+
+    def on_chunk(self, mode: str, chunk: Any) -> List[StreamEvent]:
+        if mode == "values":
+            self.state = chunk
+            return []
+
+        message, metadata = chunk
+        if metadata.get("langgraph_node") not in STREAMED_NODES or not isinstance(message.content, str):
+            return []
+        if not message.content:
+            return []
+
+        events = []
+        step = metadata.get("langgraph_step")
+        if step != self.step:
+            if self.step is not None:
+                # A regeneration after the answer was graded
+                if self.policy == "replace":
+                    events.append(StreamEvent("restart"))
+                    self.streamed = ""
+                else:
+                    self.suppressed = True
+            self.step = step
+
+        if self.suppressed:
+            return events
+
+        self.streamed += message.content
+        events.append(StreamEvent("token", message.content))
+        return events
+
+    def final(self) -> StreamEvent:
+        state = self.state or {}
+        generation = state.get("generation", "")
+        return StreamEvent("final", generation, state, shown=bool(generation) and generation == self.streamed)
+
+
+def stream_answer(app, state: GraphState, policy: str = STREAM_REGENERATION_POLICY,
+                  config: Optional[Dict[str, Any]] = None) -> Iterator[StreamEvent]:
+    """Run one turn, yielding answer tokens as they are generated and then the final event"""
+    stream = _AnswerStream(policy)
+    for mode, chunk in app.stream(state, config=config, stream_mode=STREAM_MODES):
+        yield from stream.on_chunk(mode, chunk)
+    yield stream.final()
+
+
+async def astream_answer(app, state: GraphState, policy: str = STREAM_REGENERATION_POLICY,
+                         config: Optional[Dict[str, Any]] = None) -> AsyncIterator[StreamEvent]:
+    """Async counterpart of stream_answer"""
+    stream = _AnswerStream(policy)
+    async for mode, chunk in app.astream(state, config=config, stream_mode=STREAM_MODES):
+        for event in stream.on_chunk(mode, chunk):
+            yield event
+    yield stream.final()
@@ -24,7 +24,13 @@ CREATE TABLE IF NOT EXISTS langchain_pg_embedding (
 
 -- Create indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_embedding_collection_id ON langchain_pg_embedding(collection_id);
-CREATE INDEX IF NOT EXISTS idx_embedding_vector ON langchain_pg_embedding USING ivfflat (embedding vector_cosine_ops) WITH (lists = 100);
+-- The vector index is not created here: an ANN index built on an empty table
+-- (IVFFlat lists trained on no rows) gives poor recall. Build it after the
+-- embeddings are loaded with: python manage_vector_index.py build
+-- Full-text index for the hybrid search; the expression must match
+-- TEXT_SEARCH_VECTOR in graph/retrieval/hybrid.py
+CREATE INDEX IF NOT EXISTS idx_embedding_document_fts ON langchain_pg_embedding
+    USING gin ((to_tsvector('turkish', coalesce(document, '')) || to_tsvector('simple', coalesce(document, ''))));
 
 -- Insert default collection
 INSERT INTO langchain_pg_collection (name, cmetadata)
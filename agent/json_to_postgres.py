@@ -3,6 +3,9 @@ import psycopg2
 import uuid
 from datetime import datetime
 
+from graph.retrieval.hybrid import CREATE_TEXT_INDEX_SQL
+from graph.retrieval.vector_index import EMBEDDING_TABLE, VECTOR_INDEX_NAME, hnsw_build_params
+
 # Veritabanı bağlantı ayarları
 DB_CONFIG = {
     'host': 'localhost',
@@ -258,10 +261,8 @@ def update_vector_dimension():
                 cursor.execute("DROP TABLE langchain_pg_embedding")
                 cursor.execute("ALTER TABLE langchain_pg_embedding_new RENAME TO langchain_pg_embedding")
 
-                # Index'leri yeniden oluştur
+                # Index'leri yeniden oluştur (vektör index'i embedding'ler yüklendikten sonra)
                 cursor.execute("CREATE INDEX idx_embedding_collection_id ON langchain_pg_embedding(collection_id)")
-                cursor.execute(
-                    f"CREATE INDEX idx_embedding_vector ON langchain_pg_embedding USING ivfflat (embedding vector_cosine_ops) WITH (lists = 100)")
 
                 conn.commit()
                 print("Vector boyutu güncellendi!")
@@ -277,6 +278,47 @@ def update_vector_dimension():
             conn.close()
 
 
+def build_vector_index():
+    """Embedding'ler yüklendikten sonra HNSW index'ini oluştur"""
+    conn = None
+    cursor = None
+
+    try:
+        conn = psycopg2.connect(**DB_CONFIG)
+        cursor = conn.cursor()
+
+        cursor.execute(f"SELECT count(embedding) FROM {EMBEDDING_TABLE}")
+        row_count = cursor.fetchone()[0]
+        if not row_count:
+            print("Embedding bulunamadı, vektör index'i oluşturulmadı")
+            return
+
+        # m / ef_construction koleksiyon boyutuna göre seçilir
+        params = hnsw_build_params(row_count)
+        cursor.execute(f"DROP INDEX IF EXISTS {VECTOR_INDEX_NAME}")
+        cursor.execute(
+            f"CREATE INDEX {VECTOR_INDEX_NAME} ON {EMBEDDING_TABLE} USING hnsw (embedding vector_cosine_ops) "
+            f"WITH (m = {params['m']}, ef_construction = {params['ef_construction']})"
+        )
+        # Hibrit arama için tam metin index'i
+        cursor.execute(CREATE_TEXT_INDEX_SQL)
+        cursor.execute(f"ANALYZE {EMBEDDING_TABLE}")
+        conn.commit()
+
+        print(f"HNSW index oluşturuldu: {row_count} vektör, m={params['m']}, ef_construction={params['ef_construction']}")
+        print("Arama ayarını seçmek için: python manage_vector_index.py tune")
+
+    except Exception as e:
+        print(f"Vektör index oluşturma hatası: {e}")
+        if conn:
+            conn.rollback()
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+
 def main():
     """Ana fonksiyon"""
     # JSON dosyasını yükle ve veritabanına ekle
@@ -311,6 +353,10 @@ def main():
         print(f"\n{embedding_model} modeli mevcut. Embeddings oluşturuluyor...")
         create_embeddings_with_ollama(model_name=embedding_model)
 
+    # ANN index'i dolu tablo üzerinde oluştur
+    print("\nVektör index'i oluşturuluyor...")
+    build_vector_index()
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -2,6 +2,8 @@
 from graph.graph import create_telecom_workflow
 from graph.state import GraphState
 from graph.memory.redis_client import redis_memory
+from graph.retrieval import retrieval_service
+import asyncio
 import uuid
 
 
@@ -69,5 +71,28 @@ def test_redis_conversation():
             print(f"❌ Error: {e}")
 
 
+async def test_concurrent_conversations():
+    """Serve several conversations at once on the async graph path"""
+    app = create_telecom_workflow()
+
+    questions = [
+        "Benim paketim nedir? 0555 123 45 67",
+        "Hangi paketler var?",
+        "Faturamı görebilir miyim? 0555 987 65 43",
+    ]
+
+    results = await asyncio.gather(*(
+        app.ainvoke(create_initial_state(question)) for question in questions
+    ))
+
+    for question, result in zip(questions, results):
+        print(f"🗣️ {question}")
+        print(f"✅ Assistant: {result.get('generation', 'No answer')}")
+
+    await retrieval_service.aclose()
+
+
 if __name__ == "__main__":
-    test_redis_conversation()
\ No newline at end of file
+    retrieval_service.warm_up()
+    test_redis_conversation()
+    asyncio.run(test_concurrent_conversations())
\ No newline at end of file
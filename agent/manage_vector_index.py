@@ -0,0 +1,324 @@
+# manage_vector_index.py
+"""
+ANN index management for the telecom_docs embeddings.
+
+Commands:
+    build   (Re)build the vector index after the embeddings are loaded:
+            HNSW with m / ef_construction sized from the collection, or an
+            IVFFlat index whose lists are trained on the loaded rows.
+    tune    Pick the smallest hnsw.ef_search / ivfflat.probes that reaches
+            the recall target, and save it for the retrieval service.
+    report  Recall@k of the index against exact search, with query latency.
+    build-text
+            (Re)build the GIN full-text index used by the hybrid search.
+
+Recall is measured with stored embeddings as queries: exact results come
+from a sequential scan (index scans disabled), approximate ones from the
+index with the candidate setting.
+
+Usage:
+    python manage_vector_index.py build [--type hnsw|ivfflat]
+    python manage_vector_index.py tune [--recall 0.95] [--latency-ms 20]
+    python manage_vector_index.py report [--k 5]
+    python manage_vector_index.py build-text
+"""
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, text
+
+from graph.retrieval.hybrid import CREATE_TEXT_INDEX_SQL, TEXT_INDEX_NAME
+from graph.retrieval.service import POSTGRES_CONNECTION, COLLECTION_NAME, RETRIEVAL_K
+from graph.retrieval.vector_index import (
+    EMBEDDING_TABLE,
+    VECTOR_INDEX_NAME,
+    VECTOR_INDEX_PATH,
+    hnsw_build_params,
+    ivfflat_lists,
+    load_search_settings,
+    load_tuning
+)
+
+load_dotenv()
+
+HNSW_EF_SEARCH_CANDIDATES = [10, 20, 40, 64, 100, 200, 400, 800]
+IVFFLAT_PROBE_CANDIDATES = [1, 2, 4, 8, 16, 32, 64, 128, 256]
+
+# pgvector defaults when nothing is tuned
+DEFAULT_SETTINGS = {"hnsw": ("hnsw.ef_search", 40), "ivfflat": ("ivfflat.probes", 1)}
+
+_KNN_SQL = f"""
+    SELECT id FROM {EMBEDDING_TABLE}
+    WHERE collection_id = :collection_id
+    ORDER BY embedding <=> CAST(:query AS vector)
+    LIMIT :k
+"""
+
+
+# ============================================================================
+# COLLECTION INSPECTION
+# ============================================================================
+
+def collection_info(conn, collection_name: str) -> Dict[str, Any]:
+    """Collection id, row counts, vector dimensions and current index type"""
+    collection_id = conn.execute(
+        text("SELECT uuid FROM langchain_pg_collection WHERE name = :name"), {"name": collection_name}
+    ).scalar()
+    if collection_id is None:
+        raise SystemExit(f"❌ Collection not found: {collection_name}")
+
+    rows, null_rows, min_dims, max_dims = conn.execute(text(f"""
+        SELECT count(embedding), count(*) - count(embedding),
+               min(vector_dims(embedding)), max(vector_dims(embedding))
+        FROM {EMBEDDING_TABLE} WHERE collection_id = :collection_id
+    """), {"collection_id": collection_id}).one()
+
+    column_type = conn.execute(text(f"""
+        SELECT format_type(atttypid, atttypmod) FROM pg_attribute
+        WHERE attrelid = '{EMBEDDING_TABLE}'::regclass AND attname = 'embedding'
+    """)).scalar()
+
+    index_type = conn.execute(text("""
+        SELECT am.amname FROM pg_class c JOIN pg_am am ON c.relam = am.oid
+        WHERE c.relname = :index_name
+    """), {"index_name": VECTOR_INDEX_NAME}).scalar()
+
+    return {
+        "collection_id": collection_id,
+        "rows": rows,
+        "null_rows": null_rows,
+        "dimensions": min_dims if min_dims == max_dims else None,
+        "column_type": column_type,
+        "index_type": index_type,
+    }
+
+
+# ============================================================================
+# BUILD
+# ============================================================================
+
+def build_index(engine, collection_name: str, index_type: str) -> Dict[str, Any]:
+    """Drop and rebuild the vector index on the loaded embeddings"""
+    with engine.connect() as conn:
+        info = collection_info(conn, collection_name)
+
+    if not info["rows"]:
+        raise SystemExit("❌ No embeddings loaded yet; build the index after the data load")
+    if info["null_rows"]:
+        print(f"⚠️ {info['null_rows']} rows have no embedding yet and will not be indexed")
+    if info["dimensions"] is None:
+        raise SystemExit("❌ Embeddings have mixed dimensions; re-embed the collection with one model")
+
+    # HNSW and IVFFlat need a fixed-dimension column
+    if info["column_type"] != f"vector({info['dimensions']})":
+        print(f"🔧 Setting embedding column type to vector({info['dimensions']}) (was {info['column_type']})")
+
+    if index_type == "hnsw":
+        params = hnsw_build_params(info["rows"])
+        with_clause = f"m = {params['m']}, ef_construction = {params['ef_construction']}"
+    else:
+        params = {"lists": ivfflat_lists(info["rows"])}
+        with_clause = f"lists = {params['lists']}"
+
+    print(f"🏗️ Building {index_type} index on {info['rows']} vectors ({with_clause})...")
+    started = time.perf_counter()
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if info["column_type"] != f"vector({info['dimensions']})":
+            conn.execute(text(
+                f"ALTER TABLE {EMBEDDING_TABLE} ALTER COLUMN embedding TYPE vector({info['dimensions']})"
+            ))
+        conn.execute(text("SET maintenance_work_mem = '512MB'"))
+        conn.execute(text(f"DROP INDEX IF EXISTS {VECTOR_INDEX_NAME}"))
+        conn.execute(text(
+            f"CREATE INDEX {VECTOR_INDEX_NAME} ON {EMBEDDING_TABLE} "
+            f"USING {index_type} (embedding vector_cosine_ops) WITH ({with_clause})"
+        ))
+        conn.execute(text(f"ANALYZE {EMBEDDING_TABLE}"))
+    print(f"✅ Index built in {time.perf_counter() - started:.1f}s")
+
+    return {"index_type": index_type, "rows": info["rows"], "dimensions": info["dimensions"], **params}
+
+
+def build_text_index(engine) -> None:
+    """Drop and rebuild the full-text index over the document text"""
+    print("🏗️ Building full-text index...")
+    started = time.perf_counter()
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("SET maintenance_work_mem = '512MB'"))
+        conn.execute(text(f"DROP INDEX IF EXISTS {TEXT_INDEX_NAME}"))
+        conn.execute(text(CREATE_TEXT_INDEX_SQL))
+        conn.execute(text(f"ANALYZE {EMBEDDING_TABLE}"))
+    print(f"✅ Full-text index built in {time.perf_counter() - started:.1f}s")
+
+
+# ============================================================================
+# RECALL EVALUATION
+# ============================================================================
+
+def sample_queries(conn, collection_id, count: int) -> List[str]:
+    """Stored embeddings (as pgvector text) to use as queries"""
+    return list(conn.execute(text(f"""
+        SELECT embedding::text FROM {EMBEDDING_TABLE}
+        WHERE collection_id = :collection_id AND embedding IS NOT NULL
+        ORDER BY random() LIMIT :count
+    """), {"collection_id": collection_id, "count": count}).scalars())
+
+
+def exact_neighbours(conn, collection_id, queries: List[str], k: int) -> List[set]:
+    """Ground-truth top-k ids from a sequential scan"""
+    results = []
+    for query in queries:
+        # SET LOCAL lasts until the rollback that ends each read-only query
+        conn.execute(text("SET LOCAL enable_indexscan = off"))
+        conn.execute(text("SET LOCAL enable_bitmapscan = off"))
+        ids = conn.execute(text(_KNN_SQL), {"collection_id": collection_id, "query": query, "k": k}).scalars()
+        results.append(set(ids))
+        conn.rollback()
+    return results
+
+
+def evaluate(conn, collection_id, queries: List[str], truth: List[set], k: int,
+             setting: Optional[Tuple[str, int]]) -> Dict[str, Any]:
+    """Recall@k and latency of index searches with one search setting"""
+    recalls, latencies = [], []
+    for query, expected in zip(queries, truth):
+        if setting:
+            conn.execute(text(f"SET LOCAL {setting[0]} = {int(setting[1])}"))
+        started = time.perf_counter()
+        ids = set(conn.execute(text(_KNN_SQL), {"collection_id": collection_id, "query": query, "k": k}).scalars())
+        latencies.append((time.perf_counter() - started) * 1000)
+        conn.rollback()
+        recalls.append(len(ids & expected) / len(expected) if expected else 1.0)
+
+    plan = "\n".join(conn.execute(text(f"EXPLAIN {_KNN_SQL}"), {
+        "collection_id": collection_id, "query": queries[0], "k": k
+    }).scalars())
+    conn.rollback()
+
+    return {
+        "recall": round(statistics.mean(recalls), 4),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(_percentile(latencies, 0.95), 2),
+        "index_used": VECTOR_INDEX_NAME in plan,
+    }
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+# ============================================================================
+# COMMANDS
+# ============================================================================
+
+def tune(engine, collection_name: str, k: int, recall_target: float, latency_ms: float,
+         query_count: int) -> Dict[str, Any]:
+    """Smallest search setting meeting the recall target, preferring ones within the latency budget"""
+    with engine.connect() as conn:
+        info = collection_info(conn, collection_name)
+        if info["index_type"] not in DEFAULT_SETTINGS:
+            raise SystemExit("❌ No HNSW/IVFFlat index found; run 'build' first")
+
+        queries = sample_queries(conn, info["collection_id"], query_count)
+        truth = exact_neighbours(conn, info["collection_id"], queries, k)
+
+        setting_name = DEFAULT_SETTINGS[info["index_type"]][0]
+        if info["index_type"] == "hnsw":
+            candidates = sorted({value for value in HNSW_EF_SEARCH_CANDIDATES if value >= k} | {k})
+        else:
+            lists = (load_tuning() or {}).get("lists") or ivfflat_lists(info["rows"])
+            candidates = [value for value in IVFFLAT_PROBE_CANDIDATES if value < lists] + [lists]
+
+        chosen = None
+        for value in candidates:
+            result = evaluate(conn, info["collection_id"], queries, truth, k, (setting_name, value))
+            print(f"  {setting_name}={value}: recall@{k}={result['recall']:.3f}, "
+                  f"p50={result['p50_ms']}ms, p95={result['p95_ms']}ms")
+            if chosen is None or result["recall"] > chosen[1]["recall"]:
+                chosen = (value, result)
+            if result["recall"] >= recall_target:
+                chosen = (value, result)
+                break
+
+    value, result = chosen
+    if result["recall"] < recall_target:
+        print(f"⚠️ Recall target {recall_target} not reached; using best setting {setting_name}={value}")
+    if result["p95_ms"] > latency_ms:
+        print(f"⚠️ p95 {result['p95_ms']}ms exceeds the {latency_ms}ms budget at {setting_name}={value}")
+
+    key = "ef_search" if info["index_type"] == "hnsw" else "probes"
+    return {key: value, "k": k, "recall_target": recall_target, "latency_budget_ms": latency_ms, **result}
+
+
+def report(engine, collection_name: str, k: int, query_count: int) -> Dict[str, Any]:
+    """Recall@k and latency with the settings the retrieval service uses"""
+    with engine.connect() as conn:
+        info = collection_info(conn, collection_name)
+        print(f"📚 {info['rows']} vectors ({info['null_rows']} without embedding), "
+              f"column {info['column_type']}, index {info['index_type'] or 'none'}")
+        if not info["rows"]:
+            raise SystemExit("❌ No embeddings loaded")
+
+        setting = None
+        if info["index_type"] in DEFAULT_SETTINGS:
+            name, default = DEFAULT_SETTINGS[info["index_type"]]
+            setting = (name, load_search_settings().get(name, default))
+
+        queries = sample_queries(conn, info["collection_id"], query_count)
+        truth = exact_neighbours(conn, info["collection_id"], queries, k)
+        result = evaluate(conn, info["collection_id"], queries, truth, k, setting)
+
+    label = f"{setting[0]}={setting[1]}" if setting else "no index"
+    print(f"🎯 recall@{k}={result['recall']:.3f} ({label}), p50={result['p50_ms']}ms, "
+          f"p95={result['p95_ms']}ms, index used: {'✅' if result['index_used'] else '❌'}")
+    return result
+
+
+def save_tuning(updates: Dict[str, Any], path: str = VECTOR_INDEX_PATH) -> None:
+    """Merge updates into the tuning file read by the retrieval service"""
+    tuning = load_tuning(path) or {}
+    if "index_type" in updates:
+        # A rebuilt index invalidates the previous search setting
+        tuning = {}
+    tuning.update(updates)
+    tuning["updated_at"] = datetime.now().isoformat()
+
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(tuning, file, ensure_ascii=False, indent=2)
+    print(f"💾 Saved index settings to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the telecom_docs vector index")
+    parser.add_argument("command", choices=("build", "tune", "report", "build-text"))
+    parser.add_argument("--collection", default=COLLECTION_NAME)
+    parser.add_argument("--type", choices=("hnsw", "ivfflat"), default="hnsw", help="Index type for build")
+    parser.add_argument("--k", type=int, default=RETRIEVAL_K)
+    parser.add_argument("--recall", type=float, default=0.95, help="Recall@k target for tune")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="p95 latency budget for tune")
+    parser.add_argument("--queries", type=int, default=50, help="Sampled queries for tune/report")
+    args = parser.parse_args()
+
+    engine = create_engine(POSTGRES_CONNECTION)
+    try:
+        if args.command == "build":
+            save_tuning(build_index(engine, args.collection, args.type))
+            print("💡 Run 'tune' next to pick the search setting")
+        elif args.command == "tune":
+            save_tuning(tune(engine, args.collection, args.k, args.recall, args.latency_ms, args.queries))
+        elif args.command == "build-text":
+            build_text_index(engine)
+        else:
+            report(engine, args.collection, args.k, args.queries)
+    finally:
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+import os
+
+from langchain import hub
+from langchain_core.prompts import ChatPromptTemplate
+
+# The chain modules build their Groq clients at import; no test calls them
+os.environ.setdefault("GROQ_API_KEY", "test")
+
+# generation_chain pulls its prompt from LangChain Hub at import; tests run offline
+hub.pull = lambda *args, **kwargs: ChatPromptTemplate.from_messages([("human", "{question}\n\n{context}")])
@@ -0,0 +1,27 @@
+import pytest
+
+from graph.retrieval.answer_cache import SemanticAnswerCache
+
+
+@pytest.mark.parametrize("question", [
+    "Faturamın son ödeme tarihi ne?",
+    "Paketimde kaç GB kaldı?",
+    "Borcumu öğrenmek istiyorum",
+    "Hesabımdaki bakiye nedir",
+    "Benim paketim nedir?",
+    "FATURAMI GÖREBİLİR MİYİM?",
+    "05551234567 numaralı hattın durumu",
+    "Kalan internetim ne kadar?",
+])
+def test_personal_questions_are_not_cacheable(question):
+    assert not SemanticAnswerCache.is_cacheable_question(question)
+
+
+@pytest.mark.parametrize("question", [
+    "Roaming ücretleri nedir?",
+    "Hangi paketleriniz var?",
+    "Fatura nasıl ödenir?",
+    "Hat dondurma işlemi nasıl yapılır?",
+])
+def test_general_questions_are_cacheable(question):
+    assert SemanticAnswerCache.is_cacheable_question(question)
@@ -0,0 +1,63 @@
+import pytest
+
+import graph.nodes.answer_cache as answer_cache_node
+from graph.nodes.answer_cache import _should_store, lookup_answer_cache_node
+
+QUESTION = "Roaming ücretleri nedir?"
+EARLIER_TURNS = [
+    {"role": "user", "content": "Gold paketi ne içeriyor?"},
+    {"role": "assistant", "content": "Gold paketi 20 GB internet içerir."},
+]
+
+
+def _state(history, **extra):
+    return {"question": QUESTION, "conversation_history": history, "memory_loaded": True, **extra}
+
+
+def _answered_state(history):
+    return _state(
+        history + [{"role": "user", "content": QUESTION}, {"role": "assistant", "content": "Yanıt"}],
+        datasource="vectorstore", answer_grade=True, relevant_documents=["belge"],
+        generation="Yanıt"
+    )
+
+
+@pytest.fixture
+def lookups(monkeypatch):
+    asked = []
+
+    def lookup(question):
+        asked.append(question)
+        return {"question": question, "answer": "Önbellekteki yanıt", "similarity": 0.99}
+
+    monkeypatch.setattr(answer_cache_node.answer_cache, "lookup", lookup)
+    return asked
+
+
+def test_first_turn_is_looked_up(lookups):
+    state = lookup_answer_cache_node(_state([{"role": "user", "content": QUESTION}]))
+
+    assert lookups == [QUESTION]
+    assert state["answer_cache_hit"]
+    assert state["generation"] == "Önbellekteki yanıt"
+
+
+def test_follow_up_skips_the_lookup(lookups):
+    history = EARLIER_TURNS + [{"role": "user", "content": QUESTION}]
+
+    state = lookup_answer_cache_node(_state(history))
+
+    assert lookups == []
+    assert not state["answer_cache_hit"]
+
+
+def test_first_turn_answer_is_stored():
+    assert _should_store(_answered_state([]))
+
+
+def test_follow_up_answer_is_not_stored():
+    assert not _should_store(_answered_state(EARLIER_TURNS))
+
+
+def test_personal_answer_is_not_stored():
+    assert not _should_store({**_answered_state([]), "user_context": {"phone_number": "+905551234567"}})
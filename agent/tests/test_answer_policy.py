@@ -0,0 +1,68 @@
+import pytest
+
+from graph.chains.answer_policy import AnswerPolicy, turkish_share
+from graph.messages import API_UNAVAILABLE_MESSAGE, REJECTION_MESSAGE
+from graph.metrics import metrics
+
+QUESTION = "Gold paketin aylık ücreti ne kadar?"
+ANSWER = "Gold paketin aylık ücreti 200 TL'dir ve 20 GB internet içerir."
+
+
+@pytest.fixture
+def policy():
+    return AnswerPolicy(min_chars=15, echo_similarity=0.9, enabled=True)
+
+
+def _outcome(check):
+    return check.reason, check.grade, check.retry
+
+
+def test_disabled_policy_sends_everything_to_the_llm():
+    policy = AnswerPolicy(min_chars=15, echo_similarity=0.9, enabled=False)
+
+    assert _outcome(policy.check(QUESTION, "")) == ("llm", None, False)
+
+
+def test_cached_answer_was_graded_before(policy):
+    assert _outcome(policy.check(QUESTION, ANSWER, cached=True)) == ("cached", True, False)
+
+
+@pytest.mark.parametrize("message", [REJECTION_MESSAGE, API_UNAVAILABLE_MESSAGE])
+def test_system_message_is_final(policy, message):
+    assert _outcome(policy.check(QUESTION, message)) == ("system_message", False, False)
+
+
+@pytest.mark.parametrize("generation", ["", "   ", None])
+def test_empty_answer_is_regenerated(policy, generation):
+    assert _outcome(policy.check(QUESTION, generation)) == ("empty", False, True)
+
+
+def test_short_answer_is_regenerated(policy):
+    assert _outcome(policy.check(QUESTION, "200 TL")) == ("too_short", False, True)
+
+
+def test_echoed_question_is_regenerated(policy):
+    assert _outcome(policy.check(QUESTION, "Gold paketin aylık ücreti ne kadar")) == ("echo", False, True)
+
+
+def test_english_answer_is_regenerated(policy):
+    answer = "The monthly price of the Gold package is 200 and it comes with your data."
+
+    assert _outcome(policy.check(QUESTION, answer)) == ("not_turkish", False, True)
+
+
+def test_turkish_answer_goes_to_the_llm(policy):
+    assert _outcome(policy.check(QUESTION, ANSWER)) == ("llm", None, False)
+
+
+def test_too_few_known_words_leave_the_language_undecided(policy):
+    assert turkish_share("Gold 200 price") is None
+    assert _outcome(policy.check(QUESTION, "Gold package price: 200")) == ("llm", None, False)
+
+
+def test_outcomes_are_counted(policy):
+    before = metrics.get("answer_policy.too_short")
+
+    policy.check(QUESTION, "200 TL")
+
+    assert metrics.get("answer_policy.too_short") == before + 1
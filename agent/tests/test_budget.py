@@ -0,0 +1,76 @@
+import time
+
+import pytest
+
+from graph.budget import TurnBudget, estimate_tokens
+from graph.metrics import metrics
+
+
+@pytest.fixture
+def budget():
+    return TurnBudget(latency_seconds=10, tokens=1000, max_retries=2, regeneration_seconds=3)
+
+
+def _state(retry_count=0, tokens_used=0, remaining_seconds=10.0):
+    return {
+        "retry_count": retry_count,
+        "tokens_used": tokens_used,
+        "budget_deadline": time.monotonic() + remaining_seconds,
+    }
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("a" * 40, "b" * 3, None) == 10
+
+
+def test_start_sets_deadline_and_resets_tokens(budget):
+    state = budget.start({"tokens_used": 500})
+
+    assert state["tokens_used"] == 0
+    assert 9 < budget.remaining_seconds(state) <= 10
+
+
+def test_fresh_turn_allows_regeneration(budget):
+    assert budget.exhausted_by(_state()) is None
+
+
+def test_turn_without_deadline_has_no_time_limit(budget):
+    assert budget.exhausted_by({"retry_count": 0, "tokens_used": 0}) is None
+
+
+def test_retry_cap(budget):
+    assert budget.exhausted_by(_state(retry_count=1)) is None
+    assert budget.exhausted_by(_state(retry_count=2)) == "retries"
+
+
+def test_deadline_needs_room_for_a_whole_round(budget):
+    assert budget.exhausted_by(_state(remaining_seconds=3.5)) is None
+    assert budget.exhausted_by(_state(remaining_seconds=2.5)) == "deadline"
+
+
+def test_tokens_count_the_next_round_at_the_mean_round_cost(budget):
+    # One round of 500 tokens: the next brings the turn to exactly 1000
+    assert budget.exhausted_by(_state(tokens_used=500)) is None
+    assert budget.exhausted_by(_state(tokens_used=501)) == "tokens"
+    # Two rounds of 300 tokens: the next brings it to 900
+    assert budget.exhausted_by(_state(retry_count=1, tokens_used=600)) is None
+    assert budget.exhausted_by(_state(retry_count=1, tokens_used=700)) == "tokens"
+
+
+def test_retries_are_checked_before_the_budget(budget):
+    state = _state(retry_count=2, tokens_used=5000, remaining_seconds=0)
+
+    assert budget.exhausted_by(state) == "retries"
+
+
+def test_allows_regeneration_counts_why_it_refused(budget):
+    before = metrics.snapshot("turn_budget.")
+
+    assert not budget.allows_regeneration(_state(remaining_seconds=1))
+    assert not budget.allows_regeneration(_state(retry_count=2))
+
+    after = metrics.snapshot("turn_budget.")
+    assert after.get("turn_budget.deadline", 0) - before.get("turn_budget.deadline", 0) == 1
+    assert after.get("turn_budget.retries", 0) - before.get("turn_budget.retries", 0) == 1
+    # Reaching the retry cap is not an exhausted budget
+    assert after.get("turn_budget.exhausted", 0) - before.get("turn_budget.exhausted", 0) == 1
@@ -0,0 +1,50 @@
+from calibrate_retrieval_gate import choose_accept_threshold, choose_reject_threshold
+
+SAMPLES = [(0.9, True), (0.8, True), (0.7, False), (0.6, True)]
+
+
+def test_accept_threshold_is_the_lowest_score_meeting_the_precision():
+    assert choose_accept_threshold(SAMPLES, precision=1.0, min_support=1) == 0.8
+    assert choose_accept_threshold(SAMPLES, precision=0.75, min_support=1) == 0.6
+
+
+def test_accept_threshold_needs_min_support():
+    assert choose_accept_threshold(SAMPLES, precision=1.0, min_support=3) == 1.01
+
+
+def test_accept_threshold_keeps_equal_scores_together():
+    # 0.8 would be precise for the first relevant document, but not for both
+    samples = [(0.9, True), (0.8, True), (0.8, False)]
+
+    assert choose_accept_threshold(samples, precision=1.0, min_support=1) == 0.9
+
+
+def test_accept_threshold_without_samples_accepts_nothing():
+    assert choose_accept_threshold([], precision=0.9, min_support=1) == 1.01
+
+
+def test_reject_threshold_is_the_highest_score_meeting_the_precision():
+    samples = [(0.1, False), (0.2, False), (0.3, True), (0.4, False)]
+
+    # Scores below 0.3 are rejected
+    assert choose_reject_threshold(samples, precision=0.9, min_support=1) == 0.3
+    assert choose_reject_threshold(samples, precision=0.9, min_support=3) == -1.0
+
+
+def test_reject_threshold_keeps_equal_scores_together():
+    samples = [(0.1, False), (0.2, False), (0.2, True)]
+
+    assert choose_reject_threshold(samples, precision=0.9, min_support=1) == 0.2
+
+
+def test_reject_threshold_covers_the_top_score_when_nothing_is_relevant():
+    samples = [(0.1, False), (0.2, False)]
+
+    threshold = choose_reject_threshold(samples, precision=0.9, min_support=1)
+
+    assert threshold > 0.2
+    assert all(score < threshold for score, _ in samples)
+
+
+def test_reject_threshold_without_samples_rejects_nothing():
+    assert choose_reject_threshold([], precision=0.9, min_support=1) == -1.0
@@ -0,0 +1,113 @@
+import pytest
+import requests
+
+import graph.backend.health as health_module
+from graph.backend.client import BackendUnavailableError, TelecomAPIClient
+from graph.backend.health import BackendHealthMonitor
+
+
+class NoSharedHealth:
+    def save_backend_health(self, health, ttl_seconds):
+        return False
+
+    def get_backend_health(self):
+        return None
+
+    def acquire_backend_probe_lock(self, ttl_seconds):
+        return True
+
+
+class Response:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeSession:
+    """Replays one outcome (status code or exception) per request"""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.requests = []
+
+    def request(self, method, url, **kwargs):
+        self.requests.append((method, url))
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return Response(outcome)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(health_module, "redis_memory", NoSharedHealth())
+    client = TelecomAPIClient(
+        base_url="http://backend",
+        get_retries=2,
+        health=BackendHealthMonitor(probe=None, failure_threshold=1, recovery_seconds=30, sync_seconds=3600)
+    )
+    monkeypatch.setattr(client, "_backoff", lambda attempt: None)
+    return client
+
+
+def _replay(client, *outcomes):
+    client.session = FakeSession(outcomes)
+    return client.session
+
+
+def test_get_is_retried_on_gateway_errors(client):
+    session = _replay(client, 503, 502, 200)
+
+    assert client.get("/api/v1/packages", endpoint="packages.list").status_code == 200
+    assert len(session.requests) == 3
+    assert client.health.state == BackendHealthMonitor.CLOSED
+
+
+def test_get_is_retried_on_connection_errors(client):
+    session = _replay(client, requests.exceptions.ConnectionError(), 200)
+
+    assert client.get("/api/v1/packages").status_code == 200
+    assert len(session.requests) == 2
+
+
+def test_get_returns_the_last_gateway_error(client):
+    session = _replay(client, 503, 503, 503)
+
+    assert client.get("/api/v1/packages").status_code == 503
+    assert len(session.requests) == 3
+    assert client.health.state == BackendHealthMonitor.OPEN
+
+
+@pytest.mark.parametrize("method", ["post", "put"])
+def test_writes_are_never_retried(client, method):
+    session = _replay(client, 503, 200)
+
+    assert getattr(client, method)("/api/v1/tickets", json={}).status_code == 503
+    assert len(session.requests) == 1
+
+
+def test_write_connection_errors_are_raised_at_once(client):
+    session = _replay(client, requests.exceptions.Timeout(), 200)
+
+    with pytest.raises(requests.exceptions.Timeout):
+        client.post("/api/v1/tickets", json={})
+    assert len(session.requests) == 1
+
+
+def test_open_circuit_fails_without_a_request(client):
+    client.health.record_failure()
+    session = _replay(client, 200)
+
+    with pytest.raises(BackendUnavailableError):
+        client.get("/api/v1/packages")
+    assert session.requests == []
+
+
+def test_client_errors_count_as_a_healthy_backend(client):
+    _replay(client, 404)
+
+    assert client.get("/api/v1/users/phone/x").status_code == 404
+    assert client.health.state == BackendHealthMonitor.CLOSED
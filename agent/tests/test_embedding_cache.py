@@ -0,0 +1,23 @@
+import pytest
+
+from graph.retrieval.embedding_cache import normalize_question
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("  Roaming ÜCRETLERİ nedir?? ", "roaming ücretleri nedir"),
+    ("İNTERNET PAKETİ", "internet paketi"),
+    ("IRMAK ŞUBESİ", "ırmak şubesi"),
+    ("Faturamı, nasıl ödeyebilirim!", "faturamı nasıl ödeyebilirim"),
+    ("Hattım\tdondurulabilir   mi?", "hattım dondurulabilir mi"),
+])
+def test_normalize_question(text, expected):
+    assert normalize_question(text) == expected
+
+
+def test_normalize_question_dotted_and_dotless_i_stay_apart():
+    # Plain casefold would turn 'I' into 'i' and 'İ' into 'i̇'
+    assert normalize_question("İ I i ı") == "i ı i ı"
+
+
+def test_normalize_question_composes_decomposed_letters():
+    assert normalize_question("U\u0308cret") == normalize_question("\u00dccret") == "\u00fccret"
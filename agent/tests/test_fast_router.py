@@ -0,0 +1,105 @@
+import pytest
+
+from graph.chains.fast_router import FastRouter, mask_identifiers
+from graph.metrics import metrics
+
+
+@pytest.fixture
+def router():
+    return FastRouter(min_confidence=0.6, log_path="", audit_rate=0.0)
+
+
+@pytest.mark.parametrize("question", [
+    "Benim paketim nedir?",
+    "Faturamın son ödeme tarihi ne?",
+    "Paketimde kaç GB kaldı?",
+    "Borcumu öğrenmek istiyorum",
+    "Hesabımdaki bakiye nedir",
+    "Hattımı dondurmak istiyorum",
+    "Paketlerimden hangisi aktif?",
+])
+def test_personal_account_questions_go_to_function_calls(router, question):
+    decision = router.classify(question)
+
+    assert decision.datasource == "function_calls"
+    assert "possessive_account" in decision.rules or "personal_pronoun" in decision.rules
+
+
+@pytest.mark.parametrize("question", [
+    "Hangi paketleriniz var?",
+    "Sizin kampanyalarınız neler?",
+    "Roaming nasıl aktif edilir? Ücretleri nelerdir?",
+])
+def test_general_questions_go_to_vectorstore(router, question):
+    assert router.classify(question).datasource == "vectorstore"
+
+
+@pytest.mark.parametrize("question", [
+    "0555 123 45 67",
+    "+90 555 123 45 67",
+    "mstr001",
+])
+def test_identifiers_alone_decide(router, question):
+    decision = router.classify(question)
+
+    assert decision.datasource == "function_calls"
+    assert decision.confidence == pytest.approx(0.9)
+
+
+def test_weak_signals_are_left_to_the_llm(router):
+    # realtime_usage (0.4) alone is below the 0.6 minimum confidence
+    decision = router.classify("Ne kadar kaldı?")
+
+    assert decision.datasource is None
+    assert decision.rules == ["realtime_usage"]
+    assert decision.confidence == pytest.approx(0.4)
+
+
+def test_pronoun_alone_is_left_to_the_llm(router):
+    # 'ben' does not make a question personal: roaming rules are general information
+    decision = router.classify("ben yurtdışında internet kullanabilir miyim")
+
+    assert decision.datasource is None
+    assert decision.rules == ["personal_pronoun"]
+    assert decision.confidence < router.min_confidence
+
+
+def test_confidence_at_the_threshold_decides():
+    # personal_pronoun (0.4) and account_operation (0.2) score exactly 0.6
+    question = "Bana numara değiştirme yapar mısın?"
+
+    assert FastRouter(min_confidence=0.6, log_path="").classify(question).datasource == "function_calls"
+    assert FastRouter(min_confidence=0.61, log_path="").classify(question).datasource is None
+
+
+def test_confidence_is_capped_at_one(router):
+    decision = router.classify("Benim paketim ve faturam nedir? 05551234567 MSTR001")
+
+    assert decision.score > 1
+    assert decision.confidence == 1.0
+
+
+@pytest.mark.parametrize("question", ["PAKETİM NEDİR", "FATURAMI GÖSTER", "HESABIMDAKİ BAKİYE"])
+def test_turkish_uppercase_is_casefolded(router, question):
+    # İ -> i and I -> ı, so 'FATURAMI' matches 'faturamı' rather than 'faturami'
+    assert "possessive_account" in router.classify(question).rules
+
+
+def test_disabled_router_leaves_everything_to_the_llm():
+    decision = FastRouter(log_path="", enabled=False).classify("Benim paketim nedir?")
+
+    assert decision.datasource is None
+    assert decision.confidence >= 0.6
+
+
+def test_classify_without_record_leaves_metrics(router):
+    before = metrics.snapshot("fast_router.")
+    router.classify("Benim paketim nedir?", record=False)
+
+    assert metrics.snapshot("fast_router.") == before
+
+
+def test_mask_identifiers():
+    masked = mask_identifiers("Numaram 0555 123 45 67, müşteri no MSTR001")
+
+    assert masked == "Numaram <phone>, müşteri no <customer_id>"
@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+from langchain_core.documents import Document
+
+import graph.nodes.grade_documents as grade_documents_node
+from graph.chains.retrieval_grader import GradeDocuments
+from graph.nodes.grade_documents import _agrade, _grade
+
+
+class FailingBatchGrader:
+    def invoke(self, inputs):
+        raise ValueError("unparsable batch")
+
+    async def ainvoke(self, inputs):
+        raise ValueError("unparsable batch")
+
+
+class FlakyGrader:
+    """Grades 'timeout' documents with an exception, others as relevant"""
+
+    def _grades(self, inputs, return_exceptions):
+        assert return_exceptions
+        return [TimeoutError("grader timed out") if item["document"] == "timeout"
+                else GradeDocuments(binary_score="yes") for item in inputs]
+
+    def batch(self, inputs, config=None, return_exceptions=False):
+        return self._grades(inputs, return_exceptions)
+
+    async def abatch(self, inputs, config=None, return_exceptions=False):
+        return self._grades(inputs, return_exceptions)
+
+
+@pytest.fixture(autouse=True)
+def graders(monkeypatch):
+    monkeypatch.setattr(grade_documents_node, "batch_retrieval_grader", FailingBatchGrader())
+    monkeypatch.setattr(grade_documents_node, "retrieval_grader", FlakyGrader())
+
+
+DOCUMENTS = [Document(page_content="roaming"), Document(page_content="timeout"), Document(page_content="fatura")]
+
+
+def test_failed_fallback_call_grades_the_document_not_relevant():
+    grades = _grade("soru", DOCUMENTS)
+
+    assert [grade.binary_score for grade in grades] == ["yes", "no", "yes"]
+
+
+def test_failed_async_fallback_call_grades_the_document_not_relevant():
+    grades = asyncio.run(_agrade("soru", DOCUMENTS))
+
+    assert [grade.binary_score for grade in grades] == ["yes", "no", "yes"]
@@ -0,0 +1,156 @@
+import asyncio
+
+import pytest
+from langchain_core.documents import Document
+
+from graph import graph as graph_module
+from graph.nodes import retrieve as retrieve_module
+
+QUESTION = "Gold paketin aylık ücreti nedir?"
+
+# Graph globals replaced by recording fakes; retrieve and prefetch stay real
+FAKE_NODES = {
+    "load_memory_node": {},
+    "grade_question_node": None,
+    "route_question_node": None,
+    "lookup_answer_cache_node": {"answer_cache_hit": False},
+    "grade_documents": None,
+    "function_calls_node": {},
+    "generate_answer_node": {"generation": "Gold paket 200 TL"},
+    "regenerate_answer_node": {},
+    "grade_answer_node": {"needs_retry": False},
+    "select_answer_node": {},
+    "store_answer_cache_node": {},
+    "reject_question_node": {"generation": "Bu konuda yardımcı olamıyorum"},
+    "flush_memory_node": {},
+}
+
+
+class FakeRetrievalService:
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.calls = 0
+
+    def _results(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError("database unavailable")
+        return [(Document(page_content=f"belge {self.calls}"), 0.8)]
+
+    def retrieve_with_scores(self, question, k):
+        return self._results()
+
+    async def aretrieve_with_scores(self, question, k):
+        return self._results()
+
+
+class FakeReranker:
+    candidates = 10
+
+    def rerank(self, question, results):
+        return results
+
+
+def _fake(name, updates, visited):
+    def node(state):
+        visited.append(name)
+        return {**state, **updates}
+
+    async def anode(state):
+        return node(state)
+
+    node.__name__ = name
+    return node, anode
+
+
+@pytest.fixture
+def build(monkeypatch):
+    def build(question_grade=True, datasource="vectorstore", prefetch_failures=0):
+        visited = []
+        seen_documents = []
+        updates = {
+            **FAKE_NODES,
+            "grade_question_node": {"question_grade": question_grade},
+            "route_question_node": {"datasource": datasource},
+        }
+        for name, node_updates in updates.items():
+            node, anode = _fake(name, node_updates, visited)
+            monkeypatch.setattr(graph_module, name, node)
+            monkeypatch.setattr(graph_module, f"a{name}", anode)
+
+        def grade_documents(state):
+            visited.append("grade_documents")
+            seen_documents.append([document.page_content for document in state["documents"]])
+            return {**state, "retrieval_grade": True, "relevant_documents": state["documents"]}
+
+        async def agrade_documents(state):
+            return grade_documents(state)
+
+        monkeypatch.setattr(graph_module, "grade_documents", grade_documents)
+        monkeypatch.setattr(graph_module, "agrade_documents", agrade_documents)
+
+        service = FakeRetrievalService(failures=prefetch_failures)
+        monkeypatch.setattr(retrieve_module, "retrieval_service", service)
+        monkeypatch.setattr(retrieve_module, "reranker", FakeReranker())
+
+        app = graph_module.create_telecom_workflow(parallel=True, speculative=True, triage=False)
+        return app, visited, seen_documents, service
+
+    return build
+
+
+def _state():
+    return {"question": QUESTION, "conversation_history": [], "conversation_id": "conv-1"}
+
+
+def test_successful_prefetch_is_used_by_retrieve(build):
+    app, visited, seen_documents, service = build()
+
+    result = app.invoke(_state())
+
+    assert service.calls == 1
+    assert result["documents_prefetched"]
+    assert seen_documents == [["belge 1"]]
+    assert visited.index("lookup_answer_cache_node") < visited.index("grade_documents")
+    assert "function_calls_node" not in visited
+
+
+def test_failed_prefetch_is_retried_by_retrieve(build):
+    app, visited, seen_documents, service = build(prefetch_failures=1)
+
+    result = app.invoke(_state())
+
+    assert service.calls == 2
+    assert not result.get("documents_prefetched")
+    assert seen_documents == [["belge 2"]]
+
+
+def test_rejection_discards_route_and_prefetch(build):
+    app, visited, seen_documents, service = build(question_grade=False)
+
+    result = app.invoke(_state())
+
+    assert service.calls == 1
+    assert "reject_question_node" in visited
+    assert "lookup_answer_cache_node" not in visited
+    assert seen_documents == []
+    assert result["generation"] == "Bu konuda yardımcı olamıyorum"
+
+
+def test_function_calls_route_discards_the_prefetch(build):
+    app, visited, seen_documents, service = build(datasource="function_calls")
+
+    app.invoke(_state())
+
+    assert visited.index("function_calls_node") < visited.index("generate_answer_node")
+    assert "lookup_answer_cache_node" not in visited
+    assert seen_documents == []
+
+
+def test_async_graph_routes_the_same_way(build):
+    app, visited, seen_documents, service = build()
+
+    asyncio.run(app.ainvoke(_state()))
+
+    assert service.calls == 1
+    assert seen_documents == [["belge 1"]]
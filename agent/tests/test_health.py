@@ -0,0 +1,159 @@
+import time
+
+import pytest
+
+import graph.backend.health as health_module
+from graph.backend.health import BackendHealthMonitor
+
+
+class FakeSharedHealth:
+    """Backend health keys of redis_memory"""
+
+    def __init__(self):
+        self.health = None
+        self.probe_lock_free = True
+
+    def save_backend_health(self, health, ttl_seconds):
+        self.health = health
+        return True
+
+    def get_backend_health(self):
+        return self.health
+
+    def acquire_backend_probe_lock(self, ttl_seconds):
+        return self.probe_lock_free
+
+
+@pytest.fixture
+def shared(monkeypatch):
+    shared = FakeSharedHealth()
+    monkeypatch.setattr(health_module, "redis_memory", shared)
+    return shared
+
+
+class Probe:
+    def __init__(self, healthy):
+        self.healthy = healthy
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.healthy
+
+
+def _monitor(probe, sync_seconds=3600):
+    return BackendHealthMonitor(probe=probe, failure_threshold=3, recovery_seconds=30, sync_seconds=sync_seconds)
+
+
+def _recovery_elapsed(monitor, shared):
+    """Move the opening, as this and every other worker saw it, past the recovery window"""
+    monitor.opened_at -= monitor.recovery_seconds + 1
+    shared.health = {**shared.health, "opened_at": monitor.opened_at}
+
+
+def test_circuit_opens_after_consecutive_failures(shared):
+    monitor = _monitor(Probe(True))
+
+    monitor.record_failure()
+    monitor.record_failure()
+    assert monitor.is_available()
+
+    monitor.record_failure()
+    assert monitor.state == BackendHealthMonitor.OPEN
+    assert not monitor.is_available()
+
+
+def test_success_resets_the_failure_count(shared):
+    monitor = _monitor(Probe(True))
+
+    monitor.record_failure()
+    monitor.record_failure()
+    monitor.record_success()
+    monitor.record_failure()
+
+    assert monitor.state == BackendHealthMonitor.CLOSED
+
+
+def test_open_circuit_is_not_probed_before_recovery(shared):
+    probe = Probe(True)
+    monitor = _monitor(probe)
+    for _ in range(3):
+        monitor.record_failure()
+
+    assert not monitor.is_available()
+    assert probe.calls == 0
+
+
+def test_successful_probe_closes_the_circuit(shared):
+    probe = Probe(True)
+    monitor = _monitor(probe)
+    for _ in range(3):
+        monitor.record_failure()
+    _recovery_elapsed(monitor, shared)
+
+    assert monitor.is_available()
+    assert probe.calls == 1
+    assert monitor.state == BackendHealthMonitor.CLOSED
+    assert monitor.is_available()
+    assert probe.calls == 1
+
+
+def test_failed_probe_reopens_the_circuit(shared):
+    probe = Probe(False)
+    monitor = _monitor(probe)
+    for _ in range(3):
+        monitor.record_failure()
+    _recovery_elapsed(monitor, shared)
+
+    assert not monitor.is_available()
+    assert monitor.state == BackendHealthMonitor.OPEN
+    # A fresh recovery window starts
+    assert not monitor.is_available()
+    assert probe.calls == 1
+
+
+def test_failure_while_half_open_reopens_at_once(shared):
+    monitor = _monitor(None)
+    monitor.state = BackendHealthMonitor.HALF_OPEN
+
+    monitor.record_failure()
+
+    assert monitor.state == BackendHealthMonitor.OPEN
+
+
+def test_opening_is_published_to_other_workers(shared):
+    monitor = _monitor(None)
+    for _ in range(3):
+        monitor.record_failure()
+
+    assert shared.health == {"state": BackendHealthMonitor.OPEN, "opened_at": monitor.opened_at}
+
+
+def test_circuit_opened_by_another_worker_is_adopted(shared):
+    monitor = _monitor(None, sync_seconds=0)
+    shared.health = {"state": BackendHealthMonitor.OPEN, "opened_at": time.time()}
+
+    assert not monitor.is_available()
+    assert monitor.state == BackendHealthMonitor.OPEN
+
+
+def test_recovery_seen_by_another_worker_is_adopted(shared):
+    monitor = _monitor(None, sync_seconds=0)
+    for _ in range(3):
+        monitor.record_failure()
+    shared.health = {"state": BackendHealthMonitor.CLOSED}
+
+    assert monitor.is_available()
+    assert monitor.consecutive_failures == 0
+
+
+def test_only_the_probe_lock_holder_probes(shared):
+    probe = Probe(True)
+    monitor = _monitor(probe)
+    for _ in range(3):
+        monitor.record_failure()
+    _recovery_elapsed(monitor, shared)
+    shared.probe_lock_free = False
+
+    assert not monitor.is_available()
+    assert probe.calls == 0
@@ -0,0 +1,74 @@
+import re
+import sqlite3
+from types import SimpleNamespace
+
+from graph.retrieval.hybrid import HYBRID_SEARCH_SQL, hybrid_results, hybrid_search_params
+
+# The fusion step of HYBRID_SEARCH_SQL, run over given rankings
+FUSED_CTE = re.search(r"(fused AS \(.*?\n    \))", HYBRID_SEARCH_SQL, re.DOTALL).group(1)
+
+
+def _fuse(vector_ranking, text_ranking, rrf_k=60):
+    connection = sqlite3.connect(":memory:")
+    for table, ranking in (("vector_hits", vector_ranking), ("text_hits", text_ranking)):
+        connection.execute(f"CREATE TABLE {table} (id TEXT, rank INTEGER)")
+        connection.executemany(f"INSERT INTO {table} VALUES (?, ?)", [(id_, rank) for rank, id_ in enumerate(ranking, 1)])
+    return connection.execute(
+        f"WITH {FUSED_CTE} SELECT id, vector_rank, text_rank FROM fused ORDER BY rrf_score DESC",
+        {"rrf_k": rrf_k},
+    ).fetchall()
+
+
+def _row(id_, similarity, rrf_score, vector_rank=None, text_rank=None, metadata=None):
+    return SimpleNamespace(id=id_, document=f"doc {id_}", cmetadata=metadata, similarity=similarity,
+                           rrf_score=rrf_score, vector_rank=vector_rank, text_rank=text_rank)
+
+
+def test_documents_found_by_both_searches_rank_first():
+    rows = _fuse(["a", "b", "c"], ["c", "d"])
+
+    assert [row[0] for row in rows[:2]] == ["c", "a"]
+    assert rows[0][1:] == (3, 1)
+
+
+def test_single_side_hits_keep_their_rank_order():
+    rows = _fuse(["a", "b"], ["x", "y"])
+
+    # Equal ranks on either side tie; the order within a side is kept
+    ids = [row[0] for row in rows]
+    assert ids.index("a") < ids.index("b")
+    assert ids.index("x") < ids.index("y")
+    assert set(ids[:2]) == {"a", "x"}
+
+
+def test_text_only_hit_has_no_vector_rank():
+    rows = dict((row[0], row[1:]) for row in _fuse(["a"], ["x"]))
+
+    assert rows["x"] == (None, 1)
+    assert rows["a"] == (1, None)
+
+
+def test_results_keep_the_fused_order_and_the_similarity_score():
+    rows = [
+        _row(2, similarity=0.71, rrf_score=0.032, vector_rank=3, text_rank=1),
+        _row(1, similarity=0.88, rrf_score=0.016, vector_rank=1),
+    ]
+
+    results = hybrid_results(rows)
+
+    assert [document.id for document, _ in results] == ["2", "1"]
+    assert [score for _, score in results] == [0.71, 0.88]
+
+
+def test_results_carry_the_fusion_details_in_the_metadata():
+    [(document, _)] = hybrid_results([_row(1, 0.9, 0.016, vector_rank=1, metadata={"source": "faq"})])
+
+    assert document.page_content == "doc 1"
+    assert document.metadata == {"source": "faq", "rrf_score": 0.016, "vector_rank": 1, "text_rank": None}
+
+
+def test_candidates_are_never_fewer_than_k():
+    params = hybrid_search_params("Gold paket", [0.1, 0.2], "kb", k=30, candidates=20)
+
+    assert params["candidates"] == 30
+    assert params["k"] == 30
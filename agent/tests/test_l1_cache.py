@@ -0,0 +1,89 @@
+import pytest
+
+from graph.memory.l1_cache import MISSING, MemoryL1Cache
+from graph.metrics import metrics
+
+KEY = "telecom:user_context:905551234567"
+
+
+@pytest.fixture
+def cache():
+    cache = MemoryL1Cache(max_entries=2)
+    # Stands in for the listener having subscribed to invalidations
+    cache._subscribed = True
+    return cache
+
+
+def _stale_fills():
+    return metrics.get("memory_l1.user_context.stale_fill")
+
+
+def test_fill_is_cached(cache):
+    version = cache.version()
+    cache.set("user_context", KEY, {"name": "Ahmet"}, version)
+
+    assert cache.get("user_context", KEY) == {"name": "Ahmet"}
+
+
+def test_fill_raced_by_an_invalidation_is_dropped(cache):
+    before = _stale_fills()
+    version = cache.version()
+    # Another worker writes the key while this one reads the old value
+    cache.invalidate("user_context", KEY)
+    cache.set("user_context", KEY, {"name": "Eski"}, version)
+
+    assert cache.get("user_context", KEY) is MISSING
+    assert _stale_fills() == before + 1
+
+
+def test_fill_raced_by_a_local_write_keeps_the_write(cache):
+    version = cache.version()
+    cache.set("user_context", KEY, {"name": "Yeni"})
+    cache.set("user_context", KEY, {"name": "Eski"}, version)
+
+    assert cache.get("user_context", KEY) == {"name": "Yeni"}
+
+
+def test_invalidation_of_another_key_does_not_drop_the_fill(cache):
+    version = cache.version()
+    cache.invalidate("user_context", "telecom:user_context:905550000000")
+    cache.set("user_context", KEY, {"name": "Ahmet"}, version)
+
+    assert cache.get("user_context", KEY) == {"name": "Ahmet"}
+
+
+def test_forgotten_invalidations_still_drop_older_fills(cache):
+    version = cache.version()
+    cache.invalidate("user_context", KEY)
+    # max_entries=2: the record for KEY is pushed out, raising the floor
+    cache.invalidate("user_context", "a")
+    cache.invalidate("user_context", "b")
+    cache.set("user_context", KEY, {"name": "Eski"}, version)
+
+    assert cache.get("user_context", KEY) is MISSING
+
+
+def test_clear_drops_fills_started_before_it(cache):
+    version = cache.version()
+    cache.clear()
+    cache.set("user_context", KEY, {"name": "Eski"}, version)
+
+    assert cache.get("user_context", KEY) is MISSING
+
+
+def test_nothing_is_cached_until_subscribed():
+    cache = MemoryL1Cache()
+    cache.set("user_context", KEY, {"name": "Ahmet"})
+
+    cache._subscribed = True
+    assert cache.get("user_context", KEY) is MISSING
+
+
+def test_only_other_workers_invalidations_are_applied(cache):
+    cache.set("user_context", KEY, {"name": "Ahmet"})
+
+    cache._on_invalidation(cache.invalidation_message("user_context", KEY))
+    assert cache.get("user_context", KEY) == {"name": "Ahmet"}
+
+    cache._on_invalidation(f"other|user_context|{KEY}")
+    assert cache.get("user_context", KEY) is MISSING
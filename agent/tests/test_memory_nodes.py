@@ -0,0 +1,97 @@
+from graph.memory.memory_nodes import _history_updates, _mark_dirty, _turn_memory_updates
+
+PHONE = "+905551234567"
+LOADED = [{"role": "user", "content": "Merhaba"}, {"role": "assistant", "content": "Hoş geldiniz"}]
+NEW = [{"role": "user", "content": "Paketim nedir?"}, {"role": "assistant", "content": "Gold paket"}]
+
+
+def _turn(dirty, **state):
+    return {
+        "conversation_history": LOADED + NEW,
+        "memory_history_len": len(LOADED),
+        "memory_history_tail": LOADED[-1],
+        "memory_dirty": dirty,
+        **state,
+    }
+
+
+def test_mark_dirty_records_changed_memory_fields_only():
+    state = {"conversation_history": LOADED, "user_context": {}, "memory_dirty": ["user_context"]}
+
+    result = _mark_dirty(state, {**state, "conversation_history": LOADED + NEW, "generation": "Gold paket"})
+
+    assert result["memory_dirty"] == ["conversation_history", "user_context"]
+
+
+def test_mark_dirty_ignores_unchanged_fields():
+    state = {"conversation_history": LOADED, "memory_dirty": []}
+
+    assert _mark_dirty(state, {"conversation_history": list(LOADED)})["memory_dirty"] == []
+
+
+def test_history_only_turn_appends_and_relinks():
+    updates = _turn_memory_updates(_turn(["conversation_history"], memory_phone_number=PHONE))
+
+    assert updates == {"new_messages": NEW, "phone_number": PHONE, "user_context": None}
+
+
+def test_changed_user_context_is_saved_under_the_phone_number():
+    context = {"phone_number": PHONE, "name": "Ahmet"}
+
+    updates = _turn_memory_updates(_turn(["user_context"], memory_phone_number=PHONE, user_context=context))
+
+    assert updates == {"phone_number": PHONE, "user_context": context}
+
+
+def test_customer_id_conversation_falls_back_to_the_context_identifier():
+    # function_calls records the customer ID it used when no phone number was given
+    context = {"phone_number": "MSTR001"}
+
+    updates = _turn_memory_updates(_turn(["conversation_history", "user_context"], user_context=context))
+
+    assert updates["phone_number"] == "MSTR001"
+    assert updates["user_context"] == context
+
+
+def test_mapped_phone_number_wins_over_the_context():
+    updates = _turn_memory_updates(
+        _turn(["user_context"], memory_phone_number=PHONE, user_context={"phone_number": "MSTR001"})
+    )
+
+    assert updates["phone_number"] == PHONE
+
+
+def test_nothing_dirty_writes_nothing():
+    updates = _turn_memory_updates(_turn([], memory_phone_number=PHONE, user_context={"name": "Ahmet"}))
+
+    assert updates == {"phone_number": None, "user_context": None}
+
+
+def test_empty_user_context_is_not_saved():
+    updates = _turn_memory_updates(_turn(["user_context"], memory_phone_number=PHONE, user_context={}))
+
+    assert updates["user_context"] is None
+
+
+def test_intact_loaded_history_appends_only_the_new_messages():
+    assert _history_updates(_turn(["conversation_history"])) == {"new_messages": NEW}
+
+
+def test_changed_loaded_message_rewrites_the_history():
+    history = [{"role": "user", "content": "Selam"}, LOADED[-1]] + NEW
+    state = _turn(["conversation_history"], conversation_history=history)
+    state["memory_history_tail"] = {"role": "assistant", "content": "Eski cevap"}
+
+    assert _history_updates(state) == {"history": history}
+
+
+def test_truncated_history_rewrites_the_history():
+    state = _turn(["conversation_history"], conversation_history=NEW[:1])
+
+    assert _history_updates(state) == {"history": NEW[:1]}
+
+
+def test_first_turn_appends_everything():
+    state = _turn(["conversation_history"], conversation_history=NEW, memory_history_len=0, memory_history_tail=None)
+
+    assert _history_updates(state) == {"new_messages": NEW}
@@ -0,0 +1,91 @@
+import json
+
+import fakeredis
+import pytest
+
+from graph.memory.l1_cache import MemoryL1Cache
+from graph.memory.redis_client import RedisMemoryManager
+
+CONVERSATION = "conv-1"
+KEY = f"telecom:conversation:{CONVERSATION}"
+
+
+def _messages(count, start=0):
+    return [{"role": "user", "content": f"mesaj {i}"} for i in range(start, start + count)]
+
+
+@pytest.fixture
+def memory(monkeypatch):
+    # No connection pools or ping: the manager talks to an in-process fake
+    manager = RedisMemoryManager.__new__(RedisMemoryManager)
+    manager.redis_client = fakeredis.FakeRedis(decode_responses=True)
+    l1 = MemoryL1Cache()
+    monkeypatch.setattr(RedisMemoryManager, "_l1", lambda self: l1)
+    return manager
+
+
+def test_append_pushes_onto_a_list(memory):
+    assert memory.append_conversation_messages(CONVERSATION, _messages(2))
+    assert memory.append_conversation_messages(CONVERSATION, _messages(1, start=2))
+
+    assert memory.redis_client.type(KEY) == "list"
+    assert memory.get_conversation_history(CONVERSATION) == _messages(3)
+    assert memory.redis_client.ttl(KEY) > 0
+
+
+def test_append_trims_to_the_most_recent_messages(memory):
+    memory.append_conversation_messages(CONVERSATION, _messages(15))
+    memory.append_conversation_messages(CONVERSATION, _messages(10, start=15))
+
+    assert memory.get_conversation_history(CONVERSATION) == _messages(20, start=5)
+
+
+def test_last_n_reads_the_tail(memory):
+    memory.append_conversation_messages(CONVERSATION, _messages(5))
+
+    assert memory.get_conversation_history(CONVERSATION, last_n=2) == _messages(2, start=3)
+
+
+def test_legacy_blob_is_migrated_on_read(memory):
+    memory.redis_client.set(KEY, json.dumps(_messages(25)))
+
+    assert memory.get_conversation_history(CONVERSATION, last_n=3) == _messages(3, start=22)
+    assert memory.redis_client.type(KEY) == "list"
+    assert memory.get_conversation_history(CONVERSATION) == _messages(20, start=5)
+
+
+def test_legacy_blob_is_migrated_before_appending(memory):
+    memory.redis_client.set(KEY, json.dumps(_messages(2)))
+
+    assert memory.append_conversation_messages(CONVERSATION, _messages(1, start=2))
+    assert memory.get_conversation_history(CONVERSATION) == _messages(3)
+
+
+def test_turn_memory_round_trip(memory):
+    context = {"name": "Ahmet"}
+
+    assert memory.save_turn_memory(CONVERSATION, new_messages=_messages(2), phone_number="+905551234567",
+                                   user_context=context)
+    history, phone_number, user_context = memory.load_turn_memory(CONVERSATION)
+
+    assert history == _messages(2)
+    assert phone_number == "+905551234567"
+    assert user_context["name"] == "Ahmet"
+
+
+def test_turn_memory_rewrite_replaces_the_history(memory):
+    memory.append_conversation_messages(CONVERSATION, _messages(4))
+
+    assert memory.save_turn_memory(CONVERSATION, history=_messages(2, start=10))
+    assert memory.get_conversation_history(CONVERSATION) == _messages(2, start=10)
+
+
+def test_turn_memory_migrates_a_legacy_blob(memory):
+    memory.redis_client.set(KEY, json.dumps(_messages(2)))
+
+    history, _, _ = memory.load_turn_memory(CONVERSATION)
+    assert history == _messages(2)
+
+    memory.redis_client.set(KEY, json.dumps(_messages(2)))
+    assert memory.save_turn_memory(CONVERSATION, new_messages=_messages(1, start=2))
+    assert memory.get_conversation_history(CONVERSATION) == _messages(3)
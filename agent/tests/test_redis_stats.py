@@ -0,0 +1,59 @@
+import fakeredis
+import pytest
+
+from graph.memory import redis_client as redis_client_module
+from graph.memory.redis_client import RedisMemoryManager
+
+NOW = 1_700_000_000
+
+
+@pytest.fixture
+def memory(monkeypatch):
+    monkeypatch.setattr(redis_client_module.time, "time", lambda: NOW)
+    manager = RedisMemoryManager.__new__(RedisMemoryManager)
+    manager.redis_client = fakeredis.FakeRedis(decode_responses=True)
+    return manager
+
+
+def test_buckets_are_a_quarter_of_the_ttl(memory):
+    assert memory._stats_bucket_seconds("conversations") == 6 * 3600
+    assert memory._stats_bucket_seconds("api_cache") == 75
+
+
+def test_buckets_never_go_below_a_minute(memory, monkeypatch):
+    monkeypatch.setitem(memory.stats_namespaces, "api_cache", redis_client_module.timedelta(seconds=90))
+
+    assert memory._stats_bucket_seconds("api_cache") == 60
+    # 90s spans two whole minutes plus the partly expired oldest bucket
+    assert len(memory._stats_keys("api_cache")) == 3
+
+
+def test_keys_cover_the_ttl_plus_one_bucket(memory):
+    keys = memory._stats_keys("api_cache")
+
+    current = NOW // 75
+    assert keys == [f"telecom:stats:api_cache:{current - offset}" for offset in range(5)]
+
+
+def test_current_bucket_comes_first(memory):
+    keys = memory._stats_keys("conversations")
+
+    assert len(keys) == 5
+    assert keys[0] == f"telecom:stats:conversations:{NOW // 21600}"
+
+
+def test_written_keys_are_counted_once(memory):
+    memory.append_conversation_messages("conv-1", [{"role": "user", "content": "a"}])
+    memory.append_conversation_messages("conv-1", [{"role": "user", "content": "b"}])
+    memory.append_conversation_messages("conv-2", [{"role": "user", "content": "c"}])
+
+    stats_key = memory._stats_keys("conversations")[0]
+    assert memory.redis_client.pfcount(*memory._stats_keys("conversations")) == 2
+    assert memory.redis_client.ttl(stats_key) > 24 * 3600
+
+
+def test_keys_written_in_older_buckets_are_still_counted(memory, monkeypatch):
+    memory.append_conversation_messages("conv-1", [{"role": "user", "content": "a"}])
+    monkeypatch.setattr(redis_client_module.time, "time", lambda: NOW + 12 * 3600)
+
+    assert memory.redis_client.pfcount(*memory._stats_keys("conversations")) == 1
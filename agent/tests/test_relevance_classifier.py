@@ -0,0 +1,98 @@
+import json
+import math
+
+import pytest
+
+from graph.chains.relevance_classifier import (
+    MODEL_FORMAT, RelevanceClassifier, RelevanceModel, features, load_model
+)
+
+
+def _logit(probability):
+    return math.log(probability / (1 - probability))
+
+
+def _model(bias=0.0, weights=None, threshold=0.8):
+    return RelevanceModel({
+        "format": MODEL_FORMAT,
+        "version": "test",
+        "ngram_range": [3, 5],
+        "bias": bias,
+        "weights": weights or {},
+        "threshold": threshold,
+    })
+
+
+@pytest.fixture
+def model():
+    # 'roaming' makes a question relevant (p = 0.9), 'futbol' irrelevant (p = 0.1)
+    return _model(weights={"w:roaming": _logit(0.9), "w:futbol": _logit(0.1)})
+
+
+def test_features_include_words_and_character_ngrams():
+    found = features("Roaming?")
+
+    assert "w:roaming" in found
+    assert " ro" in found and "ming " in found
+    assert all(len(feature) >= 3 for feature in found)
+
+
+def test_grade_without_model_defers():
+    assert RelevanceClassifier(None, log_path="").grade("Roaming ücreti nedir?") == (None, 0.0)
+
+
+def test_disabled_classifier_defers(model):
+    classifier = RelevanceClassifier(model, log_path="", enabled=False)
+
+    assert classifier.grade("roaming") == (None, 0.0)
+
+
+def test_grade_uses_the_model_threshold(model):
+    classifier = RelevanceClassifier(model, log_path="")
+
+    relevant, confidence = classifier.grade("roaming")
+
+    assert relevant is True
+    assert confidence == pytest.approx(0.9)
+
+
+def test_grade_below_min_confidence_defers(model):
+    classifier = RelevanceClassifier(model, min_confidence=0.95, log_path="")
+
+    relevant, confidence = classifier.grade("roaming")
+
+    assert relevant is None
+    assert confidence == pytest.approx(0.9)
+
+
+def test_grade_at_min_confidence_decides():
+    classifier = RelevanceClassifier(_model(bias=_logit(0.75)), min_confidence=0.75, log_path="")
+
+    relevant, _ = classifier.grade("herhangi bir soru")
+
+    assert relevant is True
+
+
+def test_irrelevant_grade_is_final_without_history(model):
+    classifier = RelevanceClassifier(model, log_path="")
+
+    relevant, confidence = classifier.grade("futbol", has_history=False)
+
+    assert relevant is False
+    assert confidence == pytest.approx(0.9)
+
+
+def test_irrelevant_grade_with_history_defers(model):
+    classifier = RelevanceClassifier(model, log_path="")
+
+    assert classifier.grade("futbol", has_history=True)[0] is None
+    # A relevant grade stands whatever the history
+    assert classifier.grade("roaming", has_history=True)[0] is True
+
+
+def test_load_model_rejects_another_format(tmp_path):
+    path = tmp_path / "model.json"
+    path.write_text(json.dumps({**_model().raw, "format": MODEL_FORMAT + 1}), encoding="utf-8")
+
+    assert load_model(str(path)) is None
+    assert load_model(str(tmp_path / "missing.json")) is None
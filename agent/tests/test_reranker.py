@@ -0,0 +1,83 @@
+import pytest
+from langchain_core.documents import Document
+
+from graph.retrieval.reranker import Reranker, terms
+
+
+def _results(*similarities):
+    return [(Document(page_content=f"belge {index}"), similarity)
+            for index, similarity in enumerate(similarities)]
+
+
+def _contents(results):
+    return [document.page_content for document, _ in results]
+
+
+@pytest.fixture
+def reranker():
+    # Similarity only, so the combined scores are the similarities
+    return Reranker(vector_weight=1.0, score_gap=0.1, min_documents=2, max_documents=4, enabled=True)
+
+
+def test_terms_are_stemmed_without_stop_words():
+    assert terms("Faturamı nasıl öderim?") == {"fatur", "öderi"}
+    assert terms("faturanız") == terms("FATURAMIN")
+
+
+def test_rerank_cuts_at_the_first_large_score_gap(reranker):
+    results = reranker.rerank("soru", _results(0.9, 0.85, 0.8, 0.6, 0.55))
+
+    assert _contents(results) == ["belge 0", "belge 1", "belge 2"]
+
+
+def test_rerank_keeps_min_documents_across_a_gap(reranker):
+    results = reranker.rerank("soru", _results(0.9, 0.5, 0.3, 0.25))
+
+    assert _contents(results) == ["belge 0", "belge 1"]
+
+
+def test_rerank_keeps_at_most_max_documents(reranker):
+    results = reranker.rerank("soru", _results(0.9, 0.89, 0.88, 0.87, 0.86, 0.85))
+
+    assert len(results) == 4
+
+
+def test_rerank_returns_few_results_unscored(reranker):
+    results = _results(0.2, 0.9)
+
+    assert reranker.rerank("soru", results) == results
+    assert all("rerank_score" not in document.metadata for document, _ in results)
+
+
+def test_disabled_rerank_only_truncates():
+    reranker = Reranker(max_documents=2, enabled=False)
+    results = _results(0.1, 0.9, 0.5)
+
+    assert reranker.rerank("soru", results) == results[:2]
+
+
+def test_rerank_keeps_retrieval_order_on_equal_scores(reranker):
+    results = reranker.rerank("soru", _results(0.7, 0.8, 0.7, 0.7))
+
+    assert _contents(results) == ["belge 1", "belge 0", "belge 2", "belge 3"]
+
+
+def test_rerank_records_the_score_and_keeps_the_similarity(reranker):
+    results = reranker.rerank("soru", _results(0.9, 0.85, 0.4))
+
+    assert [similarity for _, similarity in results] == [0.9, 0.85]
+    assert [document.metadata["rerank_score"] for document, _ in results] == [0.9, 0.85]
+
+
+def test_term_overlap_lifts_a_matching_document():
+    reranker = Reranker(vector_weight=0.5, score_gap=1.0, min_documents=1, max_documents=3, enabled=True)
+    results = [
+        (Document(page_content="Kampanya duyuruları ve yeni paketler"), 0.8),
+        (Document(page_content="Roaming ücretleri yurt dışı kullanımda uygulanır"), 0.7),
+        (Document(page_content="Fatura itirazı nasıl yapılır"), 0.75),
+    ]
+
+    reranked = reranker.rerank("Roaming ücretleri nedir?", results)
+
+    assert reranked[0][0].page_content.startswith("Roaming")
+    assert reranked[0][1] == 0.7
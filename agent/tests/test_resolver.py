@@ -0,0 +1,109 @@
+import pytest
+
+import graph.backend.resolver as resolver_module
+from graph.backend.resolver import NOT_FOUND_RECORD, UserResolver, canonical_identifier, normalize_phone_number
+
+USER = {"id": 7, "customer_id": "MSTR001", "phone_number": "+905551234567", "current_package_id": "PKG001"}
+
+
+class FakeIndex:
+    """Redis user index of redis_memory"""
+
+    def __init__(self, entries=None):
+        self.entries = dict(entries or {})
+        self.deleted = []
+
+    def get_user_index(self, identifier_key):
+        return self.entries.get(identifier_key)
+
+    def delete_user_index(self, *identifier_keys):
+        self.deleted.extend(identifier_keys)
+        for key in identifier_keys:
+            self.entries.pop(key, None)
+        return len(identifier_keys)
+
+
+class NoBackend:
+    def get(self, *args, **kwargs):
+        raise AssertionError("the backend must not be called")
+
+
+@pytest.fixture
+def index(monkeypatch):
+    index = FakeIndex()
+    monkeypatch.setattr(resolver_module, "redis_memory", index)
+    monkeypatch.setattr(resolver_module, "telecom_api", NoBackend())
+    return index
+
+
+@pytest.mark.parametrize("phone_number", [
+    "+90 555 123 45 67",
+    "+905551234567",
+    "0555 123 45 67",
+    "05551234567",
+    "00905551234567",
+    "5551234567",
+    "(0555) 123-45-67",
+])
+def test_normalize_phone_number(phone_number):
+    assert normalize_phone_number(phone_number) == "+905551234567"
+
+
+@pytest.mark.parametrize("phone_number", ["", "12345", "0212 123 45 67", "+905551234567890"])
+def test_normalize_rejects_other_numbers(phone_number):
+    assert normalize_phone_number(phone_number) is None
+
+
+@pytest.mark.parametrize("identifier, key", [
+    ("0555 123 45 67", "phone:+905551234567"),
+    (" mstr001 ", "customer:MSTR001"),
+    ("MSTR12345", "customer:MSTR12345"),
+    ("MSTR01", None),
+    ("ahmet", None),
+    ("", None),
+])
+def test_canonical_identifier(identifier, key):
+    assert canonical_identifier(identifier) == key
+
+
+def test_invalidate_drops_every_key_of_the_user(index):
+    resolver = UserResolver()
+    resolver.local_index.set("phone:+905551234567", USER)
+    resolver.local_index.set("customer:MSTR001", USER)
+
+    resolver.invalidate("0555 123 45 67")
+
+    assert index.deleted == ["phone:+905551234567", "customer:MSTR001"]
+    assert resolver.local_index.get("phone:+905551234567") is None
+    assert resolver.local_index.get("customer:MSTR001") is None
+
+
+def test_invalidate_finds_the_other_keys_in_redis(index):
+    index.entries = {"customer:MSTR001": USER, "phone:+905551234567": USER}
+    resolver = UserResolver()
+
+    resolver.invalidate("mstr001")
+
+    assert index.deleted == ["customer:MSTR001", "phone:+905551234567"]
+    assert index.entries == {}
+
+
+def test_invalidate_ignores_unrecognized_identifiers(index):
+    UserResolver().invalidate("ahmet")
+
+    assert index.deleted == []
+
+
+def test_resolve_serves_the_local_index(index):
+    resolver = UserResolver()
+    resolver.local_index.set("phone:+905551234567", USER)
+
+    assert resolver.resolve("05551234567") == USER
+
+
+def test_resolve_remembers_unknown_users(index):
+    index.entries = {"customer:MSTR999": NOT_FOUND_RECORD}
+    resolver = UserResolver()
+
+    assert resolver.resolve("MSTR999") is None
+    assert resolver.local_index.get("customer:MSTR999") is None
@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+from graph.retrieval.score_gate import ScoreGate
+
+
+@pytest.fixture
+def gate():
+    return ScoreGate(accept_similarity=0.85, reject_similarity=0.55, enabled=True)
+
+
+def test_partition_splits_at_the_thresholds(gate):
+    accepted, ambiguous, rejected = gate.partition([0.9, 0.85, 0.849, 0.55, 0.549, 0.1])
+
+    assert accepted == [0, 1]
+    assert ambiguous == [2, 3]
+    assert rejected == [4, 5]
+
+
+def test_partition_never_rejects_lexical_matches(gate):
+    accepted, ambiguous, rejected = gate.partition([0.2, 0.2, 0.9], lexical=[True, False, True])
+
+    assert accepted == [2]
+    assert ambiguous == [0]
+    assert rejected == [1]
+
+
+def test_disabled_gate_leaves_everything_to_the_llm():
+    gate = ScoreGate(enabled=False)
+
+    assert gate.partition([0.99, 0.5, 0.01]) == ([], [0, 1, 2], [])
+
+
+def test_reject_threshold_is_clamped_to_the_accept_threshold():
+    gate = ScoreGate(accept_similarity=0.6, reject_similarity=0.8, enabled=True)
+
+    assert gate.reject_similarity == 0.6
+    assert gate.partition([0.7, 0.59]) == ([0], [], [1])
+
+
+def _write_calibration(path, **calibration):
+    path.write_text(json.dumps(calibration), encoding="utf-8")
+    return str(path)
+
+
+def test_from_calibration_without_file_is_disabled(tmp_path):
+    gate = ScoreGate.from_calibration(str(tmp_path / "missing.json"), model="nomic-embed-text")
+
+    assert not gate.enabled
+
+
+def test_from_calibration_for_another_model_is_disabled(tmp_path):
+    path = _write_calibration(tmp_path / "gate.json", embedding_model="other-model",
+                              accept_similarity=0.8, reject_similarity=0.4)
+
+    assert not ScoreGate.from_calibration(path, model="nomic-embed-text").enabled
+
+
+def test_from_calibration_uses_the_calibrated_thresholds(tmp_path):
+    path = _write_calibration(tmp_path / "gate.json", embedding_model="nomic-embed-text",
+                              accept_similarity=0.8, reject_similarity=0.4)
+
+    gate = ScoreGate.from_calibration(path, model="nomic-embed-text")
+
+    assert gate.enabled
+    assert (gate.accept_similarity, gate.reject_similarity) == (0.8, 0.4)
+
+
+def test_from_calibration_with_unreadable_file_is_disabled(tmp_path):
+    path = tmp_path / "gate.json"
+    path.write_text("{not json", encoding="utf-8")
+
+    assert not ScoreGate.from_calibration(str(path), model="nomic-embed-text").enabled
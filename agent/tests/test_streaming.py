@@ -0,0 +1,86 @@
+import asyncio
+
+from langchain_core.messages import AIMessageChunk
+
+from graph.streaming import _AnswerStream, astream_answer, stream_answer
+
+
+def _token(text, node="generate", step=3):
+    return "messages", (AIMessageChunk(content=text), {"langgraph_node": node, "langgraph_step": step})
+
+
+def _values(generation):
+    return "values", {"generation": generation}
+
+
+def _events(chunks, policy="replace"):
+    stream = _AnswerStream(policy)
+    events = [event for mode, chunk in chunks for event in stream.on_chunk(mode, chunk)]
+    return events + [stream.final()]
+
+
+def _summary(events):
+    return [(event.kind, event.text) for event in events]
+
+
+class FakeApp:
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def stream(self, state, config=None, stream_mode=None):
+        yield from self.chunks
+
+    async def astream(self, state, config=None, stream_mode=None):
+        for chunk in self.chunks:
+            yield chunk
+
+
+def test_answer_tokens_are_forwarded_as_they_arrive():
+    events = _events([_token("Gold "), _token("paket"), _values("Gold paket")])
+
+    assert _summary(events) == [("token", "Gold "), ("token", "paket"), ("final", "Gold paket")]
+    assert events[-1].shown
+
+
+def test_tokens_of_other_nodes_are_dropped():
+    events = _events([_token("yes", node="grade_documents"), _token("Cevap"), _values("Cevap")])
+
+    assert _summary(events) == [("token", "Cevap"), ("final", "Cevap")]
+
+
+def test_empty_and_non_text_chunks_are_dropped():
+    events = _events([_token(""), _token(["tool call"]), _token("Cevap"), _values("Cevap")])
+
+    assert _summary(events)[:-1] == [("token", "Cevap")]
+
+
+def test_regeneration_restarts_the_stream_with_replace_policy():
+    events = _events([_token("Eski"), _token("Yeni", node="regenerate", step=6), _values("Yeni")])
+
+    assert _summary(events) == [("token", "Eski"), ("restart", ""), ("token", "Yeni"), ("final", "Yeni")]
+    assert events[-1].shown
+
+
+def test_regeneration_arrives_whole_with_final_policy():
+    events = _events([_token("Eski"), _token("Yeni", node="regenerate", step=6), _values("Yeni")], policy="final")
+
+    assert _summary(events) == [("token", "Eski"), ("final", "Yeni")]
+    assert not events[-1].shown
+
+
+def test_unstreamed_answer_is_not_marked_shown():
+    # Answer cache hits and error messages set the generation without tokens
+    events = _events([_values("Önbellekten cevap")])
+
+    assert _summary(events) == [("final", "Önbellekten cevap")]
+    assert not events[-1].shown
+    assert events[-1].state == {"generation": "Önbellekten cevap"}
+
+
+def test_stream_answer_and_astream_answer_yield_the_same_events():
+    chunks = [_token("Gold "), _token("paket"), _values("Gold paket")]
+
+    async def collect():
+        return [event async for event in astream_answer(FakeApp(chunks), {})]
+
+    assert _summary(stream_answer(FakeApp(chunks), {})) == _summary(asyncio.run(collect()))
@@ -0,0 +1,96 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from graph.backend.tool_executor import ToolExecutor
+
+READ = "get_user_package_info"
+READ_2 = "get_user_bill_info"
+READ_3 = "get_all_packages"
+WRITE = "change_user_package"
+
+
+class RecordingTool:
+    """Tool that records when it ran; read-only calls wait for each other to prove concurrency"""
+
+    def __init__(self, name, log, barrier=None, error=None):
+        self.name = name
+        self.log = log
+        self.barrier = barrier
+        self.error = error
+
+    def invoke(self, args):
+        self.log.append(("start", self.name))
+        if self.barrier:
+            self.barrier.wait(timeout=5)
+        self.log.append(("end", self.name))
+        if self.error:
+            raise self.error
+        return f"{self.name}:{args.get('n')}"
+
+    async def ainvoke(self, args):
+        self.log.append(("start", self.name))
+        await asyncio.sleep(0)
+        self.log.append(("end", self.name))
+        if self.error:
+            raise self.error
+        return f"{self.name}:{args.get('n')}"
+
+
+@pytest.mark.parametrize("names, batches", [
+    ([READ, READ_2, READ_3], [[0, 1, 2]]),
+    ([READ, WRITE, READ_2], [[0], [1], [2]]),
+    ([READ, READ_2, WRITE, WRITE, READ_3, READ], [[0, 1], [2], [3], [4, 5]]),
+    ([WRITE, READ, READ_2], [[0], [1, 2]]),
+    (["unknown_tool", READ], [[0], [1]]),
+    ([], []),
+])
+def test_batches_group_consecutive_reads(names, batches):
+    assert ToolExecutor._batches([(name, {}) for name in names]) == batches
+
+
+def test_reads_run_concurrently_and_writes_alone():
+    log = []
+    both_reads = threading.Barrier(2)
+    executor = ToolExecutor({
+        READ: RecordingTool(READ, log, barrier=both_reads),
+        READ_2: RecordingTool(READ_2, log, barrier=both_reads),
+        WRITE: RecordingTool(WRITE, log),
+        READ_3: RecordingTool(READ_3, log),
+    }, max_workers=2)
+
+    results = executor.execute([(READ, {"n": 1}), (READ_2, {"n": 2}), (WRITE, {"n": 3}), (READ_3, {"n": 4})])
+
+    # Both reads started before either ended; the write ran after both, the last read after the write
+    assert {event for event in log[:2]} == {("start", READ), ("start", READ_2)}
+    assert log[4:] == [("start", WRITE), ("end", WRITE), ("start", READ_3), ("end", READ_3)]
+    assert list(results) == [READ, READ_2, WRITE, READ_3]
+    assert results[WRITE] == f"{WRITE}:3"
+
+
+def test_async_execution_keeps_the_write_barrier():
+    log = []
+    executor = ToolExecutor({name: RecordingTool(name, log) for name in (READ, READ_2, WRITE)})
+
+    results = asyncio.run(executor.aexecute([(READ, {"n": 1}), (WRITE, {"n": 2}), (READ_2, {"n": 3})]))
+
+    assert log == [("start", READ), ("end", READ), ("start", WRITE), ("end", WRITE),
+                   ("start", READ_2), ("end", READ_2)]
+    assert results == {READ: f"{READ}:1", WRITE: f"{WRITE}:2", READ_2: f"{READ_2}:3"}
+
+
+def test_failures_become_error_results():
+    executor = ToolExecutor({READ: RecordingTool(READ, [], error=RuntimeError("boom"))})
+
+    results = executor.execute([(READ, {}), ("unknown_tool", {})])
+
+    assert json.loads(results[READ]) == {"error": "boom"}
+    assert json.loads(results["unknown_tool"]) == {"error": "Unknown tool: unknown_tool"}
+
+
+def test_later_call_of_the_same_tool_wins():
+    executor = ToolExecutor({READ: RecordingTool(READ, [])})
+
+    assert executor.execute([(READ, {"n": 1}), (READ, {"n": 2})]) == {READ: f"{READ}:2"}
@@ -0,0 +1,129 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from graph.chains.tool_selector import ToolSelector
+from graph.nodes.function_calls import TOOL_MAPPING, _proposed_tool_calls
+
+PHONE = "+905551234567"
+
+
+class FakeLLM:
+    """Answers each selection call in turn; an exception is raised instead of returned"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.prompts = []
+
+    def _next(self, prompt):
+        self.prompts.append(prompt)
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return SimpleNamespace(tool_calls=response)
+
+    def invoke(self, prompt):
+        return self._next(prompt)
+
+    async def ainvoke(self, prompt):
+        return self._next(prompt)
+
+
+def _call(name, **args):
+    return {"name": name, "args": args}
+
+
+@pytest.fixture
+def selector():
+    return ToolSelector(TOOL_MAPPING)
+
+
+def test_proposed_calls_get_the_phone_number(selector):
+    tool_calls = selector.proposed([_call("get_user_bill_info"), _call("get_all_packages")], PHONE)
+
+    assert tool_calls == [("get_user_bill_info", {"phone_number": PHONE}), ("get_all_packages", {})]
+
+
+def test_proposed_call_keeps_its_own_arguments(selector):
+    tool_calls = selector.proposed([_call("change_user_package", new_package_id="PKG002")], PHONE)
+
+    assert tool_calls == [("change_user_package", {"new_package_id": "PKG002", "phone_number": PHONE})]
+
+
+def test_no_proposal_selects_as_usual(selector):
+    assert selector.proposed([], PHONE) is None
+
+
+def test_unknown_proposed_tool_discards_the_proposal(selector):
+    assert selector.proposed([_call("get_user_bill_info"), _call("cancel_contract")], PHONE) is None
+
+
+def test_missing_required_argument_discards_the_proposal(selector):
+    assert selector.proposed([_call("change_user_package")], PHONE) is None
+    assert selector.proposed([_call("create_support_ticket", title="İnternet yavaş")], PHONE) is None
+
+
+def test_proposal_is_not_modified(selector):
+    proposed = [_call("get_user_package_info")]
+
+    selector.proposed(proposed, PHONE)
+
+    assert proposed == [_call("get_user_package_info")]
+
+
+def test_node_reads_the_proposal_from_the_state():
+    state = {"proposed_tool_calls": [_call("get_user_support_tickets")]}
+
+    assert _proposed_tool_calls(state, PHONE) == [("get_user_support_tickets", {"phone_number": PHONE})]
+    assert _proposed_tool_calls({}, PHONE) is None
+
+
+def test_selection_uses_the_first_answer_with_tools(selector):
+    selector.llm_with_tools = FakeLLM([_call("get_user_bill_info"), _call("get_all_packages")])
+
+    assert selector.select("Faturam ne kadar?", PHONE) == [
+        ("get_user_bill_info", {"phone_number": PHONE}),
+        ("get_all_packages", {}),
+    ]
+
+
+def test_no_tool_asks_again_with_the_simple_prompt(selector):
+    selector.llm_with_tools = FakeLLM([], [_call("cancel_contract"), _call("get_user_bill_info")])
+
+    assert selector.select("Faturam ne kadar?", PHONE) == [("get_user_bill_info", {"phone_number": PHONE})]
+    assert "You MUST call one of these tools" in selector.llm_with_tools.prompts[1]
+
+
+def test_failed_call_forces_a_single_tool(selector):
+    selector.llm_with_tools = FakeLLM(ValueError("tool_use_failed"), [_call("get_all_packages"), _call("get_user_bill_info")])
+
+    assert selector.select("Paketler neler?", PHONE) == [("get_all_packages", {})]
+    assert "You MUST use exactly ONE tool" in selector.llm_with_tools.prompts[1]
+
+
+def test_forced_unknown_tool_falls_back_to_package_info(selector):
+    selector.llm_with_tools = FakeLLM(ValueError("tool_use_failed"), [_call("cancel_contract")])
+
+    assert selector.select("İptal", PHONE) == [("get_user_package_info", {"phone_number": PHONE})]
+
+
+def test_no_tool_twice_falls_back_to_package_info(selector):
+    selector.llm_with_tools = FakeLLM([], [])
+
+    assert selector.select("Merhaba", PHONE) == [("get_user_package_info", {"phone_number": PHONE})]
+
+
+def test_every_call_failing_falls_back_to_package_info(selector):
+    selector.llm_with_tools = FakeLLM(ValueError("rate limit"), ValueError("rate limit"))
+
+    assert selector.select("Merhaba", PHONE) == [("get_user_package_info", {"phone_number": PHONE})]
+
+
+def test_async_selection_follows_the_same_stages(selector):
+    responses = (ValueError("tool_use_failed"), [_call("get_all_packages")])
+    selector.llm_with_tools = FakeLLM(*responses)
+    sync_calls = selector.select("Paketler neler?", PHONE)
+
+    selector.llm_with_tools = FakeLLM(*responses)
+    assert asyncio.run(selector.aselect("Paketler neler?", PHONE)) == sync_calls
@@ -0,0 +1,143 @@
+# train_relevance_classifier.py
+"""
+Train and export the local question relevance classifier
+(graph/chains/relevance_classifier.py).
+
+Labelled questions come from:
+
+- paste.txt: every FAQ question is relevant
+- data/relevance_seed.jsonl: hand-labelled greetings, personal questions
+  and off-topic questions ({"question": ..., "relevant": true/false})
+- the question grade log: grades question_grader gave to live traffic
+  (source 'llm'; the classifier's own grades are not used as labels)
+
+The confidence threshold is picked on k-fold cross-validated predictions:
+the lowest confidence at which the questions the classifier would grade
+alone agree with the labels at least at the target precision. The model
+is then refit on all questions and written to RELEVANCE_MODEL_PATH with a
+new version.
+
+Usage:
+    python train_relevance_classifier.py [--precision 0.98] [--folds 5]
+"""
+import argparse
+import json
+import os
+import random
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from dotenv import load_dotenv
+
+from graph.chains.relevance_classifier import QUESTION_GRADE_LOG_PATH, RELEVANCE_MODEL_PATH, RelevanceModel
+
+load_dotenv()
+
+# (question, relevant)
+Sample = Tuple[str, bool]
+
+THRESHOLD_CANDIDATES = [0.6, 0.7, 0.8, 0.9, 0.95, 0.98, 0.99, 0.995, 0.999]
+
+
+def load_faq_questions(path: str) -> List[Sample]:
+    """FAQ questions, all relevant"""
+    with open(path, "r", encoding="utf-8") as file:
+        data = json.load(file)
+    return [(item["soru"], True) for items in data.values() for item in items if item.get("soru")]
+
+
+def load_labelled(path: str, llm_only: bool = False) -> List[Sample]:
+    """Labelled questions from a JSON lines file; llm_only keeps only question_grader's grades"""
+    if not os.path.exists(path):
+        print(f"⚠️ {path} not found, skipping")
+        return []
+
+    samples = []
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if llm_only and entry.get("source") != "llm":
+                continue
+            samples.append((entry["question"], bool(entry["relevant"])))
+    return samples
+
+
+def deduplicate(samples: List[Sample]) -> List[Sample]:
+    """One label per question, the last one seen winning"""
+    return list({question: (question, relevant) for question, relevant in samples}.values())
+
+
+def cross_validated(samples: List[Sample], folds: int, epochs: int, min_count: int) -> List[Tuple[float, bool]]:
+    """(probability relevant, label) of every question, predicted by a model that did not see it"""
+    shuffled = samples[:]
+    random.Random(42).shuffle(shuffled)
+
+    predictions = []
+    for fold in range(folds):
+        test = shuffled[fold::folds]
+        train = [sample for index, sample in enumerate(shuffled) if index % folds != fold]
+        model = RelevanceModel.train(train, epochs=epochs, min_count=min_count)
+        predictions.extend((model.probability(question), relevant) for question, relevant in test)
+    return predictions
+
+
+def choose_threshold(predictions: List[Tuple[float, bool]], precision: float) -> Tuple[float, Dict]:
+    """Lowest candidate confidence whose local grades reach the target precision (1.01 = never grade alone)"""
+    for threshold in THRESHOLD_CANDIDATES:
+        decided = [(probability >= 0.5, relevant) for probability, relevant in predictions
+                   if max(probability, 1 - probability) >= threshold]
+        if not decided:
+            continue
+        agreement = sum(predicted == relevant for predicted, relevant in decided) / len(decided)
+        if agreement >= precision:
+            return threshold, {
+                "cv_agreement": round(agreement, 4),
+                "cv_coverage": round(len(decided) / len(predictions), 4),
+            }
+    return 1.01, {"cv_agreement": None, "cv_coverage": 0.0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the local question relevance classifier")
+    parser.add_argument("--faq", default="paste.txt", help="FAQ JSON file with soru/cevap pairs")
+    parser.add_argument("--seed", default="data/relevance_seed.jsonl", help="Hand-labelled questions")
+    parser.add_argument("--traffic", default=QUESTION_GRADE_LOG_PATH, help="Question grade log of live traffic")
+    parser.add_argument("--precision", type=float, default=0.98, help="Required agreement of local grades")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--epochs", type=int, default=30)
+    parser.add_argument("--min-count", type=int, default=2, help="Minimum questions per feature")
+    parser.add_argument("--output", default=RELEVANCE_MODEL_PATH)
+    args = parser.parse_args()
+
+    samples = deduplicate(
+        load_faq_questions(args.faq)
+        + load_labelled(args.seed)
+        + load_labelled(args.traffic, llm_only=True)
+    )
+    relevant = sum(label for _, label in samples)
+    print(f"📚 {len(samples)} questions: {relevant} relevant, {len(samples) - relevant} irrelevant")
+    if relevant == 0 or relevant == len(samples):
+        raise SystemExit("❌ Both relevant and irrelevant questions are needed")
+
+    predictions = cross_validated(samples, args.folds, args.epochs, args.min_count)
+    threshold, stats = choose_threshold(predictions, args.precision)
+
+    model = RelevanceModel.train(samples, epochs=args.epochs, min_count=args.min_count)
+    model.threshold = threshold
+    model.save(
+        args.output,
+        precision_target=args.precision,
+        trained_at=datetime.now().isoformat(),
+        features=len(model.weights),
+        **stats,
+    )
+
+    print(f"✅ Model {model.version}: threshold {threshold}, "
+          f"{stats['cv_coverage']:.0%} graded locally (agreement {stats['cv_agreement']})")
+    print(f"💾 Saved model to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
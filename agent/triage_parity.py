@@ -0,0 +1,147 @@
+# triage_parity.py
+"""
+Parity check of the combined triage chain (graph/chains/triage.py) against
+the three-call pipeline it replaces: question_grader, question_router and
+the tool calling LLM of function_calls_node.
+
+Every question of a recorded corpus (JSON lines with a "question" field,
+e.g. the question grade or fast router decision logs) goes through both,
+without the local classifier and rule fast paths, so only LLM decisions are
+compared:
+
+- relevance: on every question
+- route: on questions both call relevant
+- tools: the set of tool names, on questions both route to function_calls
+
+Logged questions have their phone numbers masked; --phone is passed to the
+tool selection instead. Disagreements are written to --output for review.
+
+Usage:
+    python triage_parity.py [--corpus question_grades.jsonl] [--limit 200]
+"""
+import argparse
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from graph.chains.question_grader import question_grader
+from graph.chains.relevance_classifier import QUESTION_GRADE_LOG_PATH
+from graph.chains.router import question_router
+from graph.chains.triage import triage_chain
+from graph.nodes.function_calls import tool_selector
+
+load_dotenv()
+
+# Compared decision -> field of the decision dicts
+DECISION_FIELDS = {"relevance": "relevant", "route": "datasource", "tools": "tools"}
+
+
+def load_corpus(path: str, limit: Optional[int] = None) -> List[str]:
+    """Distinct questions of a JSON lines file, in order"""
+    if not os.path.exists(path):
+        raise SystemExit(f"❌ Corpus {path} not found")
+
+    questions: Dict[str, None] = {}
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            if not line.strip():
+                continue
+            question = json.loads(line).get("question")
+            if question:
+                questions[question] = None
+    return list(questions)[:limit]
+
+
+def pipeline_decision(question: str, phone: str) -> Dict[str, Any]:
+    """Decisions of the three separate LLM calls"""
+    started = time.perf_counter()
+    relevant = question_grader.invoke({"question": question}).binary_score.lower() == "yes"
+    datasource = question_router.invoke({"question": question}).datasource
+    tools = []
+    if relevant and datasource == "function_calls":
+        tools = sorted({name for name, _ in tool_selector.select(question, phone)})
+    return {"relevant": relevant, "datasource": datasource, "tools": tools,
+            "seconds": round(time.perf_counter() - started, 3)}
+
+
+def triage_decision(question: str) -> Dict[str, Any]:
+    """Decisions of the single triage call"""
+    started = time.perf_counter()
+    result = triage_chain.invoke({"question": question})
+    relevant = result.binary_score.lower() == "yes"
+    tools = []
+    if relevant and result.datasource == "function_calls":
+        tools = sorted({call.name for call in result.tool_calls})
+    return {"relevant": relevant, "datasource": result.datasource, "tools": tools,
+            "seconds": round(time.perf_counter() - started, 3)}
+
+
+def _rate(matches: int, total: int) -> str:
+    return f"{matches}/{total} ({matches / total:.1%})" if total else "n/a"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the triage chain with the three-call pipeline")
+    parser.add_argument("--corpus", default=QUESTION_GRADE_LOG_PATH, help="JSON lines file with recorded questions")
+    parser.add_argument("--limit", type=int, default=None, help="Compare at most this many questions")
+    parser.add_argument("--phone", default="+905551234567", help="Phone number passed to tool selection")
+    parser.add_argument("--output", default="triage_parity.jsonl", help="Disagreements, one per line")
+    args = parser.parse_args()
+
+    questions = load_corpus(args.corpus, args.limit)
+    print(f"📚 {len(questions)} questions from {args.corpus}")
+
+    counts = {"relevance": [0, 0], "route": [0, 0], "tools": [0, 0]}
+    seconds = {"pipeline": 0.0, "triage": 0.0}
+    disagreements = []
+
+    for number, question in enumerate(questions, 1):
+        try:
+            pipeline = pipeline_decision(question, args.phone)
+            triage = triage_decision(question)
+        except Exception as e:
+            print(f"❌ Skipping '{question[:50]}': {e}")
+            continue
+
+        seconds["pipeline"] += pipeline["seconds"]
+        seconds["triage"] += triage["seconds"]
+
+        compared = ["relevance"]
+        if pipeline["relevant"] and triage["relevant"]:
+            compared.append("route")
+            if pipeline["datasource"] == triage["datasource"] == "function_calls":
+                compared.append("tools")
+
+        differing = []
+        for name in compared:
+            counts[name][1] += 1
+            if pipeline[DECISION_FIELDS[name]] == triage[DECISION_FIELDS[name]]:
+                counts[name][0] += 1
+            else:
+                differing.append(name)
+
+        if differing:
+            disagreements.append({"question": question, "differs": differing,
+                                  "pipeline": pipeline, "triage": triage})
+        if number % 10 == 0:
+            print(f"📄 {number}/{len(questions)} questions compared")
+
+    compared_questions = counts["relevance"][1]
+    print(f"✅ Relevance agreement: {_rate(*counts['relevance'])}")
+    print(f"✅ Route agreement: {_rate(*counts['route'])}")
+    print(f"✅ Tool agreement: {_rate(*counts['tools'])}")
+    if compared_questions:
+        print(f"⏱️ Mean LLM time per question: pipeline {seconds['pipeline'] / compared_questions:.2f}s, "
+              f"triage {seconds['triage'] / compared_questions:.2f}s")
+
+    with open(args.output, "w", encoding="utf-8") as file:
+        for entry in disagreements:
+            file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    print(f"💾 {len(disagreements)} disagreements written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
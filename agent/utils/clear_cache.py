@@ -4,9 +4,9 @@ from graph.memory.redis_client import redis_memory
 def clear_api_cache():
     """Clear all API cache"""
     try:
-        keys = redis_memory.redis_client.keys("telecom:api_cache:*")
-        if keys:
-            deleted = redis_memory.redis_client.delete(*keys)
+        # SCAN + UNLINK in batches, so Redis is never blocked by a KEYS call
+        deleted = redis_memory.delete_keys("telecom:api_cache:*")
+        if deleted:
             print(f"🗑️ Cleared {deleted} cached API responses")
         else:
             print("ℹ️ No cached API responses found")
@@ -17,7 +17,7 @@ def clear_user_context(phone_number: str):
     """Clear specific user context"""
     try:
         key = f"telecom:user_context:{phone_number.replace('+', '').replace(' ', '').replace('-', '')}"
-        deleted = redis_memory.redis_client.delete(key)
+        deleted = redis_memory.redis_client.unlink(key)
         print(f"🗑️ Cleared user context: {deleted} keys deleted")
     except Exception as e:
         print(f"❌ Error clearing user context: {e}")
@@ -25,4 +25,4 @@ def clear_user_context(phone_number: str):
 if __name__ == "__main__":
     clear_api_cache()
     clear_user_context("+905551234567")
-    print("✅ Cache cleared!")
\ No newline at end of file
+    print("✅ Cache cleared!")
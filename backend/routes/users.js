@@ -275,4 +275,49 @@ router.get("/phone/:phoneNumber", async (req, res) => {
   }
 });
 
+/**
+ * @swagger
+ * /users/customer/{customerId}:
+ *   get:
+ *     summary: Get user by customer ID
+ *     tags: [Users]
+ *     parameters:
+ *       - in: path
+ *         name: customerId
+ *         required: true
+ *         schema:
+ *           type: string
+ *         description: Customer ID (e.g. MSTR001)
+ *     responses:
+ *       200:
+ *         description: User found
+ *         content:
+ *           application/json:
+ *             schema:
+ *               $ref: '#/components/schemas/User'
+ *       404:
+ *         description: User not found
+ */
+router.get("/customer/:customerId", async (req, res) => {
+  try {
+    const user = await User.findOne({
+      where: { customer_id: req.params.customerId.toUpperCase() },
+      include: [
+        {
+          model: Package,
+          as: "package",
+        },
+      ],
+    });
+
+    if (!user) {
+      return res.status(404).json({ error: "User not found" });
+    }
+
+    res.json(user);
+  } catch (error) {
+    res.status(500).json({ error: error.message });
+  }
+});
+
 export default router;